@@ -483,9 +483,6 @@ def start_backend_llm():
         traceback.print_exc()
         return False
 
-# Create the Flask application instance using the application factory pattern
-app = create_app()
-
 if __name__ == '__main__':
     """
     Main application entry point and startup sequence.
@@ -527,6 +524,11 @@ if __name__ == '__main__':
         The application automatically enables test mode for easier desktop usage
         unless explicitly disabled via environment variables.
     """
+    # Create the Flask application instance using the application factory pattern.
+    # Only when run as a script: modules that import run (cleanup registration) and
+    # spawned worker processes must not build a second app.
+    app = create_app()
+    
     print("[STARTUP] Starting Vybe AI Assistant...")
     
     # Register core cleanup functions
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Connection registry benchmark for Vybe: measures connect/disconnect latency
+while the registry holds an increasing number of simulated WebSocket
+connections. Latency should stay flat from 100 to 10k live connections.
+
+Usage: python scripts/benchmark_connection_registry.py [--max 10000] [--samples 2000]
+"""
+import argparse
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Load the module on its own so the benchmark does not start the Flask app
+_MODULE_PATH = Path(__file__).resolve().parent.parent / "vybe_app" / "utils" / "connection_registry.py"
+_spec = importlib.util.spec_from_file_location("connection_registry", _MODULE_PATH)
+connection_registry = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(connection_registry)
+
+
+def measure(live: int, samples: int) -> dict:
+    """Connect/disconnect timings (microseconds) with ``live`` connections registered"""
+    registry = connection_registry.ConnectionRegistry(max_per_ip=5, max_connections=live + samples + 1,
+                                                      max_age=3600)
+    for i in range(live):
+        registry.add(f"live-{i}", ip=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}", user_id=i)
+
+    connect, disconnect = [], []
+    for i in range(samples):
+        sid = f"probe-{i}"
+        started = time.perf_counter()
+        registry.add(sid, ip=f"192.168.{i // 256 % 256}.{i % 256}", user_id=f"probe-{i}")
+        connect.append((time.perf_counter() - started) * 1e6)
+        started = time.perf_counter()
+        registry.remove(sid)
+        disconnect.append((time.perf_counter() - started) * 1e6)
+
+    def summary(values):
+        values = sorted(values)
+        return statistics.median(values), values[int(len(values) * 0.99) - 1]
+
+    return {'live': live, 'connect': summary(connect), 'disconnect': summary(disconnect)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--max', type=int, default=10000, help='Largest number of live connections')
+    parser.add_argument('--samples', type=int, default=2000, help='Connect/disconnect pairs per size')
+    args = parser.parse_args(argv)
+
+    sizes = [size for size in (100, 1000, 5000, 10000, 50000) if size <= args.max] or [args.max]
+    print(f"{'live':>8} {'connect p50':>12} {'connect p99':>12} {'disconnect p50':>15} {'disconnect p99':>15}  (us)")
+    results = []
+    for size in sizes:
+        result = measure(size, args.samples)
+        results.append(result)
+        print(f"{size:>8} {result['connect'][0]:>12.2f} {result['connect'][1]:>12.2f} "
+              f"{result['disconnect'][0]:>15.2f} {result['disconnect'][1]:>15.2f}")
+
+    growth = results[-1]['connect'][0] / max(results[0]['connect'][0], 1e-9)
+    print(f"connect p50 at {results[-1]['live']} vs {results[0]['live']} live connections: {growth:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark for Vybe: checks per second of the sharded GCRA
+limiter from several threads over many keys, against the previous design
+(one global lock, a SHA-256 of every key and a sliding-window counter per
+key, warmed with a minute of traffic), and the number of keys each retains.
+
+Usage: python scripts/benchmark_gcra_limiter.py [--threads 8] [--checks 50000] [--keys 20000]
+"""
+import argparse
+import hashlib
+import importlib.util
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+# Load the module on its own so the benchmark does not start the Flask app
+_MODULE_PATH = Path(__file__).resolve().parent.parent / "vybe_app" / "utils" / "gcra_limiter.py"
+_spec = importlib.util.spec_from_file_location("gcra_limiter", _MODULE_PATH)
+gcra_limiter = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gcra_limiter)
+
+
+class SlidingWindowCounter:
+    """Copy of the sliding-window counter the previous tracker kept per key"""
+
+    def __init__(self, window_size: int, bucket_count: int = 60):
+        self.window_size = window_size
+        self.bucket_duration = window_size / bucket_count
+        self.buckets = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add_request(self, timestamp=None) -> int:
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            cutoff_bucket = int((timestamp - self.window_size) // self.bucket_duration)
+            for key in [key for key in self.buckets.keys() if key <= cutoff_bucket]:
+                del self.buckets[key]
+            self.buckets[int(timestamp // self.bucket_duration)] += 1
+            start_bucket = int((timestamp - self.window_size) // self.bucket_duration)
+            return sum(count for bucket, count in self.buckets.items() if bucket > start_bucket)
+
+
+class LegacyLimiter:
+    """The previous in-memory tracker: global lock, SHA-256 key, a window counter per key"""
+
+    def __init__(self):
+        self.memory_trackers = {}
+        self._lock = threading.Lock()
+
+    def check(self, key, limit, period, scope='default', timestamp=None):
+        with self._lock:
+            key_hash = hashlib.sha256(f"{key}:{scope}".encode()).hexdigest()
+            if key_hash not in self.memory_trackers:
+                self.memory_trackers[key_hash] = {'tracker': SlidingWindowCounter(period),
+                                                  'created_at': time.time()}
+            current_count = self.memory_trackers[key_hash]['tracker'].add_request(timestamp)
+            return {
+                'allowed': current_count <= limit,
+                'remaining': max(0, limit - current_count),
+                'reset_time': time.time() + period,
+                'wait_time': 0 if current_count <= limit else period,
+                'limit': limit,
+                'window': period,
+                'current_count': current_count
+            }
+
+
+def client_key(i: int, keys: int) -> str:
+    i %= keys
+    return f"10.{i // 65536}.{i // 256 % 256}.{i % 256}"
+
+
+def warm(limiter, keys: int, seconds: int):
+    """Earlier traffic from every key, one request per second, as a running server would have seen.
+    GCRA state is one timestamp per key however long the history, so it is warmed with one request."""
+    now = time.time()
+    for i in range(keys):
+        if isinstance(limiter, LegacyLimiter):
+            for second in range(seconds, 0, -1):
+                limiter.check(client_key(i, keys), 100, 60, scope='api', timestamp=now - second)
+        else:
+            limiter.check(client_key(i, keys), 100, 60, scope='api')
+
+
+def run(limiter, threads: int, checks: int, keys: int) -> float:
+    """Total checks per second across ``threads`` threads"""
+    def worker(offset):
+        for i in range(checks):
+            limiter.check(client_key(i + offset, keys), 100, 60, scope='api')
+
+    workers = [threading.Thread(target=worker, args=(n * 7919,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * checks / (time.perf_counter() - started)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent checking threads')
+    parser.add_argument('--checks', type=int, default=50000, help='Checks per thread')
+    parser.add_argument('--keys', type=int, default=20000, help='Distinct client keys')
+    args = parser.parse_args(argv)
+
+    legacy = LegacyLimiter()
+    warm(legacy, args.keys, seconds=60)
+    legacy_rate = run(legacy, args.threads, args.checks, args.keys)
+    gcra = gcra_limiter.GCRALimiter(max_keys=args.keys // 2)
+    warm(gcra, args.keys, seconds=60)
+    gcra_rate = run(gcra, args.threads, args.checks, args.keys)
+
+    print(f"legacy tracker: {legacy_rate:12,.0f} checks/s  {len(legacy.memory_trackers):8,} keys held")
+    print(f"sharded GCRA:   {gcra_rate:12,.0f} checks/s  {gcra.get_stats()['keys']:8,} keys held "
+          f"(cap {args.keys // 2:,})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
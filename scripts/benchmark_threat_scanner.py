@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Threat scanner benchmark for Vybe: measures per-request threat scanning
+overhead for typical browser requests, against the original
+per-pattern, raw-plus-normalized scan. Exits non-zero when the median
+(p50) cached per-request time is above the budget (50 us by default).
+
+Usage: python scripts/benchmark_threat_scanner.py [--requests 5000] [--budget-us 50]
+"""
+import argparse
+import importlib.util
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+# Load the module on its own so the benchmark does not start the Flask app
+_MODULE_PATH = Path(__file__).resolve().parent.parent / "vybe_app" / "utils" / "threat_scanner.py"
+_spec = importlib.util.spec_from_file_location("threat_scanner", _MODULE_PATH)
+threat_scanner = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(threat_scanner)
+
+HEADERS = {
+    'Host': 'localhost:8000',
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Cookie': 'session=eyJfZnJlc2giOmZhbHNlLCJjc3JmX3Rva2VuIjoiYWJjZGVmIn0.ZmFrZQ.c2lnbmF0dXJl; theme=dark',
+    'Connection': 'keep-alive',
+    'Referer': 'http://localhost:8000/chat',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+
+def make_request(i: int) -> dict:
+    """A browser API call; the URL and query values change per request"""
+    return {
+        'url': f'http://localhost:8000/api/chat/sessions/{i}/messages?limit=50&before={i * 7}',
+        'headers': HEADERS,
+        'query_params': {'limit': '50', 'before': str(i * 7)},
+        'form_data': {},
+    }
+
+
+def legacy_scan(request_data: dict, compiled: list) -> int:
+    """The original loop: every pattern over the raw and NFKC form of every value"""
+    values = [request_data['url']]
+    for key in ('query_params', 'form_data', 'headers'):
+        values.extend(str(v) for v in request_data[key].values())
+    hits = 0
+    for value in values:
+        for check_data in [value, unicodedata.normalize('NFKC', value)]:
+            for pattern in compiled:
+                if pattern.search(check_data):
+                    hits += 1
+    return hits
+
+
+def per_request_us(fn, requests: list) -> tuple:
+    """(p50, p99) of the time each request took, in microseconds"""
+    timings = []
+    for request_data in requests:
+        started = time.perf_counter()
+        fn(request_data)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return timings[len(timings) // 2], timings[min(len(timings) - 1, len(timings) * 99 // 100)]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help='Requests per measurement')
+    parser.add_argument('--budget-us', type=float, default=50.0, help='Allowed per-request overhead')
+    args = parser.parse_args(argv)
+
+    requests = [make_request(i) for i in range(args.requests)]
+    compiled = [re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+                for _, pattern, ignore_case in threat_scanner.THREAT_PATTERNS]
+    legacy = per_request_us(lambda r: legacy_scan(r, compiled), requests)
+
+    cold = threat_scanner.ThreatScanner(cache_size=0)
+    uncached = per_request_us(cold.scan_request, requests)
+
+    scanner = threat_scanner.ThreatScanner()
+    scanner.scan_request(requests[0])
+    cached = per_request_us(scanner.scan_request, requests)
+
+    print(f"{'':24} {'p50':>8} {'p99':>8}  us/request")
+    print(f"{'legacy per-pattern scan':24} {legacy[0]:8.2f} {legacy[1]:8.2f}")
+    print(f"{'scanner, no cache':24} {uncached[0]:8.2f} {uncached[1]:8.2f}")
+    print(f"{'scanner, cached':24} {cached[0]:8.2f} {cached[1]:8.2f}  (p50 budget {args.budget_us:.0f} us)")
+    print(f"cache: {scanner.get_stats()}")
+    if cached[0] > args.budget_us:
+        print(f"FAIL: cached p50 {cached[0]:.2f} us is over the {args.budget_us:.0f} us budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Tests for the completion notifications of orchestrated agent tasks
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.core.agent_manager import AgentManager
+from vybe_app.core.dag_executor import DAGExecutor, DAGNode
+
+
+def succeed(dependency_results):
+    return 'ok'
+
+
+def fail(dependency_results):
+    raise RuntimeError("boom")
+
+
+class OrchestrationNotificationTest(unittest.TestCase):
+    """Test that the notification matches how the DAG run ended"""
+
+    def setUp(self):
+        self.executor = DAGExecutor(max_workers=4)
+        self.manager = AgentManager()
+        self.notifications = []
+        self.manager.add_notification_callback(
+            lambda title, message, kind, orchestration_id: self.notifications.append((title, kind)))
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def finish(self, *tasks):
+        run = self.executor.submit([DAGNode(f"n{i}", task) for i, task in enumerate(tasks)])
+        run.wait(5)
+        self.manager.orchestrated_tasks['orch'] = {'main_objective': 'Summarize the release notes'}
+        self.manager._finish_orchestration('orch', run)
+        return self.manager.orchestrated_tasks['orch']['status']
+
+    def test_all_completed(self):
+        """Every node completing sends a success notification"""
+        self.assertEqual(self.finish(succeed, succeed), 'completed')
+        self.assertEqual(self.notifications[-1][1], 'success')
+
+    def test_some_failed(self):
+        """A mix of completed and failed nodes is reported as a partial failure"""
+        self.assertEqual(self.finish(succeed, fail), 'partially_failed')
+        self.assertEqual(self.notifications[-1], ("⚠️ Orchestrated Task Partially Failed", 'warning'))
+
+    def test_none_completed(self):
+        """No completed node is reported as a failure, not a partial one"""
+        self.assertEqual(self.finish(fail, fail), 'failed')
+        self.assertEqual(self.notifications[-1], ("❌ Orchestrated Task Failed", 'error'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Tests for the LLM backend liveness tracker
+"""
+
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.backend_liveness import BackendLivenessTracker
+
+
+class ScriptedProbe:
+    """Probe that answers from a list and counts calls"""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        answer = self.answers.pop(0) if len(self.answers) > 1 else self.answers[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+class BackendLivenessTrackerTest(unittest.TestCase):
+    """Test in-memory readiness, passive failures and transition events"""
+
+    def make_tracker(self, probe, **options):
+        tracker = BackendLivenessTracker('http://127.0.0.1:1', probe=probe, probe_interval=60,
+                                         recovery_interval=60, **options)
+        self.addCleanup(tracker.stop)
+        return tracker
+
+    def test_readiness_is_served_from_memory(self):
+        """Only the first readiness check probes the server"""
+        probe = ScriptedProbe(True)
+        tracker = self.make_tracker(probe)
+        for _ in range(100):
+            self.assertTrue(tracker.is_ready())
+        self.assertEqual(probe.calls, 1)
+
+    def test_connection_error_marks_unready_at_once(self):
+        """A refused connection on a real request flips readiness immediately"""
+        tracker = self.make_tracker(ScriptedProbe(True))
+        self.assertTrue(tracker.is_ready())
+        tracker.report_failure(ConnectionRefusedError('refused'))
+        self.assertFalse(tracker.is_ready())
+
+    def test_soft_failures_use_threshold(self):
+        """Timeouts only mark the backend down after consecutive failures"""
+        tracker = self.make_tracker(ScriptedProbe(True), failure_threshold=3)
+        tracker.is_ready()
+        tracker.report_failure(TimeoutError('slow'))
+        tracker.report_failure(TimeoutError('slow'))
+        self.assertTrue(tracker.is_ready())
+        tracker.report_success()
+        tracker.report_failure(TimeoutError('slow'))
+        tracker.report_failure(TimeoutError('slow'))
+        self.assertTrue(tracker.is_ready())
+        tracker.report_failure(TimeoutError('slow'))
+        self.assertFalse(tracker.is_ready())
+
+    def test_error_status_is_not_success(self):
+        """A 5xx response counts as a failure instead of resetting the failure count"""
+        tracker = self.make_tracker(ScriptedProbe(True), failure_threshold=2)
+        tracker.is_ready()
+        tracker.report_response(SimpleNamespace(status_code=503))
+        tracker.report_response(SimpleNamespace(status_code=503))
+        self.assertFalse(tracker.is_ready())
+        tracker.report_response(SimpleNamespace(status_code=200))
+        self.assertTrue(tracker.is_ready())
+
+    def test_probe_backs_off_while_down(self):
+        """The interval between probes doubles while the server stays down, up to the cap"""
+        tracker = BackendLivenessTracker('http://127.0.0.1:1', probe=ScriptedProbe(False),
+                                         probe_interval=10, recovery_interval=2, max_recovery_interval=30)
+        intervals = []
+        for _ in range(6):
+            tracker.check_now()
+            intervals.append(tracker._next_interval())
+        self.assertEqual(intervals, [2, 4, 8, 16, 30, 30])
+        tracker.mark_ready()
+        self.assertEqual(tracker._next_interval(), 10)
+
+    def test_transition_events(self):
+        """Listeners receive each state change once"""
+        tracker = self.make_tracker(ScriptedProbe(ConnectionRefusedError('down'), True))
+        events = []
+        tracker.add_listener(events.append)
+        # check_now() rather than is_ready(), so no background probe races the assertions
+        self.assertFalse(tracker.check_now())
+        tracker.check_now()
+        tracker.report_success()
+        tracker.mark_unready('server stopped')
+        self.assertEqual([(e['from'], e['to']) for e in events],
+                         [('unknown', 'unready'), ('unready', 'ready'), ('ready', 'unready')])
+        self.assertEqual(tracker.get_status()['transitions'][-1]['source'], 'server stopped')
+
+
+if __name__ == '__main__':
+    unittest.main()
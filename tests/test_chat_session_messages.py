@@ -0,0 +1,88 @@
+"""
+Tests for per-message chat session storage and its compatibility shim
+"""
+
+import unittest
+import json
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from vybe_app.models import db, ChatSession, ChatSessionMessage
+
+
+class ChatSessionMessagesTest(unittest.TestCase):
+    """Test appends, keyset pages, batched iteration and legacy blobs"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'SQLALCHEMY_TRACK_MODIFICATIONS': False
+        })
+        db.init_app(self.app)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def make_session(self, count=0, **kwargs):
+        session = ChatSession(user_id=1, title='test', **kwargs)
+        db.session.add(session)
+        for i in range(count):
+            session.append_message({'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'm{i}'})
+        db.session.commit()
+        return session
+
+    def test_append_writes_one_row_and_leaves_blob_alone(self):
+        """Appending adds a row with the next seq; the JSON column stays empty"""
+        session = self.make_session(3)
+        session.append_message({'role': 'user', 'content': 'next', 'model': 'x'})
+        db.session.commit()
+        self.assertEqual(session.messages, '[]')
+        self.assertEqual(session.message_count, 4)
+        self.assertEqual(ChatSessionMessage.query.filter_by(session_id=session.id).count(), 4)
+        self.assertEqual(session.get_messages()[-1], {'role': 'user', 'content': 'next', 'model': 'x'})
+
+    def test_keyset_pages(self):
+        """The first page is the newest; before/after page from a seq"""
+        session = self.make_session(10)
+        newest = session.page_messages(limit=3)
+        self.assertEqual([m['seq'] for m in newest], [7, 8, 9])
+        self.assertEqual([m['seq'] for m in session.page_messages(limit=3, before_seq=7)], [4, 5, 6])
+        self.assertEqual([m['content'] for m in session.page_messages(limit=2, after_seq=7)], ['m8', 'm9'])
+
+    def test_iter_messages_reads_in_batches(self):
+        """Iteration returns the whole history in order across batch boundaries"""
+        session = self.make_session(7)
+        self.assertEqual([m['content'] for m in session.iter_messages(batch_size=3)], [f'm{i}' for i in range(7)])
+
+    def test_legacy_blob_is_readable_and_migrated_on_append(self):
+        """Sessions saved as a JSON blob still read, and move to rows on the first append"""
+        legacy = [{'role': 'user', 'content': 'old'}, {'role': 'assistant', 'content': [{'type': 'text'}]}]
+        session = self.make_session(messages=json.dumps(legacy), message_count=2)
+        self.assertEqual(session.get_messages(), legacy)
+        self.assertEqual([m['seq'] for m in session.page_messages(limit=1)], [1])
+        session.append_message({'role': 'user', 'content': 'new'})
+        db.session.commit()
+        self.assertEqual(session.messages, '[]')
+        self.assertEqual(session.get_messages(), legacy + [{'role': 'user', 'content': 'new'}])
+
+    def test_set_messages_replaces_history(self):
+        """The compatibility setter rewrites the rows"""
+        session = self.make_session(5)
+        session.set_messages([{'role': 'system', 'content': 'reset'}])
+        db.session.commit()
+        self.assertEqual(session.get_messages(), [{'role': 'system', 'content': 'reset'}])
+        self.assertEqual(session.to_dict()['message_count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
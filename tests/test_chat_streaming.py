@@ -0,0 +1,100 @@
+"""
+Tests for chat token streaming helpers
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.api.chat.streaming import ActiveStreams, TokenStreamEmitter
+
+
+class RecordingEmit:
+    """Collects emitted events and keeps ack callbacks for the test to fire"""
+
+    def __init__(self):
+        self.events = []
+        self.callbacks = []
+
+    def __call__(self, event, payload, callback=None):
+        self.events.append((event, payload))
+        if callback:
+            self.callbacks.append(callback)
+
+
+class TokenStreamEmitterTest(unittest.TestCase):
+    """Test token coalescing and ack-window backpressure"""
+
+    def test_first_token_is_sent_immediately(self):
+        """The first token is not held back by the flush interval"""
+        emit = RecordingEmit()
+        emitter = TokenStreamEmitter(emit, 's1', flush_interval=60)
+        emitter.push('Hello')
+        emitter.push(' world')
+        self.assertEqual([payload['token'] for _, payload in emit.events], ['Hello'])
+        emitter.flush()
+        self.assertEqual(emit.events[-1][1]['token'], ' world')
+
+    def test_tokens_are_coalesced(self):
+        """Tokens within the flush interval share one event and keep their order"""
+        emit = RecordingEmit()
+        emitter = TokenStreamEmitter(emit, 's1', flush_interval=60, max_batch_chars=10)
+        for token in ['a', 'bb', 'ccc', 'dddd', 'eeeee']:
+            emitter.push(token)
+        emitter.flush()
+        self.assertEqual(''.join(payload['token'] for _, payload in emit.events), 'abbcccddddeeeee')
+        self.assertLess(len(emit.events), 5)
+
+    def test_ack_window_bounds_unacknowledged_events(self):
+        """A client that stops acknowledging receives no more than the window"""
+        emit = RecordingEmit()
+        emitter = TokenStreamEmitter(emit, 's1', flush_interval=0, ack_window=2)
+        for i in range(10):
+            emitter.push(str(i))
+        self.assertEqual(len(emit.events), 2)
+        emit.callbacks[0]()
+        emitter.push('x')
+        self.assertEqual(len(emit.events), 3)
+        self.assertEqual(emit.events[-1][1]['token'], '23456789x')
+
+    def test_client_that_stops_acking_is_dropped(self):
+        """Tokens stop buffering once a non-acknowledging client's backlog hits the cap"""
+        emit = RecordingEmit()
+        emitter = TokenStreamEmitter(emit, 's1', flush_interval=0, max_batch_chars=4,
+                                     ack_window=1, max_buffer_chars=16)
+        for _ in range(10):
+            emitter.push('abcd')
+        self.assertTrue(emitter.dropped)
+        self.assertEqual(emitter._buffered_chars, 0)
+        emitter.flush()
+        self.assertEqual(len(emit.events), 1)
+
+
+class ActiveStreamsTest(unittest.TestCase):
+    """Test stream ownership and cancellation"""
+
+    def test_cancel_requires_owner(self):
+        """Only the client that started a stream can cancel it"""
+        streams = ActiveStreams()
+        stream = streams.register('sid-a')
+        self.assertFalse(streams.cancel(stream['stream_id'], 'sid-b'))
+        self.assertTrue(streams.cancel(stream['stream_id'], 'sid-a'))
+        self.assertTrue(stream['cancel_event'].is_set())
+
+    def test_disconnect_cancels_all_client_streams(self):
+        """Disconnecting cancels every stream of that client"""
+        streams = ActiveStreams()
+        first, second = streams.register('sid-a'), streams.register('sid-a')
+        other = streams.register('sid-b')
+        self.assertEqual(streams.cancel_client('sid-a'), 2)
+        self.assertTrue(first['cancel_event'].is_set() and second['cancel_event'].is_set())
+        self.assertFalse(other['cancel_event'].is_set())
+        streams.finish(first['stream_id'])
+        self.assertEqual(streams.count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Tests for the normalized, write-behind collaboration store
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.core.collaboration_store import CollaborationStore
+
+
+def message(i, session_id='s1', sender_id='u1', content=None):
+    return {'id': f'm{i}', 'session_id': session_id, 'sender_id': sender_id, 'sender_name': sender_id,
+            'content': content if content is not None else f'message {i}', 'message_type': 'text',
+            'timestamp': f'2026-01-01T{10 + i % 2:02d}:00:00'}
+
+
+class CollaborationStoreTest(unittest.TestCase):
+    """Test batched flushing, keyset pages, in-place edits and cascading deletes"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp, 'collaboration.sqlite3')
+        self.store = CollaborationStore(self.db_path, flush_interval=60)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def stored_rows(self, table):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_writes_are_coalesced_into_one_flush(self):
+        """Repeated session updates and new messages commit together, one row write each"""
+        for i in range(10):
+            self.store.put_session({'id': 's1', 'owner_id': 'u1', 'status': 'active', 'last_activity': str(i)})
+            self.store.put_message(message(i))
+        self.assertEqual(self.stored_rows('collaboration_messages'), 0)
+        self.assertTrue(self.store.flush())
+        stats = self.store.get_stats()
+        self.assertEqual((stats['flushes'], stats['rows_written'], stats['coalesced']), (1, 11, 9))
+        self.assertEqual(self.store.load_sessions()[0]['last_activity'], '9')
+
+    def test_background_flush_after_interval(self):
+        """Queued writes reach disk without an explicit flush"""
+        self.store.close()
+        self.store = CollaborationStore(self.db_path, flush_interval=0.05)
+        self.store.put_message(message(1))
+        deadline = time.monotonic() + 2
+        while self.stored_rows('collaboration_messages') == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self.stored_rows('collaboration_messages'), 1)
+
+    def test_keyset_pages(self):
+        """Pages run newest first by default and page back or forward from a message id"""
+        for i in range(10):
+            self.store.put_message(message(i))
+        self.store.put_message(message(99, session_id='s2'))
+        newest = self.store.get_messages('s1', limit=3)
+        self.assertEqual([m['id'] for m in newest], ['m7', 'm8', 'm9'])
+        older = self.store.get_messages('s1', limit=3, before_id='m7')
+        self.assertEqual([m['id'] for m in older], ['m4', 'm5', 'm6'])
+        self.assertEqual([m['id'] for m in self.store.get_messages('s1', limit=2, after_id='m7')], ['m8', 'm9'])
+        self.assertEqual(self.store.get_messages('s1', before_id='unknown'), [])
+
+    def test_edit_keeps_position_and_delete_session_cascades(self):
+        """An edited message keeps its place; deleting a session removes its rows"""
+        for i in range(3):
+            self.store.put_message(message(i))
+        self.store.flush()
+        self.store.put_message(message(0, content='edited'))
+        self.assertEqual([m['content'] for m in self.store.get_messages('s1')],
+                         ['edited', 'message 1', 'message 2'])
+        self.store.put_participant('s1', {'user_id': 'u1', 'role': 'owner'})
+        self.store.delete_session('s1')
+        self.store.flush()
+        self.assertEqual(self.stored_rows('collaboration_messages'), 0)
+        self.assertEqual(self.store.load_participants(), {})
+
+    def test_message_stats(self):
+        """Aggregates cover the whole history of the session"""
+        self.store.put_message(message(0, sender_id='u1', content='abcd'))
+        self.store.put_message(message(1, sender_id='u2', content='ab'))
+        self.store.put_message(message(2, sender_id='u2', content=''))
+        stats = self.store.message_stats('s1')
+        self.assertEqual(stats['total_messages'], 3)
+        self.assertEqual(stats['unique_senders'], 2)
+        self.assertEqual(stats['avg_message_length'], 2)
+        self.assertEqual(stats['by_hour'], {10: 2, 11: 1})
+        self.assertEqual(stats['by_sender'], {'u1': 1, 'u2': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
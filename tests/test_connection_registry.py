@@ -0,0 +1,88 @@
+"""
+Tests for the indexed WebSocket connection registry
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.connection_registry import ConnectionRegistry
+
+
+class FakeClock:
+    """Manually advanced time source"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionRegistryTest(unittest.TestCase):
+    """Test the per-IP/per-user indexes, expiry and eviction"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.expired = []
+
+    def make_registry(self, **options):
+        return ConnectionRegistry(clock=self.clock, on_expire=lambda sid, data, reason: self.expired.append(
+            (sid, reason)), **options)
+
+    def test_per_ip_and_per_user_limits(self):
+        """Limits are enforced from the indexes and freed on disconnect"""
+        registry = self.make_registry(max_per_ip=2, max_per_user=1)
+        self.assertTrue(registry.add('a', ip='1.1.1.1', user_id=1))
+        self.assertFalse(registry.add('b', ip='2.2.2.2', user_id=1))
+        self.assertTrue(registry.add('c', ip='1.1.1.1', user_id=2))
+        self.assertFalse(registry.add('d', ip='1.1.1.1', user_id=3))
+        registry.remove('a')
+        self.assertTrue(registry.add('d', ip='1.1.1.1', user_id=3))
+        self.assertEqual(registry.count_for_ip('1.1.1.1'), 2)
+        self.assertEqual(registry.sids_for_user(1), [])
+        self.assertEqual(sorted(registry.sids_for_ip('1.1.1.1')), ['c', 'd'])
+
+    def test_max_age_expires_on_next_connect(self):
+        """Connections past max_age are dropped before a new one is admitted"""
+        registry = self.make_registry(max_per_ip=1, max_age=60)
+        registry.add('old', ip='1.1.1.1', data={'n': 1})
+        self.clock.now += 61
+        self.assertTrue(registry.add('new', ip='1.1.1.1'))
+        self.assertNotIn('old', registry)
+        self.assertEqual(self.expired, [('old', 'expired')])
+
+    def test_touch_postpones_idle_expiry(self):
+        """An active connection survives its original idle deadline"""
+        registry = self.make_registry(idle_timeout=30)
+        registry.add('busy')
+        registry.add('idle')
+        self.clock.now += 20
+        registry.touch('busy')
+        self.clock.now += 20
+        self.assertEqual([sid for sid, _ in registry.expire()], ['idle'])
+        self.clock.now += 20
+        self.assertEqual([sid for sid, _ in registry.expire()], ['busy'])
+
+    def test_full_registry_evicts_oldest(self):
+        """Over max_connections the oldest connection makes room"""
+        registry = self.make_registry(max_connections=3)
+        for sid in 'abcd':
+            registry.add(sid)
+        self.assertEqual([sid for sid, _ in registry.items()], ['b', 'c', 'd'])
+        self.assertEqual(self.expired, [('a', 'evicted')])
+
+    def test_heap_garbage_is_compacted(self):
+        """Churned connections do not accumulate in the expiry heap"""
+        registry = self.make_registry(max_age=3600)
+        for i in range(1000):
+            registry.add(f's{i}')
+            registry.remove(f's{i}')
+        self.assertLessEqual(registry.get_stats()['heap_size'], 2 * len(registry) + 65)
+
+
+if __name__ == '__main__':
+    unittest.main()
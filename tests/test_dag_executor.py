@@ -0,0 +1,109 @@
+"""
+Tests for the event-driven DAG executor behind agent orchestration
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.core.dag_executor import DAGExecutor, DAGNode, NodeState
+
+
+def sleeper(seconds, value=None, fail=False):
+    def run(dependency_results):
+        time.sleep(seconds)
+        if fail:
+            raise RuntimeError("boom")
+        return value if value is not None else sorted(dependency_results)
+    return run
+
+
+class DAGExecutorTest(unittest.TestCase):
+    """Test parallel dispatch, result forwarding, cancellation and timing"""
+
+    def setUp(self):
+        self.executor = DAGExecutor(max_workers=8)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_ten_node_workflow_runs_in_longest_path_time(self):
+        """Independent branches overlap, so the run takes about as long as its longest path"""
+        # 4 research branches -> 2 syntheses -> outline -> draft -> edit -> publish
+        nodes = [DAGNode(f"research_{i}", sleeper(0.2)) for i in range(4)]
+        nodes += [
+            DAGNode("synth_a", sleeper(0.1), ["research_0", "research_1"]),
+            DAGNode("synth_b", sleeper(0.1), ["research_2", "research_3"]),
+            DAGNode("outline", sleeper(0.1), ["synth_a", "synth_b"]),
+            DAGNode("draft", sleeper(0.2), ["outline"]),
+            DAGNode("edit", sleeper(0.1), ["draft"]),
+            DAGNode("publish", sleeper(0.1), ["edit"]),
+        ]
+        run = self.executor.submit(nodes)
+        self.assertTrue(run.wait(5))
+        self.assertEqual(run.status, 'completed')
+        timing = run.timing_report()
+        # Longest path: research (0.2) + synth (0.1) + outline (0.1) + draft (0.2) + edit + publish = 0.8s
+        self.assertLess(timing['elapsed_seconds'], 0.8 + 0.25)
+        self.assertEqual(timing['critical_path'][-4:], ["outline", "draft", "edit", "publish"])
+        self.assertAlmostEqual(timing['critical_path_seconds'], 0.8, delta=0.15)
+
+    def test_results_are_forwarded_to_dependents(self):
+        """Each node receives its direct dependencies' results"""
+        received = {}
+
+        def writer(dependency_results):
+            received.update(dependency_results)
+            return "post"
+
+        run = self.executor.submit([
+            DAGNode("research", sleeper(0, value="findings")),
+            DAGNode("write", writer, ["research"]),
+        ])
+        run.wait(5)
+        self.assertEqual(received, {"research": "findings"})
+        self.assertEqual(run.results()["write"], "post")
+
+    def test_failure_cancels_only_downstream(self):
+        """A failed node cancels its dependents while independent branches complete"""
+        run = self.executor.submit([
+            DAGNode("bad", sleeper(0, fail=True)),
+            DAGNode("after_bad", sleeper(0), ["bad"]),
+            DAGNode("after_after", sleeper(0), ["after_bad"]),
+            DAGNode("good", sleeper(0.05)),
+        ])
+        self.assertTrue(run.wait(5))
+        states = {node_id: node.state for node_id, node in run.nodes.items()}
+        self.assertEqual(states["bad"], NodeState.FAILED)
+        self.assertEqual(states["after_bad"], NodeState.CANCELLED)
+        self.assertEqual(states["after_after"], NodeState.CANCELLED)
+        self.assertEqual(states["good"], NodeState.COMPLETED)
+        self.assertEqual(run.status, 'partially_failed')
+
+    def test_invalid_graphs_are_rejected(self):
+        """Cycles and unknown dependencies raise before anything runs"""
+        started = threading.Event()
+        with self.assertRaises(ValueError):
+            self.executor.submit([
+                DAGNode("a", lambda _: started.set(), ["b"]),
+                DAGNode("b", lambda _: started.set(), ["a"]),
+            ])
+        with self.assertRaises(ValueError):
+            self.executor.submit([DAGNode("a", lambda _: None, ["missing"])])
+        self.assertFalse(started.is_set())
+
+    def test_completion_callback(self):
+        """on_complete fires once when the last node finishes"""
+        calls = []
+        run = self.executor.submit([DAGNode("only", sleeper(0))], on_complete=calls.append)
+        run.wait(5)
+        self.assertEqual(calls, [run])
+
+
+if __name__ == '__main__':
+    unittest.main()
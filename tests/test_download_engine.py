@@ -0,0 +1,160 @@
+"""
+Tests for the resumable ranged download engine against a local HTTP server
+"""
+
+import unittest
+import sys
+import os
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.download_engine import DownloadError, RangedDownloader
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves PAYLOAD with optional Range support and injected connection drops"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.headers.get('Range'))
+            drop = server.drops > 0 and self.headers.get('Range') != 'bytes=0-0'
+            if drop:
+                server.drops -= 1
+        start, end = 0, len(PAYLOAD) - 1
+        range_header = self.headers.get('Range')
+        if server.ranges and range_header:
+            first, last = range_header.split('=', 1)[1].split('-')
+            start, end = int(first), int(last) if last else len(PAYLOAD) - 1
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('ETag', server.etag)
+        self.end_headers()
+        body = PAYLOAD[start:end + 1]
+        # A dropped connection sends part of the body, then closes early
+        self.wfile.write(body[:len(body) // 3] if drop else body)
+
+
+class RangedDownloaderTest(unittest.TestCase):
+    """Test segmented downloads, resume, retries and the no-range fallback"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.dest = os.path.join(self.temp_dir, 'model.gguf')
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.ranges = True
+        self.server.drops = 0
+        self.server.etag = '"v1"'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/model.gguf"
+        self.sha256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def downloader(self, **options):
+        options.setdefault('segments', 4)
+        options.setdefault('min_segment_size', 256 * 1024)
+        options.setdefault('chunk_size', 64 * 1024)
+        options.setdefault('backoff', 0.01)
+        return RangedDownloader(**options)
+
+    def read_dest(self):
+        with open(self.dest, 'rb') as f:
+            return f.read()
+
+    def test_parallel_segments_with_streaming_hash(self):
+        """Segments are fetched in parallel and the SHA-256 is computed while writing"""
+        progress = []
+        result = self.downloader().download(self.url, self.dest, expected_sha256=self.sha256,
+                                            progress_callback=lambda done, total: progress.append((done, total)))
+        self.assertEqual(result.segments, 4)
+        self.assertEqual(result.sha256, self.sha256)
+        self.assertEqual(self.read_dest(), PAYLOAD)
+        self.assertEqual(progress[-1], (len(PAYLOAD), len(PAYLOAD)))
+        self.assertFalse(os.path.exists(self.dest + '.part.json'))
+
+    def test_dropped_connections_are_retried(self):
+        """Segments that are cut off mid-body continue from where they stopped"""
+        self.server.drops = 3
+        result = self.downloader().download(self.url, self.dest, expected_sha256=self.sha256)
+        self.assertEqual(result.sha256, self.sha256)
+        self.assertEqual(self.read_dest(), PAYLOAD)
+
+    def test_resume_after_failed_attempt(self):
+        """A failed attempt keeps its progress and the next call downloads only the rest"""
+        self.server.drops = 100
+        with self.assertRaises(DownloadError):
+            self.downloader(max_retries=0).download(self.url, self.dest)
+        self.assertTrue(os.path.exists(self.dest + '.part.json'))
+
+        self.server.drops = 0
+        result = self.downloader().download(self.url, self.dest, expected_sha256=self.sha256)
+        self.assertGreater(result.resumed_bytes, 0)
+        self.assertEqual(self.read_dest(), PAYLOAD)
+
+    def test_changed_remote_file_restarts(self):
+        """A partial download is discarded when the server's ETag changes"""
+        self.server.drops = 100
+        with self.assertRaises(DownloadError):
+            self.downloader(max_retries=0).download(self.url, self.dest)
+        self.server.drops = 0
+        self.server.etag = '"v2"'
+        result = self.downloader().download(self.url, self.dest, expected_sha256=self.sha256)
+        self.assertEqual(result.resumed_bytes, 0)
+
+    def test_checksum_mismatch_discards_partial(self):
+        """A wrong checksum fails and leaves nothing behind to resume from"""
+        with self.assertRaises(DownloadError):
+            self.downloader().download(self.url, self.dest, expected_sha256='0' * 64)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_server_without_ranges(self):
+        """Servers that ignore Range are downloaded as a single stream"""
+        self.server.ranges = False
+        result = self.downloader().download(self.url, self.dest, expected_sha256=self.sha256)
+        self.assertEqual(result.segments, 1)
+        self.assertEqual(self.read_dest(), PAYLOAD)
+
+    def test_cancel_interrupts_retry_backoff(self):
+        """Cancelling while a single-stream retry waits out its backoff stops at once"""
+        self.server.ranges = False
+        self.server.drops = 100
+        cancel_event = threading.Event()
+        threading.Timer(0.2, cancel_event.set).start()
+        started = time.monotonic()
+        with self.assertRaisesRegex(DownloadError, 'cancelled'):
+            self.downloader(backoff=30).download(self.url, self.dest, cancel_event=cancel_event)
+        self.assertLess(time.monotonic() - started, 10)
+
+    def test_min_size_rejected_before_download(self):
+        """A file smaller than min_size is refused from its reported size, before any range is fetched"""
+        with self.assertRaises(DownloadError):
+            self.downloader().download(self.url, self.dest, min_size=len(PAYLOAD) + 1)
+        self.assertEqual(self.server.requests, ['bytes=0-0'])
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
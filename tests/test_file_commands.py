@@ -0,0 +1,78 @@
+"""
+Tests for the file ingestion CLI commands
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import types
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from vybe_app.commands.file_commands import register_file_commands
+
+
+class IngestFileCommandTest(unittest.TestCase):
+    """Run ingest-file through Flask's CLI runner with the RAG modules faked"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp)  # Commands only accept files under ./workspace
+        os.makedirs('workspace')
+        self.filepath = os.path.join('workspace', 'notes.txt')
+        with open(self.filepath, 'w', encoding='utf-8') as f:
+            f.write('Vybe keeps its notes in plain text.\n' * 20)
+
+        self.app = Flask(__name__)
+        register_file_commands(self.app)
+
+        self.ingested = []
+        self.result = types.SimpleNamespace(success=True, failed_sources={}, chunks_ingested=2,
+                                            batches_written=1)
+
+        def ingest_sources(collection_name, sources):
+            self.ingested.append((collection_name, list(sources)))
+            return self.result
+
+        vector_db = types.ModuleType('vybe_app.rag.vector_db')
+        vector_db.initialize_vector_db = lambda path, pool_size=10: True
+        ingestion = types.ModuleType('vybe_app.rag.ingestion')
+        ingestion.ingest_sources = ingest_sources
+        ingestion.text_source = lambda source_id, text: types.SimpleNamespace(source_id=source_id, text=text)
+        self.modules = mock.patch.dict(sys.modules, {'vybe_app.rag.vector_db': vector_db,
+                                                     'vybe_app.rag.ingestion': ingestion})
+        self.modules.start()
+
+    def tearDown(self):
+        self.modules.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_ingest_file_goes_through_pipeline(self):
+        """The command hands the validated file to the batched ingestion pipeline"""
+        result = self.app.test_cli_runner().invoke(args=['ingest-file', self.filepath])
+        self.assertIsNone(result.exception, result.output)
+        self.assertIn('Successfully ingested', result.output)
+        self.assertEqual(len(self.ingested), 1)
+        collection, sources = self.ingested[0]
+        self.assertEqual(collection, 'vybe_documents')
+        self.assertEqual([source.source_id for source in sources], [self.filepath])
+        self.assertIn('Vybe keeps its notes', sources[0].text)
+
+    def test_ingest_file_reports_failed_write(self):
+        """A file whose chunks were not written is reported as an error"""
+        self.result = types.SimpleNamespace(success=False, failed_sources={self.filepath: 'disk full'},
+                                            chunks_ingested=0, batches_written=0)
+        result = self.app.test_cli_runner().invoke(args=['ingest-file', self.filepath])
+        self.assertIn('disk full', result.output)
+        self.assertNotIn('Successfully ingested', result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for the persistent file fingerprint store
+"""
+
+import unittest
+import sys
+import os
+import hashlib
+import shutil
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.file_fingerprint import FingerprintStore
+
+
+class FingerprintStoreTest(unittest.TestCase):
+    """Test quick fingerprints, cached full hashes and persistence"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'fingerprints.sqlite3')
+        self.store = FingerprintStore(self.db_path, block_size=1024, read_size=4096)
+        self.model = os.path.join(self.temp_dir, 'model.gguf')
+        self.content = os.urandom(200 * 1024)
+        with open(self.model, 'wb') as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_full_hash_matches_sha256(self):
+        """The mmap-backed hash equals a plain SHA-256"""
+        self.assertEqual(self.store.full_hash(self.model), hashlib.sha256(self.content).hexdigest())
+
+    def test_unchanged_file_is_not_rehashed(self):
+        """A second request for an unchanged file is served from the store"""
+        self.store.full_hash(self.model)
+        self.store.full_hash(self.model)
+        stats = self.store.get_stats()
+        self.assertEqual((stats['full_computed'], stats['full_hits']), (1, 1))
+
+    def test_modification_invalidates(self):
+        """Changing the file changes its fingerprint and drops the cached hash"""
+        quick = self.store.quick_fingerprint(self.model)
+        self.store.full_hash(self.model)
+        with open(self.model, 'r+b') as f:
+            f.write(b'GGUF')
+        os.utime(self.model, ns=(0, os.stat(self.model).st_mtime_ns + 1_000_000))
+        self.assertIsNone(self.store.cached_full_hash(self.model))
+        self.assertNotEqual(self.store.quick_fingerprint(self.model), quick)
+
+    def test_persists_across_restarts(self):
+        """A new store over the same database knows previously computed hashes"""
+        expected = self.store.full_hash(self.model)
+        self.store.close()
+        self.store = FingerprintStore(self.db_path)
+        self.assertEqual(self.store.cached_full_hash(self.model), expected)
+
+    def test_async_hash_callback(self):
+        """Background hashing reports its result through the callback"""
+        results = []
+        future = self.store.full_hash_async(self.model, callback=lambda value, error: results.append((value, error)))
+        future.result()
+        self.assertEqual(results, [(hashlib.sha256(self.content).hexdigest(), None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
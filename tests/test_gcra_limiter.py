@@ -0,0 +1,107 @@
+"""
+Tests for the sharded GCRA rate limiter and its SQLite write-back
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.gcra_limiter import GCRALimiter, SQLiteRateLimitBackend
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class GCRALimiterTest(unittest.TestCase):
+    """Test admission, spacing, eviction and persistence"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_burst_then_steady_rate(self):
+        """A fresh key gets its burst, then one request per emission interval"""
+        limiter = GCRALimiter(clock=self.clock)
+        decisions = [limiter.check('ip', 3, 60) for _ in range(4)]
+        self.assertEqual([d.allowed for d in decisions], [True, True, True, False])
+        self.assertEqual([d.remaining for d in decisions[:3]], [2, 1, 0])
+        self.assertAlmostEqual(decisions[3].retry_after, 20)
+        self.clock.now += 19.9
+        self.assertFalse(limiter.check('ip', 3, 60).allowed)
+        self.clock.now += 0.1
+        self.assertTrue(limiter.check('ip', 3, 60).allowed)
+
+    def test_scopes_and_keys_are_independent(self):
+        """The same key under different scopes has separate budgets"""
+        limiter = GCRALimiter(clock=self.clock)
+        self.assertTrue(limiter.check('ip', 1, 60, scope='auth').allowed)
+        self.assertFalse(limiter.check('ip', 1, 60, scope='auth').allowed)
+        self.assertTrue(limiter.check('ip', 1, 60, scope='chat').allowed)
+        self.assertTrue(limiter.check('other', 1, 60, scope='auth').allowed)
+        limiter.reset('ip', scope='auth')
+        self.assertTrue(limiter.peek('ip', 1, 60, scope='auth').allowed)
+
+    def test_memory_is_bounded(self):
+        """Idle keys are dropped and the key cap evicts least recently used keys"""
+        limiter = GCRALimiter(shards=4, max_keys=100, clock=self.clock)
+        for i in range(1000):
+            limiter.check(f'k{i}', 10, 1)
+        self.assertLessEqual(limiter.get_stats()['keys'], 100)
+        self.clock.now += 2
+        self.assertEqual(limiter.evict_idle(), limiter.get_stats()['expired'])
+        self.assertEqual(limiter.get_stats()['keys'], 0)
+
+    def test_sqlite_write_back_and_restore(self):
+        """Changed TATs are written in one flush and restored by a new limiter"""
+        db_path = os.path.join(self.tmp, 'rate_limits.sqlite3')
+        limiter = GCRALimiter(backend=SQLiteRateLimitBackend(db_path), flush_interval=60, clock=self.clock)
+        for _ in range(2):
+            limiter.check('user:1', 2, 60, scope='api')
+        limiter.check('user:2', 2, 60, scope='api')
+        self.assertTrue(limiter.flush())
+        self.assertEqual(limiter.get_stats()['rows_written'], 2)
+        limiter.close()
+        with sqlite3.connect(db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM rate_limit_state").fetchone()[0], 2)
+
+        restored = GCRALimiter(backend=SQLiteRateLimitBackend(db_path), flush_interval=60, clock=self.clock)
+        try:
+            self.assertFalse(restored.check('user:1', 2, 60, scope='api').allowed)
+            self.assertTrue(restored.check('user:2', 2, 60, scope='api').allowed)
+        finally:
+            restored.close()
+
+    def test_non_string_keys_match_after_restore(self):
+        """Keys are persisted as strings, so an int key is still limited after a restart"""
+        db_path = os.path.join(self.tmp, 'rate_limits.sqlite3')
+        limiter = GCRALimiter(backend=SQLiteRateLimitBackend(db_path), flush_interval=60, clock=self.clock)
+        for _ in range(2):
+            limiter.check(42, 2, 60, scope='api')
+        limiter.close()
+
+        restored = GCRALimiter(backend=SQLiteRateLimitBackend(db_path), flush_interval=60, clock=self.clock)
+        try:
+            self.assertFalse(restored.check(42, 2, 60, scope='api').allowed)
+            self.assertFalse(restored.check('42', 2, 60, scope='api').allowed)
+        finally:
+            restored.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Tests for the heap-based priority job queue and JobManager timeouts
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.core.job_manager import Job, JobManager, JobPriority, JobStatus, PriorityJobQueue
+
+
+def make_job(priority=JobPriority.NORMAL, name=None):
+    return Job(id=name or str(uuid.uuid4()), func=lambda: None, args=(), kwargs={},
+               priority=priority, status=JobStatus.PENDING, created_at=datetime.now())
+
+
+class PriorityJobQueueTest(unittest.TestCase):
+    """Test ordering, aging, blocking waits and stats"""
+
+    def test_priority_then_fifo(self):
+        """Higher priorities come first; equal priorities keep insertion order"""
+        queue = PriorityJobQueue()
+        for name, priority in [('low', JobPriority.LOW), ('n1', JobPriority.NORMAL),
+                               ('crit', JobPriority.CRITICAL), ('n2', JobPriority.NORMAL)]:
+            queue.put(make_job(priority, name))
+        self.assertEqual([queue.get().id for _ in range(4)], ['crit', 'n1', 'n2', 'low'])
+        self.assertIsNone(queue.get())
+
+    def test_aging_prevents_starvation(self):
+        """A LOW job that waited long enough runs before newer HIGH jobs"""
+        queue = PriorityJobQueue(aging_interval=0.02)
+        queue.put(make_job(JobPriority.LOW, 'old-low'))
+        time.sleep(0.1)  # Worth more than the two levels between LOW and HIGH
+        queue.put(make_job(JobPriority.HIGH, 'new-high'))
+        self.assertEqual(queue.get().id, 'old-low')
+
+    def test_blocking_get_wakes_on_put(self):
+        """A waiting consumer is woken by put instead of polling"""
+        queue = PriorityJobQueue()
+        received = []
+        consumer = threading.Thread(target=lambda: received.append((queue.get(timeout=5), time.monotonic())))
+        consumer.start()
+        time.sleep(0.05)
+        put_at = time.monotonic()
+        queue.put(make_job(name='wake'))
+        consumer.join(2)
+        self.assertEqual(received[0][0].id, 'wake')
+        self.assertLess(received[0][1] - put_at, 0.05)
+
+    def test_close_releases_waiters(self):
+        """close() wakes blocked consumers with None"""
+        queue = PriorityJobQueue()
+        result = []
+        consumer = threading.Thread(target=lambda: result.append(queue.get(timeout=5)))
+        consumer.start()
+        time.sleep(0.05)
+        queue.close()
+        consumer.join(1)
+        self.assertEqual(result, [None])
+
+    def test_cancelled_jobs_are_skipped(self):
+        """Discarded jobs leave the depth count and are never returned"""
+        queue = PriorityJobQueue()
+        cancelled, kept = make_job(name='cancelled'), make_job(name='kept')
+        queue.put(cancelled)
+        queue.put(kept)
+        cancelled.status = JobStatus.CANCELLED
+        queue.discard(cancelled)
+        self.assertEqual(queue.get_stats()['NORMAL']['depth'], 1)
+        self.assertEqual(queue.get().id, 'kept')
+        self.assertIsNone(queue.get())
+
+
+class JobManagerTimeoutTest(unittest.TestCase):
+    """Test timeout supervision and per-priority stats on a running manager"""
+
+    def setUp(self):
+        self.manager = JobManager()
+        self.manager.start(worker_count=2)
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def wait_for(self, job_id, timeout=5):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            status = self.manager.get_job_status(job_id)['status']
+            if status in ('completed', 'failed'):
+                return status
+            time.sleep(0.01)
+        return None
+
+    def test_timeout_uses_shared_executor(self):
+        """Timed-out jobs fail without a per-job thread pool, and stats are recorded per priority"""
+        slow = self.manager.add_job(time.sleep, 1, timeout=0.1, max_retries=0, priority=JobPriority.HIGH)
+        fast = self.manager.add_job(lambda: 42, timeout=5, max_retries=0, priority=JobPriority.HIGH)
+        self.assertEqual(self.wait_for(slow), 'failed')
+        self.assertEqual(self.wait_for(fast), 'completed')
+        self.assertIsNotNone(self.manager._timeout_executor)
+        high = self.manager._get_priority_stats()['HIGH']
+        self.assertGreaterEqual(high['completed'], 1)
+        self.assertGreaterEqual(high['failed'], 1)
+        self.assertEqual(high['depth'], 0)
+
+    def test_queued_job_is_not_timed_out_while_pool_is_full(self):
+        """A job waiting behind hung timed-out jobs gets its full timeout once it starts"""
+        self.manager.max_workers = 1  # Timeout pool of two threads
+        release = threading.Event()
+        hung = [self.manager.add_job(release.wait, 10, timeout=0.1, max_retries=0) for _ in range(2)]
+        for job_id in hung:
+            self.assertEqual(self.wait_for(job_id), 'failed')
+        calls = []
+        queued = self.manager.add_job(lambda: calls.append(1) or 'done', timeout=0.2, max_retries=1)
+        time.sleep(0.5)  # Well past the queued job's timeout
+        job = self.manager.jobs[queued]
+        self.assertEqual(job.status, JobStatus.RUNNING)
+        self.assertEqual(job.retry_count, 0)
+        self.assertEqual(calls, [])
+        release.set()
+        self.assertEqual(self.wait_for(queued), 'completed')
+        self.assertEqual(job.result, 'done')
+        self.assertEqual(calls, [1])
+        self.assertEqual(job.retry_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Tests for the LLM routing-policy snapshot
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.llm_backend_manager import LLMBackendManager, RoutingPolicy
+
+
+class RoutingPolicySnapshotTest(unittest.TestCase):
+    """Test loading, partial updates and shared connection pooling"""
+
+    def setUp(self):
+        self.manager = LLMBackendManager(backend_url='http://127.0.0.1:1')
+
+    def test_defaults_without_database(self):
+        """Without an app context the defaults are used"""
+        self.assertEqual(self.manager.get_routing_policy(), RoutingPolicy())
+        self.assertEqual(self.manager._load_routing_policy(), ('prefer_local', 'local'))
+
+    def test_update_keeps_unchanged_fields(self):
+        """A settings change replaces only the fields it carries"""
+        self.manager.update_routing_policy(default_provider='openai')
+        self.manager.update_routing_policy(routing_mode='cloud_only')
+        self.assertEqual(self.manager.get_routing_policy(),
+                         RoutingPolicy(routing_mode='cloud_only', default_provider='openai'))
+
+    def test_cloud_only_skips_local_backend(self):
+        """route_chat honours the snapshot without touching the backend"""
+        self.manager.update_routing_policy(routing_mode='cloud_only')
+        self.assertEqual(self.manager.route_chat([{'role': 'user', 'content': 'hi'}])['provider'], 'none')
+
+    def test_managers_share_one_session(self):
+        """Every manager uses the same keep-alive connection pool"""
+        other = LLMBackendManager(backend_url='http://127.0.0.1:1')
+        self.assertIs(self.manager._session, other._session)
+
+
+if __name__ == '__main__':
+    unittest.main()
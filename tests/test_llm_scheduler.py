@@ -0,0 +1,96 @@
+"""
+Tests for the LLM request scheduler and its admission control
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.llm_scheduler import LLMRequestRejected, LLMRequestScheduler, RequestClass
+
+
+class LLMRequestSchedulerTest(unittest.TestCase):
+    """Test class ordering, shedding, cancellation and wait accounting"""
+
+    def run_waiters(self, scheduler, classes, order):
+        """Queue one request per class behind a held slot, in the given arrival order"""
+        threads = []
+        for name, request_class in classes:
+            def run(name=name, request_class=request_class):
+                with scheduler.slot(request_class):
+                    order.append(name)
+            thread = threading.Thread(target=run)
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.02)  # Fix the arrival order
+        return threads
+
+    def test_interactive_overtakes_queued_background_work(self):
+        """Queued requests are admitted interactive first, then agent, then background"""
+        scheduler = LLMRequestScheduler(slots=1)
+        order = []
+        scheduler.acquire(RequestClass.BACKGROUND)
+        threads = self.run_waiters(scheduler, [('bg1', RequestClass.BACKGROUND), ('agent', RequestClass.AGENT),
+                                               ('bg2', RequestClass.BACKGROUND), ('chat', RequestClass.INTERACTIVE)],
+                                   order)
+        self.assertFalse(scheduler.is_idle(RequestClass.BACKGROUND))
+        scheduler.release(RequestClass.BACKGROUND)
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(order, ['chat', 'agent', 'bg1', 'bg2'])
+        self.assertTrue(scheduler.is_idle(RequestClass.BACKGROUND))
+
+    def test_background_keeps_a_slot_free(self):
+        """With several slots, background work cannot take the last one"""
+        scheduler = LLMRequestScheduler(slots=2, background_max_wait=0.1)
+        scheduler.acquire(RequestClass.BACKGROUND)
+        with self.assertRaises(LLMRequestRejected) as rejected:
+            scheduler.acquire(RequestClass.BACKGROUND)
+        self.assertEqual(rejected.exception.reason, 'shed')
+        self.assertLess(scheduler.acquire(RequestClass.INTERACTIVE, timeout=0.1), 0.05)
+
+    def test_background_queue_limit_sheds_immediately(self):
+        """A full background queue rejects new background work without waiting"""
+        scheduler = LLMRequestScheduler(slots=1, background_queue_limit=1)
+        scheduler.acquire(RequestClass.INTERACTIVE)
+        waiter = threading.Thread(target=lambda: self.assertRaises(
+            LLMRequestRejected, scheduler.acquire, RequestClass.BACKGROUND, 0.3))
+        waiter.start()
+        time.sleep(0.05)
+        started = time.monotonic()
+        with self.assertRaises(LLMRequestRejected):
+            scheduler.acquire(RequestClass.BACKGROUND)
+        self.assertLess(time.monotonic() - started, 0.05)
+        waiter.join(2)
+        self.assertEqual(scheduler.get_stats()['classes']['background']['shed'], 2)
+
+    def test_cancel_while_queued(self):
+        """Setting the cancel event releases a queued request"""
+        scheduler = LLMRequestScheduler(slots=1)
+        scheduler.acquire(RequestClass.INTERACTIVE)
+        cancel = threading.Event()
+        threading.Timer(0.05, cancel.set).start()
+        with self.assertRaises(LLMRequestRejected) as rejected:
+            scheduler.acquire(RequestClass.INTERACTIVE, cancel_event=cancel)
+        self.assertEqual(rejected.exception.reason, 'cancelled')
+        self.assertEqual(scheduler.get_stats()['classes']['interactive']['queued'], 0)
+
+    def test_queue_time_is_recorded(self):
+        """acquire() returns the wait and per-class stats accumulate it"""
+        scheduler = LLMRequestScheduler(slots=1)
+        scheduler.acquire(RequestClass.INTERACTIVE)
+        threading.Timer(0.1, scheduler.release, args=(RequestClass.INTERACTIVE,)).start()
+        waited = scheduler.acquire(RequestClass.AGENT)
+        self.assertGreaterEqual(waited, 0.09)
+        agent = scheduler.get_stats()['classes']['agent']
+        self.assertEqual(agent['admitted'], 1)
+        self.assertGreaterEqual(agent['max_wait_ms'], 90)
+
+
+if __name__ == '__main__':
+    unittest.main()
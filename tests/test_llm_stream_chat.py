@@ -0,0 +1,134 @@
+"""
+Tests for LLMBackendManager.stream_chat over a fake SSE response
+"""
+
+import unittest
+import sys
+import os
+import json
+import threading
+from unittest import mock
+
+import requests
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.llm_backend_manager import LLMBackendManager
+
+
+def sse(token):
+    return 'data: ' + json.dumps({'choices': [{'delta': {'content': token}}]})
+
+
+class FakeStreamResponse:
+    """Streaming response that replays SSE lines, optionally failing part way"""
+
+    def __init__(self, lines, status_code=200, error=None, on_line=None):
+        self.lines = lines
+        self.status_code = status_code
+        self.error = error
+        self.on_line = on_line
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        for i, line in enumerate(self.lines):
+            yield line
+            if self.on_line:
+                self.on_line(i)
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+class StreamChatTest(unittest.TestCase):
+    """Test completion, [DONE], cancellation and failures of a local stream"""
+
+    MESSAGES = [{'role': 'user', 'content': 'hi'}]
+
+    def setUp(self):
+        self.manager = LLMBackendManager(backend_url='http://127.0.0.1:1')
+        self.patches = [mock.patch.object(LLMBackendManager, 'is_backend_running', return_value=True)]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+
+    def stream(self, response, cancel_event=None):
+        self.manager._session = mock.Mock(post=mock.Mock(return_value=response))
+        events = list(self.manager.stream_chat(self.MESSAGES, cancel_event=cancel_event))
+        self.assertTrue(response.closed)
+        return [e['content'] for e in events if e['type'] == 'token'], events[-1]
+
+    def test_normal_completion(self):
+        """Every token is yielded and the final event carries the whole reply"""
+        tokens, done = self.stream(FakeStreamResponse(['', sse('Hel'), ': keep-alive', sse('lo'),
+                                                       'data: [DONE]']))
+        self.assertEqual(tokens, ['Hel', 'lo'])
+        self.assertEqual((done['type'], done['content'], done['tokens']), ('done', 'Hello', 2))
+        self.assertFalse(done['cancelled'] or done['truncated'])
+        self.assertIsNone(done['error'])
+        self.assertEqual(self.manager.get_stream_stats()['completed'], 1)
+
+    def test_done_marker_ends_stream(self):
+        """Lines after [DONE] are ignored"""
+        tokens, done = self.stream(FakeStreamResponse([sse('a'), 'data: [DONE]', sse('ignored')]))
+        self.assertEqual(tokens, ['a'])
+        self.assertEqual(done['content'], 'a')
+        self.assertFalse(done['truncated'])
+
+    def test_close_without_done_marker_is_truncated(self):
+        """An upstream that closes before [DONE] ends with a truncated done event"""
+        tokens, done = self.stream(FakeStreamResponse([sse('par'), sse('tial')]))
+        self.assertEqual(tokens, ['par', 'tial'])
+        self.assertEqual((done['type'], done['content']), ('done', 'partial'))
+        self.assertTrue(done['truncated'])
+        self.assertTrue(done['error'])
+        self.assertEqual(self.manager.get_stream_stats()['failed'], 1)
+
+    def test_cancel_event_stops_stream(self):
+        """Setting the cancel event ends the stream with cancelled=True"""
+        cancel_event = threading.Event()
+        response = FakeStreamResponse([sse('a'), sse('b'), sse('c')],
+                                      on_line=lambda i: i == 0 and cancel_event.set())
+        tokens, done = self.stream(response, cancel_event=cancel_event)
+        self.assertEqual(tokens, ['a'])
+        self.assertTrue(done['cancelled'])
+        self.assertEqual(self.manager.get_stream_stats()['cancelled'], 1)
+
+    def test_cancel_that_ends_iteration_quietly(self):
+        """A stream that just stops after the cancel event is set still counts as cancelled"""
+        cancel_event = threading.Event()
+        response = FakeStreamResponse([sse('a'), sse('b')], on_line=lambda i: i == 1 and cancel_event.set())
+        tokens, done = self.stream(response, cancel_event=cancel_event)
+        self.assertEqual(tokens, ['a', 'b'])
+        self.assertTrue(done['cancelled'])
+        stats = self.manager.get_stream_stats()
+        self.assertEqual((stats['cancelled'], stats['completed']), (1, 0))
+
+    def test_mid_stream_failure_is_reported(self):
+        """A connection lost after some tokens ends with a truncated done event and counts as failed"""
+        response = FakeStreamResponse([sse('par'), sse('tial')],
+                                      error=requests.exceptions.ChunkedEncodingError('connection broken'))
+        tokens, done = self.stream(response)
+        self.assertEqual(tokens, ['par', 'tial'])
+        self.assertEqual((done['type'], done['content']), ('done', 'partial'))
+        self.assertTrue(done['truncated'])
+        self.assertTrue(done['error'])
+        stats = self.manager.get_stream_stats()
+        self.assertEqual((stats['failed'], stats['completed']), (1, 0))
+
+    def test_failure_before_first_token(self):
+        """A backend error with no output yields a single error event"""
+        tokens, event = self.stream(FakeStreamResponse([], status_code=500))
+        self.assertEqual(tokens, [])
+        self.assertEqual(event['type'], 'error')
+        self.assertEqual(self.manager.get_stream_stats()['failed'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
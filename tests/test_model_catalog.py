@@ -0,0 +1,127 @@
+"""
+Tests for the GGUF header reader and the local model catalog
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import struct
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.gguf_metadata import GGUFError, read_gguf_metadata
+from vybe_app.core.model_catalog import ModelCatalog
+
+UINT32, STRING, ARRAY = 4, 8, 9
+
+
+def write_gguf(path, context_length, file_type=15, tensors=((4096, 32000), (4096,))):
+    """Write a header-only GGUF v3 file"""
+    def text(value):
+        data = value.encode()
+        return struct.pack('<Q', len(data)) + data
+
+    metadata = [
+        ('general.architecture', STRING, text('llama')),
+        ('general.name', STRING, text('Test Model')),
+        ('llama.context_length', UINT32, struct.pack('<I', context_length)),
+        ('general.file_type', UINT32, struct.pack('<I', file_type)),
+        ('tokenizer.ggml.tokens', ARRAY,
+         struct.pack('<IQ', STRING, 3) + text('<s>') + text('</s>') + text('hello')),
+    ]
+    parts = [b'GGUF', struct.pack('<IQQ', 3, len(tensors), len(metadata))]
+    for key, value_type, value in metadata:
+        parts += [text(key), struct.pack('<I', value_type), value]
+    for i, dims in enumerate(tensors):
+        parts += [text(f'blk.{i}.weight'), struct.pack('<I', len(dims))]
+        parts += [struct.pack('<Q', dim) for dim in dims]
+        parts.append(struct.pack('<IQ', 0, 0))
+    with open(path, 'wb') as f:
+        f.write(b''.join(parts))
+
+
+class GGUFMetadataTest(unittest.TestCase):
+    """Test header parsing"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_reads_header_facts(self):
+        """Architecture, context, quantization and parameter count come from the header"""
+        path = os.path.join(self.temp_dir, 'model.gguf')
+        write_gguf(path, 32768)
+        header = read_gguf_metadata(path)
+        self.assertEqual(header.architecture, 'llama')
+        self.assertEqual(header.context_length, 32768)
+        self.assertEqual(header.quantization, 'Q4_K_M')
+        self.assertEqual(header.tensor_count, 2)
+        self.assertEqual(header.parameter_count, 4096 * 32000 + 4096)
+        self.assertEqual(header.metadata['tokenizer.ggml.tokens.length'], 3)
+
+    def test_rejects_non_gguf(self):
+        """Files without the GGUF magic raise GGUFError"""
+        path = os.path.join(self.temp_dir, 'fake.gguf')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 64)
+        with self.assertRaises(GGUFError):
+            read_gguf_metadata(path)
+
+
+class ModelCatalogTest(unittest.TestCase):
+    """Test persistence, incremental refresh and min-context selection"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.models_dir = os.path.join(self.temp_dir, 'models')
+        os.makedirs(self.models_dir)
+        self.db_path = os.path.join(self.temp_dir, 'catalog.sqlite3')
+        write_gguf(os.path.join(self.models_dir, 'small-8k.gguf'), 8192)
+        write_gguf(os.path.join(self.models_dir, 'long-32k.gguf'), 32768, tensors=((4096, 32000),) * 4)
+        write_gguf(os.path.join(self.models_dir, 'tiny-32k.gguf'), 32768)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_select_model_enforces_min_context(self):
+        """The smallest model meeting the minimum context is chosen"""
+        catalog = ModelCatalog(self.db_path, [self.models_dir], check_interval=0)
+        self.assertEqual(catalog.select_model(min_context=32768).name, 'tiny-32k')
+        self.assertFalse(catalog.meets_min_context('small-8k', 32768))
+        self.assertIsNone(catalog.select_model(min_context=65536))
+
+    def test_select_model_ignores_surplus_context(self):
+        """A small model with a longer context beats a much larger model at exactly the minimum"""
+        write_gguf(os.path.join(self.models_dir, 'small-128k.gguf'), 131072, tensors=((4096, 32000),))
+        write_gguf(os.path.join(self.models_dir, 'large-32k.gguf'), 32768, tensors=((4096, 32000),) * 40)
+        os.remove(os.path.join(self.models_dir, 'long-32k.gguf'))
+        os.remove(os.path.join(self.models_dir, 'tiny-32k.gguf'))
+        catalog = ModelCatalog(self.db_path, [self.models_dir], check_interval=0)
+        self.assertEqual(catalog.select_model(min_context=32768).name, 'small-128k')
+        self.assertEqual(catalog.select_model(min_context=32768, prefer_smallest=False).name, 'small-128k')
+
+    def test_restart_does_not_reparse(self):
+        """Unchanged files are served from the persisted catalog after a restart"""
+        ModelCatalog(self.db_path, [self.models_dir], check_interval=0).list_models()
+        catalog = ModelCatalog(self.db_path, [self.models_dir], check_interval=0)
+        self.assertEqual(len(catalog.list_models()), 3)
+        self.assertEqual(catalog.get_stats()['parsed'], 0)
+
+    def test_directory_changes_are_picked_up(self):
+        """Added and removed files show up on the next check"""
+        catalog = ModelCatalog(self.db_path, [self.models_dir], check_interval=0)
+        catalog.list_models()
+        os.remove(os.path.join(self.models_dir, 'small-8k.gguf'))
+        write_gguf(os.path.join(self.models_dir, 'new-64k.gguf'), 65536)
+        catalog.refresh(force=True)
+        self.assertEqual([e.name for e in catalog.list_models()], ['long-32k', 'new-64k', 'tiny-32k'])
+        self.assertEqual(catalog.context_length('new-64k.gguf'), 65536)
+
+
+if __name__ == '__main__':
+    unittest.main()
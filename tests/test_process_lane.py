@@ -0,0 +1,108 @@
+"""
+Tests for the process lane used by CPU-bound background jobs
+"""
+
+import unittest
+import sys
+import os
+import time
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.core.job_manager import JobLane, JobManager
+from vybe_app.core.process_lane import ProcessLane
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def reverse_bytes(data):
+    return data[::-1]
+
+
+def fail():
+    raise ValueError("bad input")
+
+
+def sleep_then_return(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@unittest.skipUnless(ProcessLane().available, "spawn is not available on this platform")
+class ProcessLaneTest(unittest.TestCase):
+    """Test execution in warm workers, payload spilling, errors and timeouts"""
+
+    def setUp(self):
+        self.lane = ProcessLane(workers=2, spill_threshold=64 * 1024)
+        self.lane.start()
+
+    def tearDown(self):
+        self.lane.shutdown()
+
+    def test_runs_in_another_process(self):
+        """Work runs in a worker process, and the workers are reused"""
+        pids = {self.lane.run(worker_pid) for _ in range(10)}
+        self.assertNotIn(os.getpid(), pids)
+        self.assertLessEqual(len(pids), 2)
+
+    def test_large_payloads_spill_both_ways(self):
+        """Arguments and results above the threshold travel through files"""
+        payload = os.urandom(512 * 1024)
+        self.assertEqual(self.lane.run(reverse_bytes, (payload,)), payload[::-1])
+        stats = self.lane.get_stats()
+        self.assertEqual((stats['spilled_args'], stats['spilled_results']), (1, 1))
+        self.assertEqual(os.listdir(self.lane.spill_dir), [])
+
+    def test_errors_propagate(self):
+        """Exceptions raised in the worker reach the caller"""
+        with self.assertRaises(ValueError):
+            self.lane.run(fail)
+
+    def test_timeout(self):
+        """A call that overruns its timeout raises TimeoutError"""
+        with self.assertRaises(TimeoutError):
+            self.lane.run(sleep_then_return, (2,), timeout=0.2)
+        self.assertEqual(self.lane.get_stats()['timed_out'], 1)
+
+    def test_timeout_recycles_workers(self):
+        """The worker stuck in a timed-out call is terminated before the caller can retry"""
+        old_pids = {self.lane.run(worker_pid) for _ in range(4)}
+        with self.assertRaises(TimeoutError):
+            self.lane.run(sleep_then_return, (30,), timeout=0.2)
+        self.assertEqual(self.lane.get_stats()['recycles'], 1)
+        self.assertEqual(self.lane.run(sleep_then_return, (0,), timeout=10), 0)
+        self.assertTrue(old_pids.isdisjoint({self.lane.run(worker_pid) for _ in range(4)}))
+
+
+@unittest.skipUnless(ProcessLane().available, "spawn is not available on this platform")
+class JobManagerProcessLaneTest(unittest.TestCase):
+    """Test process-lane jobs through JobManager"""
+
+    def setUp(self):
+        self.manager = JobManager()
+        self.manager.start(worker_count=2)
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def test_process_job_result(self):
+        """A process-lane job completes with the worker's result"""
+        job_id = self.manager.add_job(worker_pid, lane=JobLane.PROCESS, max_retries=0)
+        deadline = time.time() + 10
+        while self.manager.get_job_status(job_id)['status'] != 'completed' and time.time() < deadline:
+            time.sleep(0.01)
+        status = self.manager.get_job_status(job_id)
+        self.assertEqual(status['lane'], 'process')
+        self.assertNotEqual(status['result'], os.getpid())
+
+    def test_unpicklable_function_rejected(self):
+        """Lambdas cannot go to the process lane"""
+        with self.assertRaises(ValueError):
+            self.manager.add_job(lambda: None, lane=JobLane.PROCESS)
+
+
+if __name__ == '__main__':
+    unittest.main()
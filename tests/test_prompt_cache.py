@@ -0,0 +1,74 @@
+"""
+Tests for prompt prefix cache settings, metrics and stable message layout
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.context_packer import pack_messages
+from vybe_app.utils.prompt_cache import PromptCacheMetrics, server_cached_tokens
+
+SYSTEM = {'role': 'system', 'content': 'You are a helpful assistant. ' * 40}
+ORCHESTRATOR = {'role': 'system', 'content': 'You are the orchestrator. ' * 40}
+
+
+class PromptCacheMetricsTest(unittest.TestCase):
+    """Test cached vs. evaluated token accounting"""
+
+    def test_shared_system_prompt_counts_as_cached(self):
+        """A second turn with the same system prompt reports most of its prompt as cached"""
+        metrics = PromptCacheMetrics('ram')
+        first = metrics.record([SYSTEM, {'role': 'user', 'content': 'hello'}], prompt_tokens=300)
+        second = metrics.record([SYSTEM, {'role': 'user', 'content': 'what time is it?'}], prompt_tokens=305)
+        self.assertEqual(first['cached_prompt_tokens'], 0)
+        self.assertGreater(second['cached_prompt_tokens'], 250)
+        self.assertEqual(second['evaluated_prompt_tokens'], 305 - second['cached_prompt_tokens'])
+        self.assertEqual(metrics.get_stats()['requests'], 2)
+
+    def test_without_cache_only_previous_prompt_matches(self):
+        """With the cache off, alternating system prompts are re-evaluated every time"""
+        last = {}
+        for mode in ('off', 'ram'):
+            metrics = PromptCacheMetrics(mode)
+            for system in (SYSTEM, ORCHESTRATOR, SYSTEM):
+                last[mode] = metrics.record([system, {'role': 'user', 'content': 'q'}], prompt_tokens=300)
+        self.assertLess(last['off']['cached_prompt_tokens'], 10)
+        self.assertGreater(last['ram']['cached_prompt_tokens'], 250)
+
+    def test_server_reported_counts_win(self):
+        """Cached tokens reported by the server replace the estimate"""
+        response = {'usage': {'prompt_tokens': 120, 'prompt_tokens_details': {'cached_tokens': 100}}}
+        self.assertEqual(server_cached_tokens(response), 100)
+        self.assertEqual(server_cached_tokens({'timings': {'cache_n': 7}}), 7)
+        entry = PromptCacheMetrics('ram').record([SYSTEM], prompt_tokens=120, response=response)
+        self.assertEqual((entry['cached_prompt_tokens'], entry['source']), (100, 'server'))
+
+
+class StableLayoutTest(unittest.TestCase):
+    """Test that packing keeps the static system prompt as the prompt prefix"""
+
+    def test_later_system_content_follows_the_static_prompt(self):
+        """A conversation summary is appended after the system prompt instead of replacing it"""
+        packed = pack_messages([
+            SYSTEM,
+            {'role': 'user', 'content': 'earlier'},
+            {'role': 'system', 'content': '[Previous conversation summary: greetings]'},
+            {'role': 'user', 'content': 'now'},
+        ])
+        self.assertEqual(packed[0]['role'], 'system')
+        self.assertTrue(packed[0]['content'].startswith(SYSTEM['content']))
+        self.assertTrue(packed[0]['content'].endswith('greetings]'))
+        self.assertEqual([m['role'] for m in packed[1:]], ['user', 'user'])
+
+    def test_single_system_prompt_is_unchanged(self):
+        """The common chat layout passes the system prompt through byte for byte"""
+        packed = pack_messages([SYSTEM, {'role': 'user', 'content': 'hi'}])
+        self.assertEqual(packed, [SYSTEM, {'role': 'user', 'content': 'hi'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
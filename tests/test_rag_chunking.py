@@ -0,0 +1,83 @@
+"""
+Tests for the token-aware streaming RAG chunker
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.chunking import StreamingChunker, chunk_document, iter_chunks, rebuild_from_chunks
+from vybe_app.utils.token_counter import ApproximateTokenizer
+
+
+SAMPLE_DOCUMENT = (
+    "# Introduction\n"
+    "Vybe is a local assistant. It runs models on your own hardware! "
+    "Documents are split into chunks before they are embedded.\n\n"
+    "## Chunking\n"
+    "Chunks follow sentence boundaries. They never cut a word in half. "
+    "Each chunk records the byte range it came from, including ünïcödé text.\n\n"
+    "A final paragraph without a heading closes the document."
+)
+
+
+class ChunkingTest(unittest.TestCase):
+    """Test sentence-boundary chunking, token budgets and byte offsets"""
+
+    def test_chunks_are_exact_slices_of_the_source(self):
+        """Every chunk's byte offsets point at exactly its text"""
+        data = SAMPLE_DOCUMENT.encode('utf-8')
+        for chunk in chunk_document(SAMPLE_DOCUMENT, max_tokens=20, overlap_tokens=6):
+            self.assertEqual(data[chunk.start_byte:chunk.end_byte].decode('utf-8'), chunk.text)
+
+    def test_token_budget_respected(self):
+        """No chunk exceeds the configured token budget"""
+        tokenizer = ApproximateTokenizer()
+        for chunk in chunk_document(SAMPLE_DOCUMENT, max_tokens=16, overlap_tokens=4):
+            self.assertLessEqual(chunk.token_count, 16)
+            self.assertEqual(tokenizer.count(chunk.text), chunk.token_count)
+
+    def test_sentences_are_not_split(self):
+        """With a generous budget, chunks end on sentence or paragraph boundaries"""
+        for chunk in chunk_document(SAMPLE_DOCUMENT, max_tokens=30, overlap_tokens=0)[:-1]:
+            self.assertRegex(chunk.text.rstrip(), r'[.!?]$')
+
+    def test_headings_start_new_chunks(self):
+        """Markdown headings open a chunk and label the chunks beneath them"""
+        chunks = chunk_document(SAMPLE_DOCUMENT, max_tokens=200, overlap_tokens=0)
+        self.assertTrue(chunks[1].text.startswith('## Chunking'))
+        self.assertEqual(chunks[0].heading, 'Introduction')
+        self.assertEqual(chunks[1].heading, 'Chunking')
+
+    def test_streaming_matches_whole_document(self):
+        """Feeding the text in small pieces produces the same chunks"""
+        pieces = [SAMPLE_DOCUMENT[i:i + 7] for i in range(0, len(SAMPLE_DOCUMENT), 7)]
+        streamed = [(c.start_byte, c.end_byte) for c in iter_chunks(pieces, max_tokens=20, overlap_tokens=6)]
+        whole = [(c.start_byte, c.end_byte) for c in chunk_document(SAMPLE_DOCUMENT, max_tokens=20, overlap_tokens=6)]
+        self.assertEqual(streamed, whole)
+
+    def test_rebuild_skips_overlap(self):
+        """Rebuilding from offsets reproduces the document without duplication"""
+        chunks = chunk_document(SAMPLE_DOCUMENT, max_tokens=40, overlap_tokens=12)
+        self.assertTrue(any(a.end_byte > b.start_byte for a, b in zip(chunks, chunks[1:])))
+        rebuilt = rebuild_from_chunks([(c.start_byte, c.end_byte, c.text) for c in chunks])
+        self.assertEqual(rebuilt, SAMPLE_DOCUMENT)
+
+    def test_text_without_boundaries_is_split(self):
+        """Minified text is cut on the token budget instead of buffered whole"""
+        minified = 'var a=1;' * 2000  # No whitespace, no sentence ends
+        chunker = StreamingChunker(max_tokens=32, overlap_tokens=0)
+        chunks = []
+        for i in range(0, len(minified), 100):
+            chunks.extend(chunker.feed(minified[i:i + 100]))
+            self.assertLess(len(chunker._text), 32 * 16 * 2 + 100)
+        chunks.extend(chunker.finish())
+        self.assertTrue(all(chunk.token_count <= 32 for chunk in chunks))
+        self.assertEqual(''.join(chunk.text for chunk in chunks), minified)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Tests for the RAG sidecar document index
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.document_index import DocumentIndex, split_chunk_id
+
+
+class FakeCollection:
+    """Minimal stand-in for a ChromaDB collection supporting paged get()"""
+
+    def __init__(self, rows):
+        self.rows = rows  # list of (chunk_id, metadata)
+
+    def get(self, include=None, limit=None, offset=0):
+        page = self.rows[offset:offset + limit]
+        return {'ids': [row[0] for row in page], 'metadatas': [row[1] for row in page]}
+
+
+class DocumentIndexTest(unittest.TestCase):
+    """Test document bookkeeping, pagination and backfill"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = DocumentIndex(os.path.join(self.temp_dir, 'index.sqlite3'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_record_and_lookup(self):
+        """Recorded documents expose their chunk ids in order"""
+        self.index.record_document('kb', 'doc', ['doc_0', 'doc_1', 'doc_2'], source='doc.md', byte_size=900)
+        self.assertEqual(self.index.get_chunk_ids('kb', 'doc'), ['doc_0', 'doc_1', 'doc_2'])
+        document = self.index.get_document('kb', 'doc')
+        self.assertEqual(document['chunk_count'], 3)
+        self.assertEqual(document['byte_size'], 900)
+
+    def test_rerecord_replaces_chunks(self):
+        """Updating a document replaces its chunk list"""
+        self.index.record_document('kb', 'doc', ['doc_0', 'doc_1', 'doc_2'])
+        self.index.record_document('kb', 'doc', ['doc_0'])
+        self.assertEqual(self.index.get_chunk_ids('kb', 'doc'), ['doc_0'])
+
+    def test_pagination(self):
+        """Documents are listed one page at a time"""
+        for i in range(5):
+            self.index.record_document('kb', f'doc{i}', [f'doc{i}_0'])
+        page = self.index.list_documents('kb', offset=2, limit=2)
+        self.assertEqual([doc['doc_id'] for doc in page], ['doc2', 'doc3'])
+        self.assertEqual(page[0]['first_chunk_id'], 'doc2_0')
+        self.assertEqual(self.index.count_documents('kb'), 5)
+
+    def test_remove_document(self):
+        """Removed documents disappear from lookups"""
+        self.index.record_document('kb', 'doc', ['doc_0'])
+        self.assertTrue(self.index.remove_document('kb', 'doc'))
+        self.assertEqual(self.index.get_chunk_ids('kb', 'doc'), [])
+        self.assertFalse(self.index.remove_document('kb', 'doc'))
+
+    def test_backfill_groups_chunks_by_document(self):
+        """Existing collections are indexed once by grouping chunk ids"""
+        collection = FakeCollection([
+            ('a.txt_1', {'source': 'a.txt'}),
+            ('a.txt_0', {'source': 'a.txt'}),
+            ('url_42_0', {'source': 'https://example.com'}),
+        ])
+        self.index.ensure_indexed('kb', collection, page_size=2)
+        self.assertTrue(self.index.is_indexed('kb'))
+        self.assertEqual(self.index.get_chunk_ids('kb', 'a.txt'), ['a.txt_0', 'a.txt_1'])
+        self.assertEqual(self.index.get_document('kb', 'url_42')['source'], 'https://example.com')
+
+    def test_split_chunk_id(self):
+        """Chunk ids split into document id and sequence number"""
+        self.assertEqual(split_chunk_id('report.pdf_chunk_12'), ('report.pdf', 12))
+        self.assertEqual(split_chunk_id('standalone'), ('standalone', 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+Tests for cached, batched document summarization
+"""
+
+import unittest
+import sys
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.document_summarizer import DocumentSummarizer
+
+
+class FakeController:
+    """Answers summary prompts like the local backend, counting calls"""
+
+    def __init__(self, model_path='/models/a.gguf', ready=True, reply=None):
+        self.model_path = model_path
+        self.ready = ready
+        self.reply = reply
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def is_server_ready(self):
+        return self.ready
+
+    def generate_completion(self, prompt, max_tokens=512, temperature=0.7, request_class=None):
+        with self.lock:
+            self.prompts.append(prompt)
+        if self.reply is not None:
+            return self.reply
+        names = re.findall(r'^Document(?: \d+)?: (\S+)', prompt, re.MULTILINE)
+        if len(names) == 1 and 'Document 1:' not in prompt:
+            return f"Summary: About {names[0]}.\nTags: {names[0]}, text"
+        return "\n".join(f"Document {i}\nSummary: About {name}.\nTags: {name}, text"
+                         for i, name in enumerate(names, 1))
+
+
+class DocumentSummarizerTest(unittest.TestCase):
+    """Test the single-call prompt, the disk cache and idle-time batching"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.controller = FakeController()
+        self.idle = True
+        self.summarizer = self.make_summarizer()
+
+    def tearDown(self):
+        self.summarizer.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def make_summarizer(self, **options):
+        return DocumentSummarizer(os.path.join(self.tmp, 'summaries.sqlite3'),
+                                  controller_provider=lambda: self.controller,
+                                  is_backend_idle=lambda: self.idle, **options)
+
+    def test_one_call_per_document_and_cached_on_disk(self):
+        """Summary and tags come from one call; identical content is never resent"""
+        result = self.summarizer.summarize("x" * 3000, "big.txt")
+        self.assertEqual(result, {'summary': 'About big.txt.', 'tags': ['big.txt', 'text'], 'cached': False})
+        self.assertEqual(len(self.controller.prompts), 1)
+        self.summarizer.close()
+        self.summarizer = self.make_summarizer()
+        again = self.summarizer.summarize("x" * 3000, "renamed.txt")
+        self.assertTrue(again['cached'])
+        self.assertEqual(len(self.controller.prompts), 1)
+
+    def test_cache_is_per_model(self):
+        """Switching models summarizes the content again"""
+        self.summarizer.summarize("x" * 3000, "a.txt")
+        self.controller.model_path = '/models/b.gguf'
+        self.assertFalse(self.summarizer.summarize("x" * 3000, "a.txt")['cached'])
+        self.assertEqual(len(self.controller.prompts), 2)
+
+    def test_failures_are_not_cached(self):
+        """An unusable answer returns None and the next attempt calls the model again"""
+        self.controller.reply = ""
+        self.assertIsNone(self.summarizer.summarize("x" * 3000, "a.txt"))
+        self.controller.reply = None
+        self.assertFalse(self.summarizer.summarize("x" * 3000, "a.txt")['cached'])
+        self.controller.ready = False
+        self.assertIsNone(self.summarizer.summarize("new content", "b.txt"))
+
+    def test_concurrent_small_documents_share_a_prompt(self):
+        """Small documents arriving together while idle are summarized in one call"""
+        self.summarizer.close()
+        self.summarizer = self.make_summarizer(batch_size=4, batch_window=0.5)
+        results = {}
+
+        def ingest(i):
+            results[i] = self.summarizer.summarize(f"note {i}", f"note{i}.txt")
+
+        threads = [threading.Thread(target=ingest, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(self.controller.prompts), 1)
+        self.assertEqual({i: r['summary'] for i, r in results.items()},
+                         {i: f"About note{i}.txt." for i in range(4)})
+        self.assertEqual(self.summarizer.get_stats()['batched_documents'], 4)
+
+    def test_no_batching_while_backend_busy(self):
+        """With interactive requests in flight every document gets its own call"""
+        self.idle = False
+        results = self.summarizer.summarize_many([(f"note {i}", f"note{i}.txt") for i in range(3)])
+        self.assertEqual(len(self.controller.prompts), 3)
+        self.assertTrue(all(r and not r['cached'] for r in results))
+
+    def test_documents_missing_from_batch_answer_are_retried(self):
+        """A batched answer that skips a document falls back to a single call for it"""
+        replies = iter(["Document 1\nSummary: First.\nTags: a\nDocument 2\nSummary:\n",
+                        "Summary: Second.\nTags: b"])
+        self.controller.generate_completion = lambda prompt, **kwargs: (
+            self.controller.prompts.append(prompt) or next(replies))
+        results = self.summarizer.summarize_many([("one", "1.txt"), ("two", "2.txt")])
+        self.assertEqual([r['summary'] for r in results], ['First.', 'Second.'])
+        self.assertEqual(len(self.controller.prompts), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
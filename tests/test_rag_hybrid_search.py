@@ -0,0 +1,107 @@
+"""
+Tests for hybrid (vector + BM25) search over one RAG collection
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag import vector_db
+from vybe_app.rag.lexical_index import LexicalIndex, is_keyword_query
+
+
+CHUNKS = {
+    'kb_0': 'Driver 535 or newer is required for CUDA 12 on Ubuntu 22.04.',
+    'kb_1': 'Install the proprietary NVIDIA packages before enabling GPU acceleration.',
+    'kb_2': 'The server returned ERR_CONN_RESET while loading the model.',
+    'kb_3': 'Models are loaded from the models folder at startup.',
+}
+
+
+class FakeCollection:
+    """Chroma collection whose nearest neighbours are fixed in advance"""
+
+    def __init__(self, ranking):
+        self.ranking = ranking
+        self.queries = []
+
+    def query(self, n_results, include, query_texts=None, query_embeddings=None, where=None):
+        self.queries.append(query_texts or query_embeddings)
+        ids = self.ranking[:n_results]
+        return {'ids': [ids], 'documents': [[CHUNKS[i] for i in ids]],
+                'metadatas': [[{} for _ in ids]],
+                'distances': [[0.2 + 0.1 * rank for rank in range(len(ids))]]}
+
+    def get(self, include, ids=None, limit=None, offset=0):
+        if ids is None:
+            ids = list(CHUNKS)[offset:offset + limit]
+        ids = [i for i in ids if i in CHUNKS]
+        return {'ids': ids, 'documents': [CHUNKS[i] for i in ids], 'metadatas': [{} for _ in ids]}
+
+
+class HybridSearchTest(unittest.TestCase):
+    """Test that hybrid mode always fuses both retrievers"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = LexicalIndex(os.path.join(self.temp_dir, 'lexical.sqlite3'))
+        self.patches = [
+            mock.patch.object(vector_db, 'get_query_cache', return_value=None),
+            mock.patch.object(vector_db, 'get_lexical_index_for_client', return_value=self.index),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.index.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def search(self, query, ranking, **kwargs):
+        collection = FakeCollection(ranking)
+        client = SimpleNamespace(get_collection=lambda name: collection)
+        hits = vector_db.search_chunks(client, 'kb', query, n_results=3, mode='hybrid', **kwargs)
+        return collection, [hit['id'] for hit in hits]
+
+    def test_digit_query_still_gets_vector_hits(self):
+        """A natural-language query with version numbers is embedded and keeps its semantic matches"""
+        query = 'which drivers do I need for CUDA 12 on Ubuntu 22.04'
+        self.assertTrue(is_keyword_query(query))
+        collection, ids = self.search(query, ['kb_1', 'kb_3'])
+        self.assertEqual(len(collection.queries), 1)
+        self.assertIn('kb_1', ids)  # Shares no terms with the query; only the vector side finds it
+        self.assertEqual(ids[0], 'kb_0')
+
+    def test_keyword_heuristic_only_shifts_weight(self):
+        """An identifier favours the BM25 ranking, a plain question the vector ranking"""
+        _, ids = self.search('ERR_CONN_RESET', ['kb_3', 'kb_1'])
+        self.assertEqual(ids, ['kb_2', 'kb_3', 'kb_1'])
+        _, ids = self.search('why is loading slow', ['kb_3', 'kb_1'])
+        self.assertEqual(ids, ['kb_3', 'kb_1', 'kb_2'])
+
+    def test_scores_are_normalized(self):
+        """A chunk ranked first by both retrievers scores 1.0"""
+        collection = FakeCollection(['kb_2', 'kb_3'])
+        client = SimpleNamespace(get_collection=lambda name: collection)
+        hits = vector_db.search_chunks(client, 'kb', 'ERR_CONN_RESET', n_results=2, mode='hybrid')
+        self.assertAlmostEqual(hits[0]['score'], 1.0)
+        self.assertAlmostEqual(hits[0]['distance'], 0.0)
+
+    def test_lexical_hits_read_text_from_chroma(self):
+        """Lexical-only hits get their document from the collection, not the index"""
+        collection = FakeCollection(['kb_3'])
+        client = SimpleNamespace(get_collection=lambda name: collection)
+        hits = vector_db.search_chunks(client, 'kb', 'ERR_CONN_RESET', n_results=2, mode='lexical')
+        self.assertEqual([(hit['id'], hit['document']) for hit in hits], [('kb_2', CHUNKS['kb_2'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
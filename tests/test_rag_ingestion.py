@@ -0,0 +1,124 @@
+"""
+Tests for the batched, pipelined RAG ingestion engine
+"""
+
+import unittest
+import sys
+import os
+import threading
+import time
+import types
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.ingestion import IngestionPipeline, IngestionSource, text_source
+
+
+class FakeCollection:
+    """Collection that records upserts, optionally blocking or failing some of them"""
+
+    def __init__(self, fail_calls=(), gate=None):
+        self.fail_calls = set(fail_calls)
+        self.gate = gate
+        self.upserted = threading.Event()
+        self.batches = []
+        self.metadatas = []
+        self.calls = 0
+
+    def upsert(self, ids, documents, metadatas):
+        self.calls += 1
+        self.upserted.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.calls in self.fail_calls:
+            raise RuntimeError("disk full")
+        self.batches.append(list(ids))
+        self.metadatas.extend(metadatas)
+
+
+def chunk_source(source_id, count, produced=None):
+    """Source whose loader yields ``count`` one-chunk pages, counting each one handed out"""
+    def loader():
+        for i in range(count):
+            if produced is not None:
+                produced.append(i)
+            yield f"{source_id} chunk {i}"
+    return IngestionSource(source_id, loader)
+
+
+def pipeline(collection, **options):
+    return IngestionPipeline(collection, chunker=lambda pages: pages, **options)
+
+
+class IngestionPipelineTest(unittest.TestCase):
+    """Test batching, backpressure and recovery from a failed batch"""
+
+    def test_chunks_are_upserted_in_batches(self):
+        """Chunks are written in batch_size upserts with the remainder in a final batch"""
+        collection = FakeCollection()
+        result = pipeline(collection, batch_size=4, max_workers=1).ingest([chunk_source('doc', 10)])
+        self.assertEqual([len(ids) for ids in collection.batches], [4, 4, 2])
+        self.assertEqual(collection.batches[0], ['doc_0', 'doc_1', 'doc_2', 'doc_3'])
+        self.assertEqual((result.chunks_ingested, result.batches_written), (10, 3))
+        self.assertEqual(result.chunk_counts, {'doc': 10})
+        self.assertTrue(result.success)
+
+    def test_bounded_queue_holds_back_extraction(self):
+        """While an upsert is stalled, extraction stops after filling the pending queue"""
+        gate = threading.Event()
+        collection = FakeCollection(gate=gate)
+        produced = []
+        ingest = pipeline(collection, batch_size=2, max_workers=1, max_pending_chunks=2)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(ingest.ingest([chunk_source('big', 100, produced)])))
+        thread.start()
+        try:
+            self.assertTrue(collection.upserted.wait(5))
+            time.sleep(0.2)
+            # The batch being written, a full queue and the one chunk blocked on put()
+            self.assertLessEqual(len(produced), 2 + 2 + 1)
+        finally:
+            gate.set()
+            thread.join(10)
+        self.assertEqual(len(produced), 100)
+        self.assertEqual(results[0].chunks_ingested, 100)
+
+    def test_failed_batch_fails_its_source_only(self):
+        """A failing upsert marks its source as failed while later batches are still written"""
+        collection = FakeCollection(fail_calls={1})
+        with self.assertLogs('vybe_app.rag.ingestion', level='ERROR'):
+            result = pipeline(collection, batch_size=2, max_workers=1).ingest(
+                [chunk_source('a', 4), chunk_source('b', 4)])
+        self.assertEqual(collection.batches, [['a_2', 'a_3'], ['b_0', 'b_1'], ['b_2', 'b_3']])
+        self.assertEqual(list(result.failed_sources), ['a'])
+        self.assertEqual((result.batches_written, result.batches_failed), (3, 1))
+        self.assertEqual((result.chunks_ingested, result.sources_ingested), (6, 1))
+        self.assertFalse(result.success)
+
+    def test_document_index_records_only_written_chunks(self):
+        """Chunks from a failed batch are left out of the document index"""
+        collection = FakeCollection(fail_calls={1})
+        recorded = {}
+        document_index = types.SimpleNamespace(
+            record_document=lambda collection_name, doc_id, chunk_ids, **kwargs:
+                recorded.__setitem__(doc_id, chunk_ids))
+        with self.assertLogs('vybe_app.rag.ingestion', level='ERROR'):
+            pipeline(collection, batch_size=2, max_workers=1, document_index=document_index,
+                     collection_name='kb').ingest([chunk_source('a', 4)])
+        self.assertEqual(recorded, {'a': ['a_2', 'a_3']})
+
+    def test_caller_metadata_cannot_replace_chunk_ids(self):
+        """Source metadata is kept but the pipeline's chunk id wins"""
+        collection = FakeCollection()
+        source = text_source('notes.txt', 'Some notes.', metadata={'chunk_id': 'bogus', 'user_id': 7},
+                             id_prefix='notes.txt', chunk_tag='chunk')
+        self.assertEqual(source.document_id, 'notes.txt')
+        pipeline(collection, max_workers=1).ingest([source])
+        self.assertEqual(collection.batches, [['notes.txt_chunk_0']])
+        self.assertEqual(collection.metadatas[0]['chunk_id'], 'notes.txt_chunk_0')
+        self.assertEqual(collection.metadatas[0]['user_id'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for the BM25 lexical index used by hybrid RAG retrieval
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.lexical_index import LexicalIndex, is_keyword_query, tokenize
+
+
+CHUNKS = {
+    'kb_0': 'The server returned ERR_CONN_RESET while loading the model.',
+    'kb_1': 'Call load_model_async() to load a model without blocking the UI.',
+    'kb_2': 'Replacement filter SKU-4410-B fits the standard housing.',
+    'kb_3': 'Models are loaded from the models folder at startup.',
+}
+
+
+class LexicalIndexTest(unittest.TestCase):
+    """Test tokenization, BM25 ranking, persistence and removal"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'lexical.sqlite3')
+        self.index = LexicalIndex(self.path)
+        self.index.add_chunks('kb', list(CHUNKS), list(CHUNKS.values()))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_identifiers_kept_whole_and_split(self):
+        """Identifiers are indexed whole and by their parts"""
+        terms = tokenize('ERR_CONN_RESET in loadModel')
+        self.assertIn('err_conn_reset', terms)
+        self.assertIn('conn', terms)
+        self.assertIn('loadmodel', terms)
+        self.assertIn('model', terms)
+
+    def test_exact_identifier_ranks_first(self):
+        """An exact error code or SKU finds its chunk first"""
+        self.assertEqual(self.index.search('kb', 'ERR_CONN_RESET')[0]['id'], 'kb_0')
+        self.assertEqual(self.index.search('kb', 'sku-4410-b')[0]['id'], 'kb_2')
+        self.assertEqual(self.index.search('kb', 'load_model_async')[0]['id'], 'kb_1')
+
+    def test_persists_across_reopen(self):
+        """A reopened index answers from the SQLite file"""
+        self.index.close()
+        self.index = LexicalIndex(self.path)
+        self.assertEqual(self.index.search('kb', 'housing')[0]['id'], 'kb_2')
+
+    def test_remove_and_replace(self):
+        """Removed chunks stop matching and re-added chunks use their new text"""
+        self.index.search('kb', 'warm up')  # load postings into memory
+        self.index.remove_chunks('kb', ['kb_2'])
+        self.assertEqual(self.index.search('kb', 'housing'), [])
+        self.index.add_chunks('kb', ['kb_3'], ['Thermal housing for the GPU.'])
+        self.assertEqual([hit['id'] for hit in self.index.search('kb', 'housing')], ['kb_3'])
+        self.assertEqual(self.index.search('kb', 'startup'), [])
+
+    def test_migrates_index_that_stored_text(self):
+        """Indexes written with a text column keep their postings and drop the text"""
+        self.index.close()
+        legacy_path = os.path.join(self.temp_dir, 'legacy.sqlite3')
+        conn = sqlite3.connect(legacy_path)
+        conn.executescript("""
+            CREATE TABLE lexical_chunks (collection TEXT NOT NULL, chunk_id TEXT NOT NULL,
+                                         terms TEXT NOT NULL, text TEXT NOT NULL,
+                                         PRIMARY KEY (collection, chunk_id));
+            INSERT INTO lexical_chunks VALUES ('kb', 'kb_0', '{"housing":1}', 'Filter housing.');
+        """)
+        conn.commit()
+        conn.close()
+        self.index = LexicalIndex(legacy_path)
+        self.assertEqual(self.index.search('kb', 'housing')[0]['id'], 'kb_0')
+        columns = [row[1] for row in self.index._conn.execute("PRAGMA table_info(lexical_chunks)")]
+        self.assertNotIn('text', columns)
+
+    def test_keyword_query_detection(self):
+        """Identifier and short queries are recognised as keyword queries"""
+        self.assertTrue(is_keyword_query('ERR_CONN_RESET'))
+        self.assertTrue(is_keyword_query('why does SKU-4410-B leak'))
+        self.assertFalse(is_keyword_query('how do I speed up model loading'))
+
+
+if __name__ == '__main__':
+    unittest.main()
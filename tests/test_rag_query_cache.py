@@ -0,0 +1,89 @@
+"""
+Tests for the RAG query-result cache
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.query_cache import QueryResultCache
+
+
+class QueryResultCacheTest(unittest.TestCase):
+    """Test exact hits, version invalidation and the embedding tier"""
+
+    def setUp(self):
+        self.cache = QueryResultCache(maxsize=2)
+
+    def test_normalized_queries_share_an_entry(self):
+        """Case, spacing and trailing punctuation do not defeat the cache"""
+        key = self.cache.make_key('db', 'kb', 'How do I  load a model?', 3)
+        self.cache.put(key, [{'id': 'kb_0'}], self.cache.version('kb'), elapsed_ms=12.0)
+        other = self.cache.make_key('db', 'kb', 'how do i load a model', 3)
+        self.assertEqual(self.cache.get(other), [{'id': 'kb_0'}])
+        self.assertEqual(self.cache.get_stats()['saved_ms'], 12.0)
+
+    def test_parameters_are_part_of_the_key(self):
+        """n_results and where-filters select different entries"""
+        key = self.cache.make_key('db', 'kb', 'q', 3, where={'agent_id': 'a'})
+        self.cache.put(key, ['x'], 0, elapsed_ms=1.0)
+        self.assertIsNone(self.cache.get(self.cache.make_key('db', 'kb', 'q', 5, where={'agent_id': 'a'})))
+        self.assertIsNone(self.cache.get(self.cache.make_key('db', 'kb', 'q', 3, where={'agent_id': 'b'})))
+
+    def test_write_invalidates_collection(self):
+        """A write to the collection makes its cached results stale"""
+        key = self.cache.make_key('db', 'kb', 'q', 3)
+        self.cache.put(key, ['x'], self.cache.version('kb'), elapsed_ms=1.0)
+        self.cache.invalidate_collection('other')
+        self.assertEqual(self.cache.get(key), ['x'])
+        self.cache.invalidate_collection('kb')
+        self.assertIsNone(self.cache.get(key))
+
+    def test_write_is_scoped_to_its_database(self):
+        """The same collection name in another database keeps its cached results"""
+        key = self.cache.make_key('db_a', 'kb', 'q', 3)
+        other = self.cache.make_key('db_b', 'kb', 'q', 3)
+        self.cache.put(key, ['a'], self.cache.version('kb', 'db_a'), elapsed_ms=1.0)
+        self.cache.put(other, ['b'], self.cache.version('kb', 'db_b'), elapsed_ms=1.0)
+        self.cache.invalidate_collection('kb', 'db_b')
+        self.assertEqual(self.cache.get(key), ['a'])
+        self.assertIsNone(self.cache.get(other))
+        self.cache.invalidate_collection('kb')
+        self.assertIsNone(self.cache.get(key))
+
+    def test_result_computed_before_write_is_stale(self):
+        """Results stored with the pre-query version are not served after a racing write"""
+        key = self.cache.make_key('db', 'kb', 'q', 3)
+        version = self.cache.version('kb')
+        self.cache.invalidate_collection('kb')
+        self.cache.put(key, ['old'], version, elapsed_ms=1.0)
+        self.assertIsNone(self.cache.get(key))
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted first"""
+        keys = [self.cache.make_key('db', 'kb', f'q{i}', 3) for i in range(3)]
+        self.cache.put(keys[0], [0], 0, 1.0)
+        self.cache.put(keys[1], [1], 0, 1.0)
+        self.cache.get(keys[0])
+        self.cache.put(keys[2], [2], 0, 1.0)
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertEqual(self.cache.get(keys[0]), [0])
+
+    def test_semantic_tier(self):
+        """Queries with nearby embeddings reuse results when the tier is enabled"""
+        cache = QueryResultCache(semantic_threshold=0.95)
+        key = cache.make_key('db', 'kb', 'load a model', 3)
+        cache.put(key, ['hit'], 0, elapsed_ms=5.0, embedding=[1.0, 0.0, 0.1])
+        near = cache.make_key('db', 'kb', 'loading models', 3)
+        self.assertEqual(cache.get_similar(near, [1.0, 0.02, 0.1]), ['hit'])
+        self.assertIsNone(cache.get_similar(near, [0.0, 1.0, 0.0]))
+        other_n = cache.make_key('db', 'kb', 'loading models', 5)
+        self.assertIsNone(cache.get_similar(other_n, [1.0, 0.02, 0.1]))
+        self.assertEqual(cache.get_stats()['semantic_hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
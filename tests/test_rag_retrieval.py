@@ -0,0 +1,97 @@
+"""
+Tests for fan-out retrieval across RAG collections
+"""
+
+import threading
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag.retrieval import FanOutRetriever, RetrievedChunk
+
+
+COLLECTIONS = {
+    'docs': [('GPU offloading needs enough VRAM for the model layers.', 0.20),
+             ('Install the CUDA toolkit before enabling GPU offloading.', 0.45)],
+    'notes': [('Remember to restart the backend after changing GPU layers.', 0.10),
+              ('GPU offloading needs enough VRAM for the model layers!', 0.30)],
+    'recipes': [('Preheat the oven to 200 degrees before baking bread.', 1.40)],
+}
+
+
+class CannedRetriever(FanOutRetriever):
+    """FanOutRetriever answering from canned per-collection hits"""
+
+    def _query_collection(self, name, query, query_embedding, where, cancel_event):
+        if name == 'broken':
+            raise RuntimeError('collection unavailable')
+        hits = [RetrievedChunk(collection=name, text=text, distance=distance, rank=rank)
+                for rank, (text, distance) in enumerate(COLLECTIONS[name], start=1)]
+        return hits, 0.0
+
+
+class SlowRetriever(CannedRetriever):
+    """CannedRetriever whose 'slow' collection runs until it is cancelled"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.released = threading.Event()
+
+    def _query_collection(self, name, query, query_embedding, where, cancel_event):
+        if name == 'slow':
+            cancel_event.wait(5.0)
+            self.released.set()
+            return [], 0.0
+        return super()._query_collection(name, query, query_embedding, where, cancel_event)
+
+
+class FanOutRetrieverTest(unittest.TestCase):
+    """Test global ranking, fusion, dedupe and token budget"""
+
+    def test_global_ranking_by_distance(self):
+        """Hits from all collections are merged best-first, not in collection order"""
+        result = CannedRetriever(top_k=3).retrieve('gpu', ['docs', 'notes', 'recipes'])
+        self.assertEqual([chunk.distance for chunk in result.chunks], [0.10, 0.20, 0.45])
+        self.assertEqual(result.chunks[0].collection, 'notes')
+
+    def test_near_duplicates_dropped(self):
+        """A near-identical chunk from another collection is only returned once"""
+        result = CannedRetriever(top_k=10).retrieve('gpu', ['docs', 'notes'])
+        texts = [chunk.text for chunk in result.chunks]
+        self.assertEqual(sum('needs enough VRAM' in text for text in texts), 1)
+        self.assertEqual(result.duplicates_dropped, 1)
+
+    def test_reciprocal_rank_fusion(self):
+        """RRF ranks by position within each collection"""
+        result = CannedRetriever(top_k=10, fusion='rrf').retrieve('gpu', ['docs', 'recipes'])
+        self.assertEqual([chunk.rank for chunk in result.chunks], [1, 1, 2])
+        self.assertGreater(result.chunks[0].score, result.chunks[-1].score)
+
+    def test_token_budget(self):
+        """Returned chunks never exceed the total token budget"""
+        retriever = CannedRetriever(top_k=10, token_budget=25)
+        result = retriever.retrieve('gpu', ['docs', 'notes', 'recipes'])
+        self.assertLessEqual(result.tokens_used, 25)
+        self.assertEqual(result.tokens_used, sum(chunk.tokens for chunk in result.chunks))
+        self.assertLess(len(result.chunks), 4)
+
+    def test_failed_collection_is_reported(self):
+        """A failing collection does not hide results from the others"""
+        result = CannedRetriever(top_k=5).retrieve('gpu', ['broken', 'recipes'])
+        self.assertIn('broken', result.failed_collections)
+        self.assertEqual(len(result.chunks), 1)
+
+    def test_timed_out_query_is_signalled(self):
+        """A query still running at the timeout is told to stop instead of holding its worker"""
+        retriever = SlowRetriever(top_k=5, timeout=0.05)
+        result = retriever.retrieve('gpu', ['slow', 'recipes'])
+        self.assertEqual(result.failed_collections, {'slow': 'timeout'})
+        self.assertEqual(len(result.chunks), 1)
+        self.assertTrue(retriever.released.wait(1.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
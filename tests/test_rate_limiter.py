@@ -0,0 +1,82 @@
+"""
+Tests for the rule-based rate limiter on the GCRA core
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.gcra_limiter import GCRALimiter
+from vybe_app.utils.rate_limiter import AdvancedRateLimiter
+
+
+class FakeClock:
+    """Manually advanced wall clock"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+# Default rule name -> (endpoint, method) that selects it
+RULE_REQUESTS = {
+    'auth_strict': ('/api/auth/login', 'POST'),
+    'ai_models': ('/api/ai/chat', 'POST'),
+    'file_upload': ('/api/files/upload', 'POST'),
+    'default_api': ('/api/settings', 'GET'),
+}
+
+
+class DefaultRulesTest(unittest.TestCase):
+    """Test the admissions the default rules allow in one window"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = AdvancedRateLimiter(storage_backend='memory')
+        self.limiter.tracker._limiter = GCRALimiter(clock=self.clock)
+        self.rules = {rule.name: rule for rule in self.limiter.rules}
+
+    def admit(self, rule_name, key):
+        endpoint, method = RULE_REQUESTS[rule_name]
+        allowed, info = self.limiter.check_rate_limit(key, endpoint=endpoint, method=method)
+        self.assertEqual(info['rule'], rule_name)
+        return allowed
+
+    def test_burst_is_the_configured_burst(self):
+        """A fresh client gets exactly the rule's burst at once, not its whole limit"""
+        for name in RULE_REQUESTS:
+            with self.subTest(rule=name):
+                burst = self.rules[name].rate_limit.burst
+                admitted = sum(self.admit(name, f'burst:{name}') for _ in range(burst * 5))
+                self.assertEqual(admitted, burst)
+
+    def test_max_admissions_per_window(self):
+        """Hammering once a second admits burst + limit - 1 requests in the first window"""
+        start = self.clock.now
+        for name in RULE_REQUESTS:
+            with self.subTest(rule=name):
+                rate_limit = self.rules[name].rate_limit
+                self.clock.now = start
+                admitted = 0
+                for second in range(rate_limit.window):
+                    self.clock.now = start + second
+                    admitted += sum(self.admit(name, f'window:{name}') for _ in range(3))
+                self.assertEqual(admitted, rate_limit.burst + rate_limit.requests - 1)
+
+    def test_login_rule(self):
+        """The login rule (5 per 5 minutes, burst 2) admits 6 in its first window, not 10"""
+        admitted = 0
+        start = self.clock.now
+        for second in range(300):
+            self.clock.now = start + second
+            admitted += sum(self.admit('auth_strict', '203.0.113.7') for _ in range(5))
+        self.assertEqual(admitted, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for the cached threat scanner
+"""
+
+import unittest
+import re
+import sys
+import os
+import unicodedata
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.threat_scanner import ThreatScanner, THREAT_PATTERNS, is_allowlisted_path
+
+SAMPLES = [
+    'http://localhost:8000/api/chat?session=12',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    "1' OR 1=1 -- ",
+    'x UNION   SELECT password FROM users',
+    '<script>alert(1)</script>',
+    '＜script＞alert(1)',  # Fullwidth angle brackets, only caught after NFKC
+    '../../etc/passwd',
+    '$(rm -rf /)',
+    '<!DOCTYPE foo [<!ENTITY xxe SYSTEM "file:///etc/passwd">]>',
+    'café au lait',
+    'Or 1 = 1; DROP\tTable x',
+    '',
+]
+
+
+def legacy_findings(value):
+    """Findings of the original per-pattern, raw-plus-normalized loop"""
+    compiled = [re.compile(pattern, re.IGNORECASE if ignore_case else 0) for _, pattern, ignore_case in THREAT_PATTERNS]
+    findings = []
+    for check_data in [value, unicodedata.normalize('NFKC', value)]:
+        for i, pattern in enumerate(compiled):
+            if pattern.search(check_data):
+                findings.append((i, check_data, check_data != value))
+    return findings
+
+
+class ThreatScannerTest(unittest.TestCase):
+    """Test equivalence with the per-pattern scan, the ASCII fast path and caching"""
+
+    def test_findings_match_per_pattern_scan(self):
+        """Every sample yields the same findings as scanning each pattern twice"""
+        scanner = ThreatScanner()
+        for value in SAMPLES:
+            findings = scanner.scan_request({'headers': {'X-Test': value}})
+            self.assertEqual(findings, legacy_findings(value), value)
+
+    def test_normalization_catches_fullwidth_markup(self):
+        """Non-ASCII values are normalized and flagged as such"""
+        findings = ThreatScanner().scan_request({'form_data': {'q': '＜script＞'}})
+        self.assertEqual([(i, normalized) for i, _, normalized in findings], [(1, True)])
+
+    def test_ascii_values_skip_normalization(self):
+        """Plain-ASCII values take the fast path"""
+        scanner = ThreatScanner()
+        scanner.scan('plain value')
+        scanner.scan('café')
+        scanner.scan('a && b')
+        stats = scanner.get_stats()
+        self.assertEqual((stats['ascii_fast_path'], stats['normalized'], stats['flagged']), (2, 1, 1))
+
+    def test_repeated_values_hit_the_cache(self):
+        """Identical header values are scanned once; the LRU stays bounded"""
+        scanner = ThreatScanner(cache_size=2, max_cached_length=50)
+        request_data = {'headers': {'User-Agent': SAMPLES[1][:40], 'Accept': '*/*'}}
+        for _ in range(5):
+            scanner.scan_request(request_data)
+        scanner.scan('a' * 51)
+        scanner.scan('another value')
+        stats = scanner.get_stats()
+        self.assertEqual(stats['cache_hits'], 8)
+        self.assertEqual(stats['cached_values'], 2)
+
+    def test_static_allowlist(self):
+        """Static prefixes are skipped unless the path climbs directories"""
+        prefixes = ('/static/', '/favicon.ico')
+        self.assertTrue(is_allowlisted_path('/static/js/app.js', prefixes))
+        self.assertTrue(is_allowlisted_path('/favicon.ico', prefixes))
+        self.assertFalse(is_allowlisted_path('/static/../config.py', prefixes))
+        self.assertFalse(is_allowlisted_path('/api/static/x', prefixes))
+
+
+if __name__ == '__main__':
+    unittest.main()
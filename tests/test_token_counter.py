@@ -0,0 +1,107 @@
+"""
+Tests for memoized token counting and token-budget context packing
+"""
+
+import unittest
+import sys
+import os
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.utils.context_packer import pack_messages
+from vybe_app.utils.token_counter import TokenCounter, context_budget
+
+
+class CountingTokenizer:
+    """Whitespace tokenizer that records every text it is asked to encode"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, text):
+        self.calls.append(text)
+        return text.split()
+
+
+class TokenCounterTest(unittest.TestCase):
+    """Test memoization and message overhead"""
+
+    def test_counts_are_memoized_per_text(self):
+        """A repeated message is tokenized once"""
+        tokenizer = CountingTokenizer()
+        counter = TokenCounter(tokenizer, message_overhead=3)
+        history = [{'role': 'user', 'content': 'one two three'}, {'role': 'assistant', 'content': 'four five'}]
+        self.assertEqual(counter.count_messages(history), 3 + 3 + 2 + 3)
+        history.append({'role': 'user', 'content': 'six'})
+        counter.count_messages(history)
+        self.assertEqual(tokenizer.calls, ['one two three', 'four five', 'six'])
+        self.assertEqual(counter.get_stats()['hits'], 2)
+
+    def test_lru_is_bounded(self):
+        """Old texts are evicted once the cache is full"""
+        counter = TokenCounter(CountingTokenizer(), cache_size=2)
+        for text in ('a', 'b', 'c'):
+            counter.count(text)
+        self.assertEqual(counter.get_stats()['cached_texts'], 2)
+
+    def test_budget_leaves_room_for_reply(self):
+        """The exact counter keeps a smaller safety margin than the approximation"""
+        exact = TokenCounter(CountingTokenizer())
+        approximate = TokenCounter()
+        self.assertEqual(context_budget(1024, exact, n_ctx=32768), int(32768 * 0.98) - 1024)
+        self.assertLess(context_budget(1024, approximate, n_ctx=32768), context_budget(1024, exact, n_ctx=32768))
+
+
+class TokenPackingTest(unittest.TestCase):
+    """Test that a token budget is filled without being exceeded"""
+
+    def test_fills_budget_with_newest_turns(self):
+        """Packing keeps the newest turns that fit and never exceeds the budget"""
+        counter = TokenCounter(CountingTokenizer(), message_overhead=0)
+        history = [{'role': 'system', 'content': 'sys ' * 10}]
+        history += [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'turn{i} ' * 10} for i in range(20)]
+        packed = pack_messages(history, max_tokens=75, token_counter=counter)
+        self.assertEqual(counter.count_messages(packed), 70)
+        self.assertEqual(packed[-1]['content'], history[-1]['content'])
+        self.assertEqual(len(packed), 1 + 6)
+
+    def test_oversized_newest_message_is_shortened(self):
+        """A newest message larger than the whole budget is elided in the middle to fit"""
+        counter = TokenCounter(CountingTokenizer(), message_overhead=0)
+        question = 'start ' + 'log ' * 200 + 'question?'
+        history = [{'role': 'system', 'content': 'sys ' * 10}, {'role': 'user', 'content': 'earlier turn'},
+                   {'role': 'user', 'content': question}]
+        with self.assertLogs('vybe_app.utils.context_packer', level='WARNING'):
+            packed = pack_messages(history, max_tokens=50, token_counter=counter)
+        self.assertEqual(len(packed), 2)
+        self.assertLessEqual(counter.count_messages(packed), 50)
+        self.assertGreaterEqual(counter.count_messages(packed), 48)
+        content = packed[-1]['content']
+        self.assertTrue(content.startswith('start ') and content.endswith('question?'))
+        self.assertIn('chars omitted', content)
+
+    def test_long_message_within_budget_is_kept_whole(self):
+        """Under a token budget, messages and the system prompt are not clipped to 4000 chars"""
+        counter = TokenCounter(CountingTokenizer(), message_overhead=0)
+        system = 'rules ' * 1000
+        pasted_log = 'line ' * 2000
+        history = [{'role': 'system', 'content': system}, {'role': 'user', 'content': pasted_log},
+                   {'role': 'user', 'content': 'what failed?'}]
+        packed = pack_messages(history, max_tokens=8000, token_counter=counter)
+        self.assertEqual([m['content'] for m in packed], [system, pasted_log, 'what failed?'])
+
+    def test_repacking_a_growing_conversation_is_incremental(self):
+        """Adding a turn only tokenizes that turn"""
+        tokenizer = CountingTokenizer()
+        counter = TokenCounter(tokenizer)
+        history = [{'role': 'system', 'content': 'sys'}] + [{'role': 'user', 'content': f'm{i}'} for i in range(10)]
+        pack_messages(history, max_tokens=10000, token_counter=counter)
+        tokenizer.calls.clear()
+        history.append({'role': 'assistant', 'content': 'new reply'})
+        pack_messages(history, max_tokens=10000, token_counter=counter)
+        self.assertEqual(tokenizer.calls, ['new reply'])
+
+
+if __name__ == '__main__':
+    unittest.main()
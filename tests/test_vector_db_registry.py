@@ -0,0 +1,88 @@
+"""
+Tests for the process-wide registry of ChromaDB connection pools
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+# Add the project root to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vybe_app.rag import vector_db
+from vybe_app.rag.vector_db import VectorDBClientRegistry
+
+
+class FakeClient:
+    """Stand-in for chromadb.PersistentClient that always passes health checks"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def list_collections(self):
+        return []
+
+
+class VectorDBClientRegistryTest(unittest.TestCase):
+    """Test pool sharing per path, registry statistics and shutdown"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'chroma')
+        self.opened = []
+        patch = mock.patch.object(vector_db.chromadb, 'PersistentClient', side_effect=self.open_client)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.registry = VectorDBClientRegistry(pool_size=1)
+        self.addCleanup(self.registry.shutdown)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def open_client(self, path):
+        client = FakeClient(path)
+        self.opened.append(client)
+        return client
+
+    def borrow(self, path=None):
+        with self.registry.client(path) as client:
+            return client
+
+    def test_same_path_returns_same_client(self):
+        """Every borrow for one persist path, however it is spelled, gets the same pooled client"""
+        first = self.borrow(self.path)
+        self.assertIs(self.borrow(self.path), first)
+        self.assertIs(self.borrow(os.path.join(self.temp_dir, '.', 'chroma')), first)
+        self.assertIs(self.borrow(), first)  # The first path registered becomes the default
+        self.assertEqual(len(self.opened), 1)
+        self.assertIsNot(self.borrow(os.path.join(self.temp_dir, 'other')), first)
+
+    def test_stats_count_reuses_and_creations(self):
+        """Lookups that find an existing pool count as reuses; only new paths create pools"""
+        for _ in range(3):
+            self.borrow(self.path)
+        self.borrow(os.path.join(self.temp_dir, 'other'))
+        stats = self.registry.get_stats()
+        self.assertEqual((stats['pool_lookups'], stats['pool_reuses'], stats['pools_created']), (4, 2, 2))
+        self.assertEqual((stats['pool_count'], stats['pool_hits'], stats['pool_misses']), (2, 4, 0))
+        self.assertEqual(stats['open_count'], 2)
+
+    def test_shutdown_closes_and_clears_pools(self):
+        """Shutdown closes every pool, forgets the default and rebuilds on the next request"""
+        self.borrow(self.path)
+        pool = self.registry.get_pool(self.path)
+        self.registry.shutdown()
+        self.assertFalse(pool.health_check_thread.is_alive())
+        self.assertTrue(pool.pool.empty())
+        self.assertEqual(self.registry.get_stats()['pool_count'], 0)
+        self.assertIsNone(self.registry.get_pool())
+        with self.assertRaises(RuntimeError):
+            self.borrow()
+        self.assertIsNot(self.registry.get_pool(self.path), pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -108,8 +108,9 @@ Note:
 """
 
 import html
+import threading
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Optional
 from flask import jsonify
 from ...logger import log_error, log_info
 
@@ -260,18 +261,25 @@ def ensure_backend_ready() -> Dict[str, Any]:
     return {'ready': True}
 
 
+def build_chat_messages(message: str, reply_tokens: int = 1024) -> List[Dict[str, str]]:
+    """System prompt plus user message, packed to the model's context window minus the reply"""
+    from ...utils.context_packer import pack_messages
+    from ...utils.token_counter import context_budget
+    
+    return pack_messages([
+        {'role': 'system', 'content': DEFAULT_SYSTEM_PROMPT},
+        {'role': 'user', 'content': message}
+    ], max_tokens=context_budget(reply_tokens))
+
+
 def process_chat_message(message: str, temperature: float = 0.7, max_tokens: int = 1024) -> Dict[str, Any]:
     """Process a chat message through the LLM backend"""
     try:
         # Import dependencies with lazy loading
-        from ...utils.context_packer import pack_messages
         from ...utils.llm_backend_manager import llm_backend_manager
         
         # Build messages and pack to reduce unnecessary context fed to backend
-        messages = pack_messages([
-            {'role': 'system', 'content': DEFAULT_SYSTEM_PROMPT},
-            {'role': 'user', 'content': message}
-        ])
+        messages = build_chat_messages(message, max_tokens)
         
         routed = llm_backend_manager.route_chat(
             messages=messages,
@@ -294,4 +302,28 @@ def process_chat_message(message: str, temperature: float = 0.7, max_tokens: int
         return {'success': False, 'error': f'Failed to process message: {str(e)}'}
 
 
-
+def stream_chat_message(message: str, temperature: float = 0.7, max_tokens: int = 1024,
+                        cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming counterpart of process_chat_message.
+    
+    Yields the events of LLMBackendManager.stream_chat(): 'token' events as
+    they are generated, then one 'done' (full response, ttft_ms, total_ms,
+    cancelled, truncated) or 'error' event.
+    """
+    try:
+        from ...utils.llm_backend_manager import llm_backend_manager
+        
+        messages = build_chat_messages(message, max_tokens)
+        for event in llm_backend_manager.route_chat(
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            cancel_event=cancel_event
+        ):
+            yield event
+            
+    except Exception as e:
+        log_error(f"Error streaming chat message: {str(e)}")
+        yield {'type': 'error', 'error': f'Failed to process message: {str(e)}'}
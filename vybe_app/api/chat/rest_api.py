@@ -30,7 +30,11 @@ API Endpoints:
     
     Message Operations:
         - POST /chat/rest: Send message and receive synchronous response
+          (``"stream": true`` returns the reply as Server-Sent Events)
         - GET /chat/history: Retrieve conversation history
+        - GET /chat/sessions/<id>/messages: Page through a saved session
+          (``?before=<seq>`` / ``?after=<seq>``)
+        - GET /chat/sessions/<id>/export: Stream a saved session as JSON Lines
         - DELETE /chat/history: Clear conversation history
         - POST /chat/feedback: Submit response feedback
     
@@ -134,13 +138,16 @@ Note:
     on application requirements and client capabilities.
 """
 
-from flask import Blueprint, request, jsonify
+import json
+import threading
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from ...auth import test_mode_login_required
 from ...logger import log_api_request, log_error
 from ...logger import handle_api_errors, log_execution_time
 from .message_processor import (
     validate_message, sanitize_message, ensure_backend_ready,
-    process_chat_message
+    process_chat_message, stream_chat_message
 )
 
 # Create chat sub-blueprint
@@ -196,6 +203,13 @@ def chat_rest():
         if not backend_status['ready']:
             return format_error_response(backend_status['error'], 'backend_error', 503)
         
+        if data.get('stream'):
+            return _stream_chat_response(
+                sanitized_message,
+                temperature=data.get('temperature', 0.7),
+                max_tokens=data.get('max_tokens', 1024)
+            )
+        
         # Process message
         result = process_chat_message(
             sanitized_message,
@@ -211,3 +225,106 @@ def chat_rest():
     except Exception as e:
         log_error(f"Error in chat REST endpoint: {str(e)}")
         return format_error_response('Internal server error', 'internal_error', 500)
+
+
+def _stream_chat_response(message: str, temperature: float, max_tokens: int) -> Response:
+    """
+    SSE variant of /chat/rest.
+    
+    Emits ``event: token`` with ``{"token": ...}`` per generated chunk, then
+    ``event: done`` (full response, ttft_ms, total_ms) or ``event: error``.
+    If the client disconnects, the generator is closed and the upstream LLM
+    request is aborted.
+    """
+    cancel_event = threading.Event()
+    
+    def generate():
+        events = stream_chat_message(message, temperature=temperature, max_tokens=max_tokens,
+                                     cancel_event=cancel_event)
+        try:
+            for event in events:
+                if event['type'] == 'token':
+                    payload = {'token': event['content']}
+                elif event['type'] == 'done':
+                    payload = {
+                        'response': event['content'].strip(),
+                        'model': event.get('provider', 'local'),
+                        'cancelled': event.get('cancelled', False),
+                        'truncated': event.get('truncated', False),
+                        'error': event.get('error'),
+                        'ttft_ms': event.get('ttft_ms'),
+                        'total_ms': event.get('total_ms')
+                    }
+                else:
+                    payload = {'error': event.get('error', 'AI backend not available')}
+                yield f"event: {event['type']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            cancel_event.set()
+            events.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _owned_chat_session(session_id: int):
+    """The current user's chat session, or None"""
+    from flask_login import current_user
+    from ...models import ChatSession
+    return ChatSession.query.filter_by(id=session_id, user_id=current_user.id).first()
+
+
+@chat_bp.route('/sessions/<int:session_id>/messages', methods=['GET'])
+@test_mode_login_required
+@handle_api_errors
+def chat_session_messages(session_id):
+    """Page through a saved chat session: newest first page, ?before=<seq> for older, ?after=<seq> for newer"""
+    log_api_request(request.endpoint, request.method)
+    
+    from ...utils.api_response_utils import format_error_response, format_success_response
+    
+    session = _owned_chat_session(session_id)
+    if session is None:
+        return format_error_response('Chat session not found', 'not_found', 404)
+    
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+    messages = session.page_messages(
+        limit=limit,
+        before_seq=request.args.get('before', type=int),
+        after_seq=request.args.get('after', type=int)
+    )
+    return format_success_response({
+        'session_id': session_id,
+        'messages': messages,
+        'message_count': session.message_count,
+        'has_more': len(messages) == limit
+    })
+
+
+@chat_bp.route('/sessions/<int:session_id>/export', methods=['GET'])
+@test_mode_login_required
+@handle_api_errors
+def export_chat_session(session_id):
+    """
+    Stream a saved chat session as JSON Lines, one message per line. The
+    history is read in batches, so long sessions are never loaded whole.
+    """
+    log_api_request(request.endpoint, request.method)
+    
+    from ...utils.api_response_utils import format_error_response
+    
+    session = _owned_chat_session(session_id)
+    if session is None:
+        return format_error_response('Chat session not found', 'not_found', 404)
+    
+    def generate():
+        for message in session.iter_messages():
+            yield json.dumps(message) + "\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename=chat_session_{session_id}.jsonl'}
+    )
@@ -0,0 +1,161 @@
+"""
+Token Streaming Helpers for Chat
+================================
+
+Shared pieces of the streaming chat path used by the WebSocket handlers:
+
+    - ActiveStreams: tracks in-flight streams per client so a 'chat_cancel'
+      event or a disconnect can abort the upstream LLM request.
+    - TokenStreamEmitter: turns the per-token iterator from
+      LLMBackendManager.stream_chat() into 'chat_token' events. Tokens are
+      coalesced on a short interval, and when the client acknowledges events
+      the number of unacknowledged events is bounded; a slow client receives
+      fewer, larger chunks instead of an unbounded backlog. A client that
+      stops acknowledging altogether is dropped once the buffer reaches its cap.
+"""
+
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+
+class ActiveStreams:
+    """Registry of cancellable streams keyed by stream id and owning client"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams: Dict[str, Dict[str, Any]] = {}
+        self._by_client: Dict[str, set] = {}
+
+    def register(self, client_id: str) -> Dict[str, Any]:
+        """Create a stream for ``client_id``; returns {'stream_id', 'cancel_event'}"""
+        stream = {'stream_id': uuid.uuid4().hex, 'cancel_event': threading.Event(),
+                  'client_id': client_id, 'started_at': time.time()}
+        with self._lock:
+            self._streams[stream['stream_id']] = stream
+            self._by_client.setdefault(client_id, set()).add(stream['stream_id'])
+        return stream
+
+    def cancel(self, stream_id: str, client_id: str) -> bool:
+        """Cancel a stream if it belongs to ``client_id``"""
+        with self._lock:
+            stream = self._streams.get(stream_id)
+            if not stream or stream['client_id'] != client_id:
+                return False
+            stream['cancel_event'].set()
+            return True
+
+    def cancel_client(self, client_id: str) -> int:
+        """Cancel every stream of a client, e.g. on disconnect"""
+        with self._lock:
+            stream_ids = list(self._by_client.get(client_id, ()))
+            for stream_id in stream_ids:
+                self._streams[stream_id]['cancel_event'].set()
+            return len(stream_ids)
+
+    def finish(self, stream_id: str):
+        with self._lock:
+            stream = self._streams.pop(stream_id, None)
+            if stream:
+                client_streams = self._by_client.get(stream['client_id'])
+                if client_streams is not None:
+                    client_streams.discard(stream_id)
+                    if not client_streams:
+                        del self._by_client[stream['client_id']]
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._streams)
+
+
+class TokenStreamEmitter:
+    """
+    Coalesce tokens into 'chat_token' events with optional ack-based backpressure.
+
+    Args:
+        emit: Callable(event, payload, callback=None) delivering one event
+        stream_id: Stream identifier included in every payload
+        flush_interval: Seconds tokens may be buffered before an event is sent
+        max_batch_chars: Buffered characters that force an event regardless of interval
+        ack_window: Maximum unacknowledged events; 0 disables acknowledgements
+        max_buffer_chars: Characters buffered behind a full ack window before the
+            client is dropped (``dropped`` becomes True and later tokens are discarded)
+    """
+
+    def __init__(self, emit: Callable[..., Any], stream_id: str, flush_interval: float = 0.03,
+                 max_batch_chars: int = 256, ack_window: int = 0, max_buffer_chars: int = 64 * 1024):
+        self.emit = emit
+        self.stream_id = stream_id
+        self.flush_interval = flush_interval
+        self.max_batch_chars = max_batch_chars
+        self.ack_window = max(0, ack_window)
+        self.max_buffer_chars = max(max_batch_chars, max_buffer_chars)
+        self.dropped = False
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._last_flush = 0.0
+        self._unacked = 0
+        self.events_sent = 0
+        self.tokens = 0
+
+    def push(self, token: str):
+        """Buffer a token and send an event if one is due"""
+        if self.dropped:
+            return
+        self._buffer.append(token)
+        self._buffered_chars += len(token)
+        self.tokens += 1
+        now = time.monotonic()
+        # The first token goes out immediately so time-to-first-token stays low
+        due = (self.events_sent == 0 or now - self._last_flush >= self.flush_interval
+               or self._buffered_chars >= self.max_batch_chars)
+        if not due:
+            return
+        if not self._window_full():
+            self._send(now)
+        elif self._buffered_chars >= self.max_buffer_chars:
+            # The client stopped acknowledging; stop holding its reply in memory
+            self.dropped = True
+            self._buffer = []
+            self._buffered_chars = 0
+
+    def flush(self):
+        """Send whatever is buffered, ignoring the ack window (end of stream)"""
+        if self._buffer and not self.dropped:
+            self._send(time.monotonic())
+
+    def _window_full(self) -> bool:
+        if not self.ack_window:
+            return False
+        with self._lock:
+            return self._unacked >= self.ack_window
+
+    def _send(self, now: float):
+        text = ''.join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = now
+        payload = {'stream_id': self.stream_id, 'token': text, 'index': self.events_sent}
+        self.events_sent += 1
+        if self.ack_window:
+            with self._lock:
+                self._unacked += 1
+            self.emit('chat_token', payload, callback=self._on_ack)
+        else:
+            self.emit('chat_token', payload)
+
+    def _on_ack(self, *args):
+        with self._lock:
+            self._unacked = max(0, self._unacked - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            unacked = self._unacked
+        return {'events_sent': self.events_sent, 'tokens': self.tokens, 'unacked': unacked,
+                'dropped': self.dropped}
+
+
+# Streams in flight across all WebSocket clients
+active_streams = ActiveStreams()
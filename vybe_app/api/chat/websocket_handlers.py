@@ -26,6 +26,9 @@ WebSocket Events:
     
     Client to Server:
         - 'message': Send chat message to AI or other users
+        - 'chat_message': Send a message to the AI; with ``stream: true`` the
+          reply arrives as 'chat_token' events
+        - 'chat_cancel': Abort a streaming reply by ``stream_id``
         - 'typing_start': Indicate user started typing
         - 'typing_stop': Indicate user stopped typing
         - 'join_room': Join a specific chat room or conversation
@@ -35,12 +38,16 @@ WebSocket Events:
     
     Server to Client:
         - 'message': Deliver chat message to client
+        - 'chat_stream_start': Streaming reply accepted, carries ``stream_id``
+        - 'chat_token': Incremental reply text for a stream
+        - 'chat_stream_end': Full reply, time-to-first-token, cancel and truncation status
         - 'typing': Broadcast typing indicators to room
         - 'user_joined': Notify when user joins room
         - 'user_left': Notify when user leaves room
         - 'error': Send error messages and status updates
         - 'pong': Heartbeat response to client ping
         - 'connection_status': Connection health information
+        - 'backend_status': LLM backend became ready or unready (broadcast)
 
 Connection Management:
     The WebSocketConnectionManager class provides sophisticated connection
@@ -126,12 +133,14 @@ Security Notes:
 """
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from flask import request
 from flask_socketio import emit, disconnect
 from flask_login import current_user
-from ...logger import log_info, log_error
-from .message_processor import process_chat_message
+from ...logger import log_info, log_warning, log_error
+from ...utils.connection_registry import ConnectionRegistry
+from .message_processor import process_chat_message, stream_chat_message
+from .streaming import active_streams, TokenStreamEmitter
 
 
 class WebSocketConnectionManager:
@@ -216,72 +225,116 @@ class WebSocketConnectionManager:
         ...     print("Connection rejected due to rate limits")
     """
     
-    def __init__(self):
-        self.active_connections = {}
-        self.max_connections_per_ip = 5
-        self.connection_timeout = 3600  # 1 hour
+    def __init__(self, max_connections_per_ip: int = 5, connection_timeout: int = 3600,
+                 max_connections: int = 1000):
+        # Indexed by sid, IP and user; expiry is heap-driven, so connect and
+        # disconnect stay O(1) however many clients are attached
+        self.registry = ConnectionRegistry(
+            max_per_ip=max_connections_per_ip,
+            max_connections=max_connections,
+            max_age=connection_timeout,
+            on_expire=self._log_expired
+        )
     
-    def add_connection(self, sid: str, ip: str) -> bool:
+    @property
+    def max_connections_per_ip(self) -> int:
+        return self.registry.max_per_ip
+    
+    @max_connections_per_ip.setter
+    def max_connections_per_ip(self, value: int):
+        self.registry.max_per_ip = value
+    
+    @property
+    def connection_timeout(self) -> float:
+        return self.registry.max_age
+    
+    @property
+    def active_connections(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot of sid -> connection info"""
+        return dict(self.registry.items())
+    
+    @staticmethod
+    def _log_expired(sid: str, conn_info: Dict[str, Any], reason: str):
+        log_info(f"Cleaned up {reason} WebSocket connection: {sid}")
+    
+    def add_connection(self, sid: str, ip: str, user_id: Optional[Any] = None) -> bool:
         """Add a new connection with rate limiting"""
-        current_time = time.time()
-        
-        # Clean up old connections
-        self._cleanup_old_connections(current_time)
-        
-        # Check connection limit per IP
-        ip_connections = sum(1 for conn in self.active_connections.values() 
-                           if conn.get('ip') == ip)
-        if ip_connections >= self.max_connections_per_ip:
-            return False
-        
-        # Track this connection
-        self.active_connections[sid] = {
+        return self.registry.add(sid, ip=ip, user_id=user_id, data={
             'ip': ip,
-            'connected_at': current_time,
+            'user_id': user_id,
+            'connected_at': time.time(),
             'message_count': 0,
             'last_message': 0
-        }
-        
-        return True
+        })
     
     def remove_connection(self, sid: str):
         """Remove a connection"""
-        if sid in self.active_connections:
-            del self.active_connections[sid]
-    
-    def _cleanup_old_connections(self, current_time: float):
-        """Clean up connections older than timeout"""
-        old_connections = []
-        for sid, conn_info in self.active_connections.items():
-            if current_time - conn_info['connected_at'] >= self.connection_timeout:
-                old_connections.append(sid)
-        
-        # Remove old connections
-        for sid in old_connections:
-            del self.active_connections[sid]
-            log_info(f"Cleaned up old WebSocket connection: {sid}")
-        
-        # Also clean up if we have too many connections
-        if len(self.active_connections) > 1000:  # Safety limit
-            # Remove oldest connections
-            sorted_connections = sorted(
-                self.active_connections.items(),
-                key=lambda x: x[1]['connected_at']
-            )
-            connections_to_remove = sorted_connections[:-500]  # Keep newest 500
-            for sid, _ in connections_to_remove:
-                del self.active_connections[sid]
-            log_info(f"Cleaned up {len(connections_to_remove)} excess WebSocket connections")
+        self.registry.remove(sid)
+    
+    def get_user_connections(self, user_id: Any) -> List[str]:
+        """Connection ids currently open for a user"""
+        return self.registry.sids_for_user(user_id)
     
     def get_connection_info(self, sid: str) -> Dict[str, Any]:
         """Get connection information"""
-        return self.active_connections.get(sid, {})
+        return self.registry.get(sid, {})
 
 
 # Global connection manager
 connection_manager = WebSocketConnectionManager()
 
 
+def run_chat_stream(socketio, sid: str, stream: Dict[str, Any], message: str,
+                    temperature: float, max_tokens: int, ack_window: int = 0):
+    """
+    Background task streaming one reply to a client as 'chat_token' events.
+    
+    Runs outside the Socket.IO event handler so the handler returns at once.
+    The stream's cancel event (set by 'chat_cancel' or disconnect) aborts the
+    upstream request.
+    """
+    stream_id = stream['stream_id']
+    
+    def emit_to_client(event, payload, callback=None):
+        socketio.emit(event, payload, to=sid, callback=callback)
+    
+    emitter = TokenStreamEmitter(emit_to_client, stream_id, ack_window=ack_window)
+    try:
+        for event in stream_chat_message(message, temperature=temperature, max_tokens=max_tokens,
+                                         cancel_event=stream['cancel_event']):
+            if event['type'] == 'token':
+                emitter.push(event['content'])
+                if emitter.dropped and not stream['cancel_event'].is_set():
+                    log_warning(f"Chat stream {stream_id} dropped: client stopped acknowledging tokens")
+                    stream['cancel_event'].set()
+            elif event['type'] == 'done':
+                emitter.flush()
+                emit_to_client('chat_stream_end', {
+                    'stream_id': stream_id,
+                    'response': event['content'].strip(),
+                    'model': event.get('provider', 'local'),
+                    'cancelled': event.get('cancelled', False),
+                    'truncated': event.get('truncated', False),
+                    'error': event.get('error'),
+                    'ttft_ms': event.get('ttft_ms'),
+                    'total_ms': event.get('total_ms'),
+                    'events': emitter.events_sent,
+                    'timestamp': time.time()
+                })
+                log_info(f"Chat stream {stream_id} finished: ttft={event.get('ttft_ms')}ms "
+                         f"total={event.get('total_ms')}ms tokens={event.get('tokens')} "
+                         f"cancelled={event.get('cancelled', False)} "
+                         f"truncated={event.get('truncated', False)}")
+            elif event['type'] == 'error':
+                emitter.flush()
+                emit_to_client('error', {'message': event['error'], 'stream_id': stream_id})
+    except Exception as e:
+        log_error(f"WebSocket chat stream error: {str(e)}")
+        emit_to_client('error', {'message': 'Internal server error', 'stream_id': stream_id})
+    finally:
+        active_streams.finish(stream_id)
+
+
 def register_chat_socketio_handlers(socketio):
     """Register WebSocket event handlers for chat"""
     
@@ -301,7 +354,7 @@ def register_chat_socketio_handlers(socketio):
             # We'll use a combination of user ID and timestamp as identifier
             connection_id = f"user_{current_user.id}_{int(current_time)}"
             
-            if not connection_manager.add_connection(connection_id, client_ip):
+            if not connection_manager.add_connection(connection_id, client_ip, user_id=current_user.id):
                 log_info(f"WebSocket connection rejected: {connection_id} from {client_ip} (rate limit)")
                 return False
             
@@ -322,6 +375,8 @@ def register_chat_socketio_handlers(socketio):
         """Handle WebSocket disconnection"""
         try:
             from flask import session
+            # Abort any replies still streaming to this client
+            active_streams.cancel_client(request.sid)
             connection_id = session.get('ws_connection_id')
             if connection_id:
                 connection_manager.remove_connection(connection_id)
@@ -361,6 +416,17 @@ def register_chat_socketio_handlers(socketio):
                 emit('error', {'message': 'Invalid message'})
                 return
             
+            if data.get('stream'):
+                # Stream from a background task; tokens arrive as 'chat_token' events
+                stream = active_streams.register(request.sid)
+                emit('chat_stream_start', {'stream_id': stream['stream_id'], 'timestamp': current_time})
+                socketio.start_background_task(
+                    run_chat_stream, socketio, request.sid, stream, message,
+                    data.get('temperature', 0.7), data.get('max_tokens', 1024),
+                    int(data.get('ack_window', 0) or 0)
+                )
+                return
+            
             # Process message
             result = process_chat_message(
                 message,
@@ -381,6 +447,16 @@ def register_chat_socketio_handlers(socketio):
             log_error(f"WebSocket chat message error: {str(e)}")
             emit('error', {'message': 'Internal server error'})
     
+    @socketio.on('chat_cancel')
+    def handle_chat_cancel(data):
+        """Cancel a streaming reply owned by this client"""
+        try:
+            stream_id = (data or {}).get('stream_id', '')
+            if not active_streams.cancel(stream_id, request.sid):
+                emit('error', {'message': 'Stream not found', 'stream_id': stream_id})
+        except Exception as e:
+            log_error(f"WebSocket chat cancel error: {str(e)}")
+    
     @socketio.on('typing_start')
     def handle_typing_start():
         """Handle typing start event"""
@@ -402,3 +478,12 @@ def register_chat_socketio_handlers(socketio):
             emit('user_stopped_typing', {'user': user_id}, broadcast=True, include_self=False)
         except Exception as e:
             log_error(f"WebSocket typing stop error: {str(e)}")
+    
+    # Push backend readiness transitions instead of having clients poll for them
+    from ...utils.backend_liveness import get_backend_liveness
+    
+    def broadcast_backend_status(event):
+        socketio.emit('backend_status', {'ready': event['to'] == 'ready', 'state': event['to'],
+                                         'timestamp': event['timestamp']})
+    
+    get_backend_liveness().add_listener(broadcast_backend_status)
@@ -8,14 +8,11 @@ from flask_login import login_required, current_user
 from datetime import datetime
 import json
 
-from ..core.collaboration_manager import CollaborationManager, CollaborationType, UserRole, SessionStatus
+from ..core.collaboration_manager import collaboration_manager, CollaborationType, UserRole, SessionStatus
 from ..logger import log_info, log_error
 
 collaboration_bp = Blueprint('collaboration', __name__, url_prefix='/api/collaboration')
 
-# Initialize collaboration manager
-collaboration_manager = CollaborationManager()
-
 
 @collaboration_bp.route('/sessions', methods=['GET'])
 @login_required
@@ -174,12 +171,19 @@ def leave_session(session_id):
 @collaboration_bp.route('/sessions/<session_id>/messages', methods=['GET'])
 @login_required
 def get_messages(session_id):
-    """Get messages for a collaboration session"""
+    """Get a page of messages; ?before=<message id> pages back, ?after=<message id> fetches newer ones"""
     try:
-        messages = collaboration_manager.get_session_messages(session_id)
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        messages = collaboration_manager.get_session_messages(
+            session_id,
+            limit=limit,
+            before_id=request.args.get('before'),
+            after_id=request.args.get('after')
+        )
         return jsonify({
             'success': True,
-            'messages': messages
+            'messages': messages,
+            'has_more': len(messages) == limit
         })
     except Exception as e:
         log_error(f"Error getting collaboration messages: {e}")
@@ -94,21 +94,43 @@ def get_llm_config():
 @llm_bp.route('/ready', methods=['GET'])
 @test_mode_login_required
 def llm_ready():
-    """Lightweight readiness endpoint for the desktop loader/UI."""
+    """Lightweight readiness endpoint for the desktop loader/UI (served from memory)."""
     try:
-        import requests as _rq
-        ok = False
-        try:
-            r = _rq.get('http://127.0.0.1:11435/v1/models', timeout=2)
-            ok = (r.status_code == 200)
-        except Exception:
-            ok = False
-        return jsonify({'success': True, 'ready': ok})
+        from ..utils.backend_liveness import get_backend_liveness
+        liveness = get_backend_liveness('http://127.0.0.1:11435')
+        ok = liveness.is_ready()
+        status = liveness.get_status()
+        return jsonify({'success': True, 'ready': ok, 'state': status['state'],
+                        'transitions': status['transitions']})
     except Exception as e:
         log_error(f"LLM ready check error: {e}")
         return jsonify({'success': False, 'ready': False}), 200
 
 
+@llm_bp.route('/prompt-cache', methods=['GET'])
+@test_mode_login_required
+def llm_prompt_cache_stats():
+    """Prompt prefix cache mode and cached vs. evaluated prompt tokens per request."""
+    try:
+        from ..utils.prompt_cache import get_prompt_cache_metrics
+        return jsonify({'success': True, 'prompt_cache': get_prompt_cache_metrics().get_stats()})
+    except Exception as e:
+        log_error(f"LLM prompt cache stats error: {e}")
+        return jsonify({'success': False, 'error': 'Failed to get prompt cache stats'}), 500
+
+
+@llm_bp.route('/scheduler', methods=['GET'])
+@test_mode_login_required
+def llm_scheduler_stats():
+    """Slots, queue depth and queue-time percentiles per request class."""
+    try:
+        from ..utils.llm_scheduler import get_llm_scheduler
+        return jsonify({'success': True, 'scheduler': get_llm_scheduler().get_stats()})
+    except Exception as e:
+        log_error(f"LLM scheduler stats error: {e}")
+        return jsonify({'success': False, 'error': 'Failed to get scheduler stats'}), 500
+
+
 @llm_bp.route('/config', methods=['POST'])
 @test_mode_login_required
 def set_llm_config():
@@ -258,7 +258,7 @@ def api_rag_documents():
     """Get list of RAG documents"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, list_rag_documents_metadata
+        from ..rag.vector_db import initialize_vector_db, vector_db_client, list_rag_documents_metadata
         import os
         
         # Get the collection name from query parameters
@@ -268,13 +268,12 @@ def api_rag_documents():
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
         try:
-            # Initialize ChromaDB client
-            chroma_client = initialize_vector_db(rag_data_path)
-            
-            if chroma_client:
+            # Initialize (or reuse) the shared ChromaDB connection pool
+            if initialize_vector_db(rag_data_path):
                 try:
                     # Get documents from the specified collection
-                    documents = list_rag_documents_metadata(chroma_client, collection_name)
+                    with vector_db_client(rag_data_path) as chroma_client:
+                        documents = list_rag_documents_metadata(chroma_client, collection_name)
                     
                     # If no documents, return helpful default data
                     if not documents:
@@ -384,41 +383,51 @@ def api_rag_collection_documents(collection_name):
     """Get list of RAG documents for a specific collection"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, list_rag_documents_metadata
+        from ..rag.vector_db import (
+            initialize_vector_db, vector_db_client, list_rag_documents_metadata, count_rag_documents
+        )
         import os
         
+        # Optional pagination
+        offset = max(0, request.args.get('offset', 0, type=int) or 0)
+        limit = request.args.get('limit', None, type=int)
+        
         # Get the RAG data path
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
         try:
-            # Initialize ChromaDB client
-            chroma_client = initialize_vector_db(rag_data_path)
-            
-            if chroma_client:
+            # Initialize (or reuse) the shared ChromaDB connection pool
+            if initialize_vector_db(rag_data_path):
                 try:
-                    # Get documents from the specified collection
-                    documents = list_rag_documents_metadata(chroma_client, collection_name)
+                    # Get one page of documents from the specified collection
+                    with vector_db_client(rag_data_path) as chroma_client:
+                        documents = list_rag_documents_metadata(chroma_client, collection_name, offset=offset, limit=limit)
+                        total = count_rag_documents(chroma_client, collection_name)
                     
                     # Transform documents to match expected frontend format
                     formatted_documents = []
                     for doc in documents:
+                        byte_size = doc.get('byte_size')
                         formatted_documents.append({
                             'id': doc.get('id', 'unknown'),
                             'filename': doc.get('source', 'Unknown Source'),
                             'title': doc.get('source', 'Unknown Source'),
                             'content_preview': doc.get('snippet', 'No content preview available'),
                             'document_type': 'text',
-                            'file_size': 'Unknown',
-                            'upload_date': '2025-01-01T00:00:00Z',
+                            'file_size': f"{byte_size / 1024:.1f} KB" if byte_size else 'Unknown',
+                            'upload_date': doc.get('created_at', '2025-01-01T00:00:00Z'),
                             'source_url': doc.get('source', ''),
-                            'chunk_count': 1,
+                            'chunk_count': doc.get('chunk_count', 1),
                             'status': 'Ready'
                         })
                     
                     return jsonify({
                         'success': True,
                         'documents': formatted_documents,
-                        'collection_name': collection_name
+                        'collection_name': collection_name,
+                        'total': total,
+                        'offset': offset,
+                        'limit': limit
                     })
                     
                 except Exception as list_error:
@@ -837,83 +846,61 @@ def api_upload_files_to_collection(collection_name):
 def process_uploaded_files_job(collection_name, uploaded_files, temp_dir, user_id):
     """Background job to process uploaded files"""
     try:
-        from ..rag.vector_db import initialize_vector_db, get_connection_pool
-        from ..rag.text_processing import chunk_text, process_pdf_content, process_text_file
-        from ..config import Config
+        from ..rag.ingestion import file_source, ingest_sources
+        from ..rag.text_processing import process_pdf_content, process_text_file
         from ..models import AppSetting
         from ..core.job_manager import job_manager
-        import shutil
-        
-        # Initialize vector database
-        init_success = initialize_vector_db(Config.RAG_VECTOR_DB_PATH)
-        if not init_success:
-            raise Exception("Failed to initialize vector database")
-        
-        # Get connection pool
-        pool = get_connection_pool()
-        if not pool:
-            raise Exception("Connection pool not available")
-        
-        # Get or create collection
-        with pool.get_connection() as vector_db:
-            try:
-                collection = vector_db.get_collection(collection_name)
-            except Exception as e:
-                logger.warning(f"Failed to get collection {collection_name}, creating new one: {e}")
-                collection = vector_db.create_collection(collection_name)
         
         # Check if RAG auto-processing is enabled
         rag_setting = AppSetting.query.filter_by(key='rag_auto_processing').first()
         auto_processing = rag_setting.value == 'true' if rag_setting else True
         
         processed_count = 0
+        pipeline_sources = []
         for file_info in uploaded_files:
             try:
-                # Process the file
                 file_path = file_info['path']
                 filename = file_info['filename']
-                
-                # Read and process file content based on type
-                content = None
-                if filename.lower().endswith('.txt') or filename.lower().endswith('.md'):
-                    content = process_text_file(file_path)
-                elif filename.lower().endswith('.pdf'):
-                    content = process_pdf_content(file_path)
-                
-                if not content:
+                if not filename.lower().endswith(('.txt', '.md', '.pdf')):
                     continue
                 
                 # If auto-processing is enabled, add document processing job
                 if auto_processing:
+                    if filename.lower().endswith('.pdf'):
+                        # PDF parsing is CPU-bound; keep it off the threads serving requests
+                        content = job_manager.run_in_process(process_pdf_content, (file_path,), timeout=300)
+                    else:
+                        content = process_text_file(file_path)
+                    
+                    if not content:
+                        continue
+                    
                     job_manager.add_document_processing_job(content, filename, collection_name)
                     print(f"✅ Queued {filename} for backend LLM processing")
+                    processed_count += 1
                 else:
-                    # Regular processing without LLM enhancement
-                    # Split content into chunks
-                    chunks = chunk_text(content, Config.RAG_CHUNK_SIZE, Config.RAG_CHUNK_OVERLAP)
-                    
-                    # Add chunks to collection
-                    for i, chunk in enumerate(chunks):
-                        doc_id = f"{filename}_chunk_{i}"
-                        collection.add(
-                            documents=[chunk],
-                            metadatas=[{
-                                'source': filename,
-                                'chunk_index': i,
-                                'total_chunks': len(chunks),
-                                'user_id': user_id
-                            }],
-                            ids=[doc_id]
-                        )
-                    
-                    print(f"✅ Processed {filename} without LLM enhancement")
-                
-                processed_count += 1
+                    # Regular processing without LLM enhancement goes through the
+                    # batched ingestion pipeline below
+                    pipeline_sources.append(file_source(
+                        file_path,
+                        source_id=filename,
+                        metadata={'user_id': user_id},
+                        id_prefix=filename,
+                        chunk_tag='chunk'
+                    ))
                 
             except Exception as e:
                 print(f"Error processing file {file_info['filename']}: {str(e)}")
                 continue
         
+        if pipeline_sources:
+            result = ingest_sources(collection_name, pipeline_sources)
+            processed_count += result.sources_ingested
+            for filename, error in result.failed_sources.items():
+                print(f"Error processing file {filename}: {error}")
+            print(f"✅ Processed {result.sources_ingested} files without LLM enhancement "
+                  f"({result.chunks_ingested} chunks in {result.batches_written} batches)")
+        
         print(f"Processed {processed_count}/{len(uploaded_files)} files for collection {collection_name}")
         
     except Exception as e:
@@ -965,10 +952,8 @@ def api_load_url_to_collection(collection_name):
 def process_url_job(collection_name, url, user_id):
     """Background job to process URL content"""
     try:
-        from ..rag.vector_db import initialize_vector_db, get_connection_pool
-        from ..rag.text_processing import chunk_text
+        from ..rag.ingestion import text_source, ingest_sources
         from ..web_loader import load_web_content
-        from ..config import Config
         
         # Load web content
         content = load_web_content(url)
@@ -976,43 +961,15 @@ def process_url_job(collection_name, url, user_id):
             print(f"Failed to load content from URL: {url}")
             return
         
-        # Initialize vector database
-        init_success = initialize_vector_db(Config.RAG_VECTOR_DB_PATH)
-        if not init_success:
-            raise Exception("Failed to initialize vector database")
-        
-        # Get connection pool
-        pool = get_connection_pool()
-        if not pool:
-            raise Exception("Connection pool not available")
+        # Chunk, embed and upsert in batches through the ingestion pipeline
+        result = ingest_sources(collection_name, [text_source(
+            url,
+            content,
+            metadata={'user_id': user_id, 'content_type': 'web_page'},
+            id_prefix=f"url_{hash(url)}"
+        )])
         
-        # Get or create collection
-        with pool.get_connection() as vector_db:
-            try:
-                collection = vector_db.get_collection(collection_name)
-            except Exception as e:
-                logger.warning(f"Failed to get collection {collection_name}, creating new one: {e}")
-                collection = vector_db.create_collection(collection_name)
-            
-            # Split content into chunks
-            chunks = chunk_text(content, Config.RAG_CHUNK_SIZE, Config.RAG_CHUNK_OVERLAP)
-            
-            # Add chunks to collection
-            for i, chunk in enumerate(chunks):
-                doc_id = f"url_{hash(url)}_{i}"
-                collection.add(
-                    documents=[chunk],
-                    metadatas=[{
-                        'source': url,
-                        'chunk_index': i,
-                        'total_chunks': len(chunks),
-                        'user_id': user_id,
-                        'content_type': 'web_page'
-                    }],
-                    ids=[doc_id]
-                )
-            
-            print(f"Processed URL {url} into {len(chunks)} chunks for collection {collection_name}")
+        print(f"Processed URL {url} into {result.chunks_ingested} chunks for collection {collection_name}")
         
     except Exception as e:
         print(f"Error in URL processing job: {str(e)}")
@@ -1091,19 +1048,19 @@ def api_get_document(collection_name, doc_id):
     """Get a specific document's full content"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, get_document_full_content
+        from ..rag.vector_db import initialize_vector_db, vector_db_client, get_document_full_content
         import os
         
         # Get the RAG data path
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
-        # Initialize ChromaDB client
-        chroma_client = initialize_vector_db(rag_data_path)
-        if not chroma_client:
+        # Initialize (or reuse) the shared ChromaDB connection pool
+        if not initialize_vector_db(rag_data_path):
             return jsonify({'error': 'ChromaDB not available'}), 500
         
         # Get document content
-        document = get_document_full_content(chroma_client, collection_name, doc_id)
+        with vector_db_client(rag_data_path) as chroma_client:
+            document = get_document_full_content(chroma_client, collection_name, doc_id)
         if not document:
             return jsonify({'error': 'Document not found'}), 404
         
@@ -1121,7 +1078,7 @@ def api_update_document(collection_name, doc_id):
     """Update an existing document"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, update_document_in_rag
+        from ..rag.vector_db import initialize_vector_db, vector_db_client, update_document_in_rag
         import os
         
         data = request.get_json()
@@ -1137,13 +1094,13 @@ def api_update_document(collection_name, doc_id):
         # Get the RAG data path
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
-        # Initialize ChromaDB client
-        chroma_client = initialize_vector_db(rag_data_path)
-        if not chroma_client:
+        # Initialize (or reuse) the shared ChromaDB connection pool
+        if not initialize_vector_db(rag_data_path):
             return jsonify({'error': 'ChromaDB not available'}), 500
         
         # Update document
-        success = update_document_in_rag(chroma_client, collection_name, doc_id, source, content)
+        with vector_db_client(rag_data_path) as chroma_client:
+            success = update_document_in_rag(chroma_client, collection_name, doc_id, source, content)
         if not success:
             return jsonify({'error': 'Failed to update document'}), 500
         
@@ -1161,19 +1118,19 @@ def api_delete_document(collection_name, doc_id):
     """Delete a specific document"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, delete_rag_document_by_id
+        from ..rag.vector_db import initialize_vector_db, vector_db_client, delete_rag_document_by_id
         import os
         
         # Get the RAG data path
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
-        # Initialize ChromaDB client
-        chroma_client = initialize_vector_db(rag_data_path)
-        if not chroma_client:
+        # Initialize (or reuse) the shared ChromaDB connection pool
+        if not initialize_vector_db(rag_data_path):
             return jsonify({'error': 'ChromaDB not available'}), 500
         
         # Delete document
-        success = delete_rag_document_by_id(chroma_client, collection_name, doc_id)
+        with vector_db_client(rag_data_path) as chroma_client:
+            success = delete_rag_document_by_id(chroma_client, collection_name, doc_id)
         if not success:
             return jsonify({'error': 'Failed to delete document or document not found'}), 404
         
@@ -1191,7 +1148,7 @@ def api_create_document(collection_name):
     """Create a new document in the collection"""
     log_api_request(request.endpoint, request.method)
     try:
-        from ..rag.vector_db import initialize_vector_db, add_single_document_to_rag
+        from ..rag.vector_db import initialize_vector_db, vector_db_client, add_single_document_to_rag
         import os
         import uuid
         
@@ -1209,13 +1166,13 @@ def api_create_document(collection_name):
         # Get the RAG data path
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
         
-        # Initialize ChromaDB client
-        chroma_client = initialize_vector_db(rag_data_path)
-        if not chroma_client:
+        # Initialize (or reuse) the shared ChromaDB connection pool
+        if not initialize_vector_db(rag_data_path):
             return jsonify({'error': 'ChromaDB not available'}), 500
         
         # Add document
-        success = add_single_document_to_rag(chroma_client, collection_name, doc_id, source, content)
+        with vector_db_client(rag_data_path) as chroma_client:
+            success = add_single_document_to_rag(chroma_client, collection_name, doc_id, source, content)
         if not success:
             return jsonify({'error': 'Failed to create document'}), 500
         
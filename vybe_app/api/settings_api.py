@@ -542,6 +542,16 @@ def api_providers():
                 db.session.add(config)
             config.set_value(data.get('routing_mode') or 'prefer_local')
 
+        db.session.commit()
+
+        if 'default_provider' in data or 'routing_mode' in data:
+            # Refresh the routing snapshot the chat path reads
+            from ..utils.llm_backend_manager import get_llm_backend_manager
+            get_llm_backend_manager().update_routing_policy(
+                routing_mode=(data.get('routing_mode') or 'prefer_local') if 'routing_mode' in data else None,
+                default_provider=(data.get('default_provider') or 'local') if 'default_provider' in data else None
+            )
+
         log_user_action(getattr(current_user, 'id', None), f"Updated API providers: {list(updated.keys())}")
         return format_success_response({ 'success': True, 'updated': updated })
 
@@ -59,24 +59,32 @@ def register_file_commands(app):
                 
                 # Process content - use lazy imports to avoid deep import chains
                 try:
-                    from vybe_app.rag.text_processing import chunk_text
-                    from vybe_app.rag.vector_db import add_content_to_vector_db, initialize_vector_db
+                    from vybe_app.rag.ingestion import ingest_sources, text_source
+                    from vybe_app.rag.vector_db import initialize_vector_db
                     from vybe_app.config import Config
                 except ImportError:
                     click.echo("Error: RAG modules not available", err=True)
                     return
                 
-                # Initialize ChromaDB client
-                chroma_client = initialize_vector_db(Config.RAG_VECTOR_DB_PATH)
-                if not chroma_client:
+                # Initialize (or reuse) the shared ChromaDB connection pool
+                if not initialize_vector_db(Config.RAG_VECTOR_DB_PATH):
                     click.echo("Error: Failed to initialize ChromaDB client", err=True)
                     return
                 
-                chunks = chunk_text(content)
-                add_content_to_vector_db(chroma_client, 'vybe_documents', filepath, chunks)
+                # Chunk, embed and upsert in batches through the same pipeline as ingest-folder
+                result = ingest_sources('vybe_documents', [text_source(filepath, content)])
+                if not result.success:
+                    error = result.failed_sources.get(filepath, 'no chunks were written')
+                    click.echo(f"Error ingesting file {filepath}: {error}", err=True)
+                    log_command_usage('ingest-file', success=False, details={'filepath': filepath, 'error': error})
+                    return
                 
                 click.echo(f"Successfully ingested content from {filepath}.")
-                log_command_usage('ingest-file', success=True, details={'filepath': filepath, 'chunks': len(chunks)})
+                log_command_usage('ingest-file', success=True, details={
+                    'filepath': filepath,
+                    'chunks': result.chunks_ingested,
+                    'batches': result.batches_written
+                })
                 
         except Exception as e:
             log_error(f"Error ingesting file {filepath}: {e}")
@@ -98,22 +106,27 @@ def register_file_commands(app):
                 
                 # Import RAG modules - use lazy imports to avoid deep import chains
                 try:
-                    from vybe_app.rag.text_processing import chunk_text
-                    from vybe_app.rag.vector_db import add_content_to_vector_db, initialize_vector_db
+                    from vybe_app.rag.ingestion import IngestionSource, ingest_sources
+                    from vybe_app.rag.vector_db import initialize_vector_db
                     from vybe_app.config import Config
                 except ImportError:
                     click.echo("Error: RAG modules not available", err=True)
                     return
                 
-                # Initialize ChromaDB client once for the entire folder operation
-                chroma_client = initialize_vector_db(Config.RAG_VECTOR_DB_PATH)
-                if not chroma_client:
+                # Initialize the shared ChromaDB connection pool once for the entire folder operation
+                if not initialize_vector_db(Config.RAG_VECTOR_DB_PATH):
                     click.echo("Error: Failed to initialize ChromaDB client", err=True)
                     return
                 
-                processed_files = 0
-                total_chunks = 0
+                def load_validated(path):
+                    # Runs on an ingestion worker so reading overlaps with embedding
+                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+                    if not validate_content(content):
+                        raise ValueError("invalid content")
+                    yield content
                 
+                sources = []
                 for root, _, files in os.walk(folderpath):
                     for file in files:
                         filepath = os.path.join(root, file)
@@ -122,42 +135,36 @@ def register_file_commands(app):
                         if not file.lower().endswith(('.txt', '.md', '.html', '.json', '.py', '.js', '.css')):
                             continue
                         
-                        try:
-                            # Validate file access
-                            if not validate_file_access(filepath):
-                                click.echo(f"Skipping {filepath} - access denied")
-                                continue
-                            
-                            # Check file size
-                            size_ok, _ = validate_file_size(filepath, max_size_mb=50)
-                            if not size_ok:
-                                click.echo(f"Skipping {filepath} - file too large")
-                                continue
-                            
-                            # Read and process file
-                            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                                content = f.read()
-                            
-                            if not validate_content(content):
-                                click.echo(f"Skipping {filepath} - invalid content")
-                                continue
-                            
-                            chunks = chunk_text(content)
-                            add_content_to_vector_db(chroma_client, 'vybe_documents', filepath, chunks)
-                            
-                            processed_files += 1
-                            total_chunks += len(chunks)
-                            click.echo(f"Ingested: {filepath}")
-                            
-                        except Exception as e:
-                            click.echo(f"Skipping {filepath} due to error: {e}", err=True)
+                        # Validate file access
+                        if not validate_file_access(filepath):
+                            click.echo(f"Skipping {filepath} - access denied")
+                            continue
+                        
+                        # Check file size
+                        size_ok, _ = validate_file_size(filepath, max_size_mb=50)
+                        if not size_ok:
+                            click.echo(f"Skipping {filepath} - file too large")
                             continue
+                        
+                        sources.append(IngestionSource(
+                            source_id=filepath,
+                            loader=lambda path=filepath: load_validated(path)
+                        ))
+                
+                # Read, chunk, embed and upsert all files through the batched pipeline
+                result = ingest_sources('vybe_documents', sources)
+                for filepath, error in result.failed_sources.items():
+                    click.echo(f"Skipping {filepath} due to error: {error}", err=True)
                 
+                processed_files = result.sources_ingested
+                total_chunks = result.chunks_ingested
                 click.echo(f"Successfully ingested {processed_files} files with {total_chunks} total chunks.")
                 log_command_usage('ingest-folder', success=True, details={
                     'folderpath': folderpath,
                     'processed_files': processed_files,
-                    'total_chunks': total_chunks
+                    'total_chunks': total_chunks,
+                    'batches': result.batches_written,
+                    'seconds': round(result.total_seconds, 2)
                 })
                 
         except Exception as e:
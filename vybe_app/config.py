@@ -185,6 +185,10 @@ class Config:
         'Permissions-Policy': 'camera=(), microphone=(), geolocation=()'
     }
     
+    # Threat Detection
+    THREAT_SCAN_SKIP_PREFIXES = [p.strip() for p in os.getenv('THREAT_SCAN_SKIP_PREFIXES', '/static/,/favicon.ico').split(',') if p.strip()]  # Paths not scanned
+    THREAT_SCAN_CACHE_SIZE = int(os.getenv('THREAT_SCAN_CACHE_SIZE', '4096'))  # Cached header/parameter verdicts
+    
     # Rate Limiting
     RATELIMIT_STORAGE_URL = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
     RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '1000 per hour')
@@ -240,7 +244,27 @@ class Config:
     LLM_BACKEND_TIMEOUT = int(os.getenv('LLM_BACKEND_TIMEOUT', '30'))
     # Hard minimum context tokens required for backend orchestrator/model
     REQUIRED_MIN_CONTEXT_TOKENS = int(os.getenv('VYBE_REQUIRED_MIN_CONTEXT', '32768'))
-    
+    LLM_CHAT_WORKERS = int(os.getenv('LLM_CHAT_WORKERS', '8'))  # Concurrent chat requests; sizes the backend connection pool
+    # Request scheduler in front of the local server (interactive > agent > background)
+    LLM_SERVER_SLOTS = int(os.getenv('LLM_SERVER_SLOTS', '1'))  # Requests the server processes at once
+    LLM_BACKGROUND_MAX_WAIT = float(os.getenv('LLM_BACKGROUND_MAX_WAIT', '120'))  # Seconds before queued background work is shed
+    LLM_BACKGROUND_QUEUE_LIMIT = int(os.getenv('LLM_BACKGROUND_QUEUE_LIMIT', '32'))  # Queued background requests before new ones are shed
+    # Background liveness tracking (readiness is read from memory on the chat path)
+    LLM_LIVENESS_PROBE_INTERVAL = float(os.getenv('LLM_LIVENESS_PROBE_INTERVAL', '10'))  # Seconds while ready
+    LLM_LIVENESS_RECOVERY_INTERVAL = float(os.getenv('LLM_LIVENESS_RECOVERY_INTERVAL', '2'))  # Seconds while down
+    LLM_LIVENESS_MAX_RECOVERY_INTERVAL = float(os.getenv('LLM_LIVENESS_MAX_RECOVERY_INTERVAL', '60'))  # Backoff cap while down
+    LLM_LIVENESS_PROBE_TIMEOUT = float(os.getenv('LLM_LIVENESS_PROBE_TIMEOUT', '3'))
+    LLM_LIVENESS_FAILURE_THRESHOLD = int(os.getenv('LLM_LIVENESS_FAILURE_THRESHOLD', '2'))  # Failed requests before down
+    # Prompt prefix (KV) cache on the local server: 'off', 'ram' or 'disk', with a byte budget
+    LLM_PROMPT_CACHE = os.getenv('LLM_PROMPT_CACHE', 'ram').lower()
+    LLM_PROMPT_CACHE_BYTES = int(os.getenv('LLM_PROMPT_CACHE_BYTES', str(2 << 30)))
+    # Token counting for context packing: 'model' (the GGUF tokenizer) or 'approximate'
+    CONTEXT_TOKENIZER = os.getenv('CONTEXT_TOKENIZER', 'model').lower()
+    # Sub-agents of orchestrated tasks running at the same time
+    AGENT_ORCHESTRATION_WORKERS = int(os.getenv('AGENT_ORCHESTRATION_WORKERS', '4'))
+    # Worker processes for CPU-bound background jobs (PDF/audio extraction); 0 runs them in threads
+    JOB_PROCESS_WORKERS = int(os.getenv('JOB_PROCESS_WORKERS', '2'))
+
     # RAG Configuration - Use user data directories
     @staticmethod
     def get_user_data_dir():
@@ -697,11 +721,49 @@ class Config:
     RAG_VECTOR_DB_PATH = os.getenv('RAG_VECTOR_DB_PATH', str(_user_data_dir / "rag_data" / "chroma_db"))
     RAG_CHUNK_SIZE = int(os.getenv('RAG_CHUNK_SIZE', '500'))
     RAG_CHUNK_OVERLAP = int(os.getenv('RAG_CHUNK_OVERLAP', '50'))
+    RAG_CHUNK_TOKENS = int(os.getenv('RAG_CHUNK_TOKENS', '256'))  # Token budget per chunk (token-aware chunker)
+    RAG_CHUNK_OVERLAP_TOKENS = int(os.getenv('RAG_CHUNK_OVERLAP_TOKENS', '32'))
+    RAG_INGEST_BATCH_SIZE = int(os.getenv('RAG_INGEST_BATCH_SIZE', '64'))  # Chunks per embed/upsert call
+    RAG_INGEST_WORKERS = int(os.getenv('RAG_INGEST_WORKERS', '4'))  # Read/extract worker threads
+    RAG_INGEST_MAX_PENDING_CHUNKS = int(os.getenv('RAG_INGEST_MAX_PENDING_CHUNKS', '512'))  # Backpressure bound
+    RAG_LEXICAL_INDEX_ENABLED = os.getenv('RAG_LEXICAL_INDEX_ENABLED', 'True').lower() in ('true', '1', 'yes', 'on')
+    RAG_RETRIEVAL_MODE = os.getenv('RAG_RETRIEVAL_MODE', 'vector')  # 'vector', 'lexical' or 'hybrid' (opt-in)
+    RAG_HYBRID_VECTOR_WEIGHT = float(os.getenv('RAG_HYBRID_VECTOR_WEIGHT', '0.6'))  # Lexical weight is 1 - this
+    RAG_HYBRID_KEYWORD_VECTOR_WEIGHT = float(os.getenv('RAG_HYBRID_KEYWORD_VECTOR_WEIGHT', '0.3'))  # Keyword-like queries
+    RAG_QUERY_CACHE_ENABLED = os.getenv('RAG_QUERY_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes', 'on')
+    RAG_QUERY_CACHE_SIZE = int(os.getenv('RAG_QUERY_CACHE_SIZE', '1024'))  # Cached queries
+    RAG_QUERY_CACHE_TTL = float(os.getenv('RAG_QUERY_CACHE_TTL', '600'))  # Seconds
+    RAG_QUERY_CACHE_SEMANTIC_THRESHOLD = float(os.getenv('RAG_QUERY_CACHE_SEMANTIC_THRESHOLD', '0'))  # Cosine; 0 = off
+    RAG_RETRIEVAL_WORKERS = int(os.getenv('RAG_RETRIEVAL_WORKERS', '4'))  # Concurrent collection queries
+    RAG_RETRIEVAL_TOP_K = int(os.getenv('RAG_RETRIEVAL_TOP_K', '8'))  # Chunks returned across all collections
+    RAG_RETRIEVAL_FUSION = os.getenv('RAG_RETRIEVAL_FUSION', 'score')  # 'score' (distance) or 'rrf'
+    RAG_RETRIEVAL_DEDUPE_THRESHOLD = float(os.getenv('RAG_RETRIEVAL_DEDUPE_THRESHOLD', '0.9'))
+    RAG_RETRIEVAL_TOKEN_BUDGET = int(os.getenv('RAG_RETRIEVAL_TOKEN_BUDGET', '2000'))  # 0 = unlimited
+    RAG_RETRIEVAL_TIMEOUT = float(os.getenv('RAG_RETRIEVAL_TIMEOUT', '10'))
+    DOCUMENT_SUMMARY_CACHE_PATH = os.getenv('DOCUMENT_SUMMARY_CACHE_PATH', str(_user_data_dir / "cache" / "document_summaries.sqlite3"))
+    DOCUMENT_SUMMARY_BATCH_SIZE = int(os.getenv('DOCUMENT_SUMMARY_BATCH_SIZE', '4'))  # Small documents per prompt; 1 = no batching
+    DOCUMENT_SUMMARY_BATCH_CHARS = int(os.getenv('DOCUMENT_SUMMARY_BATCH_CHARS', '1500'))  # Largest document that may be batched
     
     # File Management
     SECURE_WORKSPACE_PATH = os.getenv('SECURE_WORKSPACE_PATH', str(_user_data_dir / "workspace"))
     MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', '16777216'))  # 16MB
     ALLOWED_FILE_EXTENSIONS = os.getenv('ALLOWED_FILE_EXTENSIONS', '.txt,.md,.pdf,.json,.csv').split(',')
+    FILE_FINGERPRINT_DB_PATH = os.getenv('FILE_FINGERPRINT_DB_PATH', str(_user_data_dir / "cache" / "file_fingerprints.sqlite3"))
+    FILE_HASH_WORKERS = int(os.getenv('FILE_HASH_WORKERS', '2'))  # Background full-hash threads
+    MODEL_CATALOG_DB_PATH = os.getenv('MODEL_CATALOG_DB_PATH', str(_user_data_dir / "cache" / "model_catalog.sqlite3"))
+    DOWNLOAD_SEGMENTS = int(os.getenv('DOWNLOAD_SEGMENTS', '4'))  # Parallel range requests per model/plugin download
+    DOWNLOAD_MAX_RETRIES = int(os.getenv('DOWNLOAD_MAX_RETRIES', '5'))  # Consecutive failures allowed per segment
+    
+    # Collaboration Sessions
+    COLLABORATION_DB_PATH = os.getenv('COLLABORATION_DB_PATH', str(_user_data_dir / "collaboration.sqlite3"))
+    COLLABORATION_FLUSH_INTERVAL = float(os.getenv('COLLABORATION_FLUSH_INTERVAL', '0.5'))  # Seconds writes are batched before commit
+    
+    # Rate Limiting Core (shared by rate_limiter and security_middleware)
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH', str(_user_data_dir / "cache" / "rate_limits.sqlite3"))
+    RATE_LIMIT_SHARDS = int(os.getenv('RATE_LIMIT_SHARDS', '64'))  # Lock stripes
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))  # Tracked keys before LRU eviction
+    RATE_LIMIT_FLUSH_INTERVAL = float(os.getenv('RATE_LIMIT_FLUSH_INTERVAL', '1.0'))  # Seconds between SQLite write-backs
     
     # Logging Configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -5,6 +5,7 @@ with advanced planning, execution, and memory capabilities
 """
 
 import json
+import threading
 import time
 import uuid
 from datetime import datetime
@@ -14,6 +15,7 @@ from enum import Enum
 
 from ..logger import logger
 from ..tools import ai_write_file
+from .dag_executor import DAGExecutor, DAGNode, DAGRun
 
 
 class AgentStatus(Enum):
@@ -116,8 +118,8 @@ class Agent:
             'home_assistant': self._tool_home_assistant,
         }
         
-    def start(self):
-        """Start the agent execution"""
+    def start(self, blocking: bool = False):
+        """Start the agent execution; ``blocking`` runs it on the calling thread"""
         if self.status != AgentStatus.IDLE:
             logger.warning(f"Agent {self.id} is not idle, current status: {self.status}")
             return
@@ -128,7 +130,7 @@ class Agent:
         logger.info(f"🤖 Agent {self.id} started with objective: {self.objective}")
         
         # Submit to job manager for background execution
-        if self.job_manager:
+        if self.job_manager and not blocking:
             self.job_manager.add_job(self._execute)
         else:
             self._execute()
@@ -238,13 +240,14 @@ class Agent:
         """Create an execution plan using the backend LLM"""
         try:
             from ..core.backend_llm_controller import BackendLLMController
+            from ..utils.llm_scheduler import RequestClass
             backend_llm = BackendLLMController()
             
             # Construct planning prompt
             planning_prompt = self._build_planning_prompt(relevant_memories)
             
-            # Get LLM response
-            response = backend_llm.generate_response(planning_prompt)
+            # Get LLM response (queued behind interactive chat)
+            response = backend_llm.generate_response(planning_prompt, request_class=RequestClass.AGENT)
             
             # Parse the JSON plan from the response
             plan_json = self._extract_json_from_response(response)
@@ -274,6 +277,15 @@ class Agent:
             for i, memory in enumerate(relevant_memories, 1):
                 memory_context += f"{i}. {memory['content'][:200]}...\n"
         
+        # Results forwarded by the orchestrator from agents this one depends on
+        dependency_context = ""
+        dependency_results = {k: v for k, v in (self.memory.context or {}).items() if k.startswith("dependency_")}
+        if dependency_results:
+            dependency_context = "\n\nResults from previous agents:\n"
+            for key, result in sorted(dependency_results.items()):
+                summary = result.get('summary', '') if isinstance(result, dict) else str(result)
+                dependency_context += f"- {key}: {summary[:1000]}\n"
+        
         tools_list = ", ".join(self.authorized_tools)
         
         prompt = f"""You are an autonomous AI agent tasked with creating a detailed execution plan.
@@ -282,7 +294,7 @@ OBJECTIVE: {self.objective}
 
 AVAILABLE TOOLS: {tools_list}
 
-{memory_context}
+{memory_context}{dependency_context}
 
 Create a detailed step-by-step execution plan as a JSON array. Each step should specify the tool to use and its arguments.
 
@@ -686,6 +698,8 @@ class AgentManager:
         self.sub_agent_relationships: Dict[str, List[str]] = {}  # parent_id -> [child_ids]
         self.orchestrated_tasks: Dict[str, Dict] = {}  # task_id -> orchestration data
         self.notification_callbacks: List[Callable] = []  # For desktop notifications
+        self._dag_executor: Optional[DAGExecutor] = None
+        self._dag_executor_lock = threading.Lock()
         
     def create_agent(self, objective: str, system_prompt: str, 
                     authorized_tools: List[str]) -> str:
@@ -871,120 +885,158 @@ class AgentManager:
         logger.info(f"Created orchestrated task {orchestration_id} with {len(sub_tasks)} sub-agents")
         return orchestration_id
 
+    def _get_dag_executor(self) -> DAGExecutor:
+        """Shared pool for orchestrated sub-agents (Config.AGENT_ORCHESTRATION_WORKERS)"""
+        if self._dag_executor is None:
+            with self._dag_executor_lock:
+                if self._dag_executor is None:
+                    try:
+                        from ..config import Config
+                        workers = Config.AGENT_ORCHESTRATION_WORKERS
+                    except Exception:
+                        workers = 4
+                    self._dag_executor = DAGExecutor(max_workers=workers, thread_name_prefix="Orchestration")
+        return self._dag_executor
+
     def execute_orchestrated_task(self, orchestration_id: str) -> bool:
-        """Execute an orchestrated multi-agent task"""
+        """
+        Start an orchestrated multi-agent task and return immediately.
+        
+        Sub-agents run as a DAG: every agent whose dependencies have finished
+        starts at once, each completion releases its dependents together with
+        the dependency results, and a failure cancels everything downstream of it.
+        """
         if orchestration_id not in self.orchestrated_tasks:
             return False
         
         orch_data = self.orchestrated_tasks[orchestration_id]
-        orch_data['status'] = 'executing'
+        run = orch_data.get('run')
+        if run is not None and not run.done:
+            return True
         
-        # Execute agents based on dependencies
-        executed_agents = set()
-        
-        while len(executed_agents) < len(orch_data['sub_agent_ids']):
-            made_progress = False
-            
-            for i, (agent_id, task) in enumerate(zip(orch_data['sub_agent_ids'], orch_data['sub_tasks'])):
-                if agent_id in executed_agents:
-                    continue
-                
-                # Check if dependencies are met
-                dependencies = task.get('depends_on', [])
-                deps_met = all(orch_data['sub_agent_ids'][dep_idx] in executed_agents 
-                             for dep_idx in dependencies)
-                
-                if deps_met:
-                    # Pass results from dependent agents
-                    dep_results = {}
-                    for dep_idx in dependencies:
-                        dep_agent_id = orch_data['sub_agent_ids'][dep_idx]
-                        dep_results[f"dependency_{dep_idx}"] = orch_data['results'].get(dep_agent_id, {})
-                    
-                    # Add dependency results to agent's context
-                    if agent_id in self.agents:
-                        agent_memory = self.agents[agent_id].memory
-                        context = agent_memory.context
-                        if context is None:
-                            context = {}
-                            agent_memory.context = context
-                        if context is not None:  # Additional null check before update
-                            context.update(dep_results)
-                    
-                    # Start the agent
-                    if self.start_agent(agent_id):
-                        executed_agents.add(agent_id)
-                        made_progress = True
-                        logger.info(f"Started sub-agent {agent_id} for orchestration {orchestration_id}")
-            
-            if not made_progress:
-                logger.error(f"Orchestration {orchestration_id} stuck - circular dependencies or all agents failed")
-                orch_data['status'] = 'failed'
-                return False
-            
-            # Wait a bit before checking again
-            time.sleep(1)
+        sub_agent_ids = orch_data['sub_agent_ids']
+        try:
+            nodes = []
+            for agent_id, task in zip(sub_agent_ids, orch_data['sub_tasks']):
+                dependency_indexes = task.get('depends_on', [])
+                dependency_ids = {sub_agent_ids[dep_idx]: dep_idx for dep_idx in dependency_indexes}
+                nodes.append(DAGNode(
+                    node_id=agent_id,
+                    func=lambda results, agent_id=agent_id, dependency_ids=dependency_ids:
+                        self._run_orchestrated_agent(orch_data, agent_id, dependency_ids, results),
+                    depends_on=list(dependency_ids)
+                ))
+            orch_data['status'] = 'executing'
+            orch_data['run'] = self._get_dag_executor().submit(
+                nodes, on_complete=lambda run: self._finish_orchestration(orchestration_id, run)
+            )
+        except (IndexError, TypeError, ValueError) as e:
+            logger.error(f"Orchestration {orchestration_id} has an invalid dependency graph: {e}")
+            orch_data['status'] = 'failed'
+            orch_data['error'] = str(e)
+            return False
         
-        orch_data['status'] = 'monitoring'
+        logger.info(f"Started orchestration {orchestration_id} with {len(sub_agent_ids)} sub-agents")
         return True
 
+    def _run_orchestrated_agent(self, orch_data: Dict[str, Any], agent_id: str,
+                                dependency_ids: Dict[str, int], dependency_results: Dict[str, Any]) -> Dict[str, Any]:
+        """DAG node body: run one sub-agent to completion with its dependencies' results"""
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            raise RuntimeError(f"Agent {agent_id} no longer exists")
+        
+        # Add dependency results to agent's context
+        if agent.memory.context is None:
+            agent.memory.context = {}
+        for dep_agent_id, dep_idx in dependency_ids.items():
+            agent.memory.context[f"dependency_{dep_idx}"] = dependency_results.get(dep_agent_id, {})
+        
+        agent.start(blocking=True)
+        if agent.status != AgentStatus.COMPLETED:
+            raise RuntimeError(f"Agent {agent_id} finished with status {agent.status.value}")
+        
+        result = self._collect_agent_result(agent)
+        orch_data['results'][agent_id] = result
+        return result
+
+    @staticmethod
+    def _collect_agent_result(agent: Agent) -> Dict[str, Any]:
+        return {
+            'summary': agent._create_task_summary(),
+            'actions': [asdict(action) for action in agent.memory.actions],
+            'completed_at': agent.completed_at.isoformat() if agent.completed_at else None
+        }
+
+    def _finish_orchestration(self, orchestration_id: str, run: DAGRun):
+        """Completion event for an orchestration's DAG run"""
+        orch_data = self.orchestrated_tasks.get(orchestration_id)
+        if orch_data is None:
+            return
+        timing = run.timing_report()
+        orch_data['timing'] = timing
+        orch_data['completed_at'] = datetime.now().isoformat()
+        logger.info(f"Orchestration {orchestration_id} finished ({run.status}) in "
+                    f"{timing['elapsed_seconds']:.2f}s; critical path {timing['critical_path_seconds']:.2f}s "
+                    f"over {len(timing['critical_path'])} agents")
+        
+        if run.status == 'completed':
+            orch_data['status'] = 'completed'
+            self._send_notification(
+                "✅ Orchestrated Task Completed",
+                f"All agents completed: {orch_data['main_objective'][:50]}...",
+                "success",
+                orchestration_id
+            )
+        elif run.status == 'partially_failed':
+            orch_data['status'] = 'partially_failed'
+            self._send_notification(
+                "⚠️ Orchestrated Task Partially Failed",
+                f"Some agents failed in: {orch_data['main_objective'][:50]}...",
+                "warning",
+                orchestration_id
+            )
+        else:
+            orch_data['status'] = 'failed'
+            self._send_notification(
+                "❌ Orchestrated Task Failed",
+                f"No agent completed: {orch_data['main_objective'][:50]}...",
+                "error",
+                orchestration_id
+            )
+
     def get_orchestration_status(self, orchestration_id: str) -> Dict[str, Any]:
         """Get status of an orchestrated task"""
         if orchestration_id not in self.orchestrated_tasks:
             return {'error': 'Orchestration not found'}
         
         orch_data = self.orchestrated_tasks[orchestration_id]
+        run: Optional[DAGRun] = orch_data.get('run')
         
         # Check status of all sub-agents
         agent_statuses = {}
-        all_completed = True
-        any_failed = False
-        
         for agent_id in orch_data['sub_agent_ids']:
             if agent_id in self.agents:
                 agent = self.agents[agent_id]
+                node = run.nodes.get(agent_id) if run else None
                 agent_statuses[agent_id] = {
                     'status': agent.status.value,
-                    'objective': agent.objective
+                    'objective': agent.objective,
+                    'node_state': node.state.value if node else None
                 }
-                
-                if agent.status not in [AgentStatus.COMPLETED, AgentStatus.FAILED]:
-                    all_completed = False
-                elif agent.status == AgentStatus.FAILED:
-                    any_failed = True
-                elif agent.status == AgentStatus.COMPLETED:
-                    # Store results
-                    orch_data['results'][agent_id] = {
-                        'actions': [asdict(action) for action in agent.memory.actions],
-                        'completed_at': agent.completed_at.isoformat() if agent.completed_at else None
-                    }
-        
-        # Update orchestration status
-        if all_completed:
-            if any_failed:
-                orch_data['status'] = 'partially_failed'
-                self._send_notification(
-                    "⚠️ Orchestrated Task Partially Failed",
-                    f"Some agents failed in: {orch_data['main_objective'][:50]}...",
-                    "warning",
-                    orchestration_id
-                )
-            else:
-                orch_data['status'] = 'completed'
-                self._send_notification(
-                    "✅ Orchestrated Task Completed",
-                    f"All agents completed: {orch_data['main_objective'][:50]}...",
-                    "success",
-                    orchestration_id
-                )
         
-        return {
+        status = {
             'orchestration_id': orchestration_id,
             'status': orch_data['status'],
             'main_objective': orch_data['main_objective'],
             'agent_statuses': agent_statuses,
             'results_summary': len(orch_data['results'])
         }
+        if run is not None:
+            status['timing'] = orch_data.get('timing') or run.timing_report()
+        if orch_data.get('error'):
+            status['error_detail'] = orch_data['error']
+        return status
 
     def create_research_and_write_workflow(self, topic: str) -> str:
         """
@@ -679,10 +679,16 @@ def transcribe_audio(file_path: str, transcription_controller=None) -> Dict[str,
         }
 
 
+def _extract_audio_features(file_path: str) -> Dict[str, Any]:
+    """Module-level entry point so feature extraction can run in the job manager's process lane"""
+    return audio_processor.extract_audio_features(file_path)
+
+
 @cached(timeout=3600)
 def get_audio_features(file_path: str) -> Dict[str, Any]:
     """Get cached audio features"""
-    return audio_processor.extract_audio_features(file_path)
+    from .job_manager import job_manager
+    return job_manager.run_in_process(_extract_audio_features, (file_path,), timeout=600)
 
 
 def convert_audio_format(input_path: str, output_path: str, 
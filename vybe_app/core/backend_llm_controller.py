@@ -12,6 +12,10 @@ from pathlib import Path
 from typing import Optional, Dict, Any
 import logging
 
+from ..utils.backend_liveness import get_backend_liveness, get_backend_session
+from ..utils.prompt_cache import get_prompt_cache_metrics, prompt_cache_settings
+from ..utils.llm_scheduler import LLMRequestRejected, RequestClass, get_llm_scheduler
+
 logger = logging.getLogger(__name__)
 
 class BackendLLMController:
@@ -42,6 +46,8 @@ class BackendLLMController:
         self.server_host = server_host
         self.server_port = server_port
         self.server_url = f"http://{server_host}:{server_port}"
+        # Readiness is kept in memory by a background prober plus request outcomes
+        self.liveness = get_backend_liveness(self.server_url)
         # Create instance-level lock for this controller's operations
         self.cache_lock = self._cache_lock  # Use the class-level lock
         
@@ -152,6 +158,23 @@ class BackendLLMController:
             # Fallback to default models directory
             models_dirs = [Path("models")]
         
+        # Prefer the smallest local model whose GGUF header confirms the hard minimum context
+        catalog = None
+        try:
+            from .model_catalog import get_model_catalog
+            catalog = get_model_catalog()
+            for models_dir in models_dirs:
+                catalog.add_directory(models_dir)
+            entry = catalog.select_model(prefer_smallest=True)
+            if entry:
+                logger.info(f"Found {entry.context_length} context model: {entry.path}")
+                with self.cache_lock:
+                    BackendLLMController._model_cache = entry.path
+                    BackendLLMController._cache_timestamp = current_time
+                return entry.path
+        except Exception as e:
+            logger.warning(f"Model catalog lookup failed: {e}")
+        
         for models_dir in models_dirs:
             if not models_dir.exists():
                 logger.debug(f"Models directory does not exist: {models_dir}")
@@ -168,6 +191,10 @@ class BackendLLMController:
                 logger.debug(f"No GGUF files found in {models_dir}")
                 continue
             
+            # Drop files whose header shows too small a context; unknown context stays eligible
+            if catalog is not None:
+                gguf_files = [p for p in gguf_files if catalog.meets_min_context(p) is not False]
+            
             # Use ModelSourcesManager for smart model selection enforcing hard min context
             try:
                 from .model_sources_manager import get_model_sources_manager
@@ -260,35 +287,32 @@ class BackendLLMController:
         """
         if model_name:
             # Look for specific model by name
-            models_dir = Path(os.getcwd()) / "models"
-            if models_dir.exists():
-                for gguf_file in models_dir.glob("*.gguf"):
-                    if model_name.lower() in gguf_file.name.lower():
-                        return str(gguf_file)
-            return None
+            from .model_catalog import get_model_catalog
+            catalog = get_model_catalog()
+            catalog.add_directory(Path(os.getcwd()) / "models")
+            entry = catalog.get(model_name)
+            if entry is None:
+                lowered = model_name.lower()
+                entry = next((e for e in catalog.list_models() if lowered in e.filename.lower()), None)
+            return entry.path if entry else None
         else:
             # Return current model path or find any available model
             return self.model_path or self._find_model()
 
     def list_available_models(self) -> list:
         """List all available GGUF model files from all models directories"""
-        from ..config import Config
-        
-        models = []
-        models_dirs = Config.get_models_directories()
-        
-        for models_dir in models_dirs:
-            if not models_dir.exists():
-                continue
-                
-            for gguf_file in models_dir.glob("*.gguf"):
-                logger.info(f"Found GGUF model: {gguf_file.name}")
-                models.append({
-                    'name': gguf_file.stem,
-                    'path': str(gguf_file),
-                    'size': gguf_file.stat().st_size if gguf_file.exists() else 0,
-                    'directory': str(models_dir)
-                })
+        from .model_catalog import get_model_catalog
+        
+        models = [{
+            'name': entry.name,
+            'path': entry.path,
+            'size': entry.size,
+            'directory': entry.directory,
+            'architecture': entry.architecture,
+            'context_length': entry.context_length,
+            'quantization': entry.quantization,
+            'parameter_count': entry.parameter_count
+        } for entry in get_model_catalog().list_models()]
         
         if not models:
             logger.warning("No GGUF models found in any models directory")
@@ -446,7 +470,7 @@ class BackendLLMController:
                 except Exception:
                     n_batch = 256
 
-                settings = Settings(
+                settings_kwargs = dict(
                     model=str(self.model_path),  # Required field
                     host=self.server_host,
                     port=self.server_port,
@@ -462,6 +486,16 @@ class BackendLLMController:
                     n_batch=n_batch,      # Batch size tuned by hardware tier
                     flash_attn=False,     # Disable flash attention for stability
                 )
+                # Prompt prefix cache: evaluated system prompts are restored instead of re-evaluated
+                cache_kwargs = prompt_cache_settings()
+                try:
+                    settings = Settings(**settings_kwargs, **cache_kwargs)
+                except Exception as e:
+                    logger.warning(f"Prompt cache settings rejected by llama-cpp-python ({e}); starting without it")
+                    settings = Settings(**settings_kwargs)
+                else:
+                    if cache_kwargs.get('cache'):
+                        logger.info(f"Prompt cache: {cache_kwargs['cache_type']}, {cache_kwargs['cache_size'] // (1 << 20)} MB")
                 
                 # Create the FastAPI app
                 app = create_app(settings=settings)
@@ -504,9 +538,10 @@ class BackendLLMController:
         # Wait for server to start
         for i in range(30):  # 30 second timeout
             try:
-                response = requests.get(f"{self.server_url}/v1/models", timeout=10)
+                response = get_backend_session().get(f"{self.server_url}/v1/models", timeout=10)
                 if response.status_code == 200:
                     self.is_running = True
+                    self.liveness.mark_ready('server started')
                     logger.info("LLM server started successfully")
                     return True
             except requests.exceptions.RequestException:
@@ -522,13 +557,14 @@ class BackendLLMController:
         # Set shutdown event
         self._shutdown_event.set()
         self.is_running = False
+        self.liveness.mark_unready('server stopped')
         
         # Try to gracefully shutdown the server
         try:
             if self.server_thread and self.server_thread.is_alive():
                 # Try to send shutdown request to server
                 try:
-                    requests.post(f"{self.server_url}/shutdown", timeout=5)
+                    get_backend_session().post(f"{self.server_url}/shutdown", timeout=5)
                 except Exception as e:
                     logger.debug(f"Server shutdown endpoint not supported: {e}")
                     pass  # Server might not support shutdown endpoint
@@ -554,34 +590,32 @@ class BackendLLMController:
         logger.info("LLM server cleanup completed")
 
     def is_server_ready(self) -> bool:
-        """Check if the server is ready to accept requests"""
-        # Try active flag first, but don't rely on it exclusively
-        try:
-            response = requests.get(f"{self.server_url}/v1/models", timeout=5)
-            if response.status_code == 200:
-                self.is_running = True
-                return True
-        except requests.exceptions.RequestException:
-            pass
+        """Check if the server is ready to accept requests (in-memory, no round-trip)"""
+        if self.liveness.is_ready():
+            self.is_running = True
+            return True
         return False
 
-    def generate_completion(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+    def generate_completion(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7,
+                            request_class: RequestClass = RequestClass.INTERACTIVE) -> str:
         """Generate a text completion using the local LLM server"""
         if not self.is_server_ready():
             logger.error("LLM server is not ready")
             return ""
         
         try:
-            response = requests.post(
-                f"{self.server_url}/v1/completions",
-                json={
-                    "prompt": prompt,
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "stream": False
-                },
-                timeout=30
-            )
+            with get_llm_scheduler().slot(request_class):
+                response = get_backend_session().post(
+                    f"{self.server_url}/v1/completions",
+                    json={
+                        "prompt": prompt,
+                        "max_tokens": max_tokens,
+                        "temperature": temperature,
+                        "stream": False
+                    },
+                    timeout=30
+                )
+            self.liveness.report_response(response)
             
             if response.status_code == 200:
                 result = response.json()
@@ -590,11 +624,16 @@ class BackendLLMController:
                 logger.error(f"LLM server error: {response.status_code}")
                 return ""
                 
+        except requests.exceptions.RequestException as e:
+            self.liveness.report_failure(e)
+            logger.error(f"Error generating completion: {e}")
+            return ""
         except Exception as e:
             logger.error(f"Error generating completion: {e}")
             return ""
 
-    def generate_response(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 1024, temperature: float = 0.7) -> str:
+    def generate_response(self, prompt: str, system_prompt: Optional[str] = None, max_tokens: int = 1024, temperature: float = 0.7,
+                          request_class: RequestClass = RequestClass.INTERACTIVE) -> str:
         """
         Generate a response using the local LLM server with an optional system prompt.
         This method is required by the agent_manager for planning operations.
@@ -604,6 +643,7 @@ class BackendLLMController:
             system_prompt: Optional system prompt to provide context
             max_tokens: Maximum tokens in response
             temperature: Temperature for generation
+            request_class: Scheduler priority class (agents pass RequestClass.AGENT)
             
         Returns:
             Generated response text
@@ -620,22 +660,27 @@ class BackendLLMController:
                 full_prompt = prompt
             
             # Use the chat completions endpoint for better formatting
-            response = requests.post(
-                f"{self.server_url}/v1/chat/completions",
-                json={
-                    "messages": [
-                        {"role": "system", "content": system_prompt or "You are a helpful AI assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "stream": False
-                },
-                timeout=60  # Longer timeout for complex responses
-            )
+            messages = [
+                {"role": "system", "content": system_prompt or "You are a helpful AI assistant."},
+                {"role": "user", "content": prompt}
+            ]
+            with get_llm_scheduler().slot(request_class):
+                response = get_backend_session().post(
+                    f"{self.server_url}/v1/chat/completions",
+                    json={
+                        "messages": messages,
+                        "max_tokens": max_tokens,
+                        "temperature": temperature,
+                        "stream": False
+                    },
+                    timeout=60  # Longer timeout for complex responses
+                )
+            self.liveness.report_response(response)
             
             if response.status_code == 200:
                 result = response.json()
+                get_prompt_cache_metrics().record(messages, (result.get("usage") or {}).get("prompt_tokens"),
+                                                  result, kind='generate')
                 content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
                 if not content:
                     # Fallback to completions-style text
@@ -644,60 +689,26 @@ class BackendLLMController:
             else:
                 # Fallback to completions endpoint if chat endpoint fails
                 logger.warning(f"Chat endpoint failed with {response.status_code}, trying completions endpoint")
-                return self.generate_completion(full_prompt, max_tokens, temperature)
+                return self.generate_completion(full_prompt, max_tokens, temperature, request_class)
                 
-        except requests.exceptions.Timeout:
+        except LLMRequestRejected as e:
+            logger.warning(f"LLM request not admitted: {e}")
+            return "Error: The AI backend is busy. Please try again shortly."
+        except requests.exceptions.Timeout as e:
+            self.liveness.report_failure(e)
             logger.error("LLM server timeout - request took too long")
             return "Error: Request timeout. The model may be processing a complex request."
         except Exception as e:
+            if isinstance(e, requests.exceptions.RequestException):
+                self.liveness.report_failure(e)
             logger.error(f"Error generating response: {e}")
             # Fallback to simple completion
             try:
-                return self.generate_completion(prompt, max_tokens, temperature)
+                return self.generate_completion(prompt, max_tokens, temperature, request_class)
             except Exception as fallback_error:
                 logger.error(f"Fallback completion also failed: {fallback_error}")
                 return f"Error generating response: {str(e)}"
 
-    def generate_summary_and_tags(self, content: str) -> Dict[str, Any]:
-        """Generate summary and tags for given content"""
-        if not self.is_server_ready():
-            return {"summary": "LLM server not available", "tags": []}
-        
-        # Truncate content if too long
-        if len(content) > 2000:
-            content = content[:2000] + "..."
-        
-        prompt = f"""Analyze the following document and provide:
-1. A concise summary (2-3 sentences)
-2. Relevant tags (up to 5 keywords)
-
-Document:
-{content}
-
-Response format:
-Summary: [your summary here]
-Tags: tag1, tag2, tag3, tag4, tag5"""
-
-        response_text = self.generate_completion(prompt, max_tokens=256, temperature=0.3)
-        
-        # Parse the response
-        summary = ""
-        tags = []
-        
-        if response_text:
-            lines = response_text.strip().split('\n')
-            for line in lines:
-                if line.startswith("Summary:"):
-                    summary = line.replace("Summary:", "").strip()
-                elif line.startswith("Tags:"):
-                    tag_text = line.replace("Tags:", "").strip()
-                    tags = [tag.strip() for tag in tag_text.split(",") if tag.strip()]
-        
-        return {
-            "summary": summary or "Unable to generate summary",
-            "tags": tags[:5]  # Limit to 5 tags
-        }
-
 # Global instance
 _backend_controller: Optional[BackendLLMController] = None
 
@@ -5,7 +5,6 @@ Provides seamless synchronization with major cloud storage providers
 
 import os
 import json
-import hashlib
 import threading
 import time
 import zipfile
@@ -22,6 +21,7 @@ import shutil
 
 # Import resource cleanup utilities
 from ..utils.resource_cleanup import ResourceCleanupManager, register_thread_cleanup
+from ..utils.file_fingerprint import full_file_hash
 
 # Cloud storage SDKs
 try:
@@ -393,12 +393,8 @@ class CloudSyncManager:
         return results
     
     def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA256 hash of a file"""
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        """Calculate SHA256 hash of a file (unchanged files are not re-read)"""
+        return full_file_hash(file_path)
     
     def _upload_file(self, provider, item: SyncItem, local_path: Path, config: SyncConfig) -> bool:
         """Upload a file to cloud storage"""
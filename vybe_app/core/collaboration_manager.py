@@ -17,6 +17,7 @@ from threading import Lock
 
 from ..logger import log_info, log_error, log_warning
 from ..models import db, AppSetting, User
+from .collaboration_store import CollaborationStore, get_collaboration_store
 
 # Import app for Flask application context
 try:
@@ -117,17 +118,39 @@ class CollaborationMessage:
             self.timestamp = datetime.now()
 
 
+_LEGACY_SETTING_KEYS = ('collaboration_sessions', 'collaboration_participants', 'collaboration_messages')
+
+
+def _to_record(obj: Any) -> Dict[str, Any]:
+    """JSON-ready dict of a session, participant or message"""
+    record = asdict(obj)
+    for key, value in record.items():
+        if isinstance(value, Enum):
+            record[key] = value.value
+        elif isinstance(value, datetime):
+            record[key] = value.isoformat()
+    return record
+
+
+def _legacy_enum_value(enum_cls: type, raw: Any) -> Any:
+    """The AppSetting blobs were written with default=str, which stored enums as 'SessionStatus.ACTIVE'"""
+    prefix = f"{enum_cls.__name__}."
+    if isinstance(raw, str) and raw.startswith(prefix) and raw[len(prefix):] in enum_cls.__members__:
+        return enum_cls[raw[len(prefix):]].value
+    return raw
+
+
 class CollaborationManager:
     """Manages collaboration sessions and multi-user features"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[CollaborationStore] = None):
+        self.store = store or get_collaboration_store()
         self.sessions: Dict[str, CollaborationSession] = {}
         self.participants: Dict[str, Dict[str, SessionParticipant]] = {}  # session_id -> {user_id -> participant}
-        self.messages: Dict[str, List[CollaborationMessage]] = {}  # session_id -> messages
         self.user_sessions: Dict[str, Set[str]] = {}  # user_id -> set of session_ids
         self.session_locks: Dict[str, Lock] = {}
         
-        # Load existing sessions from database
+        # Load existing sessions from the store (migrating old app settings once)
         self._load_sessions()
     
     def _validate_session_data(self, session_data: Dict[str, Any]) -> bool:
@@ -271,7 +294,7 @@ class CollaborationManager:
             bool: True if data is valid, False otherwise
         """
         try:
-            required_fields = ['id', 'session_id', 'user_id', 'username', 'content', 'timestamp', 'message_type']
+            required_fields = ['id', 'session_id', 'sender_id', 'sender_name', 'content', 'timestamp', 'message_type']
             
             # Check for required fields
             for field in required_fields:
@@ -280,7 +303,7 @@ class CollaborationManager:
                     return False
             
             # Validate field types
-            string_fields = ['id', 'session_id', 'user_id', 'username', 'content', 'message_type']
+            string_fields = ['id', 'session_id', 'sender_id', 'sender_name', 'content', 'message_type']
             for field in string_fields:
                 if not isinstance(message_data[field], str) or not message_data[field]:
                     log_warning(f"Message validation failed: invalid {field}")
@@ -292,174 +315,158 @@ class CollaborationManager:
             log_error(f"Error validating message data: {e}")
             return False
         
+    def _session_from_record(self, data: Dict[str, Any]) -> Optional[CollaborationSession]:
+        """Build a session from a stored record, or None if the record is invalid"""
+        data = dict(data)
+        data['session_type'] = _legacy_enum_value(CollaborationType, data.get('session_type'))
+        data['status'] = _legacy_enum_value(SessionStatus, data.get('status'))
+        if not self._validate_session_data(data):
+            log_warning(f"Skipping invalid session data: {data.get('id', 'unknown')}")
+            return None
+        try:
+            for key in ('created_at', 'last_activity', 'scheduled_start', 'scheduled_end'):
+                if data.get(key):
+                    data[key] = datetime.fromisoformat(data[key])
+            data['session_type'] = CollaborationType(data['session_type'])
+            data['status'] = SessionStatus(data['status'])
+            return CollaborationSession(**data)
+        except (TypeError, ValueError) as e:
+            log_warning(f"Failed to create session object: {data.get('id', 'unknown')} - {e}")
+            return None
+
+    def _participant_from_record(self, data: Dict[str, Any]) -> Optional[SessionParticipant]:
+        """Build a participant from a stored record, or None if the record is invalid"""
+        data = dict(data)
+        data['role'] = _legacy_enum_value(UserRole, data.get('role'))
+        if not self._validate_participant_data(data):
+            log_warning(f"Skipping invalid participant data: {data.get('user_id', 'unknown')}")
+            return None
+        try:
+            for key in ('joined_at', 'last_activity'):
+                if data.get(key):
+                    data[key] = datetime.fromisoformat(data[key])
+            data['role'] = UserRole(data['role'])
+            return SessionParticipant(**data)
+        except (TypeError, ValueError) as e:
+            log_warning(f"Failed to create participant object: {data.get('user_id', 'unknown')} - {e}")
+            return None
+
+    def _message_from_record(self, data: Dict[str, Any]) -> Optional[CollaborationMessage]:
+        """Build a message from a stored record, or None if the record is invalid"""
+        data = dict(data)
+        if not self._validate_message_data(data):
+            log_warning(f"Skipping invalid message data: {data.get('id', 'unknown')}")
+            return None
+        try:
+            for key in ('timestamp', 'edited_at'):
+                if data.get(key):
+                    data[key] = datetime.fromisoformat(data[key])
+            return CollaborationMessage(**data)
+        except (TypeError, ValueError) as e:
+            log_warning(f"Failed to create message object: {data.get('id', 'unknown')} - {e}")
+            return None
+
     def _load_sessions(self):
-        """Load existing collaboration sessions from database"""
+        """Load sessions and participants from the collaboration store (messages stay on disk)"""
         try:
-            if not APP_AVAILABLE:
-                log_warning("Flask app not available - using in-memory sessions only")
-                return
-                
-            with app.app_context():
-                # Load sessions from AppSetting
-                setting = AppSetting.query.filter_by(key='collaboration_sessions').first()
-                if setting:
-                    sessions_data = json.loads(setting.value)
-                    for session_data in sessions_data:
-                        # Validate session data before processing
-                        if not self._validate_session_data(session_data):
-                            log_warning(f"Skipping invalid session data: {session_data.get('id', 'unknown')}")
-                            continue
-                        
-                        # Convert datetime strings back to datetime objects
-                        try:
-                            if session_data.get('created_at'):
-                                session_data['created_at'] = datetime.fromisoformat(session_data['created_at'])
-                            if session_data.get('last_activity'):
-                                session_data['last_activity'] = datetime.fromisoformat(session_data['last_activity'])
-                            if session_data.get('scheduled_start'):
-                                session_data['scheduled_start'] = datetime.fromisoformat(session_data['scheduled_start'])
-                            if session_data.get('scheduled_end'):
-                                session_data['scheduled_end'] = datetime.fromisoformat(session_data['scheduled_end'])
-                        except ValueError as e:
-                            log_warning(f"Skipping session with invalid datetime format: {session_data.get('id', 'unknown')} - {e}")
-                            continue
-                        
-                        try:
-                            session = CollaborationSession(**session_data)
-                            self.sessions[session.id] = session
-                            self.session_locks[session.id] = Lock()
-                        except Exception as e:
-                            log_warning(f"Failed to create session object: {session_data.get('id', 'unknown')} - {e}")
-                            continue
-                    
-                # Load participants
-                setting = AppSetting.query.filter_by(key='collaboration_participants').first()
-                if setting:
-                    participants_data = json.loads(setting.value)
-                    for session_id, session_participants in participants_data.items():
-                        # Only load participants for valid sessions
-                        if session_id not in self.sessions:
-                            log_warning(f"Skipping participants for unknown session: {session_id}")
-                            continue
-                            
-                        self.participants[session_id] = {}
-                        for user_id, participant_data in session_participants.items():
-                            # Validate participant data before processing
-                            if not self._validate_participant_data(participant_data):
-                                log_warning(f"Skipping invalid participant data: {user_id} in session {session_id}")
-                                continue
-                            
-                            try:
-                                if participant_data.get('joined_at'):
-                                    participant_data['joined_at'] = datetime.fromisoformat(participant_data['joined_at'])
-                                if participant_data.get('last_activity'):
-                                    participant_data['last_activity'] = datetime.fromisoformat(participant_data['last_activity'])
-                            except ValueError as e:
-                                log_warning(f"Skipping participant with invalid datetime format: {user_id} - {e}")
-                                continue
-                        
-                            try:
-                                participant = SessionParticipant(**participant_data)
-                                self.participants[session_id][user_id] = participant
-                            except Exception as e:
-                                log_warning(f"Failed to create participant object: {user_id} - {e}")
-                                continue
-                        
-                # Load messages
-                setting = AppSetting.query.filter_by(key='collaboration_messages').first()
-                if setting:
-                    messages_data = json.loads(setting.value)
-                    for session_id, session_messages in messages_data.items():
-                        # Only load messages for valid sessions
-                        if session_id not in self.sessions:
-                            log_warning(f"Skipping messages for unknown session: {session_id}")
-                            continue
-                            
-                        self.messages[session_id] = []
-                        for message_data in session_messages:
-                            # Validate message data before processing
-                            if not self._validate_message_data(message_data):
-                                log_warning(f"Skipping invalid message data in session {session_id}")
-                                continue
-                            
-                            try:
-                                if message_data.get('timestamp'):
-                                    message_data['timestamp'] = datetime.fromisoformat(message_data['timestamp'])
-                                if message_data.get('edited_at'):
-                                    message_data['edited_at'] = datetime.fromisoformat(message_data['edited_at'])
-                            except ValueError as e:
-                                log_warning(f"Skipping message with invalid datetime format: {message_data.get('id', 'unknown')} - {e}")
-                                continue
-                        
-                            try:
-                                message = CollaborationMessage(**message_data)
-                                self.messages[session_id].append(message)
-                            except Exception as e:
-                                log_warning(f"Failed to create message object: {message_data.get('id', 'unknown')} - {e}")
-                                continue
-                        
+            self._migrate_legacy_settings()
+
+            for session_data in self.store.load_sessions():
+                session = self._session_from_record(session_data)
+                if session:
+                    self.sessions[session.id] = session
+                    self.session_locks[session.id] = Lock()
+                    self.participants[session.id] = {}
+
+            for session_id, session_participants in self.store.load_participants().items():
+                # Only load participants for valid sessions
+                if session_id not in self.sessions:
+                    log_warning(f"Skipping participants for unknown session: {session_id}")
+                    continue
+                for participant_data in session_participants:
+                    participant = self._participant_from_record(participant_data)
+                    if participant:
+                        self.participants[session_id][participant.user_id] = participant
+
             # Build user sessions mapping
             for session_id, session_participants in self.participants.items():
                 for user_id in session_participants.keys():
                     if user_id not in self.user_sessions:
                         self.user_sessions[user_id] = set()
                     self.user_sessions[user_id].add(session_id)
-                    
+
         except Exception as e:
             log_error(f"Error loading collaboration sessions: {e}")
-            
-    def _save_sessions(self):
-        """Save collaboration sessions to database"""
+
+    def _migrate_legacy_settings(self):
+        """
+        One-time move of the JSON blobs formerly kept in AppSetting rows into
+        the collaboration store. The rows are deleted only after the store
+        has committed their contents, so a failed migration is retried on
+        the next start.
+        """
+        if not APP_AVAILABLE:
+            return
+
         try:
-            if not APP_AVAILABLE:
-                log_warning("Flask app not available - cannot save sessions to database")
-                return
-                
             with app.app_context():
-                # Save sessions
-                sessions_data = [asdict(session) for session in self.sessions.values()]
-                setting = AppSetting.query.filter_by(key='collaboration_sessions').first()
-                if setting:
-                    setting.value = json.dumps(sessions_data, default=str)
-                else:
-                    setting = AppSetting()
-                    setting.key = 'collaboration_sessions'
-                    setting.value = json.dumps(sessions_data, default=str)
-                    db.session.add(setting)                # Save participants
-                participants_data = {}
-                for session_id, session_participants in self.participants.items():
-                    participants_data[session_id] = {
-                        user_id: asdict(participant) 
-                        for user_id, participant in session_participants.items()
-                    }
-            
-                setting = AppSetting.query.filter_by(key='collaboration_participants').first()
-                if setting:
-                    setting.value = json.dumps(participants_data, default=str)
-                else:
-                    setting = AppSetting()
-                    setting.key = 'collaboration_participants'
-                    setting.value = json.dumps(participants_data, default=str)
-                    db.session.add(setting)
-                
-                # Save messages
-                messages_data = {}
-                for session_id, session_messages in self.messages.items():
-                    messages_data[session_id] = [asdict(message) for message in session_messages]
-            
-                setting = AppSetting.query.filter_by(key='collaboration_messages').first()
-                if setting:
-                    setting.value = json.dumps(messages_data, default=str)
-                else:
-                    setting = AppSetting()
-                    setting.key = 'collaboration_messages'
-                    setting.value = json.dumps(messages_data, default=str)
-                    db.session.add(setting)
-                
+                settings = [setting for setting in
+                            (AppSetting.query.filter_by(key=key).first() for key in _LEGACY_SETTING_KEYS)
+                            if setting]
+                if not settings:
+                    return
+                blobs = {setting.key: json.loads(setting.value) for setting in settings}
+
+                session_ids = set()
+                for session_data in blobs.get('collaboration_sessions', []):
+                    session = self._session_from_record(session_data)
+                    if session:
+                        self.store.put_session(_to_record(session))
+                        session_ids.add(session.id)
+
+                participant_count = 0
+                for session_id, session_participants in blobs.get('collaboration_participants', {}).items():
+                    if session_id not in session_ids:
+                        continue
+                    for participant_data in session_participants.values():
+                        participant = self._participant_from_record(participant_data)
+                        if participant:
+                            self.store.put_participant(session_id, _to_record(participant))
+                            participant_count += 1
+
+                message_count = 0
+                for session_id, session_messages in blobs.get('collaboration_messages', {}).items():
+                    if session_id not in session_ids:
+                        continue
+                    for message_data in session_messages:
+                        message = self._message_from_record(message_data)
+                        if message:
+                            self.store.put_message(_to_record(message))
+                            message_count += 1
+
+                if not self.store.flush():
+                    log_error("Collaboration data migration was not committed; keeping the legacy settings")
+                    return
+                for setting in settings:
+                    db.session.delete(setting)
                 db.session.commit()
-            
+                log_info(f"Migrated {len(session_ids)} collaboration sessions, {participant_count} participants "
+                         f"and {message_count} messages out of app settings")
+
         except Exception as e:
-            log_error(f"Error saving collaboration sessions: {e}")
+            log_error(f"Error migrating legacy collaboration settings: {e}")
+
+    def _save_session(self, session: CollaborationSession):
+        """Queue the session's row for the next store flush"""
+        self.store.put_session(_to_record(session))
+
+    def _save_participant(self, session_id: str, participant: SessionParticipant):
+        """Queue the participant's row for the next store flush"""
+        self.store.put_participant(session_id, _to_record(participant))
+
+    def flush(self) -> bool:
+        """Commit queued writes now"""
+        return self.store.flush()
             
     def create_session(self, name: str, description: str, session_type: CollaborationType, 
                       owner_id: str, max_participants: int = 10, is_public: bool = False,
@@ -497,7 +504,6 @@ class CollaborationManager:
             self.sessions[session_id] = session
             self.session_locks[session_id] = Lock()
             self.participants[session_id] = {}
-            self.messages[session_id] = []
             
             # Add owner as participant
             self.add_participant(session_id, owner_id, UserRole.OWNER)
@@ -507,7 +513,7 @@ class CollaborationManager:
                 self.user_sessions[owner_id] = set()
             self.user_sessions[owner_id].add(session_id)
             
-            self._save_sessions()
+            self._save_session(session)
             
             log_info(f"Created collaboration session: {session_id} by user {owner_id}")
             return session_id
@@ -625,7 +631,8 @@ class CollaborationManager:
             elif role == UserRole.PARTICIPANT:
                 session.participants.append(user_id)
                 
-            self._save_sessions()
+            self._save_participant(session_id, participant)
+            self._save_session(session)
             
             log_info(f"Added participant {user_id} to session {session_id}")
             return True
@@ -665,7 +672,8 @@ class CollaborationManager:
             if user_id in self.user_sessions:
                 self.user_sessions[user_id].discard(session_id)
                 
-            self._save_sessions()
+            self.store.delete_participant(session_id, user_id)
+            self._save_session(session)
             
             log_info(f"Removed participant {user_id} from session {session_id}")
             return True
@@ -707,9 +715,8 @@ class CollaborationManager:
                 attachments=attachments or []
             )
             
-            if session_id not in self.messages:
-                self.messages[session_id] = []
-            self.messages[session_id].append(message)
+            # Appended as one row; activity updates coalesce with the next flush
+            self.store.put_message(_to_record(message))
             
             # Update session activity
             session = self.sessions[session_id]
@@ -718,7 +725,8 @@ class CollaborationManager:
             # Update participant activity
             participant.last_activity = datetime.now()
             
-            self._save_sessions()
+            self._save_session(session)
+            self._save_participant(session_id, participant)
             
             log_info(f"Message sent in session {session_id} by {sender_id}")
             return message_id
@@ -727,27 +735,36 @@ class CollaborationManager:
             log_error(f"Error sending message: {e}")
             return None
             
-    def get_session_messages(self, session_id: str, limit: int = 50, offset: int = 0) -> List[CollaborationMessage]:
-        """Get messages from a collaboration session"""
-        if session_id not in self.messages:
+    def get_session_messages(self, session_id: str, limit: int = 50, before_id: Optional[str] = None,
+                             after_id: Optional[str] = None) -> List[CollaborationMessage]:
+        """
+        Get a page of messages from a collaboration session, oldest first.
+
+        Without a cursor the newest ``limit`` messages are returned; pass the
+        id of the oldest message shown as ``before_id`` to page back, or of
+        the newest as ``after_id`` to fetch what arrived since.
+        """
+        if session_id not in self.sessions:
             return []
             
-        messages = self.messages[session_id]
-        return messages[offset:offset + limit]
+        records = self.store.get_messages(session_id, limit=limit, before_id=before_id, after_id=after_id)
+        return [message for message in map(self._message_from_record, records) if message]
+        
+    def _find_message(self, session_id: str, message_id: str) -> Optional[CollaborationMessage]:
+        record = self.store.get_message(message_id)
+        if not record or record.get('session_id') != session_id:
+            return None
+        return self._message_from_record(record)
         
     def edit_message(self, session_id: str, message_id: str, user_id: str, new_content: str) -> bool:
         """Edit a message in a collaboration session"""
         try:
-            if session_id not in self.messages:
+            if session_id not in self.sessions:
                 log_error(f"Session {session_id} not found")
                 return False
                 
             # Find the message
-            message = None
-            for msg in self.messages[session_id]:
-                if msg.id == message_id:
-                    message = msg
-                    break
+            message = self._find_message(session_id, message_id)
                     
             if not message:
                 log_error(f"Message {message_id} not found")
@@ -769,7 +786,7 @@ class CollaborationManager:
             message.content = new_content
             message.edited_at = datetime.now()
             
-            self._save_sessions()
+            self.store.put_message(_to_record(message))
             
             log_info(f"Message {message_id} edited by {user_id}")
             return True
@@ -781,20 +798,14 @@ class CollaborationManager:
     def delete_message(self, session_id: str, message_id: str, user_id: str) -> bool:
         """Delete a message from a collaboration session"""
         try:
-            if session_id not in self.messages:
+            if session_id not in self.sessions:
                 log_error(f"Session {session_id} not found")
                 return False
                 
             # Find the message
-            message = None
-            message_index = None
-            for i, msg in enumerate(self.messages[session_id]):
-                if msg.id == message_id:
-                    message = msg
-                    message_index = i
-                    break
+            message = self._find_message(session_id, message_id)
                     
-            if not message or message_index is None:
+            if not message:
                 log_error(f"Message {message_id} not found")
                 return False
                 
@@ -811,9 +822,7 @@ class CollaborationManager:
                     return False
                     
             # Delete the message
-            del self.messages[session_id][message_index]
-            
-            self._save_sessions()
+            self.store.delete_message(message_id)
             
             log_info(f"Message {message_id} deleted by {user_id}")
             return True
@@ -845,7 +854,7 @@ class CollaborationManager:
             session.status = status
             session.last_activity = datetime.now()
             
-            self._save_sessions()
+            self._save_session(session)
             
             log_info(f"Session {session_id} status updated to {status.value} by {user_id}")
             return True
@@ -862,36 +871,24 @@ class CollaborationManager:
                 
             session = self.sessions[session_id]
             participants = self.get_session_participants(session_id)
-            messages = self.get_session_messages(session_id, limit=1000)  # Get all messages for stats
-            
-            # Calculate statistics
-            total_messages = len(messages)
-            unique_senders = len(set(msg.sender_id for msg in messages))
-            avg_message_length = sum(len(msg.content) for msg in messages) / total_messages if total_messages > 0 else 0
-            
-            # Activity over time
-            activity_by_hour = {}
-            for msg in messages:
-                if msg.timestamp:
-                    hour = msg.timestamp.hour
-                    activity_by_hour[hour] = activity_by_hour.get(hour, 0) + 1
-                
+            # Aggregated in the store over the session's full history
+            message_stats = self.store.message_stats(session_id)
+            
             # Participant activity
             participant_activity = {}
             for participant in participants:
-                participant_messages = [msg for msg in messages if msg.sender_id == participant.user_id]
                 participant_activity[participant.user_id] = {
-                    'message_count': len(participant_messages),
+                    'message_count': message_stats['by_sender'].get(participant.user_id, 0),
                     'last_activity': participant.last_activity.isoformat() if participant.last_activity else None
                 }
                 
             return {
                 'session_id': session_id,
                 'total_participants': len(participants),
-                'total_messages': total_messages,
-                'unique_senders': unique_senders,
-                'avg_message_length': round(avg_message_length, 2),
-                'activity_by_hour': activity_by_hour,
+                'total_messages': message_stats['total_messages'],
+                'unique_senders': message_stats['unique_senders'],
+                'avg_message_length': round(message_stats['avg_message_length'], 2),
+                'activity_by_hour': message_stats['by_hour'],
                 'participant_activity': participant_activity,
                 'session_duration': (datetime.now() - session.created_at).total_seconds() if session.created_at else 0,
                 'last_activity': session.last_activity.isoformat() if session.last_activity else None
@@ -947,8 +944,6 @@ class CollaborationManager:
                     del self.sessions[session_id]
                 if session_id in self.participants:
                     del self.participants[session_id]
-                if session_id in self.messages:
-                    del self.messages[session_id]
                 if session_id in self.session_locks:
                     del self.session_locks[session_id]
                     
@@ -956,8 +951,10 @@ class CollaborationManager:
                 for user_sessions in self.user_sessions.values():
                     user_sessions.discard(session_id)
                     
+                # Drops the session's participants and messages too
+                self.store.delete_session(session_id)
+                    
             if sessions_to_remove:
-                self._save_sessions()
                 log_info(f"Cleaned up {len(sessions_to_remove)} inactive sessions")
                 
         except Exception as e:
@@ -0,0 +1,318 @@
+"""
+Collaboration Store for Vybe
+Normalized persistence for collaboration sessions, participants and messages.
+
+    - One row per session, per participant and per message, so a change
+      writes that row only instead of re-serializing every session.
+    - Messages are appended under a monotonically increasing ``seq``;
+      edits update the row in place and keep its position. Pages are read
+      by keyset (``seq`` before/after a message id) on the
+      (session_id, seq) index, never by OFFSET.
+    - Writes are write-behind: they are queued in memory, coalesced per row
+      (the latest state of a row wins) and committed in one transaction
+      every ``flush_interval`` seconds, or sooner when the queue grows past
+      ``max_pending``. Reads flush the queue first, so callers always see
+      their own writes.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CollaborationStore:
+    """
+    SQLite store with batched write-behind for collaboration data.
+
+    Records are JSON-ready dicts (enums and datetimes already converted);
+    the columns needed for indexing and aggregates are taken from them.
+
+    Args:
+        db_path: SQLite file holding the tables
+        flush_interval: Seconds queued writes may wait before being committed
+        max_pending: Queued row writes that trigger an immediate flush
+    """
+
+    def __init__(self, db_path: str, flush_interval: float = 0.5, max_pending: int = 500):
+        self.db_path = db_path
+        self.flush_interval = max(0.01, flush_interval)
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()  # Connection and flush ordering
+        self._pending_cond = threading.Condition()
+        self._pending: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._stats = {'queued': 0, 'coalesced': 0, 'flushes': 0, 'rows_written': 0, 'flush_errors': 0,
+                       'last_flush_ms': 0.0}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="CollaborationFlush", daemon=True)
+        self._flusher.start()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS collaboration_sessions (
+                    id TEXT PRIMARY KEY,
+                    owner_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    is_public INTEGER NOT NULL DEFAULT 0,
+                    last_activity TEXT,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS collaboration_participants (
+                    session_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (session_id, user_id)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS collaboration_messages (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    session_id TEXT NOT NULL,
+                    sender_id TEXT NOT NULL,
+                    timestamp TEXT,
+                    content_length INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_collaboration_participants_user "
+                               "ON collaboration_participants (user_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_collaboration_messages_session "
+                               "ON collaboration_messages (session_id, seq)")
+
+    # Queued writes ---------------------------------------------------
+
+    def _queue(self, key: Tuple, op: Tuple):
+        """Queue a row write; a newer write of the same row replaces the older one"""
+        with self._pending_cond:
+            if key in self._pending:
+                del self._pending[key]
+                self._stats['coalesced'] += 1
+            self._pending[key] = op
+            self._stats['queued'] += 1
+            # Wake the flusher to start a batch window, or to end it early when full
+            if len(self._pending) == 1 or len(self._pending) >= self.max_pending:
+                self._pending_cond.notify()
+
+    def put_session(self, record: Dict[str, Any]):
+        self._queue(('session', record['id']), ('put_session', record))
+
+    def delete_session(self, session_id: str):
+        """Delete a session with its participants and messages"""
+        self._queue(('session', session_id), ('delete_session', session_id))
+
+    def put_participant(self, session_id: str, record: Dict[str, Any]):
+        self._queue(('participant', session_id, record['user_id']), ('put_participant', session_id, record))
+
+    def delete_participant(self, session_id: str, user_id: str):
+        self._queue(('participant', session_id, user_id), ('delete_participant', session_id, user_id))
+
+    def put_message(self, record: Dict[str, Any]):
+        """Append a message, or update it in place if its id is already stored"""
+        self._queue(('message', record['id']), ('put_message', record))
+
+    def delete_message(self, message_id: str):
+        self._queue(('message', message_id), ('delete_message', message_id))
+
+    # Flushing --------------------------------------------------------
+
+    def _apply(self, op: Tuple):
+        kind = op[0]
+        if kind == 'put_session':
+            record = op[1]
+            self._conn.execute(
+                "INSERT INTO collaboration_sessions (id, owner_id, status, is_public, last_activity, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET owner_id = excluded.owner_id, "
+                "status = excluded.status, is_public = excluded.is_public, "
+                "last_activity = excluded.last_activity, data = excluded.data",
+                (record['id'], record['owner_id'], record['status'], int(bool(record.get('is_public'))),
+                 record.get('last_activity'), json.dumps(record))
+            )
+        elif kind == 'delete_session':
+            session_id = op[1]
+            self._conn.execute("DELETE FROM collaboration_messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM collaboration_participants WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM collaboration_sessions WHERE id = ?", (session_id,))
+        elif kind == 'put_participant':
+            session_id, record = op[1], op[2]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO collaboration_participants (session_id, user_id, role, data) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, record['user_id'], record['role'], json.dumps(record))
+            )
+        elif kind == 'delete_participant':
+            self._conn.execute("DELETE FROM collaboration_participants WHERE session_id = ? AND user_id = ?",
+                               (op[1], op[2]))
+        elif kind == 'put_message':
+            record = op[1]
+            self._conn.execute(
+                "INSERT INTO collaboration_messages (id, session_id, sender_id, timestamp, content_length, data) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "content_length = excluded.content_length, data = excluded.data",
+                (record['id'], record['session_id'], record['sender_id'], record.get('timestamp'),
+                 len(record.get('content') or ''), json.dumps(record))
+            )
+        elif kind == 'delete_message':
+            self._conn.execute("DELETE FROM collaboration_messages WHERE id = ?", (op[1],))
+
+    def flush(self) -> bool:
+        """Commit every queued write in one transaction. Returns False if the commit failed."""
+        with self._lock:
+            with self._pending_cond:
+                if not self._pending:
+                    return True
+                batch, self._pending = self._pending, OrderedDict()
+            started = time.perf_counter()
+            try:
+                with self._conn:
+                    for op in batch.values():
+                        self._apply(op)
+            except sqlite3.Error as e:
+                logger.error(f"Collaboration store flush of {len(batch)} rows failed: {e}")
+                with self._pending_cond:
+                    # Keep the failed writes, in order, ahead of anything queued since
+                    for key, op in self._pending.items():
+                        batch.pop(key, None)
+                        batch[key] = op
+                    self._pending = batch
+                    self._stats['flush_errors'] += 1
+                return False
+            with self._pending_cond:
+                self._stats['flushes'] += 1
+                self._stats['rows_written'] += len(batch)
+                self._stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+            return True
+
+    def _flush_loop(self):
+        while True:
+            with self._pending_cond:
+                if not self._pending and not self._closed:
+                    self._pending_cond.wait()
+                if self._closed:
+                    return
+                # Let writes accumulate unless the queue is already full
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.max_pending and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_cond.wait(remaining)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Collaboration store flush error: {e}")
+
+    # Reads -----------------------------------------------------------
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        self.flush()
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def load_sessions(self) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in self._query("SELECT data FROM collaboration_sessions")]
+
+    def load_participants(self) -> Dict[str, List[Dict[str, Any]]]:
+        """session_id -> participant records"""
+        participants: Dict[str, List[Dict[str, Any]]] = {}
+        for session_id, data in self._query("SELECT session_id, data FROM collaboration_participants"):
+            participants.setdefault(session_id, []).append(json.loads(data))
+        return participants
+
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM collaboration_messages WHERE id = ?", (message_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_messages(self, session_id: str, limit: int = 50, before_id: Optional[str] = None,
+                     after_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        One page of a session's messages in chronological order: the newest
+        ``limit`` by default, those older than ``before_id``, or those newer
+        than ``after_id``. An unknown cursor id yields an empty page.
+        """
+        limit = max(0, int(limit))
+        seq_of = "(SELECT seq FROM collaboration_messages WHERE id = ?)"
+        if after_id is not None:
+            rows = self._query(
+                f"SELECT data FROM collaboration_messages WHERE session_id = ? AND seq > {seq_of} "
+                "ORDER BY seq ASC LIMIT ?", (session_id, after_id, limit))
+            return [json.loads(row[0]) for row in rows]
+        if before_id is not None:
+            rows = self._query(
+                f"SELECT data FROM collaboration_messages WHERE session_id = ? AND seq < {seq_of} "
+                "ORDER BY seq DESC LIMIT ?", (session_id, before_id, limit))
+        else:
+            rows = self._query("SELECT data FROM collaboration_messages WHERE session_id = ? "
+                               "ORDER BY seq DESC LIMIT ?", (session_id, limit))
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def message_stats(self, session_id: str) -> Dict[str, Any]:
+        """Message aggregates for a session, computed in SQL"""
+        total, senders, avg_length = self._query(
+            "SELECT COUNT(*), COUNT(DISTINCT sender_id), AVG(content_length) FROM collaboration_messages "
+            "WHERE session_id = ?", (session_id,))[0]
+        with self._lock:
+            by_hour = dict(self._conn.execute(
+                "SELECT CAST(substr(timestamp, 12, 2) AS INTEGER) AS hour, COUNT(*) FROM collaboration_messages "
+                "WHERE session_id = ? AND timestamp IS NOT NULL GROUP BY hour", (session_id,)).fetchall())
+            by_sender = dict(self._conn.execute(
+                "SELECT sender_id, COUNT(*) FROM collaboration_messages WHERE session_id = ? GROUP BY sender_id",
+                (session_id,)).fetchall())
+        return {
+            'total_messages': total,
+            'unique_senders': senders,
+            'avg_message_length': avg_length or 0,
+            'by_hour': by_hour,
+            'by_sender': by_sender
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._pending_cond:
+            return {'pending': len(self._pending), **self._stats}
+
+    def close(self):
+        """Flush queued writes and stop the flush thread"""
+        with self._pending_cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending_cond.notify_all()
+        self._flusher.join(timeout=5)
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+_collaboration_store: Optional[CollaborationStore] = None
+_collaboration_store_lock = threading.Lock()
+
+
+def get_collaboration_store() -> CollaborationStore:
+    """Shared store at Config.COLLABORATION_DB_PATH; queued writes are flushed at exit"""
+    global _collaboration_store
+    if _collaboration_store is None:
+        with _collaboration_store_lock:
+            if _collaboration_store is None:
+                from ..config import Config
+                _collaboration_store = CollaborationStore(
+                    Config.COLLABORATION_DB_PATH,
+                    flush_interval=Config.COLLABORATION_FLUSH_INTERVAL
+                )
+                atexit.register(_collaboration_store.close)
+    return _collaboration_store
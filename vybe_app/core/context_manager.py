@@ -13,6 +13,8 @@ from datetime import datetime
 import hashlib
 from pathlib import Path
 
+from ..utils.token_counter import get_token_counter
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,8 +48,8 @@ class ContextManager:
         logger.info("ContextManager initialized with intelligent context window management")
     
     def estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation: 1 token ≈ 4 characters)"""
-        return len(text) // 4
+        """Token count with the active model's tokenizer (or its approximation), memoized"""
+        return get_token_counter().count(text)
     
     def get_model_limit(self, model_name: str) -> int:
         """Get context window limit for a specific model"""
@@ -62,15 +64,8 @@ class ContextManager:
     def analyze_context_usage(self, conversation_history: List[Dict], model_name: str) -> Dict[str, Any]:
         """Analyze current context usage and provide recommendations"""
         
-        # Calculate total tokens in conversation
-        total_text = ""
-        for msg in conversation_history:
-            if isinstance(msg, dict):
-                total_text += str(msg.get('content', '')) + " "
-            else:
-                total_text += str(msg) + " "
-        
-        current_tokens = self.estimate_tokens(total_text)
+        # Per-message counts are memoized, so only new messages are tokenized
+        current_tokens = get_token_counter().count_messages(conversation_history)
         max_tokens = self.get_model_limit(model_name)
         usage_ratio = current_tokens / max_tokens
         
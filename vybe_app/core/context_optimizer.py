@@ -9,6 +9,8 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+from ..utils.token_counter import get_token_counter
+
 logger = logging.getLogger(__name__)
 
 
@@ -280,7 +282,7 @@ You have access to various capabilities including text generation, image creatio
     
     def _estimate_tokens(self, text: str) -> int:
         """
-        Estimate token count for text (rough approximation)
+        Token count for text (active model's tokenizer or its approximation)
         
         Args:
             text: Text to estimate tokens for
@@ -288,8 +290,7 @@ You have access to various capabilities including text generation, image creatio
         Returns:
             Estimated token count
         """
-        # Rough approximation: 1 token ≈ 4 characters for English text
-        return len(text) // 4
+        return get_token_counter().count(text)
     
     def _generate_instructions_summary(self, context: Dict[str, Any]) -> str:
         """
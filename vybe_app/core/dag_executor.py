@@ -0,0 +1,307 @@
+"""
+DAG Executor for Vybe
+Event-driven scheduler for graphs of dependent tasks, used by the agent
+orchestrator to run multi-agent workflows.
+
+    - Every node whose dependencies have completed is started at once on a
+      bounded thread pool; nothing polls. A node's completion is the event
+      that releases its dependents.
+    - Each node function receives ``{dependency_id: result}`` for its
+      direct dependencies.
+    - When a node fails, all of its transitive dependents are cancelled;
+      independent branches keep running.
+    - A finished run reports per-node timings and the critical path (the
+      chain of nodes that determined the total time), so scheduling
+      overhead shows up as the gap between elapsed and critical-path time.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class NodeState(Enum):
+    """Lifecycle of a node in a run"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class DAGNode:
+    """A unit of work; ``func(dependency_results)`` returns the node's result"""
+    node_id: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+    state: NodeState = NodeState.PENDING
+    result: Any = None
+    error: Optional[str] = None
+    cancelled_by: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class DAGRun:
+    """One execution of a graph; created by DAGExecutor.submit"""
+
+    def __init__(self, nodes: List[DAGNode], on_complete: Optional[Callable[['DAGRun'], None]] = None):
+        self.run_id = f"dag_{uuid.uuid4().hex[:12]}"
+        self.nodes: Dict[str, DAGNode] = {node.node_id: node for node in nodes}
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._on_complete = on_complete
+        self._waiting: Dict[str, int] = {node.node_id: len(set(node.depends_on)) for node in nodes}
+        self._dependents: Dict[str, List[str]] = {node.node_id: [] for node in nodes}
+        for node in nodes:
+            for dependency in set(node.depends_on):
+                self._dependents[dependency].append(node.node_id)
+        self._remaining = len(nodes)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every node is completed, failed or cancelled"""
+        return self._done.wait(timeout)
+
+    @property
+    def status(self) -> str:
+        """'running', 'completed', 'partially_failed' (some nodes completed) or 'failed'"""
+        if self.finished_at is None:
+            return 'running'
+        states = [node.state for node in self.nodes.values()]
+        if all(state == NodeState.COMPLETED for state in states):
+            return 'completed'
+        if any(state == NodeState.COMPLETED for state in states):
+            return 'partially_failed'
+        return 'failed'
+
+    def results(self) -> Dict[str, Any]:
+        """Results of the completed nodes"""
+        return {node_id: node.result for node_id, node in self.nodes.items() if node.state == NodeState.COMPLETED}
+
+    def cancel(self, reason: str = "run cancelled"):
+        """Cancel every node that has not started; running nodes finish normally"""
+        with self._lock:
+            pending = [node for node in self.nodes.values() if node.state == NodeState.PENDING]
+            for node in pending:
+                self._mark_cancelled(node, reason)
+            finished = self._check_finished()
+        if finished:
+            self._finish()
+
+    # Scheduling (called with the lock held unless noted) -------------
+
+    def _ready_nodes(self) -> List[DAGNode]:
+        return [self.nodes[node_id] for node_id, waiting in self._waiting.items()
+                if waiting == 0 and self.nodes[node_id].state == NodeState.PENDING]
+
+    def _mark_cancelled(self, node: DAGNode, cause: str):
+        node.state = NodeState.CANCELLED
+        node.cancelled_by = cause
+        node.finished_at = time.monotonic()
+        self._remaining -= 1
+
+    def _cancel_dependents(self, node_id: str):
+        stack = list(self._dependents[node_id])
+        while stack:
+            dependent = self.nodes[stack.pop()]
+            if dependent.state == NodeState.PENDING:
+                self._mark_cancelled(dependent, node_id)
+                stack.extend(self._dependents[dependent.node_id])
+
+    def _node_finished(self, node: DAGNode) -> List[DAGNode]:
+        """Record a node's outcome; returns the dependents that became ready"""
+        self._remaining -= 1
+        if node.state != NodeState.COMPLETED:
+            self._cancel_dependents(node.node_id)
+            return []
+        ready = []
+        for dependent_id in self._dependents[node.node_id]:
+            self._waiting[dependent_id] -= 1
+            dependent = self.nodes[dependent_id]
+            if self._waiting[dependent_id] == 0 and dependent.state == NodeState.PENDING:
+                ready.append(dependent)
+        return ready
+
+    def _check_finished(self) -> bool:
+        if self._remaining == 0 and self.finished_at is None:
+            self.finished_at = time.monotonic()
+            return True
+        return False
+
+    def _finish(self):
+        """Run the completion callback, then release waiters (lock not held)"""
+        if self._on_complete is not None:
+            try:
+                self._on_complete(self)
+            except Exception as e:
+                logger.error(f"DAG run {self.run_id} completion callback failed: {e}")
+        self._done.set()
+
+    # Reporting -------------------------------------------------------
+
+    def critical_path(self) -> List[str]:
+        """
+        Chain of nodes that determined the finish time: from the last node to
+        finish, repeatedly step to the dependency that finished last.
+        """
+        finished = [node for node in self.nodes.values() if node.finished_at is not None
+                    and node.started_at is not None]
+        if not finished:
+            return []
+        current = max(finished, key=lambda node: node.finished_at)
+        path = [current.node_id]
+        while current.depends_on:
+            dependencies = [self.nodes[d] for d in current.depends_on if self.nodes[d].finished_at is not None]
+            if not dependencies:
+                break
+            current = max(dependencies, key=lambda node: node.finished_at)
+            path.append(current.node_id)
+        path.reverse()
+        return path
+
+    def timing_report(self) -> Dict[str, Any]:
+        """Elapsed time, the critical path and its busy time, and per-node timings"""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        path = self.critical_path()
+        path_seconds = sum(self.nodes[node_id].duration or 0.0 for node_id in path)
+        elapsed = end - self.started_at
+        return {
+            'elapsed_seconds': round(elapsed, 4),
+            'critical_path': path,
+            'critical_path_seconds': round(path_seconds, 4),
+            'scheduling_overhead_seconds': round(max(0.0, elapsed - path_seconds), 4) if self.finished_at is not None else None,
+            'nodes': {
+                node_id: {
+                    'state': node.state.value,
+                    'started_offset': round(node.started_at - self.started_at, 4) if node.started_at else None,
+                    'duration': round(node.duration, 4) if node.duration is not None else None,
+                    'error': node.error,
+                    'cancelled_by': node.cancelled_by
+                }
+                for node_id, node in self.nodes.items()
+            }
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for node in self.nodes.values():
+            counts[node.state.value] = counts.get(node.state.value, 0) + 1
+        return {'run_id': self.run_id, 'status': self.status, 'nodes': counts}
+
+
+class DAGExecutor:
+    """
+    Runs DAGRuns on a shared bounded pool.
+
+    Args:
+        max_workers: Nodes executing at the same time across all runs
+    """
+
+    def __init__(self, max_workers: int = 4, thread_name_prefix: str = "DAG"):
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+
+    def submit(self, nodes: Iterable[DAGNode],
+               on_complete: Optional[Callable[[DAGRun], None]] = None) -> DAGRun:
+        """
+        Validate the graph and start every node without dependencies.
+        Raises ValueError for duplicate ids, unknown dependencies or cycles.
+        """
+        nodes = list(nodes)
+        validate_graph(nodes)
+        run = DAGRun(nodes, on_complete)
+        with run._lock:
+            ready = run._ready_nodes()
+            for node in ready:
+                node.state = NodeState.RUNNING
+            finished = run._check_finished()  # Empty graph
+        if finished:
+            run._finish()
+        for node in ready:
+            self._dispatch(run, node)
+        return run
+
+    def _dispatch(self, run: DAGRun, node: DAGNode):
+        try:
+            self._pool.submit(self._run_node, run, node)
+        except RuntimeError as e:  # Pool shut down
+            node.error = str(e)
+            self._complete(run, node, NodeState.FAILED)
+
+    def _run_node(self, run: DAGRun, node: DAGNode):
+        dependency_results = {d: run.nodes[d].result for d in node.depends_on}
+        node.started_at = time.monotonic()
+        try:
+            node.result = node.func(dependency_results)
+            state = NodeState.COMPLETED
+        except Exception as e:
+            node.error = str(e)
+            state = NodeState.FAILED
+            logger.warning(f"DAG node {node.node_id} failed: {e}")
+        self._complete(run, node, state)
+
+    def _complete(self, run: DAGRun, node: DAGNode, state: NodeState):
+        with run._lock:
+            node.state = state
+            node.finished_at = time.monotonic()
+            ready = run._node_finished(node)
+            for dependent in ready:
+                dependent.state = NodeState.RUNNING
+            finished = run._check_finished()
+        for dependent in ready:
+            self._dispatch(run, dependent)
+        if finished:
+            run._finish()
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+def validate_graph(nodes: List[DAGNode]):
+    """Raise ValueError unless the nodes form a DAG with known, unique ids"""
+    ids = [node.node_id for node in nodes]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Duplicate node ids in graph")
+    known = set(ids)
+    for node in nodes:
+        unknown = [d for d in node.depends_on if d not in known]
+        if unknown:
+            raise ValueError(f"Node {node.node_id} depends on unknown nodes: {unknown}")
+    # Kahn's algorithm: anything left unvisited sits on a cycle
+    waiting = {node.node_id: len(set(node.depends_on)) for node in nodes}
+    dependents: Dict[str, List[str]] = {node_id: [] for node_id in ids}
+    for node in nodes:
+        for dependency in set(node.depends_on):
+            dependents[dependency].append(node.node_id)
+    queue = [node_id for node_id, count in waiting.items() if count == 0]
+    visited = 0
+    while queue:
+        node_id = queue.pop()
+        visited += 1
+        for dependent in dependents[node_id]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                queue.append(dependent)
+    if visited != len(nodes):
+        cyclic = sorted(node_id for node_id, count in waiting.items() if count > 0)
+        raise ValueError(f"Dependency cycle among nodes: {cyclic}")
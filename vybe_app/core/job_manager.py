@@ -1,4 +1,5 @@
-import queue
+import heapq
+import pickle
 import threading
 import time
 import asyncio
@@ -6,12 +7,14 @@ import gc
 import psutil
 import os
 from typing import Any, Callable, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from enum import Enum
 import uuid
 
 from ..logger import log_info, log_warning, log_error
+from .process_lane import ProcessLane
 
 
 class JobPriority(Enum):
@@ -22,6 +25,12 @@ class JobPriority(Enum):
     CRITICAL = 4
 
 
+class JobLane(Enum):
+    """Where a job executes"""
+    THREAD = "thread"    # On a worker thread (I/O-bound work, anything needing app state)
+    PROCESS = "process"  # In the warm process pool (CPU-bound work; func and args must pickle)
+
+
 class JobStatus(Enum):
     """Job status states"""
     PENDING = "pending"
@@ -48,50 +57,102 @@ class Job:
     retry_count: int = 0
     max_retries: int = 3
     timeout: Optional[int] = None  # seconds
+    lane: JobLane = JobLane.THREAD
 
 
 class PriorityJobQueue:
-    """Priority-based job queue"""
+    """
+    Priority job queue backed by a single heap.
     
-    def __init__(self):
-        self.queues = {
-            JobPriority.CRITICAL: queue.Queue(),
-            JobPriority.HIGH: queue.Queue(),
-            JobPriority.NORMAL: queue.Queue(),
-            JobPriority.LOW: queue.Queue()
-        }
+    Jobs run highest priority first and FIFO within a priority. Waiting
+    jobs age: every ``aging_interval`` seconds spent queued counts as one
+    priority level, so LOW jobs cannot be starved by a steady stream of
+    higher-priority work. Because aging is linear and identical for all
+    jobs, the effective order is fixed at insertion time and the heap key
+    is simply ``enqueued_at - priority * aging_interval``.
+    
+    Consumers block on a condition variable and are woken by ``put`` or
+    ``close``; nothing polls.
+    """
+    
+    def __init__(self, aging_interval: float = 30.0):
+        self.aging_interval = aging_interval
+        self._heap = []
+        self._sequence = 0
+        self._closed = False
         self.lock = threading.Lock()
+        self._not_empty = threading.Condition(self.lock)
+        self._depth = {priority: 0 for priority in JobPriority}
+        self._wait_stats = {priority: {'dequeued': 0, 'total_wait': 0.0, 'max_wait': 0.0} for priority in JobPriority}
     
     def put(self, job: Job):
-        """Add job to appropriate priority queue"""
-        self.queues[job.priority].put(job)
-    
-    def get(self, timeout: Optional[int] = None) -> Optional[Job]:
-        """Get next job from highest priority non-empty queue"""
-        if timeout is None:
-            # Non-blocking mode
-            for priority in [JobPriority.CRITICAL, JobPriority.HIGH, JobPriority.NORMAL, JobPriority.LOW]:
-                try:
-                    return self.queues[priority].get_nowait()
-                except queue.Empty:
-                    continue
-            return None
-        else:
-            # Blocking mode with timeout
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                for priority in [JobPriority.CRITICAL, JobPriority.HIGH, JobPriority.NORMAL, JobPriority.LOW]:
-                    try:
-                        return self.queues[priority].get_nowait()
-                    except queue.Empty:
-                        continue
-                # Use short wait instead of sleep to prevent busy waiting
-                time.sleep(0.01)  # Reduced delay to improve responsiveness
-            return None
+        """Add a job and wake one waiting consumer"""
+        now = time.monotonic()
+        with self.lock:
+            self._sequence += 1
+            key = now - job.priority.value * self.aging_interval
+            heapq.heappush(self._heap, (key, self._sequence, now, job))
+            self._depth[job.priority] += 1
+            self._not_empty.notify()
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[Job]:
+        """
+        Pop the next job. ``timeout=None`` does not block; otherwise wait up
+        to ``timeout`` seconds. Returns None when nothing arrived or the queue is closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.lock:
+            while True:
+                while self._heap:
+                    _, _, enqueued_at, job = heapq.heappop(self._heap)
+                    if job.status == JobStatus.CANCELLED:
+                        continue  # Already removed from the depth count by discard()
+                    self._depth[job.priority] -= 1
+                    waited = time.monotonic() - enqueued_at
+                    stats = self._wait_stats[job.priority]
+                    stats['dequeued'] += 1
+                    stats['total_wait'] += waited
+                    stats['max_wait'] = max(stats['max_wait'], waited)
+                    return job
+                if self._closed or deadline is None:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._not_empty.wait(remaining)
+    
+    def discard(self, job: Job):
+        """Account for a queued job that was cancelled; it is skipped when popped"""
+        with self.lock:
+            self._depth[job.priority] = max(0, self._depth[job.priority] - 1)
+    
+    def close(self):
+        """Wake every waiting consumer; get() returns None once the queue is drained"""
+        with self.lock:
+            self._closed = True
+            self._not_empty.notify_all()
+    
+    def reopen(self):
+        with self.lock:
+            self._closed = False
     
     def empty(self) -> bool:
-        """Check if all queues are empty"""
-        return all(q.empty() for q in self.queues.values())
+        """Check if no runnable jobs are queued"""
+        with self.lock:
+            return not any(self._depth.values())
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth and wait times per priority"""
+        with self.lock:
+            return {
+                priority.name: {
+                    'depth': self._depth[priority],
+                    'dequeued': stats['dequeued'],
+                    'avg_wait_ms': round(stats['total_wait'] / stats['dequeued'] * 1000, 2) if stats['dequeued'] else 0.0,
+                    'max_wait_ms': round(stats['max_wait'] * 1000, 2)
+                }
+                for priority, stats in self._wait_stats.items()
+            }
 
 
 class JobManager:
@@ -120,6 +181,14 @@ class JobManager:
         self.jobs: Dict[str, Job] = {}
         self.worker_threads = []
         self.max_workers = 4
+        # Shared pool that runs jobs with a timeout while their worker supervises them
+        self._timeout_executor: Optional[ThreadPoolExecutor] = None
+        self._timeout_executor_lock = threading.Lock()
+        self._run_stats = {priority: {'completed': 0, 'failed': 0, 'total_run': 0.0, 'max_run': 0.0}
+                           for priority in JobPriority}
+        self._run_stats_lock = threading.Lock()
+        # CPU-bound jobs; workers are spawned when the manager starts
+        self.process_lane = ProcessLane(workers=_process_workers())
         self._running = False
         self._initialized = True
         
@@ -147,6 +216,13 @@ class JobManager:
         
         if not self._running:
             self._running = True
+            self.job_queue.reopen()
+            
+            if _process_workers() > 0:
+                try:
+                    self.process_lane.start()
+                except Exception as e:
+                    log_warning(f"Process lane failed to start, CPU-bound jobs will run in threads: {e}")
             
             # Start worker threads
             for i in range(self.max_workers):
@@ -165,7 +241,8 @@ class JobManager:
         if self._running:
             self._running = False
             
-            # Signal cleanup thread to stop
+            # Wake idle workers and signal cleanup thread to stop
+            self.job_queue.close()
             if hasattr(self, "_stop_cleanup_event"):
                 self._stop_cleanup_event.set()
             
@@ -181,6 +258,12 @@ class JobManager:
             self.worker_threads.clear()
             self.cleanup_thread = None
             
+            with self._timeout_executor_lock:
+                if self._timeout_executor is not None:
+                    self._timeout_executor.shutdown(wait=False, cancel_futures=True)
+                    self._timeout_executor = None
+            self.process_lane.shutdown(wait=False)
+            
             # Final cleanup
             self._perform_cleanup(force=True)
             log_info("Job manager stopped")
@@ -193,7 +276,8 @@ class JobManager:
             return False
     
     def add_job(self, func: Callable, *args, priority: JobPriority = JobPriority.NORMAL, 
-                timeout: Optional[int] = None, max_retries: int = 3, **kwargs) -> str:
+                timeout: Optional[int] = None, max_retries: int = 3,
+                lane: JobLane = JobLane.THREAD, **kwargs) -> str:
         """
         Add a job to the queue for background execution.
         
@@ -203,11 +287,17 @@ class JobManager:
             priority: Job priority level
             timeout: Job timeout in seconds
             max_retries: Maximum retry attempts
+            lane: JobLane.PROCESS runs a module-level function in the process pool
             **kwargs: Keyword arguments for the function
             
         Returns:
             Job ID for tracking
         """
+        if lane == JobLane.PROCESS:
+            try:
+                pickle.dumps(func)
+            except Exception as e:
+                raise ValueError(f"Process-lane jobs need a module-level function: {e}") from e
         job_id = str(uuid.uuid4())
         job = Job(
             id=job_id,
@@ -218,7 +308,8 @@ class JobManager:
             status=JobStatus.PENDING,
             created_at=datetime.now(),
             timeout=timeout,
-            max_retries=max_retries
+            max_retries=max_retries,
+            lane=lane
         )
         
         self.jobs[job_id] = job
@@ -226,7 +317,7 @@ class JobManager:
         self.stats['total_jobs'] += 1
         self.stats['pending_jobs'] += 1
         
-        log_info(f"Added job {job_id} with priority {priority.name}")
+        log_info(f"Added job {job_id} with priority {priority.name} ({lane.value} lane)")
         return job_id
     
     def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
@@ -239,6 +330,7 @@ class JobManager:
             'id': job.id,
             'status': job.status.value,
             'priority': job.priority.name,
+            'lane': job.lane.value,
             'created_at': job.created_at.isoformat(),
             'started_at': job.started_at.isoformat() if job.started_at else None,
             'completed_at': job.completed_at.isoformat() if job.completed_at else None,
@@ -255,6 +347,8 @@ class JobManager:
         job = self.jobs[job_id]
         if job.status == JobStatus.PENDING:
             job.status = JobStatus.CANCELLED
+            job.completed_at = datetime.now()
+            self.job_queue.discard(job)
             self.stats['pending_jobs'] -= 1
             log_info(f"Cancelled job {job_id}")
             return True
@@ -292,9 +386,72 @@ class JobManager:
             'memory_usage_mb': self.stats['memory_usage_mb'],
             'last_cleanup': self.last_cleanup.isoformat(),
             'cleanup_interval_seconds': self.cleanup_interval,
-            'job_retention_hours': self.job_retention_hours
+            'job_retention_hours': self.job_retention_hours,
+            'priorities': self._get_priority_stats(),
+            'process_lane': self.process_lane.get_stats()
         }
     
+    def run_in_process(self, func: Callable, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None) -> Any:
+        """
+        Run a CPU-bound, module-level function in the process lane and wait for
+        it; runs on the calling thread when the lane is not running.
+        """
+        if self.process_lane.running:
+            return self.process_lane.run(func, args, kwargs, timeout=timeout)
+        return func(*args, **(kwargs or {}))
+    
+    def _get_priority_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, wait time and run time per priority"""
+        priorities = self.job_queue.get_stats()
+        with self._run_stats_lock:
+            for priority, stats in self._run_stats.items():
+                finished = stats['completed'] + stats['failed']
+                priorities[priority.name].update({
+                    'completed': stats['completed'],
+                    'failed': stats['failed'],
+                    'avg_run_ms': round(stats['total_run'] / finished * 1000, 2) if finished else 0.0,
+                    'max_run_ms': round(stats['max_run'] * 1000, 2)
+                })
+        return priorities
+    
+    def _record_run(self, job: Job, run_seconds: float, succeeded: bool):
+        with self._run_stats_lock:
+            stats = self._run_stats[job.priority]
+            stats['completed' if succeeded else 'failed'] += 1
+            stats['total_run'] += run_seconds
+            stats['max_run'] = max(stats['max_run'], run_seconds)
+    
+    def _get_timeout_executor(self) -> ThreadPoolExecutor:
+        if self._timeout_executor is None:
+            with self._timeout_executor_lock:
+                if self._timeout_executor is None:
+                    self._timeout_executor = ThreadPoolExecutor(max_workers=self.max_workers * 2,
+                                                                thread_name_prefix="JobTimeout")
+        return self._timeout_executor
+    
+    def _run_with_timeout(self, job: Job) -> Any:
+        """Run job on the shared timeout pool, timing it from when a pool thread picks it up"""
+        job_started = threading.Event()
+        
+        def run():
+            job.started_at = datetime.now()
+            job_started.set()
+            return job.func(*job.args, **job.kwargs)
+        
+        future = self._get_timeout_executor().submit(run)
+        # Pool threads still held by earlier timed-out jobs can keep this one queued;
+        # that wait is not part of its timeout. stop() cancels queued runs.
+        if not job_started.wait(1.0):
+            log_warning(f"Job {job.id} is waiting for a free timeout pool thread")
+            while not job_started.wait(0.5):
+                if future.done():
+                    break
+        try:
+            return future.result(timeout=job.timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Job {job.id} timed out after {job.timeout} seconds") from None
+    
     def _cleanup_runner(self):
         """Cleanup thread function for periodic resource management"""
         # Use stop event for graceful shutdown
@@ -392,19 +549,21 @@ class JobManager:
         """Worker thread function"""
         while self._running:
             try:
-                job = self.job_queue.get(timeout=1)
+                # Blocks on the queue's condition variable until a job arrives or stop() closes it
+                job = self.job_queue.get(timeout=self.cleanup_interval)
                 if job is None:
-                    break
+                    continue
                 
                 self._execute_job(job)
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 log_error(f"Job runner error: {e}")
     
     def _execute_job(self, job: Job):
         """Execute a single job"""
+        if job.status == JobStatus.CANCELLED:
+            return  # Cancelled between leaving the queue and starting
+        started = time.monotonic()
         try:
             # Update job status
             job.status = JobStatus.RUNNING
@@ -413,17 +572,14 @@ class JobManager:
             
             log_info(f"Executing job {job.id}")
             
-            # Execute with timeout if specified
-            if job.timeout:
-                import concurrent.futures
-                
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(job.func, *job.args, **job.kwargs)
-                    try:
-                        result = future.result(timeout=job.timeout)
-                    except concurrent.futures.TimeoutError:
-                        future.cancel()
-                        raise TimeoutError(f"Job {job.id} timed out after {job.timeout} seconds")
+            # Execute with timeout if specified. The job runs on the shared timeout
+            # pool so this worker can give up on it; a timed-out job cannot be
+            # interrupted and keeps its pool thread until it returns.
+            if job.lane == JobLane.PROCESS and self.process_lane.running:
+                # The worker thread waits on the process pool, which enforces the timeout
+                result = self.process_lane.run(job.func, job.args, job.kwargs, timeout=job.timeout)
+            elif job.timeout:
+                result = self._run_with_timeout(job)
             else:
                 result = job.func(*job.args, **job.kwargs)
             
@@ -432,6 +588,7 @@ class JobManager:
             job.completed_at = datetime.now()
             job.result = result
             self.stats['completed_jobs'] += 1
+            self._record_run(job, time.monotonic() - started, succeeded=True)
             
             log_info(f"Job {job.id} completed successfully")
             
@@ -439,6 +596,7 @@ class JobManager:
             # Job failed
             job.error = str(e)
             job.retry_count += 1
+            self._record_run(job, time.monotonic() - started, succeeded=False)
             
             if job.retry_count <= job.max_retries:
                 # Retry job
@@ -464,13 +622,9 @@ class JobManager:
         """
         def process_document_task():
             try:
-                # Import backend LLM controller here to avoid circular imports
-                from .backend_llm_controller import BackendLLMController
-                backend_llm = BackendLLMController()
-                
-                # Process with backend LLM for summary and tags
+                # Summary and tags from one cached call on the shared backend controller
                 from ..rag.text_processing import process_document_with_llm, ingest_file_content_to_rag
-                llm_result = process_document_with_llm(content, filename, backend_llm)
+                llm_result = process_document_with_llm(content, filename)
                 
                 # Ingest into RAG with processed metadata
                 success = ingest_file_content_to_rag(collection_name, filename, content)
@@ -494,5 +648,14 @@ class JobManager:
         return self.add_job(process_document_task, priority=JobPriority.NORMAL, timeout=300)
 
 
+def _process_workers() -> int:
+    """Config.JOB_PROCESS_WORKERS (0 disables the process lane)"""
+    try:
+        from ..config import Config
+        return int(getattr(Config, 'JOB_PROCESS_WORKERS', 2))
+    except Exception:
+        return 2
+
+
 # Global singleton instance
 job_manager = JobManager()
@@ -5,11 +5,10 @@ Provides a foundation for API marketplace with external plugin hosting
 
 import json
 import requests
-import hashlib
 import time
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, timedelta
 from enum import Enum
 import logging
@@ -17,6 +16,7 @@ from urllib.parse import urlparse, urljoin
 
 from ..logger import log_info, log_error, log_warning
 from ..models import db, AppSetting
+from ..utils.download_engine import DownloadError, download_file
 
 # Import app for Flask application context
 try:
@@ -65,14 +65,14 @@ class MarketplacePlugin:
     documentation_url: Optional[str] = None
     website_url: Optional[str] = None
     license: Optional[str] = None
-    tags: List[str] = []
+    tags: List[str] = field(default_factory=list)
     icon: Optional[str] = None
-    screenshots: List[str] = []
+    screenshots: List[str] = field(default_factory=list)
     min_vybe_version: Optional[str] = None
     max_vybe_version: Optional[str] = None
-    dependencies: List[str] = []
-    requirements: List[str] = []
-    permissions: List[str] = []
+    dependencies: List[str] = field(default_factory=list)
+    requirements: List[str] = field(default_factory=list)
+    permissions: List[str] = field(default_factory=list)
     rating: Optional[float] = None
     download_count: int = 0
     last_updated: Optional[datetime] = None
@@ -93,7 +93,7 @@ class MarketplaceCategory:
     description: str
     icon: str
     plugin_count: int = 0
-    featured_plugins: List[str] = []
+    featured_plugins: List[str] = field(default_factory=list)
 
 
 class MarketplaceManager:
@@ -586,14 +586,17 @@ class MarketplaceManager:
             temp_dir = self.cache_dir / "downloads" / plugin.id
             temp_dir.mkdir(parents=True, exist_ok=True)
             
-            # Download plugin file
-            response = requests.get(plugin.download_url, stream=True, timeout=30)
-            if response.status_code != 200:
-                log_error(f"Failed to download plugin {plugin.id}: HTTP {response.status_code}")
+            # Download plugin file (resumable; checksum verified while writing)
+            download_path = temp_dir / f"{plugin.id}.download"
+            try:
+                result = download_file(plugin.download_url, download_path,
+                                       expected_sha256=plugin.checksum or None)
+            except DownloadError as e:
+                log_error(f"Failed to download plugin {plugin.id}: {e}")
                 return False
                 
             # Determine file extension
-            content_type = response.headers.get('content-type', '')
+            content_type = result.content_type or ''
             if 'zip' in content_type:
                 file_ext = '.zip'
             elif 'tar' in content_type:
@@ -602,17 +605,7 @@ class MarketplaceManager:
                 file_ext = '.zip'  # Default
                 
             plugin_file = temp_dir / f"{plugin.id}{file_ext}"
-            
-            # Download file
-            with open(plugin_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-                    
-            # Verify checksum if provided
-            if plugin.checksum:
-                if not self._verify_checksum(plugin_file, plugin.checksum):
-                    log_error(f"Checksum verification failed for plugin {plugin.id}")
-                    return False
+            download_path.replace(plugin_file)
                     
             # Install using plugin manager
             from .plugin_manager import plugin_manager
@@ -629,16 +622,6 @@ class MarketplaceManager:
             log_error(f"Error downloading plugin {plugin.id}: {e}")
             return False
             
-    def _verify_checksum(self, file_path: Path, expected_checksum: str) -> bool:
-        """Verify file checksum"""
-        try:
-            with open(file_path, 'rb') as f:
-                file_hash = hashlib.sha256(f.read()).hexdigest()
-            return file_hash == expected_checksum
-        except Exception as e:
-            log_error(f"Error verifying checksum: {e}")
-            return False
-            
     def uninstall_plugin(self, plugin_id: str) -> bool:
         """Uninstall a marketplace plugin"""
         try:
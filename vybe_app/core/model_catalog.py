@@ -0,0 +1,309 @@
+"""
+Local Model Catalog for Vybe
+Single in-memory view of the GGUF models on disk, with facts read from each
+file's header (vybe_app.utils.gguf_metadata) instead of guessed from names.
+
+Entries are persisted in SQLite keyed by path and validated against
+(size, mtime_ns, inode), so a restart re-parses nothing that is unchanged.
+Lookups are dictionary reads; at most every ``check_interval`` seconds a
+lookup stats the model directories and rescans only those whose mtime
+moved (files added, removed or renamed). Entries that failed to parse,
+such as files still being downloaded, are re-checked on the same schedule.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+import logging
+
+from ..utils.gguf_metadata import GGUFError, read_gguf_metadata
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+_QUANTIZATION_PATTERNS = ("Q4_K_M", "Q4_K_S", "Q5_K_M", "Q5_K_S", "Q6_K", "Q8_0", "Q4_0", "Q5_0",
+                          "Q3_K_M", "Q2_K", "IQ4_XS", "BF16", "F16", "F32")
+
+
+@dataclass
+class CatalogEntry:
+    """One local GGUF model file"""
+    path: str
+    name: str
+    filename: str
+    directory: str
+    size: int
+    mtime_ns: int
+    inode: int
+    architecture: Optional[str] = None
+    model_name: Optional[str] = None
+    context_length: Optional[int] = None
+    quantization: Optional[str] = None
+    file_type: Optional[int] = None
+    tensor_count: Optional[int] = None
+    parameter_count: Optional[int] = None
+    embedding_length: Optional[int] = None
+    block_count: Optional[int] = None
+    error: Optional[str] = None
+    scanned_at: float = 0.0
+
+    @property
+    def size_mb(self) -> float:
+        return round(self.size / (1024 * 1024), 2)
+
+    @property
+    def parameter_size(self) -> str:
+        """Human readable parameter count, e.g. '7.2B'"""
+        if not self.parameter_count:
+            return "unknown"
+        if self.parameter_count >= 1e9:
+            return f"{self.parameter_count / 1e9:.1f}B"
+        return f"{self.parameter_count / 1e6:.0f}M"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.update({'size_mb': self.size_mb, 'parameter_size': self.parameter_size})
+        return data
+
+
+_ENTRY_FIELDS = [f.name for f in fields(CatalogEntry)]
+
+
+def quantization_from_filename(filename: str) -> Optional[str]:
+    upper = filename.upper()
+    for pattern in _QUANTIZATION_PATTERNS:
+        if pattern in upper:
+            return pattern
+    return None
+
+
+class ModelCatalog:
+    """
+    Persistent catalog of GGUF models in a set of directories.
+
+    Args:
+        db_path: SQLite file for the persisted entries
+        directories: Model directories to watch
+        check_interval: Minimum seconds between directory change checks
+    """
+
+    def __init__(self, db_path: str, directories: Iterable[PathLike] = (), check_interval: float = 2.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._directories: List[str] = []
+        self._dir_mtimes: Dict[str, int] = {}
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._last_check = 0.0
+        self._stats = {'parsed': 0, 'parse_errors': 0, 'rescans': 0}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS model_catalog (
+                    path TEXT PRIMARY KEY,
+                    directory TEXT NOT NULL,
+                    entry TEXT NOT NULL
+                )
+            """)
+        for row in self._conn.execute("SELECT entry FROM model_catalog"):
+            try:
+                data = json.loads(row[0])
+                entry = CatalogEntry(**{k: v for k, v in data.items() if k in _ENTRY_FIELDS})
+                self._entries[entry.path] = entry
+            except (TypeError, ValueError):
+                continue
+        for directory in directories:
+            self.add_directory(directory)
+
+    def add_directory(self, directory: PathLike):
+        """Watch another models directory (idempotent)"""
+        directory = os.path.abspath(str(directory))
+        with self._lock:
+            if directory not in self._directories:
+                self._directories.append(directory)
+                self._last_check = 0.0
+
+    # Refreshing ------------------------------------------------------
+
+    def refresh(self, force: bool = False):
+        """Rescan changed directories now; ``force`` rescans every directory"""
+        with self._lock:
+            self._last_check = time.monotonic()
+            for directory in self._directories:
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    mtime = None
+                if force or mtime is None or self._dir_mtimes.get(directory) != mtime:
+                    self._scan_directory(directory, mtime)
+            for entry in [e for e in self._entries.values() if e.error]:
+                self._recheck(entry)
+
+    def _ensure_fresh(self):
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self.refresh()
+
+    def _scan_directory(self, directory: str, mtime: Optional[int]):
+        self._stats['rescans'] += 1
+        seen = set()
+        try:
+            with os.scandir(directory) as it:
+                for item in it:
+                    if item.name.lower().endswith('.gguf') and item.is_file():
+                        seen.add(item.path)
+                        self._update(item.path, item.stat())
+        except OSError:
+            pass  # Missing directory: drop its entries below
+        for path in [p for p, e in self._entries.items() if e.directory == directory and p not in seen]:
+            self._remove(path)
+        if mtime is None:
+            self._dir_mtimes.pop(directory, None)
+        else:
+            self._dir_mtimes[directory] = mtime
+
+    def _recheck(self, entry: CatalogEntry):
+        try:
+            self._update(entry.path, os.stat(entry.path))
+        except OSError:
+            self._remove(entry.path)
+
+    def _update(self, path: str, st: os.stat_result):
+        existing = self._entries.get(path)
+        if existing and (existing.size, existing.mtime_ns, existing.inode) == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return
+        directory, filename = os.path.split(path)
+        entry = CatalogEntry(path=path, name=os.path.splitext(filename)[0], filename=filename,
+                             directory=directory, size=st.st_size, mtime_ns=st.st_mtime_ns,
+                             inode=st.st_ino, scanned_at=time.time())
+        try:
+            header = read_gguf_metadata(path)
+            entry.architecture = header.architecture
+            entry.model_name = header.name
+            entry.context_length = header.context_length
+            entry.quantization = header.quantization or quantization_from_filename(filename)
+            entry.file_type = header.file_type
+            entry.tensor_count = header.tensor_count
+            entry.parameter_count = header.parameter_count
+            entry.embedding_length = header.embedding_length
+            entry.block_count = header.block_count
+            self._stats['parsed'] += 1
+        except (GGUFError, OSError, ValueError) as e:
+            entry.quantization = quantization_from_filename(filename)
+            entry.error = str(e)
+            self._stats['parse_errors'] += 1
+            logger.warning(f"Could not read GGUF header of {path}: {e}")
+        self._entries[path] = entry
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO model_catalog (path, directory, entry) VALUES (?, ?, ?)",
+                (path, directory, json.dumps(asdict(entry)))
+            )
+
+    def _remove(self, path: str):
+        self._entries.pop(path, None)
+        with self._conn:
+            self._conn.execute("DELETE FROM model_catalog WHERE path = ?", (path,))
+
+    # Lookups ---------------------------------------------------------
+
+    def list_models(self, directory: Optional[PathLike] = None,
+                    min_context: Optional[int] = None) -> List[CatalogEntry]:
+        """Models sorted by name, optionally limited to a directory or a known minimum context"""
+        with self._lock:
+            self._ensure_fresh()
+            entries = list(self._entries.values())
+        if directory is not None:
+            directory = os.path.abspath(str(directory))
+            entries = [e for e in entries if e.directory == directory]
+        else:
+            entries = [e for e in entries if e.directory in self._directories]
+        if min_context is not None:
+            entries = [e for e in entries if (e.context_length or 0) >= min_context]
+        return sorted(entries, key=lambda e: e.name.lower())
+
+    def get(self, name_or_path: PathLike, directory: Optional[PathLike] = None) -> Optional[CatalogEntry]:
+        """Find a model by path, filename or stem; falls back to a filename substring match"""
+        key = str(name_or_path)
+        with self._lock:
+            self._ensure_fresh()
+            entry = self._entries.get(os.path.abspath(key))
+        if entry is not None:
+            return entry
+        candidates = self.list_models(directory=directory)
+        for entry in candidates:
+            if key in (entry.filename, entry.name):
+                return entry
+        for entry in candidates:
+            if key and key in entry.filename:
+                return entry
+        return None
+
+    def context_length(self, name_or_path: PathLike) -> Optional[int]:
+        entry = self.get(name_or_path)
+        return entry.context_length if entry else None
+
+    def meets_min_context(self, name_or_path: PathLike, min_context: Optional[int] = None) -> Optional[bool]:
+        """
+        Whether a model's trained context reaches ``min_context`` (default
+        Config.REQUIRED_MIN_CONTEXT_TOKENS); None when the header gave no context length.
+        """
+        if min_context is None:
+            min_context = _required_min_context()
+        context = self.context_length(name_or_path)
+        return None if context is None else context >= min_context
+
+    def select_model(self, min_context: Optional[int] = None, prefer_smallest: bool = True) -> Optional[CatalogEntry]:
+        """
+        Best readable model whose header context meets ``min_context``: the
+        smallest by parameters when ``prefer_smallest``, otherwise the largest context.
+        """
+        if min_context is None:
+            min_context = _required_min_context()
+        candidates = [e for e in self.list_models(min_context=min_context) if not e.error]
+        if not candidates:
+            return None
+        if prefer_smallest:
+            candidates.sort(key=lambda e: (e.parameter_count or e.size, e.size))
+        else:
+            candidates.sort(key=lambda e: (-e.context_length, e.parameter_count or e.size, e.size))
+        return candidates[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'models': len(self._entries),
+                'directories': list(self._directories),
+                'unreadable': sum(1 for e in self._entries.values() if e.error),
+                **self._stats
+            }
+
+
+def _required_min_context() -> int:
+    try:
+        from ..config import Config
+        return int(getattr(Config, 'REQUIRED_MIN_CONTEXT_TOKENS', 32768))
+    except Exception:
+        return 32768
+
+
+_model_catalog: Optional[ModelCatalog] = None
+_model_catalog_lock = threading.Lock()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """Shared catalog over Config.get_models_directories(), persisted at Config.MODEL_CATALOG_DB_PATH"""
+    global _model_catalog
+    if _model_catalog is None:
+        with _model_catalog_lock:
+            if _model_catalog is None:
+                from ..config import Config
+                _model_catalog = ModelCatalog(Config.MODEL_CATALOG_DB_PATH, Config.get_models_directories())
+    return _model_catalog
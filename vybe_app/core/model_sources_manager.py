@@ -3,7 +3,6 @@ Model Sources Manager for Vybe
 Integrates multiple model sources (Huggingface, Ollama, direct URLs) with 4K+ context filtering
 """
 
-import requests
 import json
 import logging
 from pathlib import Path
@@ -14,6 +13,7 @@ import aiohttp
 
 # Import caching decorator
 from ..utils.cache_manager import cache
+from ..utils.download_engine import download_file
 
 logger = logging.getLogger(__name__)
 
@@ -250,31 +250,19 @@ class ModelSourcesManager:
             
             logger.info(f"Downloading {filename} from {download_url}")
             
-            # Download with progress tracking
-            response = requests.get(download_url, stream=True)
-            response.raise_for_status()
+            def report(downloaded: int, total_size: int):
+                if progress_callback and total_size > 0:
+                    progress_callback(f"Downloading {filename}", (downloaded / total_size) * 100)
             
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if progress_callback and total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            progress_callback(f"Downloading {filename}", progress)
+            # Ranged, resumable download; a failed attempt leaves a .part file the next call resumes
+            download_file(download_url, local_path, expected_sha256=model.get('sha256'),
+                          progress_callback=report)
             
             logger.info(f"Successfully downloaded {filename}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to download model {model['name']}: {e}")
-            # Clean up partial download
-            if local_path.exists():
-                local_path.unlink()
             return False
     
     async def search_huggingface_models(self, query: str = "", min_context: int = 4096) -> List[Dict[str, Any]]:
@@ -344,10 +332,11 @@ class ModelSourcesManager:
             return []
     
     def validate_model_context(self, model_path: Path) -> Optional[int]:
-        """Validate that a model has sufficient context (placeholder implementation)"""
-        # This would need to inspect the GGUF file metadata to determine actual context
-        # For now, return None to indicate unknown context
-        return None
+        """Trained context length from the model's GGUF header; None if unknown or unreadable"""
+        from .model_catalog import get_model_catalog
+        catalog = get_model_catalog()
+        catalog.add_directory(Path(model_path).parent)
+        return catalog.context_length(model_path)
     
     def get_model_priority_order(self) -> List[str]:
         """Get the priority order for model selection"""
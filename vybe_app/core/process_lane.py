@@ -0,0 +1,253 @@
+"""
+Process Lane for Vybe
+Warm process pool for CPU-bound background work (PDF text extraction,
+audio feature extraction) so it stops competing with request threads for
+the GIL.
+
+Workers are spawned once when the job manager starts and reused for every
+job. Spawning (rather than forking) works on every platform and never copies
+locks held by the server's other threads into a child; run.py only builds the
+app under ``__main__``, so a spawned child does not start a second server.
+
+A call that overruns its timeout cannot be interrupted inside the worker, so
+the pool is recycled: new calls go to fresh workers and the old workers are
+terminated. Other calls caught in the old pool are resubmitted once.
+
+Payloads are pickled in the parent. Anything above ``spill_threshold``
+bytes, in either direction, is written to a file under /dev/shm (shared
+memory on Linux) or the temp directory, and only the file path goes
+through the pool's pipe.
+"""
+
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Spilled:
+    """Reference to a pickled payload written to a file"""
+    __slots__ = ('path',)
+
+    def __init__(self, path: str):
+        self.path = path
+
+
+def _dump(obj: Any, spill_dir: str, threshold: int):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) < threshold:
+        return data
+    fd, path = tempfile.mkstemp(dir=spill_dir, suffix='.pkl')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    return _Spilled(path)
+
+
+def _load(payload) -> Any:
+    if isinstance(payload, _Spilled):
+        try:
+            with open(payload.path, 'rb') as f:
+                data = f.read()
+        finally:
+            _remove(payload.path)
+        return pickle.loads(data)
+    return pickle.loads(payload)
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _execute(payload, spill_dir: str, threshold: int):
+    """Worker entry point: unpack the call, run it, pack the result"""
+    func, args, kwargs = _load(payload)
+    return _dump(func(*args, **kwargs), spill_dir, threshold)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _default_spill_root() -> str:
+    shm = '/dev/shm'
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+class ProcessLane:
+    """
+    Warm ProcessPoolExecutor with large-payload spilling.
+
+    Args:
+        workers: Worker processes
+        spill_threshold: Pickled size in bytes above which payloads go through a file
+    """
+
+    def __init__(self, workers: int = 2, spill_threshold: int = 1024 * 1024):
+        self.workers = max(1, workers)
+        self.spill_threshold = spill_threshold
+        self.spill_dir: Optional[str] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timed_out': 0,
+                       'spilled_args': 0, 'spilled_results': 0, 'restarts': 0, 'recycles': 0,
+                       'resubmitted': 0}
+        # Pools retired after a timeout; their calls were killed, not failed
+        self._recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        try:
+            self._context = multiprocessing.get_context('spawn')
+        except ValueError:
+            self._context = None
+
+    @property
+    def available(self) -> bool:
+        return self._context is not None
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        """Create the pool and spawn every worker now, before the first job needs them"""
+        if not self.available:
+            logger.info("Process lane unavailable on this platform; CPU-bound jobs run in threads")
+            return
+        with self._lock:
+            if self._pool is not None:
+                return
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix=f"vybe-jobs-{os.getpid()}-", dir=_default_spill_root())
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+            pool = self._pool
+        for _ in range(self.workers):
+            pool.submit(_warm_up)
+        logger.info(f"Process lane started with {self.workers} workers")
+
+    def run(self, func: Callable, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None,
+            timeout: Optional[float] = None) -> Any:
+        """
+        Run ``func(*args, **kwargs)`` in a worker and return its result. ``func``
+        must be importable (module level). A timeout raises TimeoutError after
+        the pool running the call has been recycled, so a retry never overlaps
+        the abandoned call.
+        """
+        name = getattr(func, '__name__', func)
+        pool = self._get_pool()
+        payload = _dump((func, args, kwargs or {}), self.spill_dir, self.spill_threshold)
+        spilled_args = isinstance(payload, _Spilled)
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['spilled_args'] += int(spilled_args)
+        try:
+            try:
+                result = self._submit(pool, payload, name, timeout)
+            except BrokenProcessPool:
+                if pool not in self._recycled:
+                    raise
+                # Killed along with another call's timed-out worker; run it once more
+                self._count('resubmitted')
+                pool = self._get_pool()
+                result = self._submit(pool, payload, name, timeout)
+        except BrokenProcessPool as e:
+            self._count('failed')
+            self._restart(pool)
+            raise RuntimeError(f"Process worker died while running {name}") from e
+        except TimeoutError:
+            raise
+        except Exception:
+            self._count('failed')
+            raise
+        finally:
+            if spilled_args:
+                _remove(payload.path)
+        with self._lock:
+            self._stats['completed'] += 1
+            self._stats['spilled_results'] += int(isinstance(result, _Spilled))
+        return _load(result)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self.start()
+        if self._pool is None:
+            raise RuntimeError("Process lane is not available")
+        return self._pool
+
+    def _submit(self, pool: ProcessPoolExecutor, payload: Any, name: str, timeout: Optional[float]) -> Any:
+        future = pool.submit(_execute, payload, self.spill_dir, self.spill_threshold)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Delete the result file of the abandoned call if it still arrives
+            future.add_done_callback(_discard_result)
+            self._count('timed_out')
+            self._recycle(pool)
+            raise TimeoutError(f"{name} timed out after {timeout} seconds") from None
+
+    def _recycle(self, pool: ProcessPoolExecutor):
+        """Replace a pool whose worker is stuck in an abandoned call, and terminate its workers"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self._recycled.add(pool)
+            self._stats['recycles'] += 1
+        # ProcessPoolExecutor has no public way to stop a busy worker
+        processes = list((getattr(pool, '_processes', None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            try:
+                process.terminate()
+            except Exception as e:
+                logger.debug(f"Could not terminate process worker: {e}")
+        logger.warning("Process lane recycled its workers after a timed-out call")
+        self.start()
+
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._stats['restarts'] += 1
+        broken.shutdown(wait=False)
+        logger.warning("Process lane pool broke; restarting workers")
+        self.start()
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            spill_dir, self.spill_dir = self.spill_dir, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'available': self.available, 'running': self.running,
+                    'workers': self.workers, **self._stats}
+
+
+def _discard_result(future):
+    try:
+        result = future.result()
+    except Exception:
+        return
+    if isinstance(result, _Spilled):
+        _remove(result.path)
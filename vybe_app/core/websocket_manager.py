@@ -19,6 +19,7 @@ from flask_socketio import SocketIO, emit, disconnect
 from flask import request, session
 
 from ..logger import log_info, log_warning, log_error
+from ..utils.connection_registry import ConnectionRegistry
 
 
 class ConnectionState(Enum):
@@ -157,10 +158,12 @@ class WebSocketManager:
     
     def __init__(self, socketio: SocketIO):
         self.socketio = socketio
-        self.connections: Dict[str, ConnectionInfo] = {}
         self.event_handlers: Dict[str, List[Callable]] = {}
         self.health_check_interval = 30  # seconds
         self.connection_timeout = 300  # seconds
+        # Indexed by sid, IP and user; idle connections expire off a deadline heap
+        self.connections = ConnectionRegistry(idle_timeout=self.connection_timeout,
+                                              on_expire=self._on_connection_expired)
         self.max_reconnect_attempts = 5
         self.reconnect_delay = 5  # seconds
         
@@ -228,7 +231,7 @@ class WebSocketManager:
         connection_info = self.connection_pool.get_connection(sid, user_id)
         
         if connection_info:
-            self.connections[sid] = connection_info
+            self.connections.add(sid, ip=connection_info.ip_address, user_id=user_id, data=connection_info)
             self.stats['total_connections'] += 1
             self.stats['active_connections'] += 1
             
@@ -246,8 +249,7 @@ class WebSocketManager:
         """Handle WebSocket disconnection"""
         sid = self._get_current_sid()
         
-        if sid in self.connections:
-            connection_info = self.connections[sid]
+        if self.connections.remove(sid) is not None:
             self.stats['active_connections'] -= 1
             
             # Release connection back to pool
@@ -259,22 +261,28 @@ class WebSocketManager:
         """Handle WebSocket error"""
         sid = self._get_current_sid()
         
-        if sid in self.connections:
-            connection_info = self.connections[sid]
+        connection_info = self.connections.get(sid)
+        if connection_info is not None:
             connection_info.error_count += 1
             connection_info.state = ConnectionState.ERROR
             self.stats['total_errors'] += 1
             
             log_error(f"WebSocket error: {sid} - {data}")
+            
+            # Too many errors: drop the connection now rather than on the next health check
+            if connection_info.error_count > 10:
+                log_warning(f"Connection error limit exceeded: {sid}")
+                self._force_disconnect(sid)
     
     def _handle_ping(self):
         """Handle ping message"""
         sid = self._get_current_sid()
         
-        if sid in self.connections:
-            connection_info = self.connections[sid]
+        connection_info = self.connections.get(sid)
+        if connection_info is not None:
             connection_info.last_activity = datetime.utcnow()
             connection_info.message_count += 1
+            self.connections.touch(sid)
             self.stats['total_messages'] += 1
             
             # Send pong response
@@ -320,47 +328,39 @@ class WebSocketManager:
                 event.wait(timeout=error_interval)
     
     def _check_connection_health(self):
-        """Check health of all connections"""
-        current_time = datetime.utcnow()
-        disconnected_sids = []
-        
-        for sid, connection_info in self.connections.items():
-            # Check for timeout
-            if (current_time - connection_info.last_activity).total_seconds() > self.connection_timeout:
-                disconnected_sids.append(sid)
-                connection_info.state = ConnectionState.DISCONNECTED
-                log_warning(f"Connection timeout: {sid}")
-            
-            # Check for too many errors
-            elif connection_info.error_count > 10:
-                disconnected_sids.append(sid)
-                connection_info.state = ConnectionState.ERROR
-                log_warning(f"Connection error limit exceeded: {sid}")
-        
-        # Disconnect unhealthy connections
-        for sid in disconnected_sids:
-            self._force_disconnect(sid)
+        """Expire idle connections (only those past their deadline are visited)"""
+        self.connections.expire()
+    
+    def _on_connection_expired(self, sid: str, connection_info: ConnectionInfo, reason: str):
+        """Registry callback for a connection idle past connection_timeout"""
+        connection_info.state = ConnectionState.DISCONNECTED
+        log_warning(f"Connection timeout: {sid}")
+        self._close_connection(sid)
     
     def _force_disconnect(self, sid: str):
         """Force disconnect a connection"""
-        if sid in self.connections:
-            connection_info = self.connections.pop(sid)
-            self.stats['active_connections'] -= 1
-            
-            # Release connection back to pool
-            self.connection_pool.release_connection(sid, keep_alive=False)
-            
-            try:
-                disconnect(sid)
-            except Exception as e:
-                log_error(f"Error disconnecting {sid}: {e}")
+        if self.connections.remove(sid) is not None:
+            self._close_connection(sid)
+    
+    def _close_connection(self, sid: str):
+        """Release and disconnect a connection already removed from the registry"""
+        self.stats['active_connections'] -= 1
+        
+        # Release connection back to pool
+        self.connection_pool.release_connection(sid, keep_alive=False)
+        
+        try:
+            disconnect(sid)
+        except Exception as e:
+            log_error(f"Error disconnecting {sid}: {e}")
     
     def send_message(self, sid: str, event: str, data: Any):
         """Send message to specific connection"""
-        if sid in self.connections:
-            connection_info = self.connections[sid]
+        connection_info = self.connections.get(sid)
+        if connection_info is not None:
             connection_info.last_activity = datetime.utcnow()
             connection_info.message_count += 1
+            self.connections.touch(sid)
             self.stats['total_messages'] += 1
             
             try:
@@ -377,7 +377,7 @@ class WebSocketManager:
         success_count = 0
         total_count = len(self.connections)
         
-        for sid in list(self.connections.keys()):
+        for sid in list(self.connections):
             if sid != exclude_sid:
                 if self.send_message(sid, event, data):
                     success_count += 1
@@ -391,7 +391,11 @@ class WebSocketManager:
     
     def get_all_connections(self) -> Dict[str, ConnectionInfo]:
         """Get all active connections"""
-        return self.connections.copy()
+        return dict(self.connections.items())
+    
+    def get_user_connections(self, user_id: str) -> List[ConnectionInfo]:
+        """Active connections of one user"""
+        return [conn for conn in map(self.connections.get, self.connections.sids_for_user(user_id)) if conn]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get WebSocket manager statistics"""
@@ -400,6 +404,7 @@ class WebSocketManager:
         return {
             **self.stats,
             'connection_pool': pool_stats,
+            'registry': self.connections.get_stats(),
             'monitoring': self.monitoring
         }
     
@@ -408,7 +413,7 @@ class WebSocketManager:
         self.monitoring = False
         
         # Disconnect all connections
-        for sid in list(self.connections.keys()):
+        for sid in list(self.connections):
             self._force_disconnect(sid)
         
         log_info("WebSocket manager shutdown complete")
@@ -1139,8 +1139,8 @@ class ChatSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
-    messages = db.Column(db.Text, nullable=False)  # JSON string of messages
-    message_count = db.Column(db.Integer, default=0, index=True)
+    messages = db.Column(db.Text, nullable=False, default='[]')  # Legacy JSON blob; history lives in ChatSessionMessage
+    message_count = db.Column(db.Integer, default=0, index=True)  # Also the seq of the next appended message
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
@@ -1153,30 +1153,151 @@ class ChatSession(db.Model):
     )
 
     user = db.relationship('User', backref=db.backref('chat_sessions', lazy='dynamic'))
+    message_rows = db.relationship('ChatSessionMessage', backref='session', lazy='dynamic',
+                                   order_by='ChatSessionMessage.seq', cascade='all, delete-orphan')
 
-    def get_messages(self):
-        """Get messages as list"""
+    def _legacy_messages(self):
+        """Messages still held in the JSON blob of a session saved before migration 1.4.0, or None"""
+        if not self.messages or self.messages == '[]':
+            return None
         try:
-            return json.loads(self.messages)
+            messages = json.loads(self.messages)
         except (ValueError, json.JSONDecodeError):
-            return []
+            return None
+        return messages if isinstance(messages, list) else None
+
+    def _migrate_legacy_messages(self):
+        """Move a legacy JSON blob into message rows before the first append"""
+        legacy = self._legacy_messages()
+        self.messages = '[]'
+        if legacy:
+            for seq, message in enumerate(legacy):
+                self.message_rows.append(ChatSessionMessage.from_message(seq, message))
+            self.message_count = len(legacy)
+
+    def append_message(self, message):
+        """Append one message as its own row; the rest of the history is not touched"""
+        if self._legacy_messages() is not None:
+            self._migrate_legacy_messages()
+        seq = self.message_count or 0
+        row = ChatSessionMessage.from_message(seq, message)
+        self.message_rows.append(row)
+        self.message_count = seq + 1
+        return row
+
+    def page_messages(self, limit=50, before_seq=None, after_seq=None):
+        """
+        One page of messages in order, each with its ``seq``: the newest
+        ``limit`` by default, those before ``before_seq``, or those after
+        ``after_seq``. Pages are read by keyset on (session_id, seq).
+        """
+        limit = max(0, int(limit))
+        legacy = self._legacy_messages()
+        if legacy is not None:
+            indexed = [{'seq': seq, **message} for seq, message in enumerate(legacy)]
+            if after_seq is not None:
+                return indexed[after_seq + 1:after_seq + 1 + limit]
+            end = len(indexed) if before_seq is None else max(0, min(before_seq, len(indexed)))
+            return indexed[max(0, end - limit):end]
+
+        query = ChatSessionMessage.query.filter(ChatSessionMessage.session_id == self.id)
+        if after_seq is not None:
+            rows = query.filter(ChatSessionMessage.seq > after_seq).order_by(
+                ChatSessionMessage.seq.asc()).limit(limit).all()
+        else:
+            if before_seq is not None:
+                query = query.filter(ChatSessionMessage.seq < before_seq)
+            rows = list(reversed(query.order_by(ChatSessionMessage.seq.desc()).limit(limit).all()))
+        return [row.to_dict() for row in rows]
+
+    def iter_messages(self, batch_size=500):
+        """Yield the whole conversation in order, reading ``batch_size`` rows at a time"""
+        legacy = self._legacy_messages()
+        if legacy is not None:
+            yield from legacy
+            return
+        last_seq = -1
+        while True:
+            rows = ChatSessionMessage.query.filter(
+                ChatSessionMessage.session_id == self.id,
+                ChatSessionMessage.seq > last_seq
+            ).order_by(ChatSessionMessage.seq.asc()).limit(batch_size).all()
+            for row in rows:
+                yield row.to_message()
+            if len(rows) < batch_size:
+                return
+            last_seq = rows[-1].seq
+
+    def get_messages(self):
+        """Get messages as list (loads the whole conversation; prefer page_messages/iter_messages)"""
+        legacy = self._legacy_messages()
+        if legacy is not None:
+            return legacy
+        return list(self.iter_messages())
 
     def set_messages(self, messages):
-        """Set messages from list"""
-        self.messages = json.dumps(messages)
+        """Replace the whole conversation (rewrites every row; prefer append_message)"""
+        self.messages = '[]'
+        if self.id is not None:
+            ChatSessionMessage.query.filter(ChatSessionMessage.session_id == self.id).delete(
+                synchronize_session=False)
+        for seq, message in enumerate(messages):
+            self.message_rows.append(ChatSessionMessage.from_message(seq, message))
         self.message_count = len(messages)
 
-    def to_dict(self):
+    def to_dict(self, include_messages=True):
         """Convert session to dictionary"""
-        return {
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'title': self.title,
-            'messages': self.get_messages(),
             'message_count': self.message_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_messages:
+            data['messages'] = self.get_messages()
+        return data
+
+class ChatSessionMessage(db.Model):
+    """One message of a ChatSession, appended under a per-session sequence number"""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('chat_session.id'), nullable=False)
+    seq = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(32), nullable=True)
+    content = db.Column(db.Text, nullable=True)
+    extra = db.Column(db.Text, nullable=True)  # JSON of any other message keys
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_chatsessionmessage_session_seq', 'session_id', 'seq', unique=True),
+    )
+
+    @classmethod
+    def from_message(cls, seq, message):
+        """Row for a chat message dict ({'role': ..., 'content': ..., ...})"""
+        message = dict(message)
+        # Non-text content (e.g. multimodal parts) stays in ``extra`` as JSON
+        role = message.pop('role') if isinstance(message.get('role'), str) else None
+        content = message.pop('content') if isinstance(message.get('content'), str) else None
+        return cls(seq=seq, role=role, content=content, extra=json.dumps(message) if message else None)
+
+    def to_message(self):
+        """The message dict as it was appended"""
+        message = {}
+        if self.role is not None:
+            message['role'] = self.role
+        if self.content is not None:
+            message['content'] = self.content
+        if self.extra:
+            try:
+                message.update(json.loads(self.extra))
+            except (ValueError, json.JSONDecodeError):
+                pass
+        return message
+
+    def to_dict(self):
+        return {'seq': self.seq, **self.to_message()}
 
 class SystemPrompt(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -5,9 +5,15 @@ RAG module initialization - provides a unified interface for RAG functionality.
 from .web_search import perform_web_search, apply_post_retrieval_filtering, scrape_url_content
 from .vector_db import (
     initialize_vector_db, 
+    get_vector_db_registry,
+    vector_db_client,
+    shutdown_vector_db,
     add_content_to_vector_db, 
     retrieve_relevant_chunks, 
+    retrieve_scored_chunks,
+    search_chunks,
     list_rag_documents_metadata,
+    count_rag_documents,
     delete_rag_document_by_id,
     get_document_full_content,
     add_single_document_to_rag,
@@ -22,14 +28,54 @@ from .text_processing import (
     ingest_document,
     process_retrieved_documents_with_llm
 )
+from .chunking import (
+    Chunk,
+    StreamingChunker,
+    iter_chunks,
+    chunk_document,
+    rebuild_from_chunks
+)
+from .ingestion import (
+    IngestionPipeline,
+    IngestionSource,
+    IngestionResult,
+    file_source,
+    text_source,
+    ingest_sources
+)
+from .lexical_index import LexicalIndex, get_lexical_index
+from .query_cache import QueryResultCache, get_query_cache, get_query_cache_stats
+from .document_summarizer import DocumentSummarizer, get_document_summarizer
+from .retrieval import (
+    FanOutRetriever,
+    RetrievedChunk,
+    RetrievalResult,
+    retrieve_across_collections
+)
 
 __all__ = [
     'perform_web_search',
     'apply_post_retrieval_filtering', 
     'scrape_url_content',
     'initialize_vector_db',
+    'get_vector_db_registry',
+    'vector_db_client',
+    'shutdown_vector_db',
     'add_content_to_vector_db',
     'retrieve_relevant_chunks',
+    'retrieve_scored_chunks',
+    'search_chunks',
+    'LexicalIndex',
+    'get_lexical_index',
+    'QueryResultCache',
+    'get_query_cache',
+    'get_query_cache_stats',
+    'DocumentSummarizer',
+    'get_document_summarizer',
+    'FanOutRetriever',
+    'RetrievedChunk',
+    'RetrievalResult',
+    'retrieve_across_collections',
     'chunk_text',
     'process_pdf_content',
     'process_text_file',
@@ -37,7 +83,19 @@ __all__ = [
     'ingest_file_content_to_rag',
     'ingest_document',
     'process_retrieved_documents_with_llm',
+    'Chunk',
+    'StreamingChunker',
+    'iter_chunks',
+    'chunk_document',
+    'rebuild_from_chunks',
+    'IngestionPipeline',
+    'IngestionSource',
+    'IngestionResult',
+    'file_source',
+    'text_source',
+    'ingest_sources',
     'list_rag_documents_metadata',
+    'count_rag_documents',
     'delete_rag_document_by_id',
     'get_document_full_content',
     'add_single_document_to_rag',
@@ -0,0 +1,300 @@
+"""
+Token-aware, boundary-respecting text chunker for RAG ingestion.
+
+Chunks are streamed from an iterator of pages/lines. Boundaries are chosen
+at sentence ends, paragraph breaks and markdown headings, and chunk size is
+measured in tokens using a pluggable tokenizer. Every chunk is an exact slice
+of the source text and carries its UTF-8 byte offsets, so a document can be
+rebuilt from its chunks without duplicating the overlap regions.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.token_counter import make_token_counter
+
+# A unit ends after sentence punctuation (plus closing quotes/brackets) and
+# any following whitespace, or at a paragraph break.
+_UNIT_BOUNDARY = re.compile(r'(?:[.!?]+["\')\]]*\s+|\n[ \t]*\n\s*)')
+_HEADING_LINE = re.compile(r'^#{1,6}[ \t]+\S', re.MULTILINE)
+_WHITESPACE = re.compile(r'\s')
+
+# Longest unit, in characters per token of budget, before text without any
+# sentence or paragraph boundary (minified files, long code lines) is cut
+_MAX_UNIT_CHARS_PER_TOKEN = 16
+
+
+@dataclass
+class Chunk:
+    """A chunk of a document with its position in the source"""
+    text: str
+    index: int
+    start_byte: int
+    end_byte: int
+    token_count: int
+    heading: Optional[str] = None
+
+    def metadata(self) -> dict:
+        """Metadata fields stored alongside the chunk in the vector DB"""
+        data = {
+            'chunk_index': self.index,
+            'start_byte': self.start_byte,
+            'end_byte': self.end_byte,
+            'token_count': self.token_count
+        }
+        if self.heading:
+            data['heading'] = self.heading
+        return data
+
+
+class StreamingChunker:
+    """
+    Incremental chunker. Feed pages with ``feed()`` and collect chunks as they
+    become final; call ``finish()`` at end of input for the remainder.
+
+    Args:
+        max_tokens: Upper bound on tokens per chunk
+        overlap_tokens: Trailing tokens of a chunk repeated at the start of the next
+        tokenizer: Anything accepted by make_token_counter()
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 32, tokenizer: Any = None):
+        self.max_tokens = max(8, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.count_tokens = make_token_counter(tokenizer)
+        self._max_unit_chars = self.max_tokens * _MAX_UNIT_CHARS_PER_TOKEN
+
+        self._text = ""          # Unconsumed source text, starting at _text_base
+        self._text_base = 0      # Character offset of _text[0] in the document
+        self._byte_base = 0      # UTF-8 byte offset of _text[0] in the document
+        self._scan_pos = 0       # Character offset (absolute) up to which units are found
+        self._consumed = 0       # Character offset (absolute) up to which units are placed in chunks
+        self._units: List[Tuple[int, int, int]] = []  # (start_char, end_char, tokens) in current chunk
+        self._unit_tokens = 0
+        self._heading: Optional[str] = None
+        self._next_heading: Optional[str] = None
+        self._index = 0
+
+    def feed(self, page: str) -> List[Chunk]:
+        """Add text and return any chunks that are now complete"""
+        if not page:
+            return []
+        self._text += page
+        return self._consume(final=False)
+
+    def finish(self) -> List[Chunk]:
+        """Flush all remaining text as chunks"""
+        chunks = self._consume(final=True)
+        if self._units:
+            chunks.append(self._emit(keep_overlap=False))
+        return chunks
+
+    # Internal helpers -------------------------------------------------
+
+    def _local(self, absolute: int) -> int:
+        return absolute - self._text_base
+
+    def _consume(self, final: bool) -> List[Chunk]:
+        chunks: List[Chunk] = []
+        for start, end in self._next_units(final):
+            unit_text = self._text[self._local(start):self._local(end)]
+            if not unit_text.strip():
+                # Pure whitespace: attach to the current chunk so slices stay contiguous
+                if self._units:
+                    last_start, _, last_tokens = self._units[-1]
+                    self._units[-1] = (last_start, end, last_tokens)
+                self._consumed = end
+                continue
+
+            heading = self._heading_of(unit_text)
+            if heading is not None:
+                # Headings always open a new chunk and are never overlapped across
+                if self._units:
+                    chunks.append(self._emit(keep_overlap=False))
+                self._next_heading = heading
+            for piece_start, piece_end, tokens in self._split_oversized(start, end):
+                if self._units and self._unit_tokens + tokens > self.max_tokens:
+                    chunks.append(self._emit(keep_overlap=True))
+                    # Shrink the carried overlap until the new piece fits
+                    while self._units and self._unit_tokens + tokens > self.max_tokens:
+                        self._unit_tokens -= self._units.pop(0)[2]
+                if not self._units and self._next_heading is not None:
+                    self._heading = self._next_heading
+                    self._next_heading = None
+                self._units.append((piece_start, piece_end, tokens))
+                self._unit_tokens += tokens
+                self._consumed = piece_end
+        return chunks
+
+    def _next_units(self, final: bool) -> List[Tuple[int, int]]:
+        """Return (start, end) absolute spans of the complete units after _scan_pos"""
+        local_scan = self._local(self._scan_pos)
+        text = self._text
+        boundaries = [m.end() for m in _UNIT_BOUNDARY.finditer(text, local_scan)]
+        # Headings start a new unit even without a preceding sentence end
+        boundaries += [m.start() for m in _HEADING_LINE.finditer(text, local_scan)]
+        boundaries = sorted(set(b for b in boundaries if local_scan < b < len(text)))
+        if final and local_scan < len(text):
+            boundaries.append(len(text))
+
+        spans = []
+        for boundary in boundaries:
+            for end in self._bounded_cuts(self._local(self._scan_pos), boundary, final=True):
+                spans.append((self._scan_pos, self._text_base + end))
+                self._scan_pos = self._text_base + end
+        if not final:
+            # Without a boundary the tail would be buffered until end of input
+            for end in self._bounded_cuts(self._local(self._scan_pos), len(text), final=False):
+                spans.append((self._scan_pos, self._text_base + end))
+                self._scan_pos = self._text_base + end
+        return spans
+
+    def _bounded_cuts(self, start: int, end: int, final: bool) -> List[int]:
+        """
+        Local cut points splitting text[start:end] into units of at most
+        _max_unit_chars, preferring the last whitespace in each window. Unless
+        ``final``, the remainder shorter than the limit is left for later input.
+        """
+        cuts = []
+        while end - start > self._max_unit_chars:
+            window_end = start + self._max_unit_chars
+            cut = window_end
+            for match in _WHITESPACE.finditer(self._text, start + self._max_unit_chars // 2, window_end):
+                cut = match.end()
+            cuts.append(cut)
+            start = cut
+        if final and start < end:
+            cuts.append(end)
+        return cuts
+
+    def _heading_of(self, unit_text: str) -> Optional[str]:
+        stripped = unit_text.lstrip()
+        if not _HEADING_LINE.match(stripped):
+            return None
+        return stripped.split('\n', 1)[0].lstrip('#').strip()[:200]
+
+    def _split_oversized(self, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Split a unit above max_tokens at whitespace; yields (start, end, tokens)"""
+        unit_text = self._text[self._local(start):self._local(end)]
+        tokens = self.count_tokens(unit_text)
+        if tokens <= self.max_tokens:
+            yield start, end, tokens
+            return
+
+        piece_start = 0
+        piece_tokens = 0
+        last_cut = 0
+        for match in re.finditer(r'\S+\s*', unit_text):
+            word_tokens = self.count_tokens(match.group())
+            if word_tokens > self.max_tokens:
+                # No whitespace to split at: cut the word itself on the token budget
+                if piece_tokens:
+                    yield start + piece_start, start + last_cut, piece_tokens
+                    piece_start = last_cut
+                    piece_tokens = 0
+                for cut_start, cut_end, cut_tokens in self._hard_split(unit_text, piece_start, match.end()):
+                    yield start + cut_start, start + cut_end, cut_tokens
+                piece_start = last_cut = match.end()
+                continue
+            if piece_tokens and piece_tokens + word_tokens > self.max_tokens:
+                yield start + piece_start, start + last_cut, piece_tokens
+                piece_start = last_cut
+                piece_tokens = 0
+            piece_tokens += word_tokens
+            last_cut = match.end()
+        last_cut = len(unit_text)
+        if piece_tokens:
+            yield start + piece_start, start + last_cut, piece_tokens
+
+    def _hard_split(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Cut text[start:end] into pieces of at most max_tokens; yields (start, end, tokens)"""
+        while start < end:
+            tokens = self.count_tokens(text[start:end])
+            if tokens <= self.max_tokens:
+                yield start, end, tokens
+                return
+            size = max(1, (end - start) * self.max_tokens // tokens)
+            piece_tokens = self.count_tokens(text[start:start + size])
+            while size > 1 and piece_tokens > self.max_tokens:
+                size = max(1, size * 9 // 10)
+                piece_tokens = self.count_tokens(text[start:start + size])
+            yield start, start + size, piece_tokens
+            start += size
+
+    def _emit(self, keep_overlap: bool) -> Chunk:
+        chunk_start = self._units[0][0]
+        chunk_end = self._units[-1][1]
+        text = self._text[self._local(chunk_start):self._local(chunk_end)]
+        start_byte = self._byte_base + len(self._text[:self._local(chunk_start)].encode('utf-8'))
+        chunk = Chunk(
+            text=text,
+            index=self._index,
+            start_byte=start_byte,
+            end_byte=start_byte + len(text.encode('utf-8')),
+            token_count=self._unit_tokens,
+            heading=self._heading
+        )
+        self._index += 1
+
+        # Carry trailing units into the next chunk as overlap
+        carried: List[Tuple[int, int, int]] = []
+        if keep_overlap and self.overlap_tokens:
+            carried_tokens = 0
+            for unit in reversed(self._units[1:]):
+                if carried_tokens + unit[2] > self.overlap_tokens:
+                    break
+                carried.insert(0, unit)
+                carried_tokens += unit[2]
+        self._units = carried
+        self._unit_tokens = sum(unit[2] for unit in carried)
+        if not keep_overlap:
+            self._heading = None
+
+        # Drop source text that no chunk can refer to anymore
+        keep_from = carried[0][0] if carried else self._consumed
+        cut = self._local(keep_from)
+        if cut > 0:
+            self._byte_base += len(self._text[:cut].encode('utf-8'))
+            self._text = self._text[cut:]
+            self._text_base = keep_from
+        return chunk
+
+
+def iter_chunks(pages: Iterable[str], max_tokens: int = 256, overlap_tokens: int = 32,
+                tokenizer: Any = None) -> Iterator[Chunk]:
+    """
+    Stream token-bounded chunks from an iterator of pages or lines.
+
+    Example:
+        for chunk in iter_chunks(iter_pdf_pages(path), max_tokens=256):
+            print(chunk.index, chunk.start_byte, chunk.token_count)
+    """
+    chunker = StreamingChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens, tokenizer=tokenizer)
+    for page in pages:
+        yield from chunker.feed(page)
+    yield from chunker.finish()
+
+
+def chunk_document(text: str, max_tokens: int = 256, overlap_tokens: int = 32,
+                   tokenizer: Any = None) -> List[Chunk]:
+    """Chunk an in-memory document; convenience wrapper around iter_chunks"""
+    return list(iter_chunks([text], max_tokens=max_tokens, overlap_tokens=overlap_tokens, tokenizer=tokenizer))
+
+
+def rebuild_from_chunks(chunks: Iterable[Tuple[int, int, str]]) -> str:
+    """
+    Reassemble a document from (start_byte, end_byte, text) triples, skipping
+    bytes already covered by an earlier chunk's overlap.
+    """
+    parts: List[bytes] = []
+    covered = None
+    for start_byte, end_byte, text in sorted(chunks, key=lambda c: (c[0], c[1])):
+        data = text.encode('utf-8')
+        if covered is None:
+            parts.append(data)
+            covered = end_byte
+        elif end_byte > covered:
+            parts.append(data[max(0, covered - start_byte):])
+            covered = end_byte
+    return b''.join(parts).decode('utf-8', errors='ignore')
@@ -0,0 +1,286 @@
+"""
+Sidecar document index for RAG collections.
+
+ChromaDB stores chunks, not documents, so answering "which chunks belong to
+document X" used to mean pulling every chunk of a collection into Python.
+This module keeps a small SQLite index next to the Chroma database mapping
+each document to its chunk ids, chunk count, source and byte size, so that
+document listing, full-content fetch and delete only touch that document's
+chunks.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "document_index.sqlite3"
+
+# Uploaded files use chunk ids of the form "<filename>_chunk_<n>"
+CHUNK_TAG_SUFFIX = "_chunk"
+
+
+class DocumentIndex:
+    """SQLite-backed map of (collection, doc_id) -> chunk ids and document stats"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS rag_documents (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    source TEXT,
+                    chunk_count INTEGER NOT NULL DEFAULT 0,
+                    byte_size INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (collection, doc_id)
+                );
+                CREATE TABLE IF NOT EXISTS rag_document_chunks (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    PRIMARY KEY (collection, doc_id, seq)
+                );
+                CREATE TABLE IF NOT EXISTS rag_indexed_collections (
+                    collection TEXT PRIMARY KEY,
+                    indexed_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_rag_documents_listing
+                    ON rag_documents (collection, created_at, doc_id);
+            """)
+
+    # Writes ----------------------------------------------------------
+
+    def record_document(self, collection: str, doc_id: str, chunk_ids: List[str],
+                        source: Optional[str] = None, byte_size: int = 0):
+        """Insert or replace a document and its chunk list"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT created_at FROM rag_documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            ).fetchone()
+            self._conn.execute(
+                "DELETE FROM rag_document_chunks WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rag_documents "
+                "(collection, doc_id, source, chunk_count, byte_size, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (collection, doc_id, source or doc_id, len(chunk_ids), byte_size,
+                 existing[0] if existing else now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO rag_document_chunks (collection, doc_id, seq, chunk_id) VALUES (?, ?, ?, ?)",
+                [(collection, doc_id, seq, chunk_id) for seq, chunk_id in enumerate(chunk_ids)]
+            )
+
+    def remove_document(self, collection: str, doc_id: str) -> bool:
+        """Remove a document; returns True if it was indexed"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM rag_document_chunks WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            )
+            cursor = self._conn.execute(
+                "DELETE FROM rag_documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            )
+            return cursor.rowcount > 0
+
+    def drop_collection(self, collection: str):
+        """Forget everything about a collection"""
+        with self._lock, self._conn:
+            for table in ("rag_document_chunks", "rag_documents", "rag_indexed_collections"):
+                self._conn.execute(f"DELETE FROM {table} WHERE collection = ?", (collection,))
+
+    # Reads -----------------------------------------------------------
+
+    def get_document(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_id, source, chunk_count, byte_size, created_at, updated_at "
+                "FROM rag_documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_chunk_ids(self, collection: str, doc_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM rag_document_chunks WHERE collection = ? AND doc_id = ? ORDER BY seq",
+                (collection, doc_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def list_documents(self, collection: str, offset: int = 0,
+                       limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Documents in insertion order, one page at a time"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id, source, chunk_count, byte_size, created_at, updated_at "
+                "FROM rag_documents WHERE collection = ? ORDER BY created_at, doc_id LIMIT ? OFFSET ?",
+                (collection, -1 if limit is None else max(0, limit), max(0, offset))
+            ).fetchall()
+            first_chunks = {}
+            if rows:
+                placeholders = ",".join("?" * len(rows))
+                first_chunks = dict(self._conn.execute(
+                    f"SELECT doc_id, chunk_id FROM rag_document_chunks "
+                    f"WHERE collection = ? AND seq = 0 AND doc_id IN ({placeholders})",
+                    (collection, *[row[0] for row in rows])
+                ).fetchall())
+        documents = []
+        for row in rows:
+            document = self._row_to_dict(row)
+            document['first_chunk_id'] = first_chunks.get(row[0])
+            documents.append(document)
+        return documents
+
+    def count_documents(self, collection: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM rag_documents WHERE collection = ?", (collection,)
+            ).fetchone()[0]
+
+    # Backfill --------------------------------------------------------
+
+    def is_indexed(self, collection: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM rag_indexed_collections WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+
+    def mark_indexed(self, collection: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rag_indexed_collections (collection, indexed_at) VALUES (?, ?)",
+                (collection, datetime.now().isoformat())
+            )
+
+    def ensure_indexed(self, collection_name: str, collection: Any, page_size: int = 5000):
+        """
+        One-time backfill for collections written before the index existed.
+
+        Scans chunk metadata (not documents) page by page and groups chunk ids
+        by document id, i.e. the chunk id without its trailing ``_<n>``.
+        """
+        if self.is_indexed(collection_name):
+            return
+
+        documents: Dict[str, Dict[str, Any]] = {}
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            ids = page.get("ids") or []
+            metadatas = page.get("metadatas") or []
+            for i, chunk_id in enumerate(ids):
+                metadata = (metadatas[i] if i < len(metadatas) else None) or {}
+                doc_id, seq = split_chunk_id(chunk_id)
+                entry = documents.setdefault(doc_id, {'source': metadata.get('source', doc_id),
+                                                      'chunks': [], 'byte_size': 0})
+                entry['chunks'].append((seq, chunk_id))
+                entry['byte_size'] = max(entry['byte_size'], int(metadata.get('end_byte', 0) or 0))
+            if len(ids) < page_size:
+                break
+            offset += page_size
+
+        for doc_id, entry in documents.items():
+            entry['chunks'].sort()
+            self.record_document(collection_name, doc_id, [chunk_id for _, chunk_id in entry['chunks']],
+                                 source=entry['source'], byte_size=entry['byte_size'])
+        self.mark_indexed(collection_name)
+        logger.info(f"Indexed {len(documents)} documents in RAG collection '{collection_name}'")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row) -> Dict[str, Any]:
+        return {
+            'doc_id': row[0],
+            'source': row[1],
+            'chunk_count': row[2],
+            'byte_size': row[3],
+            'created_at': row[4],
+            'updated_at': row[5]
+        }
+
+
+def split_chunk_id(chunk_id: str):
+    """
+    Split '<doc_id>_<n>' or '<doc_id>_chunk_<n>' (uploaded files) into (doc_id, n);
+    ids without a numeric suffix are their own document
+    """
+    doc_id, _, suffix = chunk_id.rpartition('_')
+    if doc_id and suffix.isdigit():
+        if doc_id.endswith(CHUNK_TAG_SUFFIX) and len(doc_id) > len(CHUNK_TAG_SUFFIX):
+            doc_id = doc_id[:-len(CHUNK_TAG_SUFFIX)]
+        return doc_id, int(suffix)
+    return chunk_id, 0
+
+
+def chunk_byte_size(chunks: Iterable[str], chunk_metadatas: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Document byte size from chunk offsets when known, otherwise summed chunk bytes"""
+    if chunk_metadatas:
+        ends = [metadata.get('end_byte') for metadata in chunk_metadatas if metadata.get('end_byte') is not None]
+        if ends:
+            return max(ends)
+    return sum(len(chunk.encode('utf-8')) for chunk in chunks)
+
+
+_indexes: Dict[str, DocumentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_document_index(db_path: str) -> DocumentIndex:
+    """Get the shared document index stored alongside the Chroma database at ``db_path``"""
+    key = os.path.normcase(os.path.realpath(db_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = DocumentIndex(os.path.join(db_path, INDEX_FILENAME))
+            _indexes[key] = index
+        return index
+
+
+def client_db_path(chroma_client: Any) -> Optional[str]:
+    """Persist directory of a Chroma client, falling back to the default pool's path"""
+    try:
+        db_path = chroma_client.get_settings().persist_directory
+    except Exception:
+        db_path = None
+    if not db_path:
+        from .vector_db import get_connection_pool
+        pool = get_connection_pool()
+        db_path = pool.db_path if pool else None
+    return db_path or None
+
+
+def get_document_index_for_client(chroma_client: Any) -> Optional[DocumentIndex]:
+    """Resolve the document index for a Chroma client, or None if its path is unknown"""
+    db_path = client_db_path(chroma_client)
+    if not db_path:
+        return None
+    try:
+        return get_document_index(db_path)
+    except Exception as e:
+        logger.warning(f"RAG document index unavailable for {db_path}: {e}")
+        return None
@@ -0,0 +1,367 @@
+"""
+Document Summarizer for Vybe
+Summary and tags for ingested documents, produced by one LLM call per
+document and cached on disk.
+
+    - Results are stored in SQLite keyed by (SHA-256 of the content, model
+      id), so re-uploading a file or re-syncing a connector never sends the
+      same content to the same model twice.
+    - Summary and tags come from a single prompt instead of one call each.
+    - While no interactive or agent request is running or queued in the
+      LLM scheduler, small documents that arrive together are collected
+      for a short window and summarized in one numbered multi-document
+      prompt. Documents missing from a batched answer are retried on
+      their own.
+    - Failed or empty generations are never cached.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from ..utils.llm_scheduler import RequestClass, get_llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompts change so old cache entries stop matching
+PROMPT_VERSION = 1
+
+_DOCUMENT_HEADER = re.compile(r'^\W*document\s+(\d+)\b', re.IGNORECASE)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8', 'replace')).hexdigest()
+
+
+def parse_summary_block(lines: Sequence[str]) -> Tuple[str, List[str]]:
+    """(summary, tags) from 'Summary: ...' / 'Tags: a, b' lines"""
+    summary = ""
+    tags: List[str] = []
+    for line in lines:
+        line = line.strip().lstrip('-*# ').strip()
+        lower = line.lower()
+        if lower.startswith("summary:"):
+            summary = line[len("summary:"):].strip()
+        elif lower.startswith("tags:"):
+            tags = [tag.strip() for tag in line[len("tags:"):].split(",") if tag.strip()]
+    return summary, tags[:5]
+
+
+class _PendingDocument:
+    __slots__ = ('key', 'content', 'filename', 'done', 'result', 'tried_alone')
+
+    def __init__(self, key: Tuple[str, str], content: str, filename: str):
+        self.key = key
+        self.content = content
+        self.filename = filename
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self.tried_alone = False
+
+
+class DocumentSummarizer:
+    """
+    Cached, batching summary/tag generator for ingestion.
+
+    Args:
+        db_path: SQLite file holding cached results
+        controller_provider: Returns the BackendLLMController to call
+        is_backend_idle: Returns True when no interactive request is using the backend
+        max_chars: Content characters sent per document
+        small_document_chars: Documents up to this size may be batched
+        batch_size: Documents per batched prompt (1 disables batching)
+        batch_window: Seconds the first small document waits for others to join
+    """
+
+    def __init__(self, db_path: str, controller_provider: Optional[Callable[[], Any]] = None,
+                 is_backend_idle: Optional[Callable[[], bool]] = None, max_chars: int = 2000,
+                 small_document_chars: int = 1500, batch_size: int = 4, batch_window: float = 0.05):
+        self.db_path = db_path
+        self.controller_provider = controller_provider or _default_controller
+        self.is_backend_idle = is_backend_idle or _backend_idle
+        self.max_chars = max(1, max_chars)
+        self.small_document_chars = min(small_document_chars, self.max_chars)
+        self.batch_size = max(1, batch_size)
+        self.batch_window = max(0.0, batch_window)
+        self._lock = threading.Lock()
+        self._batch_lock = threading.Condition()
+        self._pending: List[_PendingDocument] = []
+        self._batch_leader = False
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._stats = {'cache_hits': 0, 'cache_misses': 0, 'llm_calls': 0, 'batched_calls': 0,
+                       'batched_documents': 0, 'failed': 0, 'llm_seconds': 0.0}
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS document_summaries (
+                    content_hash TEXT NOT NULL,
+                    model_id TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    tags TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (content_hash, model_id)
+                )
+            """)
+
+    # Cache -----------------------------------------------------------
+
+    def _model_id(self, controller) -> str:
+        model_path = getattr(controller, 'model_path', None) or 'unknown'
+        return f"{os.path.basename(str(model_path))}#p{PROMPT_VERSION}"
+
+    def _cached(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, tags FROM document_summaries WHERE content_hash = ? AND model_id = ?", key
+            ).fetchone()
+        if row is None:
+            return None
+        return {'summary': row[0], 'tags': json.loads(row[1]), 'cached': True}
+
+    def _store(self, key: Tuple[str, str], summary: str, tags: List[str]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO document_summaries (content_hash, model_id, summary, tags, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key[0], key[1], summary, json.dumps(tags), time.time())
+            )
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    # Summarization ---------------------------------------------------
+
+    def summarize(self, content: str, filename: str = "", controller=None) -> Optional[Dict[str, Any]]:
+        """
+        Return ``{'summary', 'tags', 'cached'}`` for a document, or None when
+        the backend is unavailable or produced nothing usable.
+        """
+        controller = controller or self.controller_provider()
+        key = (content_hash(content), self._model_id(controller))
+        cached = self._cached(key)
+        if cached is not None:
+            self._count('cache_hits')
+            return cached
+        self._count('cache_misses')
+        if not controller.is_server_ready():
+            return None
+        if (self.batch_size > 1 and len(content) <= self.small_document_chars
+                and self._backend_idle()):
+            pending = _PendingDocument(key, content, filename)
+            self._join_batch(pending, controller)
+            if pending.result is not None or pending.tried_alone:
+                return pending.result
+        return self._summarize_one(key, content, filename, controller)
+
+    def summarize_many(self, documents: Sequence[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """Summarize ``(content, filename)`` pairs, batching the small uncached ones"""
+        controller = self.controller_provider()
+        model_id = self._model_id(controller)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        small: List[Tuple[int, _PendingDocument]] = []
+        large: List[Tuple[int, Tuple[str, str], str, str]] = []
+        batching = self.batch_size > 1 and self._backend_idle()
+        for index, (content, filename) in enumerate(documents):
+            key = (content_hash(content), model_id)
+            cached = self._cached(key)
+            if cached is not None:
+                self._count('cache_hits')
+                results[index] = cached
+                continue
+            self._count('cache_misses')
+            if batching and len(content) <= self.small_document_chars:
+                small.append((index, _PendingDocument(key, content, filename)))
+            else:
+                large.append((index, key, content, filename))
+        if (small or large) and not controller.is_server_ready():
+            return results
+        for start in range(0, len(small), self.batch_size):
+            self._run_batch([pending for _, pending in small[start:start + self.batch_size]], controller)
+        for index, pending in small:
+            if pending.result is None and not pending.tried_alone:
+                pending.result = self._summarize_one(pending.key, pending.content, pending.filename, controller)
+            results[index] = pending.result
+        for index, key, content, filename in large:
+            results[index] = self._summarize_one(key, content, filename, controller)
+        return results
+
+    def _backend_idle(self) -> bool:
+        try:
+            return bool(self.is_backend_idle())
+        except Exception:
+            return False
+
+    def _join_batch(self, pending: _PendingDocument, controller):
+        """
+        Queue a small document for batching. The first thread to arrive leads:
+        it waits up to ``batch_window`` for others, then runs batches until the
+        queue is empty. Everyone else waits for their result.
+        """
+        with self._batch_lock:
+            self._pending.append(pending)
+            if self._batch_leader:
+                self._batch_lock.notify_all()
+                leader = False
+            else:
+                self._batch_leader = leader = True
+        if not leader:
+            pending.done.wait()
+            return
+        deadline = time.monotonic() + self.batch_window
+        with self._batch_lock:
+            while len(self._pending) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._batch_lock.wait(remaining)
+        while True:
+            with self._batch_lock:
+                if not self._pending:
+                    self._batch_leader = False
+                    return
+                batch = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+            try:
+                self._run_batch(batch, controller)
+            finally:
+                for document in batch:
+                    document.done.set()
+
+    def _run_batch(self, batch: List[_PendingDocument], controller):
+        """Fill ``result`` for every document the batched answer covered"""
+        if len(batch) == 1:
+            document = batch[0]
+            document.tried_alone = True
+            document.result = self._summarize_one(document.key, document.content, document.filename, controller)
+            return
+        sections = [f"Document {number}: {document.filename or 'untitled'}\n{document.content}"
+                    for number, document in enumerate(batch, 1)]
+        prompt = f"""Analyze each of the following {len(batch)} documents and provide, for each one:
+1. A concise summary (2-3 sentences)
+2. Relevant tags (up to 5 keywords)
+
+{chr(10).join(sections)}
+
+Response format (one block per document, in order):
+Document 1
+Summary: [your summary here]
+Tags: tag1, tag2, tag3, tag4, tag5"""
+        response = self._complete(controller, prompt, max_tokens=160 * len(batch))
+        blocks: Dict[int, List[str]] = {}
+        current = None
+        for line in (response or "").splitlines():
+            match = _DOCUMENT_HEADER.match(line)
+            if match:
+                current = int(match.group(1))
+                blocks.setdefault(current, [])
+                rest = line[match.end():].strip(' :-')
+                if rest:
+                    blocks[current].append(rest)
+            elif current is not None:
+                blocks[current].append(line)
+        covered = 0
+        for number, document in enumerate(batch, 1):
+            summary, tags = parse_summary_block(blocks.get(number, []))
+            if summary:
+                self._store(document.key, summary, tags)
+                document.result = {'summary': summary, 'tags': tags, 'cached': False}
+                covered += 1
+        with self._lock:
+            self._stats['batched_calls'] += 1
+            self._stats['batched_documents'] += covered
+
+    def _summarize_one(self, key: Tuple[str, str], content: str, filename: str,
+                       controller) -> Optional[Dict[str, Any]]:
+        if len(content) > self.max_chars:
+            content = content[:self.max_chars] + "..."
+        prompt = f"""Analyze the following document and provide:
+1. A concise summary (2-3 sentences)
+2. Relevant tags (up to 5 keywords)
+
+Document: {filename or 'untitled'}
+{content}
+
+Response format:
+Summary: [your summary here]
+Tags: tag1, tag2, tag3, tag4, tag5"""
+        summary, tags = parse_summary_block((self._complete(controller, prompt, max_tokens=256) or "").splitlines())
+        if not summary:
+            self._count('failed')
+            return None
+        self._store(key, summary, tags)
+        return {'summary': summary, 'tags': tags, 'cached': False}
+
+    def _complete(self, controller, prompt: str, max_tokens: int) -> str:
+        started = time.monotonic()
+        try:
+            return controller.generate_completion(prompt, max_tokens=max_tokens, temperature=0.3,
+                                                  request_class=RequestClass.BACKGROUND)
+        except Exception as e:
+            logger.warning(f"Document summarization call failed: {e}")
+            return ""
+        finally:
+            with self._lock:
+                self._stats['llm_calls'] += 1
+                self._stats['llm_seconds'] += time.monotonic() - started
+
+    # Maintenance -----------------------------------------------------
+
+    def clear(self, model_id: Optional[str] = None) -> int:
+        """Drop cached results (for one model id, or all); returns rows removed"""
+        with self._lock, self._conn:
+            if model_id is None:
+                cursor = self._conn.execute("DELETE FROM document_summaries")
+            else:
+                cursor = self._conn.execute("DELETE FROM document_summaries WHERE model_id = ?", (model_id,))
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached_documents'] = self._conn.execute("SELECT COUNT(*) FROM document_summaries").fetchone()[0]
+        stats['llm_seconds'] = round(stats['llm_seconds'], 3)
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _default_controller():
+    from ..core.backend_llm_controller import get_backend_controller
+    return get_backend_controller()
+
+
+def _backend_idle() -> bool:
+    return get_llm_scheduler().is_idle(RequestClass.BACKGROUND)
+
+
+_document_summarizer: Optional[DocumentSummarizer] = None
+_document_summarizer_lock = threading.Lock()
+
+
+def get_document_summarizer() -> DocumentSummarizer:
+    """Shared summarizer with its cache at Config.DOCUMENT_SUMMARY_CACHE_PATH"""
+    global _document_summarizer
+    if _document_summarizer is None:
+        with _document_summarizer_lock:
+            if _document_summarizer is None:
+                from ..config import Config
+                _document_summarizer = DocumentSummarizer(
+                    Config.DOCUMENT_SUMMARY_CACHE_PATH,
+                    small_document_chars=Config.DOCUMENT_SUMMARY_BATCH_CHARS,
+                    batch_size=Config.DOCUMENT_SUMMARY_BATCH_SIZE
+                )
+    return _document_summarizer
@@ -0,0 +1,393 @@
+"""
+Batched, pipelined ingestion engine for RAG collections.
+
+Documents flow through four stages:
+
+    read/extract  ->  chunk  ->  embed (batched)  ->  upsert (batched)
+
+Read/extract and chunking run per source on a worker pool and push chunk
+records into a bounded queue. The calling thread drains that queue, embeds
+chunks in batches and upserts them with one ``collection.upsert()`` call per
+batch. Because the queue is bounded, extractors block when embedding falls
+behind, so a large PDF is never held in memory in full. A batch that fails
+to embed or upsert marks its sources as failed; the remaining batches are
+still written.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import logging
+
+from .query_cache import invalidate_collection
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed by a worker once its source has been fully chunked
+_SOURCE_DONE = object()
+
+
+@dataclass
+class IngestionSource:
+    """A single document to ingest"""
+    source_id: str
+    loader: Callable[[], Iterable[str]]  # Yields pages/blocks of extracted text
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    id_prefix: Optional[str] = None  # Document id; defaults to source_id
+    chunk_tag: Optional[str] = None  # Chunk ids are f"{document_id}_{chunk_tag}_{index}" when set
+
+    @property
+    def document_id(self) -> str:
+        return self.id_prefix or self.source_id
+
+    def chunk_id(self, index: int) -> str:
+        if self.chunk_tag:
+            return f"{self.document_id}_{self.chunk_tag}_{index}"
+        return f"{self.document_id}_{index}"
+
+
+@dataclass
+class ChunkRecord:
+    """A chunk waiting to be embedded and upserted"""
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+    source_id: str
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of an ingestion run"""
+    sources_total: int = 0
+    sources_ingested: int = 0
+    chunks_ingested: int = 0
+    batches_written: int = 0
+    batches_failed: int = 0
+    failed_sources: Dict[str, str] = field(default_factory=dict)
+    chunk_counts: Dict[str, int] = field(default_factory=dict)
+    extract_seconds: float = 0.0
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    total_seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.sources_ingested > 0 and not self.failed_sources
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'sources_total': self.sources_total,
+            'sources_ingested': self.sources_ingested,
+            'chunks_ingested': self.chunks_ingested,
+            'batches_written': self.batches_written,
+            'batches_failed': self.batches_failed,
+            'failed_sources': dict(self.failed_sources),
+            'extract_seconds': round(self.extract_seconds, 3),
+            'embed_seconds': round(self.embed_seconds, 3),
+            'upsert_seconds': round(self.upsert_seconds, 3),
+            'total_seconds': round(self.total_seconds, 3)
+        }
+
+
+def file_source(file_path: str, source_id: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None,
+                id_prefix: Optional[str] = None, chunk_tag: Optional[str] = None) -> IngestionSource:
+    """Build an IngestionSource that streams text out of a .pdf/.txt/.md file"""
+    from .text_processing import iter_pdf_pages, iter_text_file
+
+    def loader() -> Iterable[str]:
+        if file_path.lower().endswith('.pdf'):
+            return iter_pdf_pages(file_path)
+        return iter_text_file(file_path)
+
+    return IngestionSource(
+        source_id=source_id or os.path.basename(file_path),
+        loader=loader,
+        metadata=metadata or {},
+        id_prefix=id_prefix,
+        chunk_tag=chunk_tag
+    )
+
+
+def text_source(source_id: str, text: str, metadata: Optional[Dict[str, Any]] = None,
+                id_prefix: Optional[str] = None, chunk_tag: Optional[str] = None) -> IngestionSource:
+    """Build an IngestionSource for text that is already in memory"""
+    return IngestionSource(
+        source_id=source_id,
+        loader=lambda: [text],
+        metadata=metadata or {},
+        id_prefix=id_prefix,
+        chunk_tag=chunk_tag
+    )
+
+
+class IngestionPipeline:
+    """
+    Pipelined bulk ingestion into a single ChromaDB collection.
+
+    Args:
+        collection: ChromaDB collection to upsert into
+        batch_size: Number of chunks per embedding call and per upsert
+        max_workers: Worker threads running read/extract/chunk
+        max_pending_chunks: Bound on chunks buffered between stages (backpressure)
+        chunker: Callable turning an iterator of pages into chunk texts or Chunk objects
+        embedding_function: Callable mapping a list of texts to a list of vectors.
+            When None, the collection embeds documents itself during upsert.
+        document_index: Optional DocumentIndex updated with each ingested document
+        lexical_index: Optional LexicalIndex updated with each upserted batch
+        collection_name: Collection name used for document_index/lexical_index entries
+        db_path: Database path of ``collection``; scopes query-cache invalidation
+    """
+
+    def __init__(self, collection: Any, batch_size: int = 64, max_workers: int = 4,
+                 max_pending_chunks: int = 512,
+                 chunker: Optional[Callable[[Iterable[str]], Iterator[Any]]] = None,
+                 embedding_function: Optional[Callable[[List[str]], List[Any]]] = None,
+                 document_index: Any = None, lexical_index: Any = None,
+                 collection_name: Optional[str] = None, db_path: Optional[str] = None):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_pending_chunks = max(self.batch_size, max_pending_chunks)
+        self.chunker = chunker or _default_chunker
+        self.embedding_function = embedding_function
+        self.document_index = document_index
+        self.lexical_index = lexical_index
+        self.collection_name = collection_name or getattr(collection, 'name', None)
+        self.db_path = db_path
+
+    def ingest(self, sources: Iterable[IngestionSource]) -> IngestionResult:
+        """Ingest every source, returning counts and per-stage timings"""
+        sources = list(sources)
+        result = IngestionResult(sources_total=len(sources))
+        if not sources:
+            return result
+
+        start_time = time.perf_counter()
+        pending: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_pending_chunks)
+        stop_event = threading.Event()
+        stats_lock = threading.Lock()
+
+        byte_sizes: Dict[str, int] = {}
+
+        def extract(source: IngestionSource):
+            extract_start = time.perf_counter()
+            count = 0
+            byte_size = 0
+            try:
+                for item in self.chunker(source.loader()):
+                    if stop_event.is_set():
+                        return
+                    # Chunkers may yield plain strings or Chunk objects with offsets
+                    text = getattr(item, 'text', item)
+                    if not text or not text.strip():
+                        continue
+                    # Chunk ids stay contiguous so the document index can derive them
+                    index = count
+                    # Caller metadata cannot override the ids the indexes rely on
+                    metadata = {
+                        **source.metadata,
+                        **(item.metadata() if hasattr(item, 'metadata') else {}),
+                        'source': source.source_id,
+                        'chunk_id': source.chunk_id(index),
+                        'chunk_index': index
+                    }
+                    # Blocks while the embed/upsert stage is behind
+                    self._put(pending, ChunkRecord(source.chunk_id(index), text, metadata, source.source_id), stop_event)
+                    count += 1
+                    byte_size = max(byte_size, metadata.get('end_byte', 0)) if 'end_byte' in metadata \
+                        else byte_size + len(text.encode('utf-8'))
+                if count == 0:
+                    with stats_lock:
+                        result.failed_sources[source.source_id] = 'No text content extracted'
+            except Exception as e:
+                logger.error(f"Error extracting {source.source_id}: {e}")
+                with stats_lock:
+                    result.failed_sources[source.source_id] = str(e)
+            finally:
+                with stats_lock:
+                    result.chunk_counts[source.source_id] = count
+                    byte_sizes[source.source_id] = byte_size
+                    result.extract_seconds += time.perf_counter() - extract_start
+                self._put(pending, _SOURCE_DONE, stop_event)
+
+        # Chunk ids per source whose batch was upserted; only these reach the document index
+        written: Dict[str, List[str]] = {}
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(sources)),
+                                      thread_name_prefix="RAGIngest")
+        try:
+            for source in sources:
+                executor.submit(extract, source)
+
+            remaining = len(sources)
+            batch: List[ChunkRecord] = []
+            while remaining:
+                item = pending.get()
+                if item is _SOURCE_DONE:
+                    remaining -= 1
+                    continue
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch, result, stats_lock, written)
+                    batch = []
+            if batch:
+                self._write_batch(batch, result, stats_lock, written)
+        except Exception:
+            stop_event.set()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+
+        if self.document_index is not None and self.collection_name:
+            self._record_documents(sources, written, byte_sizes)
+
+        result.sources_ingested = sum(
+            1 for source in sources
+            if result.chunk_counts.get(source.source_id) and source.source_id not in result.failed_sources
+        )
+        result.total_seconds = time.perf_counter() - start_time
+        logger.info(
+            f"Ingested {result.chunks_ingested} chunks from {result.sources_ingested}/{result.sources_total} "
+            f"sources in {result.batches_written} batches ({result.total_seconds:.2f}s)"
+        )
+        return result
+
+    def _record_documents(self, sources: List[IngestionSource], written: Dict[str, List[str]],
+                          byte_sizes: Dict[str, int]):
+        """Keep the sidecar document index in step with what was upserted"""
+        for source in sources:
+            chunk_ids = written.get(source.source_id)
+            if not chunk_ids:
+                continue
+            try:
+                self.document_index.record_document(
+                    self.collection_name,
+                    source.document_id,
+                    chunk_ids,
+                    source=source.source_id,
+                    byte_size=byte_sizes.get(source.source_id, 0)
+                )
+            except Exception as e:
+                logger.error(f"Error indexing document {source.source_id}: {e}")
+
+    @staticmethod
+    def _put(pending: "queue.Queue[Any]", item: Any, stop_event: threading.Event):
+        """Put with periodic wake-ups so workers exit if the consumer has failed"""
+        while True:
+            try:
+                pending.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if stop_event.is_set():
+                    return
+
+    def _write_batch(self, batch: List[ChunkRecord], result: IngestionResult, stats_lock: threading.Lock,
+                     written: Dict[str, List[str]]):
+        """Embed and upsert one batch of chunks, failing its sources rather than the run on error"""
+        try:
+            self._upsert_batch(batch, result)
+            for record in batch:
+                written.setdefault(record.source_id, []).append(record.id)
+        except Exception as e:
+            source_ids = sorted({record.source_id for record in batch})
+            logger.error(f"Error writing batch of {len(batch)} chunks from {', '.join(source_ids)}: {e}")
+            result.batches_failed += 1
+            with stats_lock:
+                for source_id in source_ids:
+                    result.failed_sources.setdefault(source_id, f"Batch write failed: {e}")
+
+    def _upsert_batch(self, batch: List[ChunkRecord], result: IngestionResult):
+        """Embed and upsert one batch of chunks"""
+        ids = [record.id for record in batch]
+        documents = [record.text for record in batch]
+        metadatas = [record.metadata for record in batch]
+
+        embeddings = None
+        if self.embedding_function is not None:
+            embed_start = time.perf_counter()
+            embeddings = self.embedding_function(documents)
+            result.embed_seconds += time.perf_counter() - embed_start
+
+        upsert_start = time.perf_counter()
+        if embeddings is not None:
+            self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+        else:
+            self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas)
+        if self.lexical_index is not None and self.collection_name:
+            self.lexical_index.add_chunks(self.collection_name, ids, documents)
+        if self.collection_name:
+            invalidate_collection(self.collection_name, self.db_path)
+        result.upsert_seconds += time.perf_counter() - upsert_start
+
+        result.chunks_ingested += len(batch)
+        result.batches_written += 1
+
+
+def _default_chunker(pages: Iterable[str]) -> Iterator[Any]:
+    """Token-aware chunking with the configured RAG chunk budget"""
+    from .chunking import iter_chunks
+    from ..config import Config
+
+    return iter_chunks(pages, Config.RAG_CHUNK_TOKENS, Config.RAG_CHUNK_OVERLAP_TOKENS)
+
+
+_default_embedding_function: Optional[Callable[[List[str]], List[Any]]] = None
+_default_embedding_loaded = False
+_default_embedding_lock = threading.Lock()
+
+
+def get_default_embedding_function() -> Optional[Callable[[List[str]], List[Any]]]:
+    """
+    Return ChromaDB's default embedding function so embedding can run as its own
+    batched stage. Falls back to None (collection-side embedding) if unavailable.
+
+    The instance is shared so its model is only loaded once per process.
+    """
+    global _default_embedding_function, _default_embedding_loaded
+    with _default_embedding_lock:
+        if not _default_embedding_loaded:
+            _default_embedding_loaded = True
+            try:
+                from chromadb.utils import embedding_functions
+                _default_embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            except Exception as e:
+                logger.warning(f"Default embedding function unavailable, collection will embed on upsert: {e}")
+        return _default_embedding_function
+
+
+def ingest_sources(collection_name: str, sources: Iterable[IngestionSource],
+                   db_path: Optional[str] = None, **pipeline_options) -> IngestionResult:
+    """
+    Ingest sources into ``collection_name`` using the shared ChromaDB pool.
+
+    Pipeline options default to Config.RAG_INGEST_* settings.
+    """
+    from .vector_db import vector_db_client
+    from .document_index import get_document_index
+    from .lexical_index import get_lexical_index
+    from ..config import Config
+
+    options = {
+        'batch_size': Config.RAG_INGEST_BATCH_SIZE,
+        'max_workers': Config.RAG_INGEST_WORKERS,
+        'max_pending_chunks': Config.RAG_INGEST_MAX_PENDING_CHUNKS,
+        **pipeline_options
+    }
+    if 'embedding_function' not in options:
+        options['embedding_function'] = get_default_embedding_function()
+
+    db_path = db_path or Config.RAG_VECTOR_DB_PATH
+    if 'document_index' not in options:
+        options['document_index'] = get_document_index(db_path)
+    if 'lexical_index' not in options and Config.RAG_LEXICAL_INDEX_ENABLED:
+        options['lexical_index'] = get_lexical_index(db_path)
+
+    with vector_db_client(db_path) as client:
+        collection = client.get_or_create_collection(name=collection_name)
+        return IngestionPipeline(collection, collection_name=collection_name, db_path=db_path,
+                                 **options).ingest(sources)
@@ -0,0 +1,355 @@
+"""
+Persistent BM25 inverted index for RAG collections.
+
+Vector search misses exact identifiers (error codes, function names, SKUs)
+and every query pays for an embedding. This index keeps per-chunk term
+frequencies in a SQLite file next to the Chroma database and loads each
+collection's postings into memory on first use, so a BM25 ranking costs a
+few dictionary lookups. Hybrid search fuses it with the vector ranking.
+
+Chunks are added on the same paths that write to Chroma (IngestionPipeline,
+add_content_to_vector_db) and removed with their documents. Only term
+statistics and ids are stored; chunk text stays in Chroma. Collections
+written before the index existed are backfilled once, on the first lexical
+or hybrid query (hybrid retrieval is opt-in via Config.RAG_RETRIEVAL_MODE).
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "lexical_index.sqlite3"
+
+# Identifiers stay whole ("err_conn_reset", "np.float32", "sku-4410-b") and are
+# also indexed by their parts, so both exact and partial keyword queries match.
+_TOKEN = re.compile(r'\w+(?:[.\-:/]+\w+)*')
+_SUBTOKEN_SPLIT = re.compile(r'[._\-:/]+|(?<=[a-z])(?=[A-Z])|(?<=[A-Za-z])(?=[0-9])|(?<=[0-9])(?=[A-Za-z])')
+_IDENTIFIER_HINT = re.compile(r'[_.\-:/]|\d|[a-z][A-Z]')
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it of on or that the this to was "
+    "were what when where which who why will with".split()
+)
+
+
+@lru_cache(maxsize=65536)
+def _token_terms(token: str) -> Tuple[str, ...]:
+    lowered = token.lower()
+    terms = [] if lowered in _STOPWORDS else [lowered]
+    if _IDENTIFIER_HINT.search(token):
+        parts = [part.lower() for part in _SUBTOKEN_SPLIT.split(token) if part]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part not in _STOPWORDS)
+    return tuple(terms)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased index terms for ``text``: whole identifiers plus their parts"""
+    terms: List[str] = []
+    for token in _TOKEN.findall(text):
+        terms.extend(_token_terms(token))
+    return terms
+
+
+def _query_terms(query: str, postings: Dict[str, Dict[str, int]]) -> List[str]:
+    """
+    Query-side tokenization: an identifier the index knows is looked up whole;
+    its parts are only used when the whole identifier has no postings. This
+    keeps "CODE_1234" from scanning every chunk that mentions "code".
+    """
+    terms = []
+    for match in _TOKEN.finditer(query):
+        token = match.group()
+        lowered = token.lower()
+        if lowered in postings or not _IDENTIFIER_HINT.search(token):
+            if lowered not in _STOPWORDS:
+                terms.append(lowered)
+            continue
+        terms.extend(part.lower() for part in _SUBTOKEN_SPLIT.split(token)
+                     if part and part.lower() not in _STOPWORDS)
+    return list(dict.fromkeys(terms))
+
+
+def is_keyword_query(query: str) -> bool:
+    """
+    True for short queries or queries containing identifier-like tokens.
+    Hybrid search weights BM25 more heavily for these; it still embeds them.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return False
+    if len(tokens) <= 2:
+        return True
+    return any(_IDENTIFIER_HINT.search(token) for token in tokens)
+
+
+class _CollectionPostings:
+    """In-memory postings for one collection"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def add(self, chunk_id: str, term_counts: Dict[str, int]):
+        """Add a chunk; callers remove any previous version first"""
+        length = sum(term_counts.values())
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[chunk_id] = count
+        self.lengths[chunk_id] = length
+        self.total_length += length
+
+    def remove(self, chunk_id: str, term_counts: Dict[str, int]):
+        length = self.lengths.pop(chunk_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for term in term_counts:
+            chunk_counts = self.postings.get(term)
+            if chunk_counts and chunk_counts.pop(chunk_id, None) is not None and not chunk_counts:
+                del self.postings[term]
+
+
+class LexicalIndex:
+    """
+    BM25 index over the chunks of every collection in one Chroma database.
+
+    Args:
+        db_path: SQLite file holding per-chunk term frequencies
+        k1: BM25 term-frequency saturation
+        b: BM25 length normalization
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.2, b: float = 0.75):
+        self.db_path = db_path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded: Dict[str, _CollectionPostings] = {}
+        self._indexed: set = set()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(lexical_chunks)")]
+            if 'text' in columns:
+                # Earlier versions kept a second copy of every chunk's text
+                self._conn.executescript("""
+                    ALTER TABLE lexical_chunks RENAME TO lexical_chunks_old;
+                    CREATE TABLE lexical_chunks (
+                        collection TEXT NOT NULL,
+                        chunk_id TEXT NOT NULL,
+                        terms TEXT NOT NULL,
+                        PRIMARY KEY (collection, chunk_id)
+                    );
+                    INSERT INTO lexical_chunks (collection, chunk_id, terms)
+                        SELECT collection, chunk_id, terms FROM lexical_chunks_old;
+                    DROP TABLE lexical_chunks_old;
+                """)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS lexical_chunks (
+                    collection TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    terms TEXT NOT NULL,
+                    PRIMARY KEY (collection, chunk_id)
+                );
+                CREATE TABLE IF NOT EXISTS lexical_indexed_collections (
+                    collection TEXT PRIMARY KEY,
+                    indexed_at TEXT NOT NULL
+                );
+            """)
+
+    # Writes ----------------------------------------------------------
+
+    def add_chunks(self, collection: str, chunk_ids: Sequence[str], texts: Sequence[str]):
+        """Insert or replace chunks; cheap enough to run on every ingestion batch"""
+        rows = []
+        counts = []
+        for chunk_id, text in zip(chunk_ids, texts, strict=True):
+            term_counts = dict(Counter(tokenize(text or "")))
+            counts.append((chunk_id, term_counts))
+            rows.append((collection, chunk_id, json.dumps(term_counts, separators=(',', ':'))))
+        if not rows:
+            return
+        with self._lock:
+            postings = self._loaded.get(collection)
+            if postings is not None:
+                # Re-added chunks replace their previous postings
+                replaced = [chunk_id for chunk_id, _ in counts if chunk_id in postings.lengths]
+                for chunk_id, terms in self._fetch(collection, replaced, "terms"):
+                    postings.remove(chunk_id, json.loads(terms))
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO lexical_chunks (collection, chunk_id, terms) VALUES (?, ?, ?)",
+                    rows
+                )
+            if postings is not None:
+                for chunk_id, term_counts in counts:
+                    postings.add(chunk_id, term_counts)
+
+    def remove_chunks(self, collection: str, chunk_ids: Iterable[str]):
+        chunk_ids = list(chunk_ids)
+        if not chunk_ids:
+            return
+        with self._lock:
+            postings = self._loaded.get(collection)
+            if postings is not None:
+                for chunk_id, terms in self._fetch(collection, chunk_ids, "terms"):
+                    postings.remove(chunk_id, json.loads(terms))
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM lexical_chunks WHERE collection = ? AND chunk_id = ?",
+                    [(collection, chunk_id) for chunk_id in chunk_ids]
+                )
+
+    def drop_collection(self, collection: str):
+        with self._lock:
+            self._loaded.pop(collection, None)
+            self._indexed.discard(collection)
+            with self._conn:
+                self._conn.execute("DELETE FROM lexical_chunks WHERE collection = ?", (collection,))
+                self._conn.execute("DELETE FROM lexical_indexed_collections WHERE collection = ?", (collection,))
+
+    # Backfill --------------------------------------------------------
+
+    def is_indexed(self, collection: str) -> bool:
+        if collection in self._indexed:
+            return True
+        with self._lock:
+            indexed = self._conn.execute(
+                "SELECT 1 FROM lexical_indexed_collections WHERE collection = ?", (collection,)
+            ).fetchone() is not None
+            if indexed:
+                self._indexed.add(collection)
+            return indexed
+
+    def ensure_indexed(self, collection_name: str, collection: Any, page_size: int = 2000):
+        """One-time backfill of a collection written before the index existed"""
+        if self.is_indexed(collection_name):
+            return
+        offset = 0
+        total = 0
+        while True:
+            page = collection.get(include=["documents"], limit=page_size, offset=offset)
+            ids = page.get("ids") or []
+            self.add_chunks(collection_name, ids, page.get("documents") or [])
+            total += len(ids)
+            if len(ids) < page_size:
+                break
+            offset += page_size
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lexical_indexed_collections (collection, indexed_at) VALUES (?, ?)",
+                (collection_name, datetime.now().isoformat())
+            )
+            self._indexed.add(collection_name)
+        logger.info(f"Built lexical index for {total} chunks in RAG collection '{collection_name}'")
+
+    # Queries ---------------------------------------------------------
+
+    def search(self, collection: str, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """
+        BM25 top-n for ``query``: dicts with id and score (raw BM25), best
+        match first. Callers fetch the chunk text from Chroma.
+        """
+        return [
+            {'id': chunk_id, 'score': score}
+            for chunk_id, score in self._score(collection, query, n_results)
+        ]
+
+    def _score(self, collection: str, query: str, n_results: int) -> List[Tuple[str, float]]:
+        with self._lock:
+            postings = self._load(collection)
+            total_chunks = len(postings.lengths)
+            terms = _query_terms(query, postings.postings)
+            if not total_chunks or not terms:
+                return []
+            average_length = postings.total_length / total_chunks or 1.0
+            scores: Dict[str, float] = {}
+            for term in terms:
+                chunk_counts = postings.postings.get(term)
+                if not chunk_counts:
+                    continue
+                df = len(chunk_counts)
+                idf = math.log(1.0 + (total_chunks - df + 0.5) / (df + 0.5))
+                for chunk_id, tf in chunk_counts.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * postings.lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return heapq.nlargest(max(1, n_results), scores.items(), key=lambda item: item[1])
+
+    def _load(self, collection: str) -> _CollectionPostings:
+        postings = self._loaded.get(collection)
+        if postings is None:
+            postings = _CollectionPostings()
+            for chunk_id, terms in self._conn.execute(
+                "SELECT chunk_id, terms FROM lexical_chunks WHERE collection = ?", (collection,)
+            ):
+                postings.add(chunk_id, json.loads(terms))
+            self._loaded[collection] = postings
+        return postings
+
+    def _fetch(self, collection: str, chunk_ids: List[str], column: str) -> List[Tuple[str, str]]:
+        rows = []
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(self._conn.execute(
+                    f"SELECT chunk_id, {column} FROM lexical_chunks "
+                    f"WHERE collection = ? AND chunk_id IN ({placeholders})",
+                    (collection, *batch)
+                ).fetchall())
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._loaded.clear()
+            self._conn.close()
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_lexical_index(db_path: str) -> LexicalIndex:
+    """Get the shared lexical index stored alongside the Chroma database at ``db_path``"""
+    key = os.path.normcase(os.path.realpath(db_path))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = LexicalIndex(os.path.join(db_path, INDEX_FILENAME))
+            _indexes[key] = index
+        return index
+
+
+def get_lexical_index_for_client(chroma_client: Any) -> Optional[LexicalIndex]:
+    """Resolve the lexical index for a Chroma client; None if disabled or unavailable"""
+    from ..config import Config
+    from .document_index import client_db_path
+
+    if not Config.RAG_LEXICAL_INDEX_ENABLED:
+        return None
+    db_path = client_db_path(chroma_client)
+    if not db_path:
+        return None
+    try:
+        return get_lexical_index(db_path)
+    except Exception as e:
+        logger.warning(f"RAG lexical index unavailable for {db_path}: {e}")
+        return None
@@ -0,0 +1,290 @@
+"""
+Query-result cache for RAG and agent-memory lookups.
+
+Agents send the same or nearly the same query many times per plan, and each
+one used to re-embed the query and re-run the vector search. Results are
+cached under (database, collection, normalized query, n_results, where, mode).
+
+Every collection has a version number, kept per database path, that is
+bumped on each write through this package (ingestion, add/delete, agent
+memory stores); the same collection name in another store is unaffected.
+Entries remember
+the version they were computed against and are ignored once it moves on, so
+invalidation is O(1) and never scans the cache.
+
+An optional second tier matches queries by embedding: a query whose embedding
+is within Config.RAG_QUERY_CACHE_SEMANTIC_THRESHOLD cosine similarity of a
+cached query for the same collection and parameters reuses its results.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # Semantic tier falls back to pure Python dot products
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_EDGE_PUNCTUATION = re.compile(r'^[\s"\'.,;:!?]+|[\s"\'.,;:!?]+$')
+
+
+@lru_cache(maxsize=64)
+def normalize_scope(scope: Optional[str]) -> str:
+    """Canonical form of a database path so relative and absolute spellings share versions"""
+    return os.path.normcase(os.path.realpath(scope)) if scope else ''
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop leading/trailing punctuation"""
+    return _EDGE_PUNCTUATION.sub('', _WHITESPACE.sub(' ', query or '').lower())
+
+
+class QueryResultCache:
+    """
+    Version-stamped LRU cache of query results with an optional embedding tier.
+
+    Args:
+        maxsize: Maximum number of cached queries (exact tier)
+        ttl: Seconds an entry stays valid even without writes
+        semantic_threshold: Cosine similarity for the embedding tier; 0 disables it
+        semantic_entries: Embeddings kept per (collection, parameters) bucket
+        embedding_function: Embeds queries for the semantic tier
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600.0, semantic_threshold: float = 0.0,
+                 semantic_entries: int = 256,
+                 embedding_function: Optional[Callable[[List[str]], List[Any]]] = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.semantic_entries = max(1, semantic_entries)
+        self.embedding_function = embedding_function
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[int, float, float, List[Any]]]" = OrderedDict()
+        self._semantic: Dict[Tuple, "OrderedDict[Tuple, Tuple[Any, int, float, float, List[Any]]]"] = {}
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._collection_versions: Dict[str, int] = {}
+        self._stats = {
+            'exact_hits': 0,
+            'semantic_hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'saved_ms': 0.0
+        }
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold > 0
+
+    # Versioning ------------------------------------------------------
+
+    def version(self, collection: str, scope: Optional[str] = None) -> int:
+        with self._lock:
+            return self._current_version(normalize_scope(scope), collection)
+
+    def invalidate_collection(self, collection: str, scope: Optional[str] = None):
+        """
+        Mark cached results for ``collection`` in the ``scope`` database as
+        stale; without a scope, the collection goes stale in every database.
+        """
+        with self._lock:
+            if scope:
+                item = (normalize_scope(scope), collection)
+                self._versions[item] = self._versions.get(item, 0) + 1
+            else:
+                self._collection_versions[collection] = self._collection_versions.get(collection, 0) + 1
+            self._stats['invalidations'] += 1
+
+    def _current_version(self, scope: str, collection: str) -> int:
+        # Both counters only grow, so their sum moves whenever either does
+        return self._collection_versions.get(collection, 0) + self._versions.get((scope, collection), 0)
+
+    # Lookups ---------------------------------------------------------
+
+    @staticmethod
+    def make_key(scope: Optional[str], collection: str, query: str, n_results: int,
+                 where: Optional[Dict[str, Any]] = None, mode: Optional[str] = None) -> Tuple:
+        where_key = json.dumps(where, sort_keys=True, default=str) if where else ''
+        return (normalize_scope(scope), collection, normalize_query(query), n_results, where_key, mode or '')
+
+    def get(self, key: Tuple) -> Optional[List[Any]]:
+        """Exact-tier lookup; returns a copy of the cached results or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            version, stored_at, elapsed_ms, results = entry
+            if version != self._current_version(key[0], key[1]) or time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self._stats['stale'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['exact_hits'] += 1
+            self._stats['saved_ms'] += elapsed_ms
+            return _copy_results(results)
+
+    def get_similar(self, key: Tuple, embedding: Any) -> Optional[List[Any]]:
+        """Semantic-tier lookup for a query embedding under the same collection/parameters"""
+        if not self.semantic_enabled or embedding is None:
+            return None
+        vector = _unit_vector(embedding)
+        if vector is None:
+            return None
+        bucket_key = _bucket_key(key)
+        with self._lock:
+            bucket = self._semantic.get(bucket_key)
+            if not bucket:
+                return None
+            current_version = self._current_version(key[0], key[1])
+            now = time.time()
+            best = None
+            best_similarity = self.semantic_threshold
+            for entry_key, (other, version, stored_at, elapsed_ms, results) in list(bucket.items()):
+                if version != current_version or now - stored_at > self.ttl:
+                    del bucket[entry_key]
+                    continue
+                similarity = _dot(vector, other)
+                if similarity >= best_similarity:
+                    best, best_similarity = (entry_key, elapsed_ms, results), similarity
+            if best is None:
+                return None
+            bucket.move_to_end(best[0])
+            self._stats['semantic_hits'] += 1
+            self._stats['saved_ms'] += best[1]
+            return _copy_results(best[2])
+
+    def record_miss(self):
+        with self._lock:
+            self._stats['misses'] += 1
+
+    def put(self, key: Tuple, results: List[Any], version: int, elapsed_ms: float, embedding: Any = None):
+        """
+        Store results computed against collection ``version`` (read before the
+        query ran, so a write racing with the query leaves the entry stale).
+        """
+        stored_at = time.time()
+        results = _copy_results(results)
+        vector = _unit_vector(embedding) if self.semantic_enabled and embedding is not None else None
+        with self._lock:
+            self._entries[key] = (version, stored_at, elapsed_ms, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            if vector is not None:
+                bucket = self._semantic.setdefault(_bucket_key(key), OrderedDict())
+                bucket[key] = (vector, version, stored_at, elapsed_ms, results)
+                bucket.move_to_end(key)
+                while len(bucket) > self.semantic_entries:
+                    bucket.popitem(last=False)
+
+    def embed(self, query: str) -> Optional[Any]:
+        """Embed a query for the semantic tier; None when unavailable"""
+        if not self.semantic_enabled or self.embedding_function is None:
+            return None
+        try:
+            embedding = self.embedding_function([query])[0]
+            return embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding)
+        except Exception as e:
+            logger.warning(f"Query embedding for the semantic cache failed: {e}")
+            return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._semantic.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['exact_hits'] + stats['semantic_hits'] + stats['misses']
+            stats.update({
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'semantic_threshold': self.semantic_threshold,
+                'semantic_size': sum(len(bucket) for bucket in self._semantic.values()),
+                'lookups': lookups,
+                'hit_rate': (stats['exact_hits'] + stats['semantic_hits']) / lookups if lookups else 0.0,
+                'saved_ms': round(stats['saved_ms'], 2)
+            })
+            return stats
+
+
+def _bucket_key(key: Tuple) -> Tuple:
+    """Everything but the query text"""
+    return key[:2] + key[3:]
+
+
+def _unit_vector(embedding: Any) -> Optional[Any]:
+    try:
+        if np is not None:
+            vector = np.asarray(embedding, dtype=np.float32).ravel()
+            norm = float(np.linalg.norm(vector))
+            return vector / norm if norm else None
+        values = embedding.tolist() if hasattr(embedding, 'tolist') else embedding
+        norm = sum(value * value for value in values) ** 0.5
+        return tuple(value / norm for value in values) if norm else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _dot(a: Any, b: Any) -> float:
+    if np is not None:
+        return float(np.dot(a, b)) if len(a) == len(b) else 0.0
+    return sum(x * y for x, y in zip(a, b, strict=True)) if len(a) == len(b) else 0.0
+
+
+def _copy_results(results: Sequence[Any]) -> List[Any]:
+    """Shallow-copy result dicts so callers cannot mutate cached entries"""
+    return [dict(item) if isinstance(item, dict) else item for item in results]
+
+
+_query_cache: Optional[QueryResultCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryResultCache]:
+    """Shared query-result cache configured from Config.RAG_QUERY_CACHE_*; None when disabled"""
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                from ..config import Config
+                if not Config.RAG_QUERY_CACHE_ENABLED:
+                    return None
+                embedding_function = None
+                if Config.RAG_QUERY_CACHE_SEMANTIC_THRESHOLD > 0:
+                    from .ingestion import get_default_embedding_function
+                    embedding_function = get_default_embedding_function()
+                _query_cache = QueryResultCache(
+                    maxsize=Config.RAG_QUERY_CACHE_SIZE,
+                    ttl=Config.RAG_QUERY_CACHE_TTL,
+                    semantic_threshold=Config.RAG_QUERY_CACHE_SEMANTIC_THRESHOLD,
+                    embedding_function=embedding_function
+                )
+    return _query_cache
+
+
+def invalidate_collection(collection: str, scope: Optional[str] = None):
+    """Drop cached results for a collection in the ``scope`` database after a write"""
+    cache = _query_cache
+    if cache is not None:
+        cache.invalidate_collection(collection, scope)
+
+
+def get_query_cache_stats() -> Optional[Dict[str, Any]]:
+    cache = _query_cache
+    return cache.get_stats() if cache is not None else None
@@ -0,0 +1,300 @@
+"""
+Fan-out retrieval across multiple RAG collections.
+
+Collections are queried concurrently on a small shared thread pool, each with
+its own pooled ChromaDB client. The query is embedded once and reused for
+every collection. Per-collection hits keep their distances and are merged
+into one global ranking, either by distance or by reciprocal-rank fusion
+(RRF). Near-identical chunks are dropped and the final context is cut to a
+total token budget.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import logging
+
+from ..utils.token_counter import make_token_counter
+
+logger = logging.getLogger(__name__)
+
+FUSION_SCORE = "score"
+FUSION_RRF = "rrf"
+
+_WORD = re.compile(r'\w+')
+
+
+@dataclass
+class RetrievedChunk:
+    """A chunk returned by a collection, with its rank and fused score"""
+    collection: str
+    text: str
+    id: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    distance: Optional[float] = None
+    rank: int = 0  # 1-based rank within its collection
+    score: float = 0.0  # Higher is better
+    tokens: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'collection': self.collection,
+            'id': self.id,
+            'content': self.text,
+            'metadata': dict(self.metadata),
+            'distance': self.distance,
+            'rank': self.rank,
+            'score': round(self.score, 6),
+            'tokens': self.tokens
+        }
+
+
+@dataclass
+class RetrievalResult:
+    """Merged results of a fan-out query"""
+    chunks: List[RetrievedChunk] = field(default_factory=list)
+    collections: List[str] = field(default_factory=list)
+    failed_collections: Dict[str, str] = field(default_factory=dict)
+    candidates: int = 0
+    duplicates_dropped: int = 0
+    tokens_used: int = 0
+    collection_seconds: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'documents': [chunk.to_dict() for chunk in self.chunks],
+            'collections': list(self.collections),
+            'failed_collections': dict(self.failed_collections),
+            'candidates': self.candidates,
+            'duplicates_dropped': self.duplicates_dropped,
+            'tokens_used': self.tokens_used,
+            'collection_seconds': {name: round(seconds, 4) for name, seconds in self.collection_seconds.items()},
+            'total_seconds': round(self.total_seconds, 4)
+        }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared bounded pool for collection queries"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from ..config import Config
+            _executor = ThreadPoolExecutor(max_workers=max(1, Config.RAG_RETRIEVAL_WORKERS),
+                                           thread_name_prefix="RAGRetrieve")
+        return _executor
+
+
+def _shingles(text: str, size: int = 3) -> frozenset:
+    """Word n-gram set used for near-duplicate detection"""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return frozenset([' '.join(words)])
+    return frozenset(' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class FanOutRetriever:
+    """
+    Query several collections at once and merge the hits into a global top-k.
+
+    Args:
+        db_path: ChromaDB path; defaults to the shared registry's default pool
+        top_k: Maximum number of chunks returned overall
+        per_collection_k: Hits requested from each collection (defaults to top_k,
+            so a single collection can fill the whole result)
+        fusion: "score" ranks by distance, "rrf" by reciprocal-rank fusion
+        mode: Per-collection search mode passed to vector_db.search_chunks()
+        rrf_k: RRF damping constant
+        dedupe_threshold: Shingle overlap at or above which a chunk counts as a
+            duplicate of a better-ranked one (1.0 keeps only exact duplicates out)
+        token_budget: Total tokens allowed across returned chunks (None = unlimited)
+        tokenizer: Anything accepted by token_counter.make_token_counter()
+        embedding_function: Embeds the query once for all collections; when None
+            each collection embeds the query text itself
+        timeout: Seconds to wait for slow collections before dropping them
+    """
+
+    def __init__(self, db_path: Optional[str] = None, top_k: int = 8,
+                 per_collection_k: Optional[int] = None, fusion: str = FUSION_SCORE,
+                 mode: Optional[str] = None,
+                 rrf_k: int = 60, dedupe_threshold: float = 0.9,
+                 token_budget: Optional[int] = None, tokenizer: Any = None,
+                 embedding_function: Optional[Callable[[List[str]], List[Any]]] = None,
+                 timeout: float = 10.0):
+        if fusion not in (FUSION_SCORE, FUSION_RRF):
+            raise ValueError(f"Unknown fusion mode: {fusion}")
+        self.db_path = db_path
+        self.top_k = max(1, top_k)
+        self.per_collection_k = max(1, per_collection_k or self.top_k)
+        self.fusion = fusion
+        self.mode = mode
+        self.rrf_k = max(1, rrf_k)
+        self.dedupe_threshold = dedupe_threshold
+        self.token_budget = token_budget
+        self.count_tokens = make_token_counter(tokenizer)
+        self.embedding_function = embedding_function
+        self.timeout = timeout
+
+    def retrieve(self, query: str, collection_names: Sequence[str],
+                 where: Optional[Dict[str, Any]] = None) -> RetrievalResult:
+        start_time = time.perf_counter()
+        result = RetrievalResult(collections=list(collection_names))
+        if not query or not collection_names:
+            return result
+
+        query_embedding = self._embed_query(query)
+        executor = _get_executor()
+        cancel_event = threading.Event()
+        futures = {
+            executor.submit(self._query_collection, name, query, query_embedding, where, cancel_event): name
+            for name in collection_names
+        }
+        done, not_done = wait(futures, timeout=self.timeout)
+        if not_done:
+            # Future.cancel() only drops queries still queued; running ones see
+            # the event and hand their worker back at the next checkpoint
+            cancel_event.set()
+            for future in not_done:
+                future.cancel()
+                result.failed_collections[futures[future]] = 'timeout'
+
+        candidates: List[RetrievedChunk] = []
+        for future in done:
+            name = futures[future]
+            try:
+                hits, seconds = future.result()
+            except Exception as e:
+                logger.warning(f"Error querying RAG collection '{name}': {e}")
+                result.failed_collections[name] = str(e)
+                continue
+            result.collection_seconds[name] = seconds
+            candidates.extend(hits)
+
+        result.candidates = len(candidates)
+        self._merge(candidates, result)
+        result.total_seconds = time.perf_counter() - start_time
+        return result
+
+    # Internal helpers -------------------------------------------------
+
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        if self.embedding_function is None:
+            return None
+        try:
+            embedding = self.embedding_function([query])[0]
+            return embedding.tolist() if hasattr(embedding, 'tolist') else list(embedding)
+        except Exception as e:
+            logger.warning(f"Query embedding failed, collections will embed the query text: {e}")
+            return None
+
+    def _query_collection(self, name: str, query: str, query_embedding: Optional[List[float]],
+                          where: Optional[Dict[str, Any]], cancel_event: threading.Event):
+        from .vector_db import vector_db_client, search_chunks
+
+        query_start = time.perf_counter()
+        if cancel_event.is_set():
+            return [], 0.0
+        with vector_db_client(self.db_path) as client:
+            if cancel_event.is_set():
+                return [], 0.0
+            hits = search_chunks(client, name, query, n_results=self.per_collection_k, mode=self.mode,
+                                 query_embedding=query_embedding, where=where)
+        chunks = [
+            RetrievedChunk(collection=name, text=hit['document'], id=hit['id'],
+                           metadata=hit['metadata'], distance=hit['distance'], rank=rank)
+            for rank, hit in enumerate(hits, start=1)
+        ]
+        return chunks, time.perf_counter() - query_start
+
+    def _merge(self, candidates: List[RetrievedChunk], result: RetrievalResult):
+        """Fuse scores, drop duplicates and fill the top-k within the token budget"""
+        for chunk in candidates:
+            if self.fusion == FUSION_RRF:
+                chunk.score = 1.0 / (self.rrf_k + chunk.rank)
+            else:
+                chunk.score = 1.0 - chunk.distance if chunk.distance is not None else float('-inf')
+
+        # The same text found in several collections is one hit; under RRF its votes add up
+        merged: Dict[str, RetrievedChunk] = {}
+        for chunk in candidates:
+            key = ' '.join(chunk.text.split()).lower()
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = chunk
+                continue
+            result.duplicates_dropped += 1
+            if self.fusion == FUSION_RRF:
+                best = chunk if chunk.rank < existing.rank else existing
+                best.score = existing.score + chunk.score
+                merged[key] = best
+            elif chunk.score > existing.score:
+                merged[key] = chunk
+
+        ranked = sorted(merged.values(), key=lambda c: (-c.score, c.rank, c.collection))
+
+        kept: List[RetrievedChunk] = []
+        kept_shingles: List[frozenset] = []
+        tokens_used = 0
+        for chunk in ranked:
+            if len(kept) >= self.top_k:
+                break
+            shingles = _shingles(chunk.text)
+            if self.dedupe_threshold < 1.0 and any(
+                _similarity(shingles, other) >= self.dedupe_threshold for other in kept_shingles
+            ):
+                result.duplicates_dropped += 1
+                continue
+            chunk.tokens = self.count_tokens(chunk.text)
+            if self.token_budget is not None and tokens_used + chunk.tokens > self.token_budget:
+                # A smaller, lower-ranked chunk may still fit
+                continue
+            kept.append(chunk)
+            kept_shingles.append(shingles)
+            tokens_used += chunk.tokens
+
+        result.chunks = kept
+        result.tokens_used = tokens_used
+
+
+def retrieve_across_collections(query: str, collection_names: Sequence[str],
+                                db_path: Optional[str] = None,
+                                where: Optional[Dict[str, Any]] = None,
+                                **options) -> RetrievalResult:
+    """
+    Fan-out query with Config.RAG_RETRIEVAL_* defaults.
+
+    Example:
+        result = retrieve_across_collections("gpu setup", ["docs", "notes"], fusion="rrf")
+        for chunk in result.chunks:
+            print(chunk.collection, chunk.score, chunk.text[:80])
+    """
+    from ..config import Config
+
+    defaults = {
+        'top_k': Config.RAG_RETRIEVAL_TOP_K,
+        'mode': Config.RAG_RETRIEVAL_MODE,
+        'fusion': Config.RAG_RETRIEVAL_FUSION,
+        'dedupe_threshold': Config.RAG_RETRIEVAL_DEDUPE_THRESHOLD,
+        'token_budget': Config.RAG_RETRIEVAL_TOKEN_BUDGET or None,
+        'timeout': Config.RAG_RETRIEVAL_TIMEOUT
+    }
+    options = {**defaults, **options}
+    # Only lexical mode can answer without an embedding
+    if 'embedding_function' not in options and len(collection_names) > 1 and options['mode'] != 'lexical':
+        from .ingestion import get_default_embedding_function
+        options['embedding_function'] = get_default_embedding_function()
+
+    return FanOutRetriever(db_path=db_path, **options).retrieve(query, collection_names, where=where)
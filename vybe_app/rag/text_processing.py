@@ -4,38 +4,38 @@ Text processing utilities for RAG functionality.
 
 import os
 import PyPDF2
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterator
 
 
-def process_document_with_llm(content: str, filename: str, backend_llm_controller) -> Dict[str, str]:
+def process_document_with_llm(content: str, filename: str, backend_llm_controller=None) -> Dict[str, str]:
     """
     Process a document using the backend LLM to generate summary and tags.
     
+    Summary and tags come from one cached LLM call (see document_summarizer);
+    identical content is only summarized once per model.
+    
     Args:
         content: The text content to process
         filename: Name of the file being processed
-        backend_llm_controller: Instance of BackendLLMController
+        backend_llm_controller: BackendLLMController to use (defaults to the shared one)
         
     Returns:
-        Dictionary with 'summary' and 'tags' keys
+        Dictionary with 'summary' and 'tags' (comma-separated) keys
     """
     try:
-        # Generate summary using backend LLM
-        summary = backend_llm_controller.generate_summary(content, filename)
-        
-        # Generate tags using backend LLM
-        tags = backend_llm_controller.generate_tags(content, filename)
-        
-        return {
-            'summary': summary,
-            'tags': tags
-        }
+        from .document_summarizer import get_document_summarizer
+        result = get_document_summarizer().summarize(content, filename, backend_llm_controller)
+        if result:
+            return {
+                'summary': result['summary'],
+                'tags': ','.join(result['tags'])
+            }
     except Exception as e:
         print(f"Error processing document with LLM: {e}")
-        return {
-            'summary': f"Auto-generated summary for {filename}",
-            'tags': "document,text"
-        }
+    return {
+        'summary': f"Auto-generated summary for {filename}",
+        'tags': "document,text"
+    }
 
 def chunk_text(text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> List[str]:
     """
@@ -54,6 +54,26 @@ def chunk_text(text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> Lis
         start += (chunk_size - chunk_overlap)
     return chunks
 
+def iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    Yields the extracted text of a PDF one page at a time.
+    """
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            yield (page.extract_text() or "") + "\n"
+
+def iter_text_file(file_path: str, block_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Yields the content of a text file in blocks of roughly ``block_size`` characters.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            yield block
+
 def process_pdf_content(file_path: str) -> Optional[str]:
     """
     Extracts text content from a PDF file.
@@ -140,39 +160,36 @@ def ingest_file_content_to_rag(collection_name: str, filename: str, content: str
             return False
             
         # Import here to avoid circular imports
-        from .vector_db import initialize_vector_db, add_content_to_vector_db
+        from .vector_db import initialize_vector_db, vector_db_client, add_content_to_vector_db
+        from .chunking import chunk_document
+        from ..config import Config
             
-        # Initialize ChromaDB client
+        # Initialize (or reuse) the shared ChromaDB connection pool
         rag_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'rag_data', 'chroma_db')
-        chroma_client = initialize_vector_db(rag_data_path)
-        if not chroma_client:
+        if not initialize_vector_db(rag_data_path):
             return False
             
         # Create or get collection
         try:
-            from .vector_db import get_connection_pool
-            
-            # Get connection pool and client
-            pool = get_connection_pool()
-            if not pool:
-                print(f"Error: Could not get connection pool for ChromaDB")
-                return False
-                
-            with pool.get_connection() as client:
+            with vector_db_client(rag_data_path) as client:
                 if not client:
                     print(f"Error: Could not get ChromaDB client from pool")
                     return False
                     
                 collection = client.get_or_create_collection(name=collection_name)
                 
-                # Split content into chunks
-                chunks = chunk_text(content)
+                # Split content into token-bounded chunks on sentence boundaries
+                chunks = chunk_document(content, Config.RAG_CHUNK_TOKENS, Config.RAG_CHUNK_OVERLAP_TOKENS)
                 if not chunks:
                     print(f"Warning: No chunks generated from file {filename}")
                     return False
                     
                 # Add to ChromaDB using the proper client
-                success = add_content_to_vector_db(client, collection_name, filename, chunks)
+                success = add_content_to_vector_db(
+                    client, collection_name, filename,
+                    [chunk.text for chunk in chunks],
+                    chunk_metadatas=[chunk.metadata() for chunk in chunks]
+                )
                 return success
                 
         except Exception as e:
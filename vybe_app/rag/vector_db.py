@@ -4,6 +4,7 @@ Enhanced Vector database operations for RAG functionality with connection poolin
 
 import os
 import time
+import atexit
 import threading
 import chromadb
 from queue import Queue, Empty
@@ -12,8 +13,15 @@ from datetime import datetime, timedelta
 from contextlib import contextmanager
 import logging
 
+from .document_index import DocumentIndex, get_document_index_for_client, chunk_byte_size, client_db_path
+from .lexical_index import get_lexical_index_for_client, is_keyword_query
+from .query_cache import QueryResultCache, get_query_cache, invalidate_collection
+
 logger = logging.getLogger(__name__)
 
+# Reciprocal-rank fusion damping constant for hybrid search
+HYBRID_RRF_K = 60
+
 
 class VectorDBConnectionPool:
     """Connection pool for ChromaDB operations with health checks and retry logic"""
@@ -37,14 +45,20 @@ class VectorDBConnectionPool:
             'active_count': 0,
             'pool_hits': 0,
             'pool_misses': 0,
+            'open_count': 0,
+            'open_time_total_ms': 0.0,
+            'open_time_max_ms': 0.0,
             'last_health_check': None
         }
         
         # Initialize pool
         self._initialize_pool()
         
-        # Start health check thread
-        self.health_check_thread = threading.Thread(target=self._health_check_loop, daemon=True)
+        # Start health check thread (stop event lets close() interrupt the wait)
+        self._stop_event = threading.Event()
+        self.health_check_thread = threading.Thread(
+            target=self._health_check_loop, daemon=True, name="VectorDBHealthCheck"
+        )
         self.health_check_running = True
         self.health_check_thread.start()
     
@@ -57,23 +71,36 @@ class VectorDBConnectionPool:
                 client = self._create_client()
                 if client:
                     self.pool.put(client)
-                    self.connection_stats['total_created'] += 1
+                    self._bump_stat('total_created')
             
             logger.info(f"ChromaDB connection pool initialized with {self.pool.qsize()} connections")
             
         except Exception as e:
             logger.error(f"Error initializing ChromaDB connection pool: {e}")
-            self.connection_stats['total_errors'] += 1
+            self._bump_stat('total_errors')
     
     def _create_client(self) -> Optional[Any]:
-        """Create a new ChromaDB client"""
+        """Create a new ChromaDB client, recording how long the open took"""
+        start_time = time.perf_counter()
         try:
             client = chromadb.PersistentClient(path=self.db_path)
-            return client
         except Exception as e:
             logger.error(f"Error creating ChromaDB client: {e}")
-            self.connection_stats['total_errors'] += 1
+            self._bump_stat('total_errors')
             return None
+        
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        with self.pool_lock:
+            self.connection_stats['open_count'] += 1
+            self.connection_stats['open_time_total_ms'] += elapsed_ms
+            if elapsed_ms > self.connection_stats['open_time_max_ms']:
+                self.connection_stats['open_time_max_ms'] = elapsed_ms
+        return client
+    
+    def _bump_stat(self, key: str, amount: int = 1):
+        """Increment a counter in connection_stats under the pool lock"""
+        with self.pool_lock:
+            self.connection_stats[key] += amount
     
     @contextmanager
     def get_connection(self, timeout: float = 30.0):
@@ -85,13 +112,13 @@ class VectorDBConnectionPool:
             # Try to get from pool first
             try:
                 client = self.pool.get(timeout=timeout)
-                self.connection_stats['pool_hits'] += 1
+                self._bump_stat('pool_hits')
             except Empty:
                 # Pool is empty, create new connection
                 client = self._create_client()
                 if not client:
                     raise Exception("Failed to create new ChromaDB connection")
-                self.connection_stats['pool_misses'] += 1
+                self._bump_stat('pool_misses')
             
             # Track active connection
             with self.pool_lock:
@@ -106,7 +133,7 @@ class VectorDBConnectionPool:
             
         except Exception as e:
             logger.error(f"Connection error: {e}")
-            self.connection_stats['total_errors'] += 1
+            self._bump_stat('total_errors')
             
             # If connection failed, try to create a new one
             if client is None:
@@ -148,10 +175,10 @@ class VectorDBConnectionPool:
             try:
                 self._perform_health_check()
                 self.connection_stats['last_health_check'] = datetime.utcnow()
-                time.sleep(self.health_check_interval)
+                self._stop_event.wait(self.health_check_interval)
             except Exception as e:
                 logger.error(f"Health check error: {e}")
-                time.sleep(30)  # Shorter retry interval on error
+                self._stop_event.wait(30)  # Shorter retry interval on error
     
     def _perform_health_check(self):
         """Perform comprehensive health check"""
@@ -173,11 +200,15 @@ class VectorDBConnectionPool:
     def get_stats(self) -> Dict[str, Any]:
         """Get connection pool statistics"""
         with self.pool_lock:
+            open_count = self.connection_stats['open_count']
+            requests_served = self.connection_stats['pool_hits'] + self.connection_stats['pool_misses']
             return {
                 **self.connection_stats,
                 'pool_size': self.pool_size,
                 'available_connections': self.pool.qsize(),
                 'active_connections': len(self.active_connections),
+                'hit_rate': (self.connection_stats['pool_hits'] / requests_served) if requests_served else 0.0,
+                'open_time_avg_ms': (self.connection_stats['open_time_total_ms'] / open_count) if open_count else 0.0,
                 'last_health_check': self.connection_stats['last_health_check'].isoformat() 
                                    if self.connection_stats['last_health_check'] else None
             }
@@ -185,6 +216,7 @@ class VectorDBConnectionPool:
     def close(self):
         """Close the connection pool and cleanup resources"""
         self.health_check_running = False
+        self._stop_event.set()
         if self.health_check_thread.is_alive():
             self.health_check_thread.join(timeout=5)
         
@@ -203,19 +235,164 @@ class VectorDBConnectionPool:
         logger.info("ChromaDB connection pool closed")
 
 
-# Global connection pool instance
+class VectorDBClientRegistry:
+    """
+    Process-wide registry of ChromaDB connection pools, one per database path.
+    
+    Pools are built lazily on first use and then shared by every request handler
+    and background job, so repeated initialization no longer opens new clients or
+    starts additional health-check threads.
+    """
+    
+    def __init__(self, pool_size: int = 10):
+        self.default_pool_size = pool_size
+        self._pools: Dict[str, VectorDBConnectionPool] = {}
+        self._lock = threading.Lock()
+        self._default_path: Optional[str] = None
+        self._closed = False
+        self.stats = {
+            'pool_lookups': 0,
+            'pool_reuses': 0,
+            'pools_created': 0,
+            'pool_build_time_total_ms': 0.0,
+            'pool_build_time_max_ms': 0.0
+        }
+    
+    @staticmethod
+    def _normalize_path(path: str) -> str:
+        return os.path.normcase(os.path.realpath(path))
+    
+    def get_pool(self, path: Optional[str] = None,
+                 pool_size: Optional[int] = None) -> Optional[VectorDBConnectionPool]:
+        """
+        Return the shared pool for ``path``, building it on first request.
+        
+        When ``path`` is omitted the most recently registered default path is used.
+        """
+        with self._lock:
+            if path is None:
+                if self._default_path is None:
+                    return None
+                key = self._default_path
+            else:
+                key = self._normalize_path(path)
+            
+            self.stats['pool_lookups'] += 1
+            pool = self._pools.get(key)
+            if pool is not None:
+                self.stats['pool_reuses'] += 1
+                return pool
+            
+            if path is None:
+                return None
+            
+            # Pools are rebuilt after shutdown() so late callers keep working
+            self._closed = False
+            start_time = time.perf_counter()
+            pool = VectorDBConnectionPool(path, pool_size=pool_size or self.default_pool_size)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            
+            self._pools[key] = pool
+            self.stats['pools_created'] += 1
+            self.stats['pool_build_time_total_ms'] += elapsed_ms
+            if elapsed_ms > self.stats['pool_build_time_max_ms']:
+                self.stats['pool_build_time_max_ms'] = elapsed_ms
+            if self._default_path is None:
+                self._default_path = key
+            
+            logger.info(f"ChromaDB connection pool for {path} built in {elapsed_ms:.1f}ms")
+            return pool
+    
+    def set_default(self, path: str):
+        """Make ``path`` the pool returned when callers do not name one"""
+        with self._lock:
+            self._default_path = self._normalize_path(path)
+    
+    @contextmanager
+    def client(self, path: Optional[str] = None, timeout: float = 30.0):
+        """Borrow a ChromaDB client from the shared pool for ``path``"""
+        pool = self.get_pool(path)
+        if pool is None:
+            raise RuntimeError("Vector database has not been initialized")
+        with pool.get_connection(timeout=timeout) as client:
+            yield client
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get registry statistics including per-pool hit/miss and open latency"""
+        with self._lock:
+            pools = dict(self._pools)
+            registry_stats = dict(self.stats)
+        
+        pool_stats = {path: pool.get_stats() for path, pool in pools.items()}
+        total_hits = sum(p['pool_hits'] for p in pool_stats.values())
+        total_misses = sum(p['pool_misses'] for p in pool_stats.values())
+        total_opens = sum(p['open_count'] for p in pool_stats.values())
+        total_open_ms = sum(p['open_time_total_ms'] for p in pool_stats.values())
+        
+        return {
+            **registry_stats,
+            'pool_count': len(pool_stats),
+            'default_path': self._default_path,
+            'pool_hits': total_hits,
+            'pool_misses': total_misses,
+            'hit_rate': (total_hits / (total_hits + total_misses)) if (total_hits + total_misses) else 0.0,
+            'open_count': total_opens,
+            'open_time_avg_ms': (total_open_ms / total_opens) if total_opens else 0.0,
+            'pools': pool_stats
+        }
+    
+    def shutdown(self):
+        """Close every registered pool and stop their health-check threads"""
+        with self._lock:
+            if self._closed:
+                return
+            pools = list(self._pools.values())
+            self._pools.clear()
+            self._default_path = None
+            self._closed = True
+        
+        for pool in pools:
+            try:
+                pool.close()
+            except Exception as e:
+                logger.error(f"Error closing ChromaDB connection pool: {e}")
+        logger.info("ChromaDB client registry shut down")
+
+
+# Global registry and default connection pool
+_registry: Optional[VectorDBClientRegistry] = None
+_registry_lock = threading.Lock()
 _connection_pool: Optional[VectorDBConnectionPool] = None
 
 
+def get_vector_db_registry() -> VectorDBClientRegistry:
+    """Get the process-wide ChromaDB client registry, creating it on first use"""
+    global _registry
+    
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = VectorDBClientRegistry()
+                atexit.register(_registry.shutdown)
+    return _registry
+
+
 def initialize_vector_db(path: str, pool_size: int = 10) -> bool:
     """
-    Initialize the global ChromaDB connection pool.
+    Initialize (or reuse) the shared ChromaDB connection pool for ``path``.
+    
+    Safe to call on every request: the pool is only built the first time a
+    given path is seen.
     """
     global _connection_pool
     
     try:
-        _connection_pool = VectorDBConnectionPool(path, pool_size=pool_size)
-        logger.info(f"ChromaDB connection pool initialized successfully at {path}")
+        registry = get_vector_db_registry()
+        pool = registry.get_pool(path, pool_size=pool_size)
+        if pool is None:
+            return False
+        registry.set_default(path)
+        _connection_pool = pool
         return True
     except Exception as e:
         logger.error(f"Error initializing ChromaDB connection pool at {path}: {e}")
@@ -226,6 +403,30 @@ def get_connection_pool() -> Optional[VectorDBConnectionPool]:
     """Get the global connection pool instance"""
     return _connection_pool
 
+
+@contextmanager
+def vector_db_client(path: Optional[str] = None, timeout: float = 30.0):
+    """
+    Borrow a pooled ChromaDB client, initializing the pool for ``path`` if needed.
+    
+    Usage:
+        with vector_db_client(Config.RAG_VECTOR_DB_PATH) as client:
+            collection = client.get_or_create_collection(name)
+    """
+    if path is not None and not initialize_vector_db(path):
+        raise RuntimeError(f"Vector database not available at {path}")
+    with get_vector_db_registry().client(path, timeout=timeout) as client:
+        yield client
+
+
+def shutdown_vector_db():
+    """Close all shared ChromaDB connection pools"""
+    global _connection_pool
+    
+    if _registry is not None:
+        _registry.shutdown()
+    _connection_pool = None
+
 def ensure_agent_memory_collection() -> bool:
     """
     Ensure the agent_memory collection exists and is properly configured using connection pool
@@ -284,6 +485,7 @@ def store_agent_memory(memory_id: str, content: str,
                 metadatas=[memory_metadata],
                 ids=[memory_id]
             )
+            invalidate_collection("agent_memory", _connection_pool.db_path)
             
             logger.info(f"Stored agent memory: {memory_id}")
             return True
@@ -312,23 +514,27 @@ def retrieve_agent_memories(query: str,
         logger.error("Connection pool not initialized")
         return []
     
-    try:
+    # Build where clause for filtering
+    where_clause = {}
+    if agent_id:
+        where_clause["agent_id"] = agent_id
+    if memory_type:
+        where_clause["memory_type"] = memory_type
+    
+    def run_query(query_embedding: Optional[List[float]]) -> List[Dict[str, Any]]:
         with _connection_pool.get_connection() as client:
             collection = client.get_collection(name="agent_memory")
             
-            # Build where clause for filtering
-            where_clause = {}
-            if agent_id:
-                where_clause["agent_id"] = agent_id
-            if memory_type:
-                where_clause["memory_type"] = memory_type
-            
             # Query the collection
-            results = collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=where_clause if where_clause else None
-            )
+            query_args: Dict[str, Any] = {
+                'n_results': n_results,
+                'where': where_clause if where_clause else None
+            }
+            if query_embedding is not None:
+                query_args['query_embeddings'] = [query_embedding]
+            else:
+                query_args['query_texts'] = [query]
+            results = collection.query(**query_args)
             
             memories = []
             if results and "documents" in results and results["documents"]:
@@ -348,6 +554,14 @@ def retrieve_agent_memories(query: str,
             
             logger.info(f"Retrieved {len(memories)} agent memories for query: {query[:50]}...")
             return memories
+    
+    try:
+        cache = get_query_cache()
+        if cache is None:
+            return run_query(None)
+        key = cache.make_key(_connection_pool.db_path, "agent_memory", query, n_results,
+                             where_clause, mode="memories")
+        return _cached_query(cache, key, "agent_memory", query, run_query)
         
     except Exception as e:
         logger.error(f"Error retrieving agent memories: {e}")
@@ -411,50 +625,281 @@ def get_agent_memory_stats(chroma_client: Any, agent_id: Optional[str] = None) -
             "error": str(e)
         }
 
-def add_content_to_vector_db(chroma_client: Any, collection_name: str, content_id: str, text_chunks: List[str]) -> bool:
+def add_content_to_vector_db(chroma_client: Any, collection_name: str, content_id: str, text_chunks: List[str],
+                             batch_size: int = 256,
+                             chunk_metadatas: Optional[List[Dict[str, Any]]] = None,
+                             source: Optional[str] = None) -> bool:
     """
-    Adds text chunks to a ChromaDB collection.
+    Adds text chunks to a ChromaDB collection in bounded batches and records
+    the document in the sidecar document index.
+    
+    ``chunk_metadatas`` optionally supplies extra per-chunk metadata (e.g. the
+    byte offsets produced by rag.chunking) aligned with ``text_chunks``.
     """
     try:
         collection = chroma_client.get_or_create_collection(name=collection_name)
         if not text_chunks:
             print(f"Warning: No text chunks to add for {content_id}.")
             return False
-        documents = []
-        metadatas = []
-        ids = []
-        for i, chunk in enumerate(text_chunks):
-            documents.append(chunk)
-            metadatas.append({"source": content_id, "chunk_id": f"{content_id}_{i}"})
-            ids.append(f"{content_id}_{i}")
-        if documents:
-            collection.add(documents=documents, metadatas=metadatas, ids=ids)
-            print(f"Added {len(documents)} chunks from {content_id} to ChromaDB collection '{collection_name}'.")
-            return True
-        return False
+        batch_size = max(1, batch_size)
+        for start in range(0, len(text_chunks), batch_size):
+            batch = text_chunks[start:start + batch_size]
+            ids = [f"{content_id}_{i}" for i in range(start, start + len(batch))]
+            metadatas = [{"source": source or content_id, "chunk_id": chunk_id} for chunk_id in ids]
+            if chunk_metadatas:
+                for offset, metadata in enumerate(metadatas):
+                    metadata.update(chunk_metadatas[start + offset])
+            collection.add(documents=batch, metadatas=metadatas, ids=ids)
+        
+        chunk_ids = [f"{content_id}_{i}" for i in range(len(text_chunks))]
+        index = get_document_index_for_client(chroma_client)
+        if index:
+            index.record_document(
+                collection_name, content_id, chunk_ids,
+                source=source or content_id,
+                byte_size=chunk_byte_size(text_chunks, chunk_metadatas)
+            )
+        lexical_index = get_lexical_index_for_client(chroma_client)
+        if lexical_index:
+            lexical_index.add_chunks(collection_name, chunk_ids, text_chunks)
+        invalidate_collection(collection_name, client_db_path(chroma_client))
+        print(f"Added {len(text_chunks)} chunks from {content_id} to ChromaDB collection '{collection_name}'.")
+        return True
     except Exception as e:
         print(f"Error adding content to ChromaDB for {content_id}: {e}")
         return False
 
-def retrieve_relevant_chunks(chroma_client: Any, collection_name: str, query_text: str, n_results: int = 5) -> List[str]:
+def retrieve_relevant_chunks(chroma_client: Any, collection_name: str, query_text: str, n_results: int = 5,
+                             mode: Optional[str] = None) -> List[str]:
     """
     Queries the ChromaDB collection for relevant text chunks.
+
+    ``mode`` is "vector", "lexical" or "hybrid" (default Config.RAG_RETRIEVAL_MODE);
+    see search_chunks().
     """
     if not chroma_client:
         print("Error: ChromaDB client is not initialized.")
         return []
     try:
-        collection = chroma_client.get_collection(name=collection_name)
-        results = collection.query(query_texts=[query_text], n_results=n_results)
-        return results['documents'][0] if results and results['documents'] else []
+        return [hit['document'] for hit in search_chunks(chroma_client, collection_name, query_text,
+                                                         n_results=n_results, mode=mode)]
     except Exception as e:
         print(f"Error retrieving from ChromaDB collection '{collection_name}': {e}")
         return []
 
-def list_rag_documents_metadata(chroma_client: Any, collection_name: str) -> List[Dict[str, str]]:
+def retrieve_scored_chunks(chroma_client: Any, collection_name: str, query_text: Optional[str] = None,
+                           n_results: int = 5, query_embedding: Optional[List[float]] = None,
+                           where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
     """
-    Lists all documents in the RAG knowledge base with metadata.
-    Returns a list of dicts with id, source, and snippet.
+    Queries a collection and keeps what retrieve_relevant_chunks throws away:
+    chunk id, metadata and distance, best match first.
+
+    Pass ``query_embedding`` to reuse one query embedding across collections.
+    Errors propagate so callers can tell a failed query from an empty one.
+    """
+    collection = chroma_client.get_collection(name=collection_name)
+    query_args: Dict[str, Any] = {
+        'n_results': n_results,
+        'include': ['documents', 'metadatas', 'distances']
+    }
+    if query_embedding is not None:
+        query_args['query_embeddings'] = [query_embedding]
+    else:
+        query_args['query_texts'] = [query_text]
+    if where:
+        query_args['where'] = where
+    results = collection.query(**query_args)
+    if not results or not results.get('documents'):
+        return []
+
+    documents = results['documents'][0] or []
+    ids = (results.get('ids') or [[]])[0] or []
+    metadatas = (results.get('metadatas') or [[]])[0] or []
+    distances = (results.get('distances') or [[]])[0] or []
+    return [
+        {
+            'id': ids[i] if i < len(ids) else None,
+            'document': document,
+            'metadata': (metadatas[i] if i < len(metadatas) else None) or {},
+            'distance': float(distances[i]) if i < len(distances) and distances[i] is not None else None,
+            'collection': collection_name
+        }
+        for i, document in enumerate(documents)
+        if document
+    ]
+
+def _cached_query(cache: QueryResultCache, key: Any, collection_name: str, query_text: str,
+                  run_query: Any, query_embedding: Optional[List[float]] = None,
+                  use_semantic_tier: bool = True) -> List[Any]:
+    """
+    Serve a query from the result cache, falling back to ``run_query(embedding)``.
+
+    The collection version is read before the query runs so results racing
+    with a write are stored already stale. When the semantic tier embeds the
+    query, that embedding is handed to ``run_query`` instead of being recomputed.
+    """
+    results = cache.get(key)
+    if results is not None:
+        return results
+    version = cache.version(collection_name, key[0])
+    embedding = query_embedding
+    if use_semantic_tier and cache.semantic_enabled:
+        if embedding is None:
+            embedding = cache.embed(query_text)
+        results = cache.get_similar(key, embedding)
+        if results is not None:
+            return results
+    cache.record_miss()
+    start_time = time.perf_counter()
+    results = run_query(embedding)
+    cache.put(key, results, version, (time.perf_counter() - start_time) * 1000, embedding)
+    return results
+
+def search_chunks(chroma_client: Any, collection_name: str, query_text: str, n_results: int = 5,
+                  mode: Optional[str] = None, query_embedding: Optional[List[float]] = None,
+                  where: Optional[Dict[str, Any]] = None,
+                  vector_weight: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Vector, lexical (BM25) or hybrid search over one collection, served from
+    the query-result cache (rag.query_cache) when possible.
+
+    Returns retrieve_scored_chunks()-style dicts, best first, each with a
+    ``score`` in which higher is better and ``distance = 1 - score`` for
+    lexical and hybrid hits. Hybrid mode always runs both retrievers and fuses
+    their rankings with weighted reciprocal-rank fusion: ``vector_weight``
+    (default Config.RAG_HYBRID_VECTOR_WEIGHT) for ordinary queries and
+    Config.RAG_HYBRID_KEYWORD_VECTOR_WEIGHT for keyword-like ones (identifiers,
+    error codes, one or two words). Metadata filters (``where``) and a missing
+    lexical index fall back to vector search.
+    """
+    from ..config import Config
+
+    mode = mode or Config.RAG_RETRIEVAL_MODE
+    cache = get_query_cache()
+    if cache is None:
+        return _search_chunks(chroma_client, collection_name, query_text, n_results, mode,
+                              query_embedding, where, vector_weight)
+
+    key = cache.make_key(client_db_path(chroma_client), collection_name, query_text, n_results, where,
+                         mode if vector_weight is None else f"{mode}:{vector_weight}")
+    needs_embedding = mode != 'lexical' or bool(where)
+    return _cached_query(
+        cache, key, collection_name, query_text,
+        lambda embedding: _search_chunks(chroma_client, collection_name, query_text, n_results, mode,
+                                         embedding, where, vector_weight),
+        query_embedding=query_embedding, use_semantic_tier=needs_embedding
+    )
+
+def _search_chunks(chroma_client: Any, collection_name: str, query_text: str, n_results: int,
+                   mode: str, query_embedding: Optional[List[float]], where: Optional[Dict[str, Any]],
+                   vector_weight: Optional[float]) -> List[Dict[str, Any]]:
+    """Uncached body of search_chunks()"""
+    from ..config import Config
+
+    lexical_index = None
+    if mode != 'vector' and not where:
+        lexical_index = get_lexical_index_for_client(chroma_client)
+        if lexical_index and not lexical_index.is_indexed(collection_name):
+            # One full read of a collection written before the index existed
+            lexical_index.ensure_indexed(collection_name, chroma_client.get_collection(name=collection_name))
+
+    if lexical_index is None:
+        hits = retrieve_scored_chunks(chroma_client, collection_name, query_text, n_results=n_results,
+                                      query_embedding=query_embedding, where=where)
+        for hit in hits:
+            hit['score'] = 1.0 - hit['distance'] if hit['distance'] is not None else 0.0
+        return hits
+
+    candidates = max(n_results * 2, n_results + 5) if mode == 'hybrid' else n_results
+    lexical_hits = lexical_index.search(collection_name, query_text, n_results=candidates)
+    top_lexical = lexical_hits[0]['score'] if lexical_hits else 0.0
+    for hit in lexical_hits:
+        hit['lexical_score'] = hit['score'] / top_lexical if top_lexical else 0.0
+
+    if mode == 'lexical':
+        lexical_hits = _attach_documents(chroma_client, collection_name, lexical_hits[:n_results])
+        return [
+            {'id': hit['id'], 'document': hit['document'], 'metadata': hit['metadata'],
+             'distance': 1.0 - hit['lexical_score'], 'score': hit['lexical_score'],
+             'lexical_score': hit['lexical_score'], 'collection': collection_name}
+            for hit in lexical_hits
+        ]
+
+    vector_hits = retrieve_scored_chunks(chroma_client, collection_name, query_text, n_results=candidates,
+                                         query_embedding=query_embedding)
+    distances = [hit['distance'] for hit in vector_hits if hit['distance'] is not None]
+    low, high = (min(distances), max(distances)) if distances else (0.0, 0.0)
+    for hit in vector_hits:
+        if hit['distance'] is None:
+            hit['vector_score'] = 0.0
+        else:
+            hit['vector_score'] = (high - hit['distance']) / (high - low) if high > low else 1.0
+
+    # The keyword heuristic only shifts weight toward BM25; both rankings always count
+    if vector_weight is not None:
+        weight = vector_weight
+    elif is_keyword_query(query_text):
+        weight = Config.RAG_HYBRID_KEYWORD_VECTOR_WEIGHT
+    else:
+        weight = Config.RAG_HYBRID_VECTOR_WEIGHT
+    merged: Dict[str, Dict[str, Any]] = {}
+    for rank, hit in enumerate(vector_hits, 1):
+        merged[hit['id'] or hit['document']] = {**hit, 'lexical_score': 0.0,
+                                                'score': weight / (HYBRID_RRF_K + rank)}
+    lexical_only = _attach_documents(chroma_client, collection_name,
+                                     [hit for hit in lexical_hits if hit['id'] not in merged])
+    documents = {hit['id']: hit for hit in lexical_only}
+    for rank, hit in enumerate(lexical_hits, 1):
+        key = hit['id']
+        if key not in merged:
+            if key not in documents:
+                continue  # Indexed but no longer in Chroma
+            merged[key] = {'id': key, 'document': documents[key]['document'],
+                           'metadata': documents[key]['metadata'],
+                           'collection': collection_name, 'vector_score': 0.0, 'score': 0.0}
+        merged[key]['lexical_score'] = hit['lexical_score']
+        merged[key]['score'] += (1.0 - weight) / (HYBRID_RRF_K + rank)
+    for hit in merged.values():
+        # Scale so a chunk ranked first by both retrievers scores 1.0
+        hit['score'] *= HYBRID_RRF_K + 1
+        hit['distance'] = 1.0 - hit['score']
+    return sorted(merged.values(), key=lambda hit: hit['score'], reverse=True)[:n_results]
+
+def _attach_documents(chroma_client: Any, collection_name: str,
+                      hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fill in document and metadata for lexical hits from Chroma, dropping ids it no longer has"""
+    if not hits:
+        return []
+    collection = chroma_client.get_collection(name=collection_name)
+    page = collection.get(ids=[hit['id'] for hit in hits], include=['documents', 'metadatas'])
+    ids = page.get('ids') or []
+    documents = page.get('documents') or [None] * len(ids)
+    metadatas = page.get('metadatas') or [None] * len(ids)
+    found = {chunk_id: (document, metadata or {})
+             for chunk_id, document, metadata in zip(ids, documents, metadatas, strict=True)}
+    return [
+        {**hit, 'document': found[hit['id']][0], 'metadata': found[hit['id']][1]}
+        for hit in hits
+        if hit['id'] in found and found[hit['id']][0]
+    ]
+
+def _get_indexed(chroma_client: Any, collection_name: str, collection: Any) -> Optional[DocumentIndex]:
+    """Return the document index for a collection, backfilling it on first use"""
+    index = get_document_index_for_client(chroma_client)
+    if index is None:
+        return None
+    try:
+        index.ensure_indexed(collection_name, collection)
+        return index
+    except Exception as e:
+        logger.warning(f"Could not index RAG collection '{collection_name}', falling back to a scan: {e}")
+        return None
+
+def list_rag_documents_metadata(chroma_client: Any, collection_name: str,
+                                offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Lists documents in the RAG knowledge base with metadata, one page at a time.
+    Returns a list of dicts with id, source, snippet, chunk_count and byte_size.
     """
     if not chroma_client:
         print("Error: ChromaDB client is not initialized.")
@@ -469,6 +914,30 @@ def list_rag_documents_metadata(chroma_client: Any, collection_name: str) -> Lis
             collection = chroma_client.get_or_create_collection(name=collection_name)
             print(f"Created collection '{collection_name}' successfully.")
         
+        index = _get_indexed(chroma_client, collection_name, collection)
+        if index is not None:
+            indexed_documents = index.list_documents(collection_name, offset=offset, limit=limit)
+            
+            # Fetch only the first chunk of each listed document for its snippet
+            first_chunk_ids = [doc['first_chunk_id'] for doc in indexed_documents if doc['first_chunk_id']]
+            snippets = {}
+            if first_chunk_ids:
+                results = collection.get(ids=first_chunk_ids, include=["documents"])
+                snippets = dict(zip(results.get('ids') or [], results.get('documents') or []))
+            
+            documents = []
+            for doc in indexed_documents:
+                doc_text = snippets.get(doc['first_chunk_id']) or ""
+                documents.append({
+                    'id': doc['doc_id'],
+                    'source': doc['source'] or 'Unknown',
+                    'snippet': doc_text[:200] + "..." if len(doc_text) > 200 else doc_text,
+                    'chunk_count': doc['chunk_count'],
+                    'byte_size': doc['byte_size'],
+                    'created_at': doc['created_at']
+                })
+            return documents
+        
         # Get all documents from the collection
         results = collection.get()
         
@@ -487,12 +956,27 @@ def list_rag_documents_metadata(chroma_client: Any, collection_name: str) -> Lis
                     'snippet': snippet
                 })
         
-        return documents
+        end = None if limit is None else offset + limit
+        return documents[offset:end]
     except Exception as e:
         print(f"Error listing documents from ChromaDB collection '{collection_name}': {e}")
         # Don't raise the exception, just return empty list to maintain API contract
         return []
 
+def count_rag_documents(chroma_client: Any, collection_name: str) -> int:
+    """
+    Returns the number of documents in a collection (for pagination).
+    """
+    try:
+        collection = chroma_client.get_or_create_collection(name=collection_name)
+        index = _get_indexed(chroma_client, collection_name, collection)
+        if index is not None:
+            return index.count_documents(collection_name)
+        return collection.count()
+    except Exception as e:
+        print(f"Error counting documents in ChromaDB collection '{collection_name}': {e}")
+        return 0
+
 def delete_rag_document_by_id(chroma_client: Any, collection_name: str, doc_id: str) -> bool:
     """
     Deletes a specific document from the ChromaDB collection by ID.
@@ -504,7 +988,19 @@ def delete_rag_document_by_id(chroma_client: Any, collection_name: str, doc_id:
     
     try:
         collection = chroma_client.get_collection(name=collection_name)
-        collection.delete(ids=[doc_id])
+        index = _get_indexed(chroma_client, collection_name, collection)
+        chunk_ids = index.get_chunk_ids(collection_name, doc_id) if index else []
+        if chunk_ids:
+            # Delete exactly this document's chunks
+            collection.delete(ids=chunk_ids)
+            index.remove_document(collection_name, doc_id)
+        else:
+            chunk_ids = [doc_id]
+            collection.delete(ids=chunk_ids)
+        lexical_index = get_lexical_index_for_client(chroma_client)
+        if lexical_index:
+            lexical_index.remove_chunks(collection_name, chunk_ids)
+        invalidate_collection(collection_name, client_db_path(chroma_client))
         print(f"Successfully deleted document {doc_id} from collection '{collection_name}'")
         return True
     except Exception as e:
@@ -523,28 +1019,42 @@ def get_document_full_content(chroma_client: Any, collection_name: str, doc_id:
     try:
         collection = chroma_client.get_collection(name=collection_name)
         
-        # Get all chunks for this document (chunks have IDs like doc_id_0, doc_id_1, etc.)
-        results = collection.get()
+        index = _get_indexed(chroma_client, collection_name, collection)
+        if index is not None:
+            # Fetch only this document's chunks
+            chunk_ids = index.get_chunk_ids(collection_name, doc_id)
+            if not chunk_ids:
+                return None
+            results = collection.get(ids=chunk_ids, include=["documents", "metadatas"])
+        else:
+            # Get all chunks for this document (chunks have IDs like doc_id_0, doc_id_1, etc.)
+            results = collection.get()
         
         if not results or not results['ids']:
             return None
         
         # Find all chunks that belong to this document
         document_chunks = []
+        offset_chunks = []
         source = None
         
         for i, chunk_id in enumerate(results['ids']):
             # Check if this chunk belongs to our document
             if chunk_id.startswith(f"{doc_id}_"):
                 chunk_text = results['documents'][i] if i < len(results['documents']) else ""
-                metadata = results['metadatas'][i] if i < len(results['metadatas']) else {}
+                metadata = (results['metadatas'][i] if i < len(results['metadatas']) else None) or {}
+                
+                if source is None:
+                    source = metadata.get('source', doc_id)
+                
+                # Chunks written by the token-aware chunker carry byte offsets
+                if 'start_byte' in metadata and 'end_byte' in metadata:
+                    offset_chunks.append((metadata['start_byte'], metadata['end_byte'], chunk_text))
                 
                 # Extract chunk number for proper ordering
                 try:
                     chunk_num = int(chunk_id.split('_')[-1])
                     document_chunks.append((chunk_num, chunk_text))
-                    if source is None:
-                        source = metadata.get('source', doc_id)
                 except (ValueError, IndexError):
                     # If we can't parse chunk number, just append at the end
                     document_chunks.append((999999, chunk_text))
@@ -552,9 +1062,14 @@ def get_document_full_content(chroma_client: Any, collection_name: str, doc_id:
         if not document_chunks:
             return None
         
-        # Sort chunks by their number and reconstruct full content
-        document_chunks.sort(key=lambda x: x[0])
-        full_content = ' '.join([chunk[1] for chunk in document_chunks])
+        if len(offset_chunks) == len(document_chunks):
+            # Rebuild from byte offsets so overlapping regions appear only once
+            from .chunking import rebuild_from_chunks
+            full_content = rebuild_from_chunks(offset_chunks)
+        else:
+            # Sort chunks by their number and reconstruct full content
+            document_chunks.sort(key=lambda x: x[0])
+            full_content = ' '.join([chunk[1] for chunk in document_chunks])
         
         return {
             'id': doc_id,
@@ -576,16 +1091,22 @@ def add_single_document_to_rag(chroma_client: Any, collection_name: str, doc_id:
     
     try:
         # Import here to avoid circular imports
-        from .text_processing import chunk_text
+        from .chunking import chunk_document
+        from ..config import Config
         
-        # Chunk the content
-        chunks = chunk_text(content)
+        # Chunk the content on sentence/paragraph boundaries
+        chunks = chunk_document(content, Config.RAG_CHUNK_TOKENS, Config.RAG_CHUNK_OVERLAP_TOKENS)
         if not chunks:
             print(f"Warning: No chunks generated from content")
             return False
         
         # Add to ChromaDB using the specific doc_id
-        success = add_content_to_vector_db(chroma_client, collection_name, doc_id, chunks)
+        success = add_content_to_vector_db(
+            chroma_client, collection_name, doc_id,
+            [chunk.text for chunk in chunks],
+            chunk_metadatas=[chunk.metadata() for chunk in chunks],
+            source=source
+        )
         return success
         
     except Exception as e:
@@ -4,7 +4,6 @@ Comprehensive model lifecycle management with versioning, optimization, and moni
 """
 import os
 import json
-import hashlib
 import threading
 import time
 import psutil
@@ -22,6 +21,8 @@ from sqlalchemy import and_, func
 from ..models import db
 from ..utils.error_handling import ApplicationError, ErrorCode
 from ..utils.input_validation import AdvancedInputValidator
+from ..utils.file_fingerprint import get_fingerprint_store
+from ..core.model_catalog import get_model_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -168,7 +169,10 @@ class ModelManager:
         discovered_models = []
         
         try:
-            for model_file in self.models_directory.glob("*.gguf"):
+            catalog = get_model_catalog()
+            catalog.add_directory(self.models_directory)
+            for entry in catalog.list_models(directory=self.models_directory):
+                model_file = Path(entry.path)
                 if model_file.is_file():
                     model_info = self._analyze_model_file(model_file)
                     if model_info:
@@ -411,17 +415,26 @@ class ModelManager:
         try:
             stat = model_path.stat()
             
-            # Calculate file hash
-            file_hash = self._calculate_file_hash(model_path)
+            # Sampled fingerprint for change detection; the full SHA-256 is only
+            # reported when already cached (see FingerprintStore.full_hash)
+            store = get_fingerprint_store()
+            fingerprint = store.quick_fingerprint(model_path)
+            file_hash = store.cached_full_hash(model_path) or ""
             
-            # Extract model info from filename (basic parsing)
+            # Architecture, context and quantization from the GGUF header
             name = model_path.stem
+            entry = get_model_catalog().get(model_path)
             
             return {
                 'name': name,
                 'file_path': str(model_path),
                 'file_size': stat.st_size,
                 'file_hash': file_hash,
+                'fingerprint': fingerprint,
+                'architecture': entry.architecture if entry else None,
+                'context_length': entry.context_length if entry else None,
+                'quantization': entry.quantization if entry else None,
+                'parameters': entry.parameter_count if entry else None,
                 'modified_at': datetime.fromtimestamp(stat.st_mtime)
             }
             
@@ -429,18 +442,6 @@ class ModelManager:
             logger.error(f"Failed to analyze model file {model_path}: {e}")
             return None
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA256 hash of file"""
-        hash_sha256 = hashlib.sha256()
-        try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
-        except Exception as e:
-            logger.error(f"Failed to calculate hash for {file_path}: {e}")
-            return ""
-    
     def _create_model_metadata(self, model_info: Dict[str, Any]) -> ModelMetadata:
         """Create metadata object for discovered model"""
         metadata = ModelMetadata(
@@ -449,11 +450,11 @@ class ModelManager:
             file_path=model_info['file_path'],
             file_size=model_info['file_size'],
             file_hash=model_info['file_hash'],
-            model_type="llama",  # Default type
-            parameters=7000000000,  # Default parameter count
-            architecture="llama2",  # Default architecture
-            quantization="Q4_K_M",  # Default quantization
-            context_length=2048,  # Default context length
+            model_type=model_info.get('architecture') or "llama",
+            parameters=model_info.get('parameters') or 7000000000,  # Default parameter count
+            architecture=model_info.get('architecture') or "llama2",  # Default architecture
+            quantization=model_info.get('quantization') or "Q4_K_M",  # Default quantization
+            context_length=model_info.get('context_length') or 2048,  # Default context length
             created_at=model_info.get('modified_at', datetime.utcnow()),
             last_used=None,
             use_count=0,
@@ -468,7 +468,7 @@ class UserService:
             'user': user.to_dict(),
             'recent_activities': [activity.to_dict() for activity in recent_activities],
             'active_sessions': [session.to_dict() for session in active_sessions],
-            'recent_chats': [chat.to_dict() for chat in recent_chats]
+            'recent_chats': [chat.to_dict(include_messages=False) for chat in recent_chats]
         }
 
 
@@ -113,26 +113,31 @@ def read_scratchpad():
 def ai_query_rag_collections(query, collection_names=None):
     """Query specific RAG collections or all available collections based on context.
     
+    Collections are searched concurrently and their hits merged into one ranking
+    by relevance (see rag.retrieval), with near-duplicates removed and the total
+    size capped by Config.RAG_RETRIEVAL_TOKEN_BUDGET.
+    
     Args:
         query (str): The natural language query to ask the RAG system
         collection_names (list[str], optional): List of specific collection names to query.
                                               If None or empty, queries all collections.
     
     Returns:
-        str: Combined relevant chunks of text as a single string
+        str: Combined relevant chunks of text as a single string, best match first
     """
-    from flask import current_app
-    from .rag.vector_db import retrieve_relevant_chunks
+    from .config import Config
+    from .rag.vector_db import initialize_vector_db, vector_db_client
+    from .rag.retrieval import retrieve_across_collections
     
     try:
-        # Get the ChromaDB client from the app instance
-        chroma_client = getattr(current_app, 'chroma_client', None)
-        if not chroma_client:
+        if not initialize_vector_db(Config.RAG_VECTOR_DB_PATH):
             return "Error: RAG system is not initialized."
         
         # Get available collections
         try:
-            available_collections = [col.name for col in chroma_client.list_collections()]
+            with vector_db_client(Config.RAG_VECTOR_DB_PATH) as chroma_client:
+                # Older ChromaDB returns collection objects, newer returns names
+                available_collections = [getattr(col, 'name', col) for col in chroma_client.list_collections()]
         except Exception as e:
             return f"Error: Unable to list RAG collections: {str(e)}"
         
@@ -149,25 +154,18 @@ def ai_query_rag_collections(query, collection_names=None):
             # Query all collections
             target_collections = available_collections
         
-        # Query each target collection
-        all_results = []
-        for collection_name in target_collections:
-            try:
-                results = retrieve_relevant_chunks(chroma_client, collection_name, query, n_results=3)
-                if results:
-                    # Add explicit collection context to each result
-                    collection_results = [f"[From collection '{collection_name}']: {result}" for result in results]
-                    all_results.extend(collection_results)
-            except Exception as e:
-                print(f"Error querying collection {collection_name}: {e}")
-                continue
-        
-        if not all_results:
+        result = retrieve_across_collections(query, target_collections, db_path=Config.RAG_VECTOR_DB_PATH)
+        for collection_name, error in result.failed_collections.items():
+            print(f"Error querying collection {collection_name}: {error}")
+        
+        if not result.chunks:
             queried_collections = ", ".join(target_collections)
             return f"No relevant information found in the queried collections: {queried_collections}"
         
-        # Combine and return results
-        combined_results = "\n\n".join(all_results)
+        # Combine and return results, with explicit collection context on each
+        combined_results = "\n\n".join(
+            f"[From collection '{chunk.collection}']: {chunk.text}" for chunk in result.chunks
+        )
         collection_info = f"Searched {len(target_collections)} collection(s): {', '.join(target_collections)}"
         
         return f"{collection_info}\n\n{combined_results}"
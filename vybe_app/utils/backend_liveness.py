@@ -0,0 +1,311 @@
+"""
+Backend Liveness Tracking for Vybe
+Publishes local LLM server readiness as in-memory state so request paths
+never pay a /v1/models round-trip before the real call.
+
+A background thread probes the server on an interval (faster right after
+it goes down, to notice recovery, then backing off while it stays down),
+and real requests report their outcome back
+(passive health checking): a refused connection marks the backend down at
+once, other errors after Config.LLM_LIVENESS_FAILURE_THRESHOLD in a row.
+Readiness transitions are recorded and delivered to registered listeners.
+
+get_backend_session() is the keep-alive connection pool shared by every
+call to the local backend (probes, completions and streams).
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+import logging
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'unknown'
+READY = 'ready'
+UNREADY = 'unready'
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """True for errors meaning nothing is listening (as opposed to a slow or failing server)"""
+    return isinstance(error, (ConnectionError, requests.exceptions.ConnectionError))
+
+
+class BackendLivenessTracker:
+    """
+    In-memory readiness of one LLM server, kept current by probes and real traffic.
+
+    Args:
+        base_url: Server URL; the probe requests ``{base_url}/v1/models``
+        probe_interval: Seconds between probes while ready
+        recovery_interval: Seconds before the first probe after the backend goes down;
+            doubles with each further failure up to ``max_recovery_interval``
+        max_recovery_interval: Longest wait between probes while not ready
+        probe_timeout: Timeout of a single probe request
+        failure_threshold: Consecutive soft failures before the backend is marked down
+        probe: Optional callable returning True when the server is ready (replaces the HTTP probe)
+    """
+
+    def __init__(self, base_url: str, probe_interval: float = 10.0, recovery_interval: float = 2.0,
+                 probe_timeout: float = 3.0, failure_threshold: int = 2,
+                 probe: Optional[Callable[[], bool]] = None, max_recovery_interval: float = 60.0):
+        self.base_url = base_url.rstrip('/')
+        self.probe_interval = probe_interval
+        self.recovery_interval = recovery_interval
+        self.max_recovery_interval = max(recovery_interval, max_recovery_interval)
+        self.probe_timeout = probe_timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe = probe or self._http_probe
+        self._lock = threading.Lock()
+        self._state = UNKNOWN
+        self._consecutive_failures = 0
+        self._last_success = 0.0
+        self._last_probe = 0.0
+        self._last_error: Optional[str] = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._transitions = deque(maxlen=50)
+        self._stats = {'probes': 0, 'probe_failures': 0, 'passive_successes': 0, 'passive_failures': 0}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def is_ready(self) -> bool:
+        """
+        Current readiness from memory. Only the first call, before anything is
+        known about the server, waits for a probe.
+        """
+        if self._state == UNKNOWN:
+            self.check_now()
+        self.start()
+        return self._state == READY
+
+    # Probing ---------------------------------------------------------
+
+    def start(self):
+        """Start the background probe thread (idempotent)"""
+        if self._thread is not None or self._stopped:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="LLMLiveness")
+                self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        self._wake.set()
+
+    def check_now(self) -> bool:
+        """Probe synchronously and update the state; returns readiness"""
+        try:
+            ok = bool(self.probe())
+            error, connection_lost = (None if ok else 'probe reported not ready'), False
+        except Exception as e:
+            ok, error, connection_lost = False, str(e), is_connection_error(e)
+        with self._lock:
+            self._last_probe = time.time()
+            self._stats['probes'] += 1
+            if not ok:
+                self._stats['probe_failures'] += 1
+        if ok:
+            self._record_success('probe')
+        else:
+            self._record_failure(error, connection_lost, 'probe')
+        return ok
+
+    def _http_probe(self) -> bool:
+        response = get_backend_session().get(f"{self.base_url}/v1/models", timeout=self.probe_timeout)
+        return response.status_code == 200
+
+    def _next_interval(self) -> float:
+        if self._state == READY:
+            return self.probe_interval
+        # Back off while the server stays down (or was never started)
+        failures = min(max(0, self._consecutive_failures - 1), 16)
+        return min(self.max_recovery_interval, self.recovery_interval * (2 ** failures))
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self._next_interval())
+            self._wake.clear()
+            if self._stopped:
+                break
+            # Recent successful traffic already proves the server is up
+            if self._state == READY and time.time() - self._last_success < self.probe_interval:
+                continue
+            self.check_now()
+
+    # Passive health checking -----------------------------------------
+
+    def report_success(self):
+        """A real request got a response from the server"""
+        with self._lock:
+            self._stats['passive_successes'] += 1
+        self._record_success('request')
+
+    def report_response(self, response: Any):
+        """A real request got an HTTP response; only a 2xx status counts as healthy"""
+        status_code = getattr(response, 'status_code', None)
+        if isinstance(status_code, int) and 200 <= status_code < 300:
+            self.report_success()
+        else:
+            self.report_failure(f"backend returned status {status_code}")
+
+    def report_failure(self, error: Any = None, connection_lost: Optional[bool] = None):
+        """
+        A real request failed. Connection errors mark the backend down at once;
+        other errors (timeouts, resets mid-response) count toward the threshold.
+        """
+        if connection_lost is None:
+            connection_lost = isinstance(error, BaseException) and is_connection_error(error)
+        with self._lock:
+            self._stats['passive_failures'] += 1
+        self._record_failure(str(error) if error is not None else None, connection_lost, 'request')
+
+    def mark_ready(self, reason: str = 'marked ready'):
+        """Set readiness directly, e.g. once start_server() has seen the server answer"""
+        self._record_success(reason)
+
+    def mark_unready(self, reason: str = 'marked unready'):
+        """Set the backend down directly, e.g. when the server is being stopped"""
+        self._record_failure(reason, True, reason)
+
+    def _record_success(self, source: str):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._last_success = time.time()
+            event = self._transition(READY, source)
+        self._notify(event)
+
+    def _record_failure(self, error: Optional[str], connection_lost: bool, source: str):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._last_error = error
+            event = None
+            if connection_lost or self._state == UNKNOWN or \
+                    self._consecutive_failures >= self.failure_threshold:
+                event = self._transition(UNREADY, source)
+        if event is not None:
+            # Look for recovery on the short interval rather than the long one
+            self._wake.set()
+        self._notify(event)
+
+    def _transition(self, new_state: str, source: str) -> Optional[Dict[str, Any]]:
+        """Change state under the lock; returns the transition event or None"""
+        if self._state == new_state:
+            return None
+        event = {
+            'from': self._state,
+            'to': new_state,
+            'source': source,
+            'error': self._last_error if new_state == UNREADY else None,
+            'timestamp': time.time()
+        }
+        self._state = new_state
+        self._transitions.append(event)
+        return event
+
+    # Transition events -----------------------------------------------
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """Call ``callback(event)`` on every readiness transition"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, event: Optional[Dict[str, Any]]):
+        if event is None:
+            return
+        logger.info(f"LLM backend {self.base_url} is now {event['to']} (was {event['from']}, via {event['source']})")
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(dict(event))
+            except Exception as e:
+                logger.warning(f"Liveness listener failed: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            return {
+                'url': self.base_url,
+                'state': self._state,
+                'ready': self._state == READY,
+                'consecutive_failures': self._consecutive_failures,
+                'last_error': self._last_error,
+                'seconds_since_success': round(now - self._last_success, 1) if self._last_success else None,
+                'seconds_since_probe': round(now - self._last_probe, 1) if self._last_probe else None,
+                'transitions': list(self._transitions)[-10:],
+                **self._stats
+            }
+
+
+_backend_session: Optional[requests.Session] = None
+_backend_session_lock = threading.Lock()
+
+
+def get_backend_session() -> requests.Session:
+    """
+    Keep-alive session for the local LLM backend, with one connection kept
+    per concurrent chat worker (Config.LLM_CHAT_WORKERS).
+    """
+    global _backend_session
+    if _backend_session is None:
+        with _backend_session_lock:
+            if _backend_session is None:
+                try:
+                    from ..config import Config
+                    workers = Config.LLM_CHAT_WORKERS
+                except Exception:
+                    workers = 8
+                # +1 so the liveness probe never waits behind chat traffic
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(1, workers) + 1)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _backend_session = session
+    return _backend_session
+
+
+_trackers: Dict[str, BackendLivenessTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def _normalize_url(url: str) -> str:
+    return url.rstrip('/').replace('://localhost', '://127.0.0.1')
+
+
+def get_backend_liveness(base_url: Optional[str] = None) -> BackendLivenessTracker:
+    """
+    Shared tracker for a backend URL, so the controller and the backend manager
+    (which address the same server as 127.0.0.1 and localhost) see one state.
+    """
+    try:
+        from ..config import Config
+        base_url = base_url or Config.LLM_BACKEND_URL
+        options = {
+            'probe_interval': Config.LLM_LIVENESS_PROBE_INTERVAL,
+            'recovery_interval': Config.LLM_LIVENESS_RECOVERY_INTERVAL,
+            'max_recovery_interval': Config.LLM_LIVENESS_MAX_RECOVERY_INTERVAL,
+            'probe_timeout': Config.LLM_LIVENESS_PROBE_TIMEOUT,
+            'failure_threshold': Config.LLM_LIVENESS_FAILURE_THRESHOLD
+        }
+    except Exception:
+        base_url = base_url or 'http://127.0.0.1:11435'
+        options = {}
+    key = _normalize_url(base_url)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None:
+            tracker = _trackers[key] = BackendLivenessTracker(key, **options)
+        return tracker
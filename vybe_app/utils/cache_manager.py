@@ -544,12 +544,21 @@ class CacheManager:
                 log_warning(f"Redis stats error: {e}")
                 self._handle_redis_failure()
         
+        # RAG/agent-memory query results are cached next to the vector DB code
+        rag_query_stats = None
+        try:
+            from ..rag.query_cache import get_query_cache_stats
+            rag_query_stats = get_query_cache_stats()
+        except Exception as e:
+            log_warning(f"RAG query cache stats error: {e}")
+        
         return {
             'memory_caches': memory_stats,
             'redis_cache': redis_stats,
             'redis_status': self.redis_status,
             'redis_available': REDIS_AVAILABLE,
             'redis_connected': self.redis_cache is not None and self.redis_status == "connected",
+            'rag_query_cache': rag_query_stats,
             'stats': self.stats.copy()
         }
     
@@ -0,0 +1,251 @@
+"""
+Connection Registry for Vybe
+Indexed bookkeeping for live WebSocket connections.
+
+    - Connections are kept in an insertion-ordered dict with per-IP and
+      per-user sid sets, so connect, disconnect, per-IP/per-user counts and
+      "oldest connection" are O(1).
+    - Expiry (maximum age and idle timeout) runs off a min-heap of
+      deadlines with lazy re-scheduling: touch() only records the activity
+      time, and an entry whose deadline moved is pushed back when it reaches
+      the top of the heap. expire() therefore costs O(log n) per connection
+      it actually looks at, never a walk over every connection.
+    - Entries of removed connections are skipped when popped; the heap is
+      rebuilt once such garbage outnumbers the live connections.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('sid', 'ip', 'user_id', 'connected_at', 'last_activity', 'generation', 'data')
+
+    def __init__(self, sid: str, ip: Optional[str], user_id: Optional[Hashable], now: float,
+                 generation: int, data: Any):
+        self.sid = sid
+        self.ip = ip
+        self.user_id = user_id
+        self.connected_at = now
+        self.last_activity = now
+        self.generation = generation
+        self.data = data
+
+
+class ConnectionRegistry:
+    """
+    Live connections indexed by sid, IP and user, with heap-based expiry.
+
+    Args:
+        max_per_ip: Concurrent connections allowed per IP (None = unlimited)
+        max_per_user: Concurrent connections allowed per user (None = unlimited)
+        max_connections: Total connections; the oldest is evicted to admit a new one
+        max_age: Seconds after connecting that a connection expires (None = never)
+        idle_timeout: Seconds without touch() after which a connection expires (None = never)
+        on_expire: Called as on_expire(sid, data, reason) for expired or evicted connections
+        clock: Time source (seconds)
+    """
+
+    def __init__(self, max_per_ip: Optional[int] = None, max_per_user: Optional[int] = None,
+                 max_connections: Optional[int] = None, max_age: Optional[float] = None,
+                 idle_timeout: Optional[float] = None,
+                 on_expire: Optional[Callable[[str, Any, str], None]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_per_ip = max_per_ip
+        self.max_per_user = max_per_user
+        self.max_connections = max_connections
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.on_expire = on_expire
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._entries: Dict[str, _Entry] = {}
+        self._by_ip: Dict[str, Set[str]] = {}
+        self._by_user: Dict[Hashable, Set[str]] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._generations = itertools.count()
+        self._stats = {'added': 0, 'rejected_ip': 0, 'rejected_user': 0, 'removed': 0, 'expired': 0,
+                       'evicted': 0, 'heap_rebuilds': 0}
+
+    # Deadlines -------------------------------------------------------
+
+    def _deadline(self, entry: _Entry) -> Optional[float]:
+        deadlines = []
+        if self.max_age is not None:
+            deadlines.append(entry.connected_at + self.max_age)
+        if self.idle_timeout is not None:
+            deadlines.append(entry.last_activity + self.idle_timeout)
+        return min(deadlines) if deadlines else None
+
+    def _schedule(self, entry: _Entry):
+        deadline = self._deadline(entry)
+        if deadline is not None:
+            heapq.heappush(self._heap, (deadline, entry.generation, entry.sid))
+
+    def _maybe_rebuild_heap(self):
+        """Drop entries of removed connections once they dominate the heap"""
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [item for item in self._heap
+                          if (entry := self._entries.get(item[2])) is not None and entry.generation == item[1]]
+            heapq.heapify(self._heap)
+            self._stats['heap_rebuilds'] += 1
+
+    # Registration ----------------------------------------------------
+
+    def add(self, sid: str, ip: Optional[str] = None, user_id: Optional[Hashable] = None,
+            data: Any = None) -> bool:
+        """
+        Register a connection; False when the IP or user is at its limit.
+        Re-adding a known sid replaces it. Expired connections are dropped
+        first, and the oldest is evicted if the registry is full.
+        """
+        self.expire()
+        evicted = []
+        with self._lock:
+            if sid in self._entries:
+                self._discard(sid)
+            if self.max_per_ip is not None and ip is not None and \
+                    len(self._by_ip.get(ip, ())) >= self.max_per_ip:
+                self._stats['rejected_ip'] += 1
+                added = False
+            elif self.max_per_user is not None and user_id is not None and \
+                    len(self._by_user.get(user_id, ())) >= self.max_per_user:
+                self._stats['rejected_user'] += 1
+                added = False
+            else:
+                while self.max_connections is not None and len(self._entries) >= self.max_connections:
+                    oldest = self._discard(next(iter(self._entries)))
+                    evicted.append(oldest)
+                    self._stats['evicted'] += 1
+                entry = _Entry(sid, ip, user_id, self.clock(), next(self._generations), data)
+                self._entries[sid] = entry
+                if ip is not None:
+                    self._by_ip.setdefault(ip, set()).add(sid)
+                if user_id is not None:
+                    self._by_user.setdefault(user_id, set()).add(sid)
+                self._schedule(entry)
+                self._stats['added'] += 1
+                added = True
+        self._notify([(entry.sid, entry.data) for entry in evicted], 'evicted')
+        return added
+
+    def _discard(self, sid: str) -> Optional[_Entry]:
+        """Remove a connection from every index (lock held)"""
+        entry = self._entries.pop(sid, None)
+        if entry is None:
+            return None
+        for index, key in ((self._by_ip, entry.ip), (self._by_user, entry.user_id)):
+            if key is not None:
+                sids = index.get(key)
+                if sids is not None:
+                    sids.discard(sid)
+                    if not sids:
+                        del index[key]
+        self._maybe_rebuild_heap()
+        return entry
+
+    def remove(self, sid: str) -> Any:
+        """Unregister a connection; returns its data, or None if unknown"""
+        with self._lock:
+            entry = self._discard(sid)
+            if entry is None:
+                return None
+            self._stats['removed'] += 1
+            return entry.data
+
+    def touch(self, sid: str) -> bool:
+        """Record activity on a connection (pushes back its idle deadline)"""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return False
+            entry.last_activity = self.clock()
+            return True
+
+    # Expiry ----------------------------------------------------------
+
+    def expire(self, now: Optional[float] = None) -> List[Tuple[str, Any]]:
+        """
+        Unregister connections past their deadline, calling on_expire for
+        each; returns their (sid, data). add() runs this itself, so a
+        maintenance thread only needs it to drop connections during lulls.
+        """
+        expired = []
+        with self._lock:
+            now = self.clock() if now is None else now
+            while self._heap and self._heap[0][0] <= now:
+                _, generation, sid = heapq.heappop(self._heap)
+                entry = self._entries.get(sid)
+                if entry is None or entry.generation != generation:
+                    continue  # Removed or replaced since it was scheduled
+                deadline = self._deadline(entry)
+                if deadline is not None and deadline > now:
+                    heapq.heappush(self._heap, (deadline, generation, sid))  # Touched since
+                    continue
+                self._discard(sid)
+                self._stats['expired'] += 1
+                expired.append((sid, entry.data))
+        self._notify(expired, 'expired')
+        return expired
+
+    def _notify(self, connections: List[Tuple[str, Any]], reason: str):
+        if self.on_expire is None:
+            return
+        for sid, data in connections:
+            try:
+                self.on_expire(sid, data, reason)
+            except Exception as e:
+                logger.error(f"Connection expiry callback failed for {sid}: {e}")
+
+    # Lookups ---------------------------------------------------------
+
+    def get(self, sid: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(sid)
+            return entry.data if entry is not None else default
+
+    def count_for_ip(self, ip: str) -> int:
+        with self._lock:
+            return len(self._by_ip.get(ip, ()))
+
+    def count_for_user(self, user_id: Hashable) -> int:
+        with self._lock:
+            return len(self._by_user.get(user_id, ()))
+
+    def sids_for_ip(self, ip: str) -> List[str]:
+        with self._lock:
+            return list(self._by_ip.get(ip, ()))
+
+    def sids_for_user(self, user_id: Hashable) -> List[str]:
+        with self._lock:
+            return list(self._by_user.get(user_id, ()))
+
+    def items(self) -> List[Tuple[str, Any]]:
+        """Snapshot of (sid, data), oldest connection first"""
+        with self._lock:
+            return [(sid, entry.data) for sid, entry in self._entries.items()]
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([sid for sid, _ in self.items()])
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'connections': len(self._entries),
+                'ips': len(self._by_ip),
+                'users': len(self._by_user),
+                'heap_size': len(self._heap),
+                **self._stats
+            }
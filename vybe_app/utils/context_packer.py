@@ -2,14 +2,22 @@
 Context packing utilities to keep orchestrator inputs lean while preserving meaning.
 
 Strategies implemented:
-- Keep the latest system prompt; drop older/duplicate system prompts
-- Keep the most recent user/assistant turns up to a character budget
+- Keep the first system prompt verbatim at the front (a stable prefix the
+  backend's prompt cache can reuse); later system content follows it
+- Keep the most recent user/assistant turns up to a token budget, counted
+  with the active model's tokenizer (see token_counter)
+- Shorten the newest turn when it alone would overflow the budget
 - Optionally strip overly long blocks (code/logs) to placeholders
 
-Note: This is a character-based approximation. Token-aware packing can be
-added later by integrating a tokenizer for the specific model family.
+Callers that pass no token budget get the older character budget, and the
+per-message block stripping, instead.
 """
-from typing import List, Dict
+import logging
+from typing import Callable, List, Dict, Optional
+
+from .token_counter import TokenCounter, get_token_counter
+
+logger = logging.getLogger(__name__)
 
 
 def _strip_heavy_blocks(text: str, max_block_chars: int = 2000) -> str:
@@ -25,46 +33,90 @@ def _strip_heavy_blocks(text: str, max_block_chars: int = 2000) -> str:
     return f"{head}\n\n[... {len(text) - len(head) - len(tail)} chars omitted ...]\n\n{tail}"
 
 
-def pack_messages(messages: List[Dict], max_chars: int = 24000) -> List[Dict]:
+def _elide(text: str, keep: int) -> str:
+    """Keep ``keep`` characters of ``text``, half from each end, around an omission marker."""
+    head = text[: keep // 2]
+    tail = text[len(text) - (keep - len(head)) :]
+    return f"{head}\n\n[... {len(text) - len(head) - len(tail)} chars omitted ...]\n\n{tail}"
+
+
+def _shorten_to_fit(message: Dict, budget: int, measure: Callable[[Dict], int]) -> Dict:
+    """Longest head-and-tail elision of ``message`` that measures within ``budget``."""
+    content = message["content"]
+    best = {**message, "content": _elide(content, 0)}
+    low, high = 1, len(content) - 1
+    while low <= high:
+        keep = (low + high) // 2
+        candidate = {**message, "content": _elide(content, keep)}
+        if measure(candidate) <= budget:
+            best, low = candidate, keep + 1
+        else:
+            high = keep - 1
+    return best
+
+
+def pack_messages(messages: List[Dict], max_chars: int = 24000, max_tokens: Optional[int] = None,
+                  token_counter: Optional[TokenCounter] = None) -> List[Dict]:
     """
-    Pack chat messages into a compact list within a character budget.
+    Pack chat messages into a compact list within a character budget, or a
+    token budget when ``max_tokens`` is given (see token_counter.context_budget).
 
-    - Keeps the last system message only
+    - Emits one system message: the first system prompt, byte-for-byte
+      unchanged across calls, followed by the latest later system message
+      (e.g. a conversation summary) if there is one. Keeping the static
+      prompt as the prefix lets the backend reuse its evaluated KV state.
     - Iterates from the most recent to oldest user/assistant messages until budget
-    - Strips heavy blocks to reduce size
+    - The newest message is always kept; if it alone exceeds what the system
+      message leaves of the budget, its middle is elided to fit (logged)
+    - Under a character budget, strips heavy blocks to reduce size; a token
+      budget keeps messages whole and only shortens the newest one
+    - Token counts are memoized per message text, so re-packing a growing
+      conversation only tokenizes the new turns
     """
     if not messages:
         return []
 
-    # Find the latest system message (if any)
+    if max_tokens is not None:
+        counter = token_counter or get_token_counter()
+        measure = counter.count_message
+        budget = max(0, max_tokens)
+        strip = lambda text: text
+    else:
+        measure = lambda message: len(message["content"])
+        budget = max(max_chars, 1000)
+        strip = lambda text: _strip_heavy_blocks(text, 4000)
+
+    system_contents = [m.get("content", "") for m in messages if m.get("role") == "system"]
     last_system = None
-    for m in reversed(messages):
-        if m.get("role") == "system":
-            last_system = {"role": "system", "content": _strip_heavy_blocks(m.get("content", ""), 4000)}
-            break
+    if system_contents:
+        content = strip(system_contents[0])
+        if len(system_contents) > 1 and system_contents[-1] != system_contents[0]:
+            content = f"{content}\n\n{strip(system_contents[-1])}"
+        last_system = {"role": "system", "content": content}
 
     # Iterate from newest to oldest for user/assistant content
     packed_rev: List[Dict] = []
-    current_chars = len(last_system.get("content", "")) if last_system else 0
-    budget = max(max_chars, 1000)
+    used = measure(last_system) if last_system else 0
 
     for m in reversed(messages):
         role = m.get("role")
         if role == "system":
             # Only include the latest system once; skip others
             continue
-        content = _strip_heavy_blocks(m.get("content", ""), 4000)
-        # Ensure we always include the most recent user message even if large
-        projected = current_chars + len(content)
-        if not packed_rev:
-            packed_rev.append({"role": role, "content": content})
-            current_chars = projected
-            continue
-        if projected > budget:
+        packed_message = {"role": role, "content": strip(m.get("content", ""))}
+        projected = used + measure(packed_message)
+        if packed_rev and projected > budget:
             # Stop when budget exceeded
             break
-        packed_rev.append({"role": role, "content": content})
-        current_chars = projected
+        if projected > budget:
+            # The most recent message is always included, shortened to what is left
+            size = measure(packed_message)
+            packed_message = _shorten_to_fit(packed_message, budget - used, measure)
+            projected = used + measure(packed_message)
+            logger.warning(f"Newest {role} message ({size}) exceeds the context budget ({budget - used} left); "
+                           f"shortened to {projected - used}")
+        packed_rev.append(packed_message)
+        used = projected
 
     packed = list(reversed(packed_rev))
     if last_system:
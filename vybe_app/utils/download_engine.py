@@ -0,0 +1,495 @@
+"""
+Resumable Download Engine for Vybe
+Shared downloader for models and plugins using HTTP Range requests.
+
+    - The file is split into segments fetched in parallel into ``<dest>.part``.
+    - A sidecar manifest ``<dest>.part.json`` records each segment's progress
+      together with the server's validators (size, ETag, Last-Modified), so an
+      interrupted download resumes where it stopped unless the remote file
+      changed.
+    - Each segment retries with exponential backoff; the counter resets
+      whenever a retry makes progress.
+    - SHA-256 is computed while writing: bytes are fed to the digest as soon
+      as the contiguous prefix of the file grows, straight from memory when
+      a chunk lands at the frontier and otherwise from the just-written
+      (page-cached) region. No second pass over the file is needed; only
+      after a resume is the already-downloaded prefix read once to rebuild
+      the digest state.
+
+Servers without range support fall back to a single stream that restarts
+on retry.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import logging
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+ProgressCallback = Callable[[int, int], None]
+
+MANIFEST_VERSION = 1
+
+
+class DownloadError(Exception):
+    """A download failed permanently (retries exhausted, bad checksum, cancelled)"""
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a completed download"""
+    path: str
+    size: int
+    sha256: str
+    resumed_bytes: int
+    segments: int
+    elapsed: float
+    content_type: Optional[str] = None
+
+
+class _SequentialHasher:
+    """
+    SHA-256 over the growing contiguous prefix of a file written out of order.
+
+    Bytes already on disk past the frontier are read back by one thread at a
+    time (the drainer) without holding the lock, so segment writers never
+    wait on disk reads; while a drain runs, writers only record progress.
+    """
+
+    def __init__(self, part_path: str, segments: List[Dict[str, int]]):
+        self.digest = hashlib.sha256()
+        self.position = 0
+        self._segments = segments
+        self._lock = threading.Lock()
+        self._draining = False
+        # Unbuffered: a read-ahead buffer would hold stale bytes of regions not yet written
+        self._reader = open(part_path, 'rb', buffering=0)
+
+    def wrote(self, offset: int, data: bytes):
+        """Record that ``data`` was written at ``offset`` (segment progress already updated)"""
+        with self._lock:
+            if self._draining:
+                return  # The drainer finds these bytes on disk
+            if offset == self.position:
+                self.digest.update(data)
+                self.position += len(data)
+            if self._written_end() <= self.position:
+                return
+            self._draining = True
+        self._drain()
+
+    def _written_end(self) -> int:
+        """End of the written bytes that continue the hashed prefix (call with the lock held)"""
+        segment = next((s for s in self._segments if s['start'] <= self.position < s['end']), None)
+        return segment['start'] + segment['done'] if segment else self.position
+
+    def _drain(self, read_size: int = 8 * 1024 * 1024):
+        """Hash written bytes past the frontier until none are left; only the drainer moves the frontier"""
+        try:
+            while True:
+                with self._lock:
+                    start, end = self.position, self._written_end()
+                    if end <= start:
+                        self._draining = False
+                        return
+                self._reader.seek(start)
+                block = self._reader.read(min(read_size, end - start))
+                if not block:
+                    with self._lock:
+                        self._draining = False
+                    return
+                self.digest.update(block)
+                with self._lock:
+                    self.position += len(block)
+        except BaseException:
+            with self._lock:
+                self._draining = False
+            raise
+
+    def catch_up(self):
+        with self._lock:
+            if self._draining:
+                return
+            self._draining = True
+        self._drain()
+
+    def close(self):
+        self._reader.close()
+
+
+class RangedDownloader:
+    """
+    Parallel, resumable HTTP downloader.
+
+    Args:
+        segments: Parallel range requests per file
+        chunk_size: Bytes read from the network per write
+        max_retries: Consecutive failed attempts allowed per segment
+        backoff: Base delay in seconds; doubles per consecutive failure
+        min_segment_size: Files are not split into segments smaller than this
+        timeout: (connect, read) timeout per request
+        headers: Extra request headers (e.g. User-Agent)
+        session: requests.Session to use; one with a pool sized to ``segments`` by default
+    """
+
+    def __init__(self, segments: int = 4, chunk_size: int = 1024 * 1024, max_retries: int = 5,
+                 backoff: float = 1.0, min_segment_size: int = 8 * 1024 * 1024,
+                 timeout: Tuple[float, float] = (10, 60), headers: Optional[Dict[str, str]] = None,
+                 session: Optional[requests.Session] = None):
+        self.segments = max(1, segments)
+        self.chunk_size = chunk_size
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self.min_segment_size = max(1, min_segment_size)
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        # Ranged bodies must arrive byte-exact
+        self.headers.setdefault('Accept-Encoding', 'identity')
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.segments)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+
+    # Public API ------------------------------------------------------
+
+    def download(self, url: str, dest: PathLike, expected_sha256: Optional[str] = None,
+                 expected_size: Optional[int] = None, progress_callback: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None, min_size: Optional[int] = None) -> DownloadResult:
+        """
+        Download ``url`` to ``dest``; raises DownloadError on failure. The partial
+        file and manifest are kept on failure so the next call resumes.
+        ``progress_callback(downloaded_bytes, total_bytes)`` is throttled to ~4 calls/s.
+        ``min_size`` rejects a smaller file before any of it is fetched when the
+        server reports its size, and after the download otherwise.
+        """
+        started = time.time()
+        dest = str(dest)
+        part_path, manifest_path = dest + '.part', dest + '.part.json'
+        os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+
+        size, validators, ranges_supported = self._probe(url)
+        if expected_size is not None and size is not None and size != expected_size:
+            raise DownloadError(f"Remote size {size} does not match expected {expected_size}")
+        if min_size is not None and size is not None and size < min_size:
+            raise DownloadError(f"Remote file is {size} bytes, smaller than the minimum {min_size}")
+
+        if not ranges_supported or not size:
+            digest, size = self._download_single(url, part_path, size, progress_callback, cancel_event)
+            manifest_segments, resumed = None, 0
+        else:
+            manifest = self._load_manifest(manifest_path, part_path, url, size, validators)
+            if manifest is None:
+                manifest = self._new_manifest(url, size, validators)
+                with open(part_path, 'wb') as f:
+                    f.truncate(size)
+                self._save_manifest(manifest_path, manifest)
+            manifest_segments = manifest['segments']
+            resumed = sum(s['done'] for s in manifest_segments)
+            if resumed:
+                logger.info(f"Resuming {os.path.basename(dest)} at {resumed}/{size} bytes")
+            digest = self._download_segments(url, part_path, manifest_path, manifest, size,
+                                             progress_callback, cancel_event)
+
+        sha256 = digest.hexdigest()
+        if min_size is not None and size < min_size:
+            self._discard(part_path, manifest_path)
+            raise DownloadError(f"Downloaded file is {size} bytes, smaller than the minimum {min_size}")
+        if expected_sha256 and sha256.lower() != expected_sha256.lower():
+            self._discard(part_path, manifest_path)
+            raise DownloadError(f"SHA-256 mismatch for {os.path.basename(dest)}: got {sha256}")
+        os.replace(part_path, dest)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        return DownloadResult(path=dest, size=size, sha256=sha256, resumed_bytes=resumed,
+                              segments=len(manifest_segments) if manifest_segments else 1,
+                              elapsed=time.time() - started, content_type=validators.get('content_type'))
+
+    # Probing and manifests -------------------------------------------
+
+    def _probe(self, url: str) -> Tuple[Optional[int], Dict[str, Optional[str]], bool]:
+        """(size, validators, ranges supported) from a one-byte range request"""
+        headers = dict(self.headers, Range='bytes=0-0')
+        response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout,
+                                    allow_redirects=True)
+        try:
+            if response.status_code >= 400:
+                raise DownloadError(f"HTTP {response.status_code} for {url}")
+            validators = {'etag': response.headers.get('ETag'),
+                          'last_modified': response.headers.get('Last-Modified'),
+                          'content_type': response.headers.get('Content-Type')}
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                if total.isdigit():
+                    return int(total), validators, True
+            length = response.headers.get('Content-Length')
+            return (int(length) if length and length.isdigit() else None), validators, False
+        finally:
+            response.close()
+
+    def _new_manifest(self, url: str, size: int, validators: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        count = max(1, min(self.segments, size // self.min_segment_size))
+        step = -(-size // count)
+        segments = [{'start': start, 'end': min(size, start + step), 'done': 0}
+                    for start in range(0, size, step)]
+        return {'version': MANIFEST_VERSION, 'url': url, 'size': size, 'validators': validators,
+                'segments': segments}
+
+    @staticmethod
+    def _load_manifest(manifest_path: str, part_path: str, url: str, size: int,
+                       validators: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Saved manifest if it describes the same remote file, else None"""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (manifest.get('version') != MANIFEST_VERSION or manifest.get('size') != size
+                or not os.path.exists(part_path) or os.path.getsize(part_path) != size):
+            return None
+        saved = manifest.get('validators') or {}
+        for key in ('etag', 'last_modified'):
+            if saved.get(key) and validators.get(key) and saved[key] != validators[key]:
+                logger.info(f"Remote file changed since the partial download ({key}); starting over")
+                return None
+        if manifest.get('url') != url:
+            manifest['url'] = url  # Same file from a new (e.g. redirected) URL
+        return manifest
+
+    @staticmethod
+    def _save_manifest(manifest_path: str, manifest: Dict[str, Any]):
+        temp_path = manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, manifest_path)
+
+    @staticmethod
+    def _discard(part_path: str, manifest_path: str):
+        for path in (part_path, manifest_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # Segmented download ----------------------------------------------
+
+    def _download_segments(self, url: str, part_path: str, manifest_path: str, manifest: Dict[str, Any],
+                           size: int, progress_callback: Optional[ProgressCallback],
+                           cancel_event: Optional[threading.Event]):
+        segments = manifest['segments']
+        hasher = _SequentialHasher(part_path, segments)
+        progress = _Progress(size, sum(s['done'] for s in segments), progress_callback)
+        manifest_lock = threading.Lock()
+        last_saved = [time.monotonic()]
+        stop = _StopSignal(cancel_event)
+
+        def checkpoint(force: bool = False):
+            with manifest_lock:
+                if force or time.monotonic() - last_saved[0] >= 1.0:
+                    self._save_manifest(manifest_path, manifest)
+                    last_saved[0] = time.monotonic()
+
+        def run_segment(segment: Dict[str, int]):
+            failures = 0
+            while segment['done'] < segment['end'] - segment['start']:
+                if stop.is_set():
+                    raise DownloadError("Download cancelled")
+                before = segment['done']
+                try:
+                    self._fetch_range(url, part_path, segment, hasher, progress, checkpoint, stop)
+                except DownloadError:
+                    raise
+                except Exception as e:
+                    failures = 0 if segment['done'] > before else failures + 1
+                    if failures > self.max_retries:
+                        raise DownloadError(f"Segment {segment['start']}-{segment['end']} failed: {e}") from e
+                    delay = min(60.0, self.backoff * (2 ** max(0, failures - 1)))
+                    logger.warning(f"Segment {segment['start']}-{segment['end']} interrupted ({e}); "
+                                   f"retrying in {delay:.1f}s")
+                    stop.wait(delay)
+
+        pending = [s for s in segments if s['done'] < s['end'] - s['start']]
+        progress.start()
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="Download") as pool:
+                    futures = [pool.submit(run_segment, segment) for segment in pending]
+                    errors = []
+                    for future in as_completed(futures):
+                        error = future.exception()
+                        if error is not None:
+                            errors.append(error)
+                            stop.set()  # Let the other segments stop at their next chunk
+                    if errors:
+                        raise errors[0] if isinstance(errors[0], DownloadError) else DownloadError(str(errors[0]))
+            hasher.catch_up()
+            if hasher.position != size:
+                raise DownloadError(f"Hashed {hasher.position} of {size} bytes; partial file is inconsistent")
+            progress.finish()
+            return hasher.digest
+        finally:
+            checkpoint(force=True)
+            hasher.close()
+
+    def _fetch_range(self, url: str, part_path: str, segment: Dict[str, int], hasher: _SequentialHasher,
+                     progress: '_Progress', checkpoint: Callable[..., None], stop: '_StopSignal'):
+        offset = segment['start'] + segment['done']
+        headers = dict(self.headers, Range=f"bytes={offset}-{segment['end'] - 1}")
+        response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        try:
+            if response.status_code != 206:
+                raise IOError(f"Expected 206 for range request, got HTTP {response.status_code}")
+            # Unbuffered so bytes counted in 'done' have reached the OS before the manifest says so
+            with open(part_path, 'r+b', buffering=0) as f:
+                f.seek(offset)
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if stop.is_set():
+                        raise DownloadError("Download cancelled")
+                    if not chunk:
+                        continue
+                    chunk = chunk[:segment['end'] - offset]
+                    f.write(chunk)
+                    segment['done'] += len(chunk)
+                    hasher.wrote(offset, chunk)
+                    offset += len(chunk)
+                    progress.add(len(chunk))
+                    checkpoint()
+                    if offset >= segment['end']:
+                        break
+            if offset < segment['end']:
+                raise IOError(f"Connection closed at byte {offset} of segment ending at {segment['end']}")
+        finally:
+            response.close()
+
+    # Single stream ---------------------------------------------------
+
+    def _download_single(self, url: str, part_path: str, size: Optional[int],
+                         progress_callback: Optional[ProgressCallback],
+                         cancel_event: Optional[threading.Event]):
+        """Whole-file stream for servers without range support; retries restart from zero"""
+        failures = 0
+        while True:
+            digest = hashlib.sha256()
+            progress = _Progress(size or 0, 0, progress_callback)
+            written = 0
+            try:
+                response = self.session.get(url, headers=self.headers, stream=True, timeout=self.timeout)
+                try:
+                    if response.status_code != 200:
+                        raise IOError(f"HTTP {response.status_code}")
+                    with open(part_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=self.chunk_size):
+                            if cancel_event is not None and cancel_event.is_set():
+                                raise DownloadError("Download cancelled")
+                            if chunk:
+                                f.write(chunk)
+                                digest.update(chunk)
+                                written += len(chunk)
+                                progress.add(len(chunk))
+                finally:
+                    response.close()
+                if size and written != size:
+                    raise IOError(f"Received {written} of {size} bytes")
+                progress.finish()
+                return digest, written
+            except DownloadError:
+                raise
+            except Exception as e:
+                failures += 1
+                if failures > self.max_retries:
+                    raise DownloadError(f"Download failed: {e}") from e
+                delay = min(60.0, self.backoff * (2 ** (failures - 1)))
+                logger.warning(f"Download interrupted ({e}); restarting in {delay:.1f}s")
+                if cancel_event is None:
+                    time.sleep(delay)
+                elif cancel_event.wait(delay):
+                    raise DownloadError("Download cancelled") from e
+
+
+class _StopSignal:
+    """Internal stop flag that also honours the caller's cancel event"""
+
+    def __init__(self, cancel_event: Optional[threading.Event]):
+        self._event = threading.Event()
+        self._cancel_event = cancel_event
+
+    def set(self):
+        self._event.set()
+
+    def is_set(self) -> bool:
+        return self._event.is_set() or (self._cancel_event is not None and self._cancel_event.is_set())
+
+    def wait(self, timeout: float):
+        deadline = time.monotonic() + timeout
+        while not self.is_set() and time.monotonic() < deadline:
+            self._event.wait(min(0.25, max(0.0, deadline - time.monotonic())))
+
+
+class _Progress:
+    """Thread-safe byte counter that calls back at most every 0.25s"""
+
+    def __init__(self, total: int, done: int, callback: Optional[ProgressCallback], interval: float = 0.25):
+        self.total = total
+        self.done = done
+        self.callback = callback
+        self.interval = interval
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, count: int):
+        with self._lock:
+            self.done += count
+            now = time.monotonic()
+            if self.callback is None or now - self._last < self.interval:
+                return
+            self._last = now
+            done, total = self.done, self.total
+        self._notify(done, total)
+
+    def start(self):
+        """Report the starting point (bytes already on disk when resuming)"""
+        with self._lock:
+            self._last = time.monotonic()
+            done = self.done
+        self._notify(done, self.total)
+
+    def finish(self):
+        with self._lock:
+            done = self.done
+        self._notify(done, self.total or done)
+
+    def _notify(self, done: int, total: int):
+        if self.callback is None:
+            return
+        try:
+            self.callback(done, total)
+        except Exception as e:
+            logger.warning(f"Download progress callback failed: {e}")
+
+
+def download_file(url: str, dest: PathLike, expected_sha256: Optional[str] = None,
+                  progress_callback: Optional[ProgressCallback] = None,
+                  cancel_event: Optional[threading.Event] = None, min_size: Optional[int] = None,
+                  **options) -> DownloadResult:
+    """Download with a RangedDownloader configured from Config.DOWNLOAD_* (overridable via ``options``)"""
+    try:
+        from ..config import Config
+        defaults = {'segments': Config.DOWNLOAD_SEGMENTS, 'max_retries': Config.DOWNLOAD_MAX_RETRIES}
+    except Exception:
+        defaults = {}
+    defaults.update(options)
+    return RangedDownloader(**defaults).download(url, dest, expected_sha256=expected_sha256,
+                                                 progress_callback=progress_callback,
+                                                 cancel_event=cancel_event, min_size=min_size)
@@ -0,0 +1,268 @@
+"""
+File Fingerprint Store for Vybe
+Avoids re-reading multi-GB model files (and other large files) on every scan.
+
+Fingerprints are stored in SQLite keyed by path and validated against
+(inode, size, mtime_ns); a file whose stat is unchanged is never re-read.
+
+    - quick_fingerprint(): SHA-256 over the size, the header and a fixed
+      number of evenly spaced blocks plus the tail. Reads well under a
+      megabyte regardless of file size; use it for change detection.
+    - full_hash(): SHA-256 of the whole file, read through mmap in large
+      slices, cached with the same stat key. full_hash_async() runs it on a
+      small background pool and shares the work between concurrent callers.
+"""
+
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+class FingerprintStore:
+    """
+    Persistent (path, inode, size, mtime) -> fingerprint/hash cache.
+
+    Args:
+        db_path: SQLite file holding the fingerprints
+        workers: Threads used for background full hashing
+        sample_blocks: Blocks sampled between header and tail for quick fingerprints
+        block_size: Bytes read per sampled block (and for the header and tail)
+        read_size: Slice size used when hashing whole files
+    """
+
+    def __init__(self, db_path: str, workers: int = 2, sample_blocks: int = 8,
+                 block_size: int = 64 * 1024, read_size: int = 8 * 1024 * 1024):
+        self.db_path = db_path
+        self.sample_blocks = max(0, sample_blocks)
+        self.block_size = max(1, block_size)
+        self.read_size = max(self.block_size, read_size)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="FileHash")
+        self._pending: Dict[Tuple, Future] = {}
+        self._stats = {'quick_hits': 0, 'quick_computed': 0, 'full_hits': 0, 'full_computed': 0,
+                       'bytes_hashed': 0}
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS file_fingerprints (
+                    path TEXT PRIMARY KEY,
+                    inode INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    quick_hash TEXT,
+                    full_hash TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    # Stat keys -------------------------------------------------------
+
+    @staticmethod
+    def _stat_key(path: PathLike) -> Tuple[str, int, int, int]:
+        resolved = os.path.abspath(str(path))
+        st = os.stat(resolved)
+        return resolved, st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _cached(self, key: Tuple[str, int, int, int]) -> Tuple[Optional[str], Optional[str]]:
+        """(quick_hash, full_hash) stored for this exact stat key"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, size, mtime_ns, quick_hash, full_hash FROM file_fingerprints WHERE path = ?",
+                (key[0],)
+            ).fetchone()
+        if row is None or tuple(row[:3]) != key[1:]:
+            return None, None
+        return row[3], row[4]
+
+    def _store(self, key: Tuple[str, int, int, int], quick_hash: Optional[str] = None,
+               full_hash: Optional[str] = None):
+        """Record hashes for a stat key; hashes for an older stat of the path are dropped"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT inode, size, mtime_ns, quick_hash, full_hash FROM file_fingerprints WHERE path = ?",
+                (key[0],)
+            ).fetchone()
+            if row is not None and tuple(row[:3]) == key[1:]:
+                quick_hash = quick_hash or row[3]
+                full_hash = full_hash or row[4]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_fingerprints "
+                "(path, inode, size, mtime_ns, quick_hash, full_hash, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key[0], key[1], key[2], key[3], quick_hash, full_hash, time.time())
+            )
+
+    # Quick fingerprints ----------------------------------------------
+
+    def quick_fingerprint(self, path: PathLike) -> str:
+        """Cheap content fingerprint for change detection (header + sampled blocks + tail)"""
+        key = self._stat_key(path)
+        quick_hash, _ = self._cached(key)
+        if quick_hash:
+            with self._lock:
+                self._stats['quick_hits'] += 1
+            return quick_hash
+        quick_hash = self._compute_quick(key[0], key[2])
+        self._store(key, quick_hash=quick_hash)
+        with self._lock:
+            self._stats['quick_computed'] += 1
+        return quick_hash
+
+    def _compute_quick(self, path: str, size: int) -> str:
+        digest = hashlib.sha256(str(size).encode())
+        block = self.block_size
+        if size <= block * (self.sample_blocks + 2):
+            # Small file: the whole content is cheaper than seeking around it
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+            return 'q:' + digest.hexdigest()
+        step = (size - 2 * block) // (self.sample_blocks + 1)
+        offsets = [0] + [block + step * (i + 1) - block // 2 for i in range(self.sample_blocks)] + [size - block]
+        with open(path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                digest.update(f.read(block))
+        return 'q:' + digest.hexdigest()
+
+    # Full hashes -----------------------------------------------------
+
+    def cached_full_hash(self, path: PathLike) -> Optional[str]:
+        """Full SHA-256 if it is already known for the file's current stat, without reading it"""
+        try:
+            return self._cached(self._stat_key(path))[1]
+        except OSError:
+            return None
+
+    def full_hash(self, path: PathLike, use_cache: bool = True) -> str:
+        """
+        SHA-256 of the whole file. With ``use_cache=False`` the file is re-read
+        even if its stat is unchanged (integrity verification).
+        """
+        key = self._stat_key(path)
+        if use_cache:
+            full_hash = self._cached(key)[1]
+            if full_hash:
+                with self._lock:
+                    self._stats['full_hits'] += 1
+                return full_hash
+            return self.full_hash_async(path).result()
+        return self._compute_and_store_full(key)
+
+    def full_hash_async(self, path: PathLike,
+                        callback: Optional[Callable[[Optional[str], Optional[BaseException]], Any]] = None) -> Future:
+        """Hash a file on the background pool; concurrent requests for one file share a single read"""
+        key = self._stat_key(path)
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._executor.submit(self._compute_and_store_full, key)
+                self._pending[key] = future
+                future.add_done_callback(lambda _f, k=key: self._forget_pending(k))
+        if callback is not None:
+            future.add_done_callback(lambda f: callback(*_future_outcome(f)))
+        return future
+
+    def _forget_pending(self, key: Tuple):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _compute_and_store_full(self, key: Tuple[str, int, int, int]) -> str:
+        cached = self._cached(key)[1]
+        if cached:
+            with self._lock:
+                self._stats['full_hits'] += 1
+            return cached
+        digest = hashlib.sha256()
+        size = key[2]
+        with open(key[0], 'rb') as f:
+            if size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(mapped), self.read_size):
+                            digest.update(view[offset:offset + self.read_size])
+                    finally:
+                        view.release()
+        full_hash = digest.hexdigest()
+        # Only cache if the file did not change while it was being read
+        if self._stat_key(key[0]) == key:
+            self._store(key, full_hash=full_hash)
+        with self._lock:
+            self._stats['full_computed'] += 1
+            self._stats['bytes_hashed'] += size
+        return full_hash
+
+    # Maintenance -----------------------------------------------------
+
+    def forget(self, path: PathLike):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM file_fingerprints WHERE path = ?", (os.path.abspath(str(path)),))
+
+    def prune_missing(self) -> int:
+        """Drop entries for files that no longer exist"""
+        with self._lock:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM file_fingerprints")]
+        missing = [(path,) for path in paths if not os.path.exists(path)]
+        if missing:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM file_fingerprints WHERE path = ?", missing)
+        return len(missing)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            stats['entries'] = self._conn.execute("SELECT COUNT(*) FROM file_fingerprints").fetchone()[0]
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+def _future_outcome(future: Future) -> Tuple[Optional[str], Optional[BaseException]]:
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
+
+_fingerprint_store: Optional[FingerprintStore] = None
+_fingerprint_store_lock = threading.Lock()
+
+
+def get_fingerprint_store() -> FingerprintStore:
+    """Shared fingerprint store at Config.FILE_FINGERPRINT_DB_PATH"""
+    global _fingerprint_store
+    if _fingerprint_store is None:
+        with _fingerprint_store_lock:
+            if _fingerprint_store is None:
+                from ..config import Config
+                _fingerprint_store = FingerprintStore(
+                    Config.FILE_FINGERPRINT_DB_PATH,
+                    workers=Config.FILE_HASH_WORKERS
+                )
+    return _fingerprint_store
+
+
+def quick_fingerprint(path: PathLike) -> str:
+    return get_fingerprint_store().quick_fingerprint(path)
+
+
+def full_file_hash(path: PathLike, use_cache: bool = True) -> str:
+    return get_fingerprint_store().full_hash(path, use_cache=use_cache)
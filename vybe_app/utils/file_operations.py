@@ -8,7 +8,6 @@ access to system files.
 
 import os
 import json
-import hashlib
 import mimetypes
 import shutil
 from pathlib import Path
@@ -25,6 +24,7 @@ from contextlib import contextmanager
 from flask import current_app
 
 from ..logger import log_info, log_warning, log_error
+from .file_fingerprint import full_file_hash
 
 
 def log_audit(action: str, filepath: str, user: str = "system") -> None:
@@ -204,7 +204,7 @@ class BackupManager:
         with safe_file_operation("backup_restoration", str(original_path)):
             # Verify backup integrity if requested
             if verify_integrity:
-                current_hash = self._calculate_file_hash(backup_path)
+                current_hash = self._calculate_file_hash(backup_path, use_cache=False)
                 if current_hash != backup_info.hash:
                     log_error(f"Backup integrity check failed: {backup_path}")
                     return False
@@ -220,13 +220,9 @@ class BackupManager:
             log_info(f"Restored file from backup: {original_path}")
             return True
     
-    def _calculate_file_hash(self, file_path: Path) -> str:
+    def _calculate_file_hash(self, file_path: Path, use_cache: bool = True) -> str:
         """Calculate SHA-256 hash of file (synchronous version for internal use)"""
-        hash_sha256 = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_sha256.update(chunk)
-        return hash_sha256.hexdigest()
+        return full_file_hash(file_path, use_cache=use_cache)
     
     def _calculate_file_hash_async(self, file_path: Path, callback=None) -> threading.Thread:
         """
@@ -368,13 +364,9 @@ class FileProcessor:
             return None
     
     def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA-256 hash of file (synchronous version)"""
+        """Calculate SHA-256 hash of file (synchronous version, cached until the file changes)"""
         try:
-            hash_sha256 = hashlib.sha256()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+            return full_file_hash(file_path)
         except Exception as e:
             log_error(f"Error calculating file hash: {e}")
             return ""
@@ -0,0 +1,348 @@
+"""
+GCRA Rate Limiter for Vybe
+Shared rate-limiting core behind utils/rate_limiter.py and the rate-limit
+decorators in utils/security_middleware.py.
+
+    - GCRA (generic cell rate algorithm): each key stores a single
+      "theoretical arrival time" (TAT). A limit of ``limit`` requests per
+      ``period`` with a burst of ``burst`` admits a request when it arrives
+      no earlier than TAT - burst * period / limit, then pushes TAT on by
+      period / limit. No per-request timestamps or window buckets are kept.
+    - Keys are spread over lock-striped shards by their Python hash, so
+      checks for different keys rarely contend and no key is re-hashed
+      with a cryptographic digest.
+    - A key whose TAT has passed holds no information (it behaves exactly
+      like an unseen key), so such keys are dropped as they reach the
+      least-recently-used end of their shard. A per-shard cap bounds
+      memory; past it the least recently used key is evicted.
+    - With SQLiteRateLimitBackend, TATs changed since the last flush are
+      written back in one transaction every ``flush_interval`` seconds over
+      a persistent connection, and restored at startup.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds of slack in TAT comparisons: wall-clock floats (~1.7e9) carry
+# rounding error around 1e-7 s, which must not cost a request
+_EPSILON = 1e-6
+
+
+class RateLimitDecision(NamedTuple):
+    """Outcome of a rate-limit check"""
+    allowed: bool
+    limit: int          # Burst size: requests allowed back to back from idle
+    remaining: int      # Requests that could be made right now after this one
+    retry_after: float  # Seconds until a denied request would be allowed (0 when allowed)
+    reset_after: float  # Seconds until the key is back to a full burst
+
+
+class SQLiteRateLimitBackend:
+    """
+    Persistent TAT storage for GCRALimiter over a single long-lived
+    connection. Keys are stored as text.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_state (
+                    scope TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    tat REAL NOT NULL,
+                    PRIMARY KEY (scope, key)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_state_tat ON rate_limit_state (tat)")
+
+    def load(self, now: float, limit: int) -> List[Tuple[str, str, float]]:
+        """Unexpired (scope, key, tat) rows, most recently active last"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT scope, key, tat FROM rate_limit_state WHERE tat > ? ORDER BY tat DESC LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        rows.reverse()
+        return rows
+
+    def write(self, rows: List[Tuple[str, str, float]], now: float):
+        """Upsert changed TATs and drop rows that have expired, in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO rate_limit_state (scope, key, tat) VALUES (?, ?, ?) "
+                "ON CONFLICT (scope, key) DO UPDATE SET tat = excluded.tat",
+                rows
+            )
+            self._conn.execute("DELETE FROM rate_limit_state WHERE tat <= ?", (now,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Shard:
+    __slots__ = ('lock', 'tats', 'dirty', 'allowed', 'denied', 'expired', 'evicted')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tats: "OrderedDict[Tuple[str, Hashable], float]" = OrderedDict()
+        self.dirty: Dict[Tuple[str, Hashable], float] = {}
+        self.allowed = 0
+        self.denied = 0
+        self.expired = 0
+        self.evicted = 0
+
+
+class GCRALimiter:
+    """
+    Lock-striped GCRA rate limiter with bounded memory.
+
+    Args:
+        shards: Number of lock stripes (rounded up to a power of two)
+        max_keys: Approximate cap on tracked keys across all shards
+        backend: Optional SQLiteRateLimitBackend for write-back persistence
+        flush_interval: Seconds between write-backs to the backend
+        clock: Wall-clock time source (seconds); persisted TATs depend on it
+    """
+
+    def __init__(self, shards: int = 64, max_keys: int = 100_000,
+                 backend: Optional[SQLiteRateLimitBackend] = None, flush_interval: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        count = 1
+        while count < max(1, shards):
+            count <<= 1
+        self._mask = count - 1
+        self._shards = [_Shard() for _ in range(count)]
+        self.max_keys = max_keys
+        self._max_per_shard = max(1, max_keys // count)
+        self.backend = backend
+        self.flush_interval = max(0.01, flush_interval)
+        self.clock = clock
+        self._write_stats = {'flushes': 0, 'rows_written': 0, 'flush_errors': 0}
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if backend is not None:
+            self._restore()
+            self._flusher = threading.Thread(target=self._flush_loop, name="RateLimitFlush", daemon=True)
+            self._flusher.start()
+
+    def _shard(self, item: Tuple[str, Hashable]) -> _Shard:
+        return self._shards[hash(item) & self._mask]
+
+    # Checks ----------------------------------------------------------
+
+    def check(self, key: Hashable, limit: int, period: float, burst: Optional[int] = None,
+              cost: int = 1, scope: str = 'default') -> RateLimitDecision:
+        """
+        Count a request of ``cost`` against ``key`` under ``limit`` requests
+        per ``period`` seconds (burst defaults to ``limit``). Denied
+        requests are not counted. Keys are compared as strings, the form
+        they are persisted and restored in.
+        """
+        burst = limit if burst is None else burst
+        interval = period / max(1, limit)
+        tolerance = interval * burst
+        item = (scope, str(key))
+        shard = self._shards[hash(item) & self._mask]
+        with shard.lock:
+            now = self.clock()
+            tats = shard.tats
+            tat = tats.get(item)
+            known = tat is not None
+            if not known or tat < now:
+                tat = now
+            new_tat = tat + interval * cost
+            allow_at = new_tat - tolerance
+            if allow_at - now > _EPSILON:
+                shard.denied += 1
+                return RateLimitDecision(False, burst, self._remaining(tat, now, tolerance, interval),
+                                         allow_at - now, tat - now)
+            tats[item] = new_tat
+            if known:
+                tats.move_to_end(item)
+            else:
+                self._trim(shard, now)  # Memory only grows when a key is added
+            if self.backend is not None:
+                shard.dirty[item] = new_tat
+            shard.allowed += 1
+            return RateLimitDecision(True, burst, int((tolerance - (new_tat - now) + _EPSILON) / interval),
+                                     0.0, new_tat - now)
+
+    def peek(self, key: Hashable, limit: int, period: float, burst: Optional[int] = None,
+             scope: str = 'default') -> RateLimitDecision:
+        """Decision a request would get now, without counting it"""
+        burst = limit if burst is None else burst
+        interval = period / max(1, limit)
+        tolerance = interval * burst
+        item = (scope, str(key))
+        shard = self._shard(item)
+        with shard.lock:
+            now = self.clock()
+            tat = max(shard.tats.get(item, now), now)
+        allow_at = tat + interval - tolerance
+        return RateLimitDecision(allow_at - now <= _EPSILON, burst,
+                                 self._remaining(tat, now, tolerance, interval),
+                                 max(0.0, allow_at - now), tat - now)
+
+    @staticmethod
+    def _remaining(tat: float, now: float, tolerance: float, interval: float) -> int:
+        return max(0, int((tolerance - (tat - now) + _EPSILON) / interval))
+
+    def reset(self, key: Hashable, scope: str = 'default'):
+        """Forget a key's history under a scope"""
+        item = (scope, str(key))
+        shard = self._shard(item)
+        with shard.lock:
+            shard.tats.pop(item, None)
+            if self.backend is not None:
+                shard.dirty[item] = 0.0  # Deleted as expired on the next write-back
+
+    # Memory bounds ---------------------------------------------------
+
+    def _trim(self, shard: _Shard, now: float):
+        """Drop stale keys from the LRU end and enforce the shard cap (lock held)"""
+        tats = shard.tats
+        for _ in range(2):
+            oldest = next(iter(tats), None)
+            if oldest is None or tats[oldest] > now:
+                break
+            del tats[oldest]
+            shard.expired += 1
+        while len(tats) > self._max_per_shard:
+            tats.popitem(last=False)
+            shard.evicted += 1
+
+    def evict_idle(self) -> int:
+        """Drop every key whose TAT has passed; returns how many were dropped"""
+        dropped = 0
+        for shard in self._shards:
+            with shard.lock:
+                now = self.clock()
+                stale = [item for item, tat in shard.tats.items() if tat <= now]
+                for item in stale:
+                    del shard.tats[item]
+                shard.expired += len(stale)
+                dropped += len(stale)
+        return dropped
+
+    # Persistence -----------------------------------------------------
+
+    def _restore(self):
+        try:
+            rows = self.backend.load(self.clock(), self.max_keys)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to restore rate limit state: {e}")
+            return
+        for scope, key, tat in rows:
+            item = (scope, key)
+            shard = self._shard(item)
+            with shard.lock:
+                shard.tats[item] = tat
+                while len(shard.tats) > self._max_per_shard:
+                    shard.tats.popitem(last=False)
+        logger.info(f"Restored rate limit state for {len(rows)} keys")
+
+    def flush(self) -> bool:
+        """Write TATs changed since the last flush to the backend. Returns False if the write failed."""
+        if self.backend is None:
+            return True
+        batches = []
+        for shard in self._shards:
+            with shard.lock:
+                if shard.dirty:
+                    batches.append((shard, shard.dirty))
+                    shard.dirty = {}
+        rows = [(scope, key, tat) for _, batch in batches for (scope, key), tat in batch.items()]
+        if not rows:
+            return True
+        try:
+            self.backend.write(rows, self.clock())
+        except sqlite3.Error as e:
+            logger.error(f"Rate limit write-back of {len(rows)} keys failed: {e}")
+            for shard, batch in batches:
+                with shard.lock:
+                    # Newer changes made since the batch was taken win
+                    batch.update(shard.dirty)
+                    shard.dirty = batch
+            self._write_stats['flush_errors'] += 1
+            return False
+        self._write_stats['flushes'] += 1
+        self._write_stats['rows_written'] += len(rows)
+        return True
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Rate limit flush error: {e}")
+
+    def close(self):
+        """Write back pending changes and stop the flush thread"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        if self.backend is not None:
+            self.flush()
+            self.backend.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {'keys': 0, 'allowed': 0, 'denied': 0, 'expired': 0, 'evicted': 0, 'pending_writes': 0}
+        for shard in self._shards:
+            with shard.lock:
+                stats['keys'] += len(shard.tats)
+                stats['allowed'] += shard.allowed
+                stats['denied'] += shard.denied
+                stats['expired'] += shard.expired
+                stats['evicted'] += shard.evicted
+                stats['pending_writes'] += len(shard.dirty)
+        stats.update(shards=len(self._shards), max_keys=self.max_keys,
+                     backend='sqlite' if self.backend is not None else 'memory', **self._write_stats)
+        return stats
+
+
+_gcra_limiter: Optional[GCRALimiter] = None
+_gcra_limiter_lock = threading.Lock()
+
+
+def get_gcra_limiter() -> GCRALimiter:
+    """Shared limiter configured from Config.RATE_LIMIT_*; pending writes are flushed at exit"""
+    global _gcra_limiter
+    if _gcra_limiter is None:
+        with _gcra_limiter_lock:
+            if _gcra_limiter is None:
+                from ..config import Config
+                backend = None
+                if Config.RATE_LIMIT_BACKEND == 'sqlite':
+                    try:
+                        backend = SQLiteRateLimitBackend(Config.RATE_LIMIT_DB_PATH)
+                    except (sqlite3.Error, OSError) as e:
+                        logger.error(f"Failed to open rate limit database, keeping limits in memory: {e}")
+                _gcra_limiter = GCRALimiter(
+                    shards=Config.RATE_LIMIT_SHARDS,
+                    max_keys=Config.RATE_LIMIT_MAX_KEYS,
+                    backend=backend,
+                    flush_interval=Config.RATE_LIMIT_FLUSH_INTERVAL
+                )
+                if backend is not None:
+                    atexit.register(_gcra_limiter.close)
+    return _gcra_limiter
@@ -0,0 +1,177 @@
+"""
+GGUF Header Reader for Vybe
+Reads model metadata (architecture, context length, quantization, tensor and
+parameter counts) from the header of a GGUF file through mmap. Only the
+header pages are touched; tensor data is never read.
+
+Format reference (GGUF v1-v3): magic "GGUF", uint32 version, tensor count,
+metadata key/value count, the key/value pairs, then one info record per
+tensor (name, dimensions, ggml type, data offset). Counts and string
+lengths are uint32 in v1 and uint64 from v2 on; all values are little-endian.
+"""
+
+import mmap
+import os
+import struct
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Optional
+
+GGUF_MAGIC = b'GGUF'
+
+# Metadata value types
+_UINT8, _INT8, _UINT16, _INT16, _UINT32, _INT32, _FLOAT32, _BOOL, _STRING, _ARRAY, _UINT64, _INT64, _FLOAT64 = range(13)
+
+_SCALAR_FORMATS = {
+    _UINT8: '<B', _INT8: '<b', _UINT16: '<H', _INT16: '<h', _UINT32: '<I', _INT32: '<i',
+    _FLOAT32: '<f', _BOOL: '<?', _UINT64: '<Q', _INT64: '<q', _FLOAT64: '<d'
+}
+_SCALAR_SIZES = {value_type: struct.calcsize(fmt) for value_type, fmt in _SCALAR_FORMATS.items()}
+
+# general.file_type (llama_ftype) -> quantization name
+FILE_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 7: 'Q8_0', 8: 'Q5_0', 9: 'Q5_1',
+    10: 'Q2_K', 11: 'Q3_K_S', 12: 'Q3_K_M', 13: 'Q3_K_L', 14: 'Q4_K_S', 15: 'Q4_K_M',
+    16: 'Q5_K_S', 17: 'Q5_K_M', 18: 'Q6_K', 19: 'IQ2_XXS', 20: 'IQ2_XS', 21: 'Q2_K_S',
+    22: 'IQ3_XS', 23: 'IQ3_XXS', 24: 'IQ1_S', 25: 'IQ4_NL', 26: 'IQ3_S', 27: 'IQ3_M',
+    28: 'IQ2_S', 29: 'IQ2_M', 30: 'IQ4_XS', 31: 'IQ1_M', 32: 'BF16'
+}
+
+# Scalar metadata longer than this is not kept (chat templates, licenses)
+_MAX_KEPT_STRING = 512
+
+
+class GGUFError(ValueError):
+    """The file is not a readable GGUF model"""
+
+
+@dataclass
+class GGUFMetadata:
+    """Header facts about a GGUF model"""
+    version: int
+    tensor_count: int
+    parameter_count: int
+    architecture: Optional[str] = None
+    name: Optional[str] = None
+    context_length: Optional[int] = None
+    embedding_length: Optional[int] = None
+    block_count: Optional[int] = None
+    head_count: Optional[int] = None
+    file_type: Optional[int] = None
+    quantization: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _HeaderReader:
+    """Cursor over a memory-mapped header"""
+
+    def __init__(self, buffer, version: int):
+        self.buffer = buffer
+        self.offset = 0
+        self.count_format = '<I' if version == 1 else '<Q'
+
+    def unpack(self, fmt: str) -> Any:
+        try:
+            value = struct.unpack_from(fmt, self.buffer, self.offset)[0]
+        except struct.error as e:
+            raise GGUFError(f"Truncated GGUF header at byte {self.offset}") from e
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def count(self) -> int:
+        return self.unpack(self.count_format)
+
+    def string(self, keep: bool = True) -> Optional[str]:
+        length = self.count()
+        end = self.offset + length
+        if end > len(self.buffer):
+            raise GGUFError(f"String of {length} bytes runs past end of file")
+        value = bytes(self.buffer[self.offset:end]).decode('utf-8', errors='replace') if keep else None
+        self.offset = end
+        return value
+
+    def value(self, value_type: int, keep: bool = True) -> Any:
+        if value_type in _SCALAR_FORMATS:
+            return self.unpack(_SCALAR_FORMATS[value_type])
+        if value_type == _STRING:
+            return self.string(keep)
+        if value_type == _ARRAY:
+            item_type = self.unpack('<I')
+            length = self.count()
+            if item_type in _SCALAR_SIZES:
+                # Fixed-size items are skipped in one step
+                self.offset += length * _SCALAR_SIZES[item_type]
+            else:
+                for _ in range(length):
+                    self.value(item_type, keep=False)
+            return length
+        raise GGUFError(f"Unknown GGUF value type {value_type} at byte {self.offset}")
+
+
+def read_gguf_metadata(path: str) -> GGUFMetadata:
+    """Parse the header of a GGUF file; raises GGUFError for anything else"""
+    size = os.path.getsize(path)
+    if size < 24:
+        raise GGUFError(f"File too small to be GGUF: {size} bytes")
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _parse(mapped)
+
+
+def _parse(buffer) -> GGUFMetadata:
+    if bytes(buffer[:4]) != GGUF_MAGIC:
+        raise GGUFError("Missing GGUF magic")
+    version = struct.unpack_from('<I', buffer, 4)[0]
+    if version not in (1, 2, 3):
+        raise GGUFError(f"Unsupported GGUF version {version}")
+    reader = _HeaderReader(buffer, version)
+    reader.offset = 8
+    tensor_count = reader.count()
+    kv_count = reader.count()
+
+    metadata: Dict[str, Any] = {}
+    for _ in range(kv_count):
+        key = reader.string()
+        value_type = reader.unpack('<I')
+        if value_type == _ARRAY:
+            metadata[f"{key}.length"] = reader.value(value_type)
+            continue
+        value = reader.value(value_type)
+        if not isinstance(value, str) or len(value) <= _MAX_KEPT_STRING:
+            metadata[key] = value
+
+    parameter_count = 0
+    for _ in range(tensor_count):
+        reader.string(keep=False)
+        n_dims = reader.unpack('<I')
+        elements = 1
+        for _ in range(n_dims):
+            elements *= reader.count()  # uint32 dimensions in v1
+        reader.unpack('<I')  # ggml type
+        reader.unpack('<Q')  # data offset
+        parameter_count += elements
+
+    architecture = metadata.get('general.architecture')
+    file_type = metadata.get('general.file_type')
+
+    def arch_value(suffix: str) -> Optional[int]:
+        value = metadata.get(f"{architecture}.{suffix}") if architecture else None
+        return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    return GGUFMetadata(
+        version=version,
+        tensor_count=tensor_count,
+        parameter_count=parameter_count,
+        architecture=architecture,
+        name=metadata.get('general.name'),
+        context_length=arch_value('context_length'),
+        embedding_length=arch_value('embedding_length'),
+        block_count=arch_value('block_count'),
+        head_count=arch_value('attention.head_count'),
+        file_type=file_type,
+        quantization=FILE_TYPES.get(file_type) if file_type is not None else None,
+        metadata=metadata
+    )
+
@@ -3,18 +3,32 @@ LLM Backend Manager for Vybe
 Manages llama-cpp-python backend lifecycle and model management
 Integrated backend management system replacing external dependencies
 """
+import json
 import threading
+from dataclasses import dataclass, replace
 import time
 import requests
 import os
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 from collections import deque
 import statistics
 import logging
 
+from .backend_liveness import get_backend_liveness, get_backend_session
+from .prompt_cache import get_prompt_cache_metrics
+from .llm_scheduler import RequestClass, get_llm_scheduler
+
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """Immutable snapshot of the chat routing preferences stored in AppConfiguration"""
+    routing_mode: str = 'prefer_local'
+    default_provider: str = 'local'
+
+
 class LLMBackendManager:
     """Manages integrated llama-cpp-python backend lifecycle"""
     
@@ -31,24 +45,30 @@ class LLMBackendManager:
         self.backend_url = backend_url
         self.default_timeout = timeout
         self.backend_controller = None
-        # Create persistent session for connection reuse
-        self._session = requests.Session()
+        # Shared keep-alive pool for every backend call
+        self._session = get_backend_session()
         # Note: timeout is set per request, not on session
+        # Shared in-memory readiness (background probe + outcomes of real requests)
+        self._liveness = get_backend_liveness(backend_url)
         
         # Adaptive timeout management
         self._response_times = deque(maxlen=50)  # Store last 50 response times
         self._min_timeout = 5    # Minimum timeout in seconds
         self._max_timeout = 120  # Maximum timeout in seconds
         self._timeout_lock = threading.Lock()
+        
+        # Routing policy snapshot: loaded once, replaced on settings changes,
+        # read without locking on the chat path
+        self._routing_policy: Optional[RoutingPolicy] = None
+        self._routing_policy_lock = threading.Lock()
+        
+        # Streaming metrics (time to first token in seconds)
+        self._ttft_times = deque(maxlen=200)
+        self._stream_stats = {'started': 0, 'completed': 0, 'cancelled': 0, 'failed': 0}
+        
+        # Admission control shared by every caller of the local server
+        self._scheduler = get_llm_scheduler()
     
-    def __del__(self):
-        """Cleanup session on object destruction"""
-        try:
-            if hasattr(self, '_session') and self._session:
-                self._session.close()
-        except Exception:
-            pass  # Ignore cleanup errors
-
     def _record_response_time(self, response_time: float):
         """Record response time for adaptive timeout calculation"""
         with self._timeout_lock:
@@ -116,59 +136,94 @@ class LLMBackendManager:
             return "AI service is currently unavailable"
 
     def is_backend_running(self) -> bool:
-        """Check if LLM backend is running using adaptive timeout"""
-        start_time = time.time()
-        adaptive_timeout = self._get_adaptive_timeout()
-        
-        try:
-            response = self._session.get(f"{self.backend_url}/v1/models", timeout=adaptive_timeout)
-            response_time = time.time() - start_time
-            self._record_response_time(response_time)
-            
-            if response.status_code == 200:
-                models = response.json()
-                model_count = len(models.get('data', []))
-                logger.info(f"✅ LLM backend is running and responsive with {model_count} models (response: {response_time:.2f}s)")
-                return True
-            else:
-                logger.info(f"❌ LLM backend returned status {response.status_code}")
-                return False
-        except requests.exceptions.RequestException as e:
-            logger.info(f"❌ LLM backend not accessible: {self._sanitize_error_response(str(e))}")
-            return False
-        except Exception as e:
-            logger.warning(f"❌ Error checking LLM backend status: {self._sanitize_error_response(str(e))}")
-            return False
+        """
+        Whether the LLM backend is ready, read from the shared liveness tracker.
+        No request is made here; use check_backend_now() to force a probe.
+        """
+        return self._liveness.is_ready()
 
-    def route_chat(self, messages: list, temperature: float = 0.7, max_tokens: int = 1024) -> Dict[str, Any]:
+    def check_backend_now(self) -> bool:
+        """Probe the backend synchronously and refresh the shared readiness state"""
+        return self._liveness.check_now()
+
+    def get_liveness_status(self) -> Dict[str, Any]:
+        """Readiness state, failure counters and recent transitions"""
+        return self._liveness.get_status()
+
+    def get_routing_policy(self) -> RoutingPolicy:
+        """Current routing policy; the database is read only until the first successful load"""
+        policy = self._routing_policy
+        if policy is not None:
+            return policy
+        with self._routing_policy_lock:
+            if self._routing_policy is None:
+                try:
+                    from vybe_app.models import AppConfiguration
+                    routing_config = AppConfiguration.query.filter_by(key='llm_routing_mode').first()
+                    provider_config = AppConfiguration.query.filter_by(key='llm_routing_default_provider').first()
+                    self._routing_policy = RoutingPolicy(
+                        routing_mode=routing_config.get_value() if routing_config else 'prefer_local',
+                        default_provider=provider_config.get_value() if provider_config else 'local'
+                    )
+                except Exception as e:
+                    # No app context or database yet: use defaults and retry next time
+                    logger.debug(f"Routing policy not loaded, using defaults: {e}")
+                    return RoutingPolicy()
+            return self._routing_policy
+
+    def update_routing_policy(self, routing_mode: Optional[str] = None,
+                              default_provider: Optional[str] = None) -> RoutingPolicy:
+        """Publish changed routing settings (called by the settings API after saving)"""
+        self.get_routing_policy()  # Fields not being changed keep their stored values
+        with self._routing_policy_lock:
+            current = self._routing_policy or RoutingPolicy()
+            changes = {}
+            if routing_mode is not None:
+                changes['routing_mode'] = routing_mode
+            if default_provider is not None:
+                changes['default_provider'] = default_provider
+            self._routing_policy = replace(current, **changes)
+            if self._routing_policy != current:
+                logger.info(f"LLM routing policy updated: {self._routing_policy}")
+            return self._routing_policy
+
+    def _load_routing_policy(self):
+        """Return (routing_mode, default_provider) from the routing policy snapshot"""
+        policy = self.get_routing_policy()
+        return policy.routing_mode, policy.default_provider
+
+    def route_chat(self, messages: list, temperature: float = 0.7, max_tokens: int = 1024,
+                   stream: bool = False, cancel_event: Optional[threading.Event] = None,
+                   request_class: RequestClass = RequestClass.INTERACTIVE):
         """
         Simple local router: always prefer local backend if available.
         Placeholder for future policy that could choose external APIs by intent.
+        
+        With ``stream=True`` this returns the event iterator from stream_chat()
+        instead of a completed response. Local calls wait for a scheduler slot
+        of ``request_class`` first; the wait is reported as ``queue_ms``.
 
         External provider hooks (commented):
         - OpenAI: POST https://api.openai.com/v1/chat/completions
         - Anthropic: POST https://api.anthropic.com/v1/messages
         - Together/Fireworks/etc.
         """
+        if stream:
+            return self.stream_chat(messages, temperature=temperature, max_tokens=max_tokens,
+                                    cancel_event=cancel_event, request_class=request_class)
+        
         # Load routing prefs
-        try:
-            from vybe_app.models import AppConfiguration
-            routing_config = AppConfiguration.query.filter_by(key='llm_routing_mode').first()
-            routing_mode = routing_config.get_value() if routing_config else 'prefer_local'
-            
-            provider_config = AppConfiguration.query.filter_by(key='llm_routing_default_provider').first()
-            default_provider = provider_config.get_value() if provider_config else 'local'
-        except Exception:
-            routing_mode = 'prefer_local'
-            default_provider = 'local'
+        routing_mode, default_provider = self._load_routing_policy()
 
         # Prefer local llama.cpp if policy allows
         if routing_mode != 'cloud_only' and self.is_backend_running():
+            queued = None
             try:
+                queued = self._scheduler.acquire(request_class, timeout=self._max_timeout)
                 start_time = time.time()
                 adaptive_timeout = self._get_adaptive_timeout()
                 
-                resp = requests.post(
+                resp = self._session.post(
                     f"{self.backend_url}/v1/chat/completions",
                     json={
                         "messages": messages,
@@ -181,16 +236,25 @@ class LLMBackendManager:
                 
                 response_time = time.time() - start_time
                 self._record_response_time(response_time)
+                self._liveness.report_response(resp)
                 
                 if resp.status_code == 200:
                     data = resp.json()
+                    prompt_cache = get_prompt_cache_metrics().record(
+                        messages, (data.get("usage") or {}).get("prompt_tokens"), data)
                     content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
                     if not content:
                         content = data.get("choices", [{}])[0].get("text", "")
-                    return {"provider": "local", "content": content}
+                    return {"provider": "local", "content": content, "prompt_cache": prompt_cache,
+                            "queue_ms": round(queued * 1000, 1)}
             except Exception as e:
+                if isinstance(e, requests.exceptions.RequestException):
+                    self._liveness.report_failure(e)
                 sanitized_error = self._sanitize_error_response(str(e))
                 logger.error(f"Router local call failed: {sanitized_error}")
+            finally:
+                if queued is not None:
+                    self._scheduler.release(request_class)
 
         # Cloud routing intentionally disabled for this build.
         # The following provider calls are intentionally commented out and will remain inactive:
@@ -199,6 +263,160 @@ class LLMBackendManager:
 
         return {"provider": "none", "content": self._sanitize_error_response("AI backend not available. Please ensure the local model is running or configure an API key in Settings.")}
 
+    def stream_chat(self, messages: list, temperature: float = 0.7, max_tokens: int = 1024,
+                    cancel_event: Optional[threading.Event] = None,
+                    request_class: RequestClass = RequestClass.INTERACTIVE) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a chat completion from the local backend's SSE endpoint.
+        
+        Yields ``{'type': 'token', 'content': str}`` per generated token, then a
+        final ``{'type': 'done', ...}`` with the full content, ``cancelled``,
+        ``ttft_ms`` (time to first token, including ``queue_ms`` spent waiting
+        for a scheduler slot), ``total_ms``, ``tokens`` and
+        ``prompt_tokens``/``cached_prompt_tokens`` (see prompt_cache); or a
+        single ``{'type': 'error', 'error': str}`` if the backend is unavailable
+        or fails before the first token. A failure after some tokens ends with
+        a 'done' event whose ``truncated`` is True and ``error`` says why.
+        
+        Setting ``cancel_event`` (or closing the generator) closes the upstream
+        connection, which makes llama-cpp stop generating for this request.
+        """
+        routing_mode, _ = self._load_routing_policy()
+        if routing_mode == 'cloud_only' or not self.is_backend_running():
+            yield {"type": "error", "provider": "none",
+                   "error": self._sanitize_error_response("AI backend not available. Please ensure the local model is running or configure an API key in Settings.")}
+            return
+        
+        start_time = time.time()
+        parts: List[str] = []
+        ttft = None
+        cancelled = False
+        failed = None
+        response = None
+        finished = threading.Event()
+        queued = None
+        self._bump_stream_stat('started')
+        
+        def watch_cancel():
+            # Closing the response from here unblocks a read that is waiting on the server
+            while not finished.is_set():
+                if cancel_event.wait(0.1):
+                    if response is not None:
+                        response.close()
+                        return
+                    time.sleep(0.05)  # Request still connecting
+        
+        if cancel_event is not None:
+            threading.Thread(target=watch_cancel, daemon=True, name="LLMStreamCancel").start()
+        
+        try:
+            queued = self._scheduler.acquire(request_class, timeout=self._max_timeout, cancel_event=cancel_event)
+            response = self._session.post(
+                f"{self.backend_url}/v1/chat/completions",
+                json={
+                    "messages": messages,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "stream": True
+                },
+                stream=True,
+                # Read timeout bounds the gap between tokens, not the whole completion
+                timeout=(self._min_timeout, self._max_timeout)
+            )
+            self._liveness.report_response(response)
+            if response.status_code != 200:
+                failed = f"backend returned status {response.status_code}"
+            else:
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+                    if not line or not line.startswith('data:'):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == '[DONE]':
+                        break
+                    try:
+                        choice = (json.loads(payload).get('choices') or [{}])[0]
+                    except ValueError:
+                        continue
+                    token = (choice.get('delta') or {}).get('content') or choice.get('text') or ''
+                    if not token:
+                        continue
+                    if ttft is None:
+                        ttft = time.time() - start_time
+                        with self._timeout_lock:
+                            self._ttft_times.append(ttft)
+                    parts.append(token)
+                    yield {"type": "token", "content": token}
+                else:
+                    # Only [DONE] marks a finished reply. A response closed by the cancel
+                    # watcher can end iter_lines without raising; anything else is a drop.
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                    else:
+                        failed = "backend closed the stream before it finished"
+        except Exception as e:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+            else:
+                failed = str(e)
+                if isinstance(e, requests.exceptions.RequestException):
+                    self._liveness.report_failure(e)
+        finally:
+            finished.set()
+            if queued is not None:
+                self._scheduler.release(request_class)
+            if response is not None:
+                response.close()
+        
+        error = self._sanitize_error_response(failed) if failed else None
+        if failed and not parts:
+            self._bump_stream_stat('failed')
+            logger.error(f"Router local stream failed: {error}")
+            yield {"type": "error", "provider": "local", "error": error}
+            return
+        
+        if failed:
+            self._bump_stream_stat('failed')
+            logger.error(f"Router local stream failed after {len(parts)} tokens: {error}")
+        else:
+            self._bump_stream_stat('cancelled' if cancelled else 'completed')
+        total_ms = (time.time() - start_time) * 1000
+        # Streams carry no usage block, so the prompt size is estimated
+        prompt_cache = get_prompt_cache_metrics().record(messages, kind='stream')
+        yield {
+            "type": "done",
+            "provider": "local",
+            "content": ''.join(parts),
+            "cancelled": cancelled,
+            "truncated": bool(failed),
+            "error": error,
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "total_ms": round(total_ms, 1),
+            "tokens": len(parts),
+            "queue_ms": round(queued * 1000, 1) if queued is not None else None,
+            "prompt_tokens": prompt_cache['prompt_tokens'],
+            "cached_prompt_tokens": prompt_cache['cached_prompt_tokens']
+        }
+
+    def _bump_stream_stat(self, key: str):
+        with self._timeout_lock:
+            self._stream_stats[key] += 1
+
+    def get_stream_stats(self) -> Dict[str, Any]:
+        """Streaming counters and time-to-first-token percentiles (ms)"""
+        with self._timeout_lock:
+            ttfts = sorted(self._ttft_times)
+            stats: Dict[str, Any] = dict(self._stream_stats)
+        if ttfts:
+            stats.update({
+                'ttft_avg_ms': round(statistics.mean(ttfts) * 1000, 1),
+                'ttft_p50_ms': round(ttfts[len(ttfts) // 2] * 1000, 1),
+                'ttft_p95_ms': round(ttfts[min(len(ttfts) - 1, int(len(ttfts) * 0.95))] * 1000, 1)
+            })
+        return stats
+
     def find_models(self) -> List[str]:
         """Find available GGUF model files in the models directory"""
         models_dir = Path(os.getcwd()) / "models"
@@ -222,7 +440,8 @@ class LLMBackendManager:
     def start_backend(self) -> bool:
         """Start LLM backend with proper initialization"""
         try:
-            if self.is_backend_running():
+            # Probe rather than trust cached state before launching a second server
+            if self.check_backend_now():
                 logger.info("LLM backend is already running")
                 return True
             
@@ -284,17 +503,21 @@ class LLMBackendManager:
         if self.is_backend_running():
             try:
                 adaptive_timeout = self._get_adaptive_timeout()
-                response = requests.get(f"{self.backend_url}/v1/models", timeout=adaptive_timeout)
+                response = self._session.get(f"{self.backend_url}/v1/models", timeout=adaptive_timeout)
                 if response.status_code == 200:
+                    self._liveness.report_success()
                     models = response.json()
                     return {
                         'running': True,
                         'models_available': len(models.get('data', [])) > 0,
                         'models_count': len(models.get('data', [])),
                         'url': self.backend_url,
-                        'status': 'ready'
+                        'status': 'ready',
+                        'liveness': self._liveness.get_status()
                     }
             except Exception as e:
+                if isinstance(e, requests.exceptions.RequestException):
+                    self._liveness.report_failure(e)
                 sanitized_error = self._sanitize_error_response(str(e))
                 logger.error(f"Error getting LLM backend status: {sanitized_error}")
         
@@ -303,7 +526,8 @@ class LLMBackendManager:
             'models_available': False,
             'models_count': 0,
             'url': self.backend_url,
-            'status': 'stopped'
+            'status': 'stopped',
+            'liveness': self._liveness.get_status()
         }
 
     def download_default_model(self) -> bool:
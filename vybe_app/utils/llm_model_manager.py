@@ -8,12 +8,12 @@ import json
 import time
 import requests
 import threading
-import hashlib
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from ..logger import log_info, log_warning, log_error
 from ..core.backend_llm_controller import get_backend_controller
-from .cache_manager import cache
+from ..core.model_catalog import get_model_catalog
+from .download_engine import download_file
 from urllib.parse import urlparse
 
 
@@ -24,51 +24,35 @@ class LLMModelManager:
         self.models_dir = Path(models_dir) if models_dir else Path(os.getcwd()) / "models"
         self.models_dir.mkdir(exist_ok=True)
         self.backend_controller = get_backend_controller()
-        self._available_models_cache = None
-        self._cache_time = 0
-        self._cache_duration = 30  # Cache for 30 seconds
+        # GGUF header facts come from the shared model catalog
+        self.catalog = get_model_catalog()
+        self.catalog.add_directory(self.models_dir)
         
     def ensure_models_directory(self):
         """Ensure models directory exists"""
         self.models_dir.mkdir(exist_ok=True)
         return True
         
-    @cache.cached(timeout=1800, cache_name="model_data")  # Cache for 30 minutes
     def get_available_models(self) -> List[Dict[str, Any]]:
-        """Get list of available GGUF models"""
-        current_time = time.time()
-        
-        # Use cache if recent
-        if (self._available_models_cache and 
-            current_time - self._cache_time < self._cache_duration):
-            return self._available_models_cache
-            
+        """Get list of available GGUF models (served from the model catalog)"""
         models = []
-        
-        # Scan for GGUF files
-        for gguf_file in self.models_dir.glob("*.gguf"):
-            file_size = gguf_file.stat().st_size
+        for entry in self.catalog.list_models(directory=self.models_dir):
+            family = entry.architecture or "unknown"
             models.append({
-                "name": gguf_file.stem,
-                "model": gguf_file.name,
-                "size": file_size,
-                "digest": f"file:{gguf_file}",
+                "name": entry.name,
+                "model": entry.filename,
+                "size": entry.size,
+                "digest": f"file:{entry.path}",
                 "details": {
                     "format": "gguf",
-                    "family": "llama",
-                    "families": ["llama"],
-                    "parameter_size": "unknown",
-                    "quantization_level": self._extract_quantization_level(gguf_file.name)
+                    "family": family,
+                    "families": [family],
+                    "parameter_size": entry.parameter_size,
+                    "quantization_level": entry.quantization or self._extract_quantization_level(entry.filename),
+                    "context_length": entry.context_length
                 },
-                "modified_at": gguf_file.stat().st_mtime
+                "modified_at": entry.mtime_ns / 1e9
             })
-        
-        # Enforce hard minimum context on recommendations and remove low-context defaults
-        if not models:
-            models = []
-            
-        self._available_models_cache = models
-        self._cache_time = current_time
         return models
     
     def _extract_quantization_level(self, filename: str) -> str:
@@ -92,11 +76,8 @@ class LLMModelManager:
         log_info(f"Loading model: {model_name}")
         
         # Find the model file
-        model_file = None
-        for gguf_file in self.models_dir.glob("*.gguf"):
-            if model_name in gguf_file.name or model_name == gguf_file.stem:
-                model_file = gguf_file
-                break
+        entry = self.catalog.get(model_name, directory=self.models_dir)
+        model_file = Path(entry.path) if entry else None
         
         if not model_file:
             log_error(f"Model file not found for: {model_name}")
@@ -133,17 +114,15 @@ class LLMModelManager:
                     enhanced_info = model.copy()
                     
                     # Add file system information
-                    model_file = None
-                    for gguf_file in self.models_dir.glob("*.gguf"):
-                        if model_name in gguf_file.name or model_name == gguf_file.stem:
-                            model_file = gguf_file
-                            break
+                    entry = self.catalog.get(model_name, directory=self.models_dir)
                     
-                    if model_file:
+                    if entry:
                         enhanced_info.update({
-                            'file_path': str(model_file),
-                            'file_size_mb': round(model_file.stat().st_size / (1024 * 1024), 2),
-                            'last_modified': model_file.stat().st_mtime,
+                            'file_path': entry.path,
+                            'file_size_mb': entry.size_mb,
+                            'last_modified': entry.mtime_ns / 1e9,
+                            'context_length': entry.context_length,
+                            'architecture': entry.architecture,
                             'is_loaded': self.is_model_loaded(model_name),
                             'can_load': True
                         })
@@ -227,13 +206,6 @@ class LLMModelManager:
     def pull_model(self, model_name: str, download_url: Optional[str] = None) -> bool:
         """Download a model with comprehensive progress tracking and validation"""
         try:
-            import requests
-            import threading
-            import json
-            import hashlib
-            from pathlib import Path
-            from urllib.parse import urlparse
-            
             # Create download status file
             status_file = Path(__file__).parent.parent.parent / "instance" / "download_status.json"
             status_file.parent.mkdir(parents=True, exist_ok=True)
@@ -306,28 +278,6 @@ class LLMModelManager:
                         if not final_download_url:
                             raise ValueError(f"Could not find download URL for model: {model_name}")
                     
-                    # Start download with enhanced headers
-                    headers = {
-                        'User-Agent': 'Vybe-AI-Desktop/1.0',
-                        'Accept': '*/*',
-                        'Accept-Encoding': 'gzip, deflate',
-                        'Connection': 'keep-alive'
-                    }
-                    
-                    response = requests.get(final_download_url, stream=True, timeout=30, headers=headers)
-                    response.raise_for_status()
-                    
-                    # Get file size and validate
-                    total_size = int(response.headers.get('content-length', 0))
-                    if total_size == 0:
-                        raise ValueError("Could not determine file size")
-                    
-                    if total_size < 10 * 1024 * 1024:  # Less than 10MB
-                        raise ValueError("File too small, likely not a valid model")
-                    
-                    download_status['total_bytes'] = total_size
-                    update_status(download_status)
-                    
                     # Determine local filename
                     parsed_url = urlparse(final_download_url)
                     if '/' in parsed_url.path:
@@ -341,58 +291,52 @@ class LLMModelManager:
                     
                     local_path = self.models_dir / filename
                     
-                    # Create temporary file for download
-                    temp_path = local_path.with_suffix('.tmp')
-                    
-                    # Download with progress tracking and checksum calculation
-                    downloaded = 0
-                    start_time = time.time()
-                    checksum = hashlib.sha256()
+                    # The first report carries the bytes already on disk from an earlier attempt
+                    baseline = {}
                     
-                    with open(temp_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                                downloaded += len(chunk)
-                                checksum.update(chunk)
-                                
-                                # Update progress
-                                progress = (downloaded / total_size * 100) if total_size > 0 else 0
-                                download_status['downloaded_bytes'] = downloaded
-                                download_status['progress'] = progress
-                                
-                                # Calculate download speed and ETA
-                                elapsed_time = time.time() - start_time
-                                if elapsed_time > 0:
-                                    speed = downloaded / elapsed_time
-                                    download_status['download_speed'] = f"{speed / (1024*1024):.2f} MB/s"
-                                    
-                                    if speed > 0:
-                                        remaining_bytes = total_size - downloaded
-                                        eta_seconds = remaining_bytes / speed
-                                        download_status['estimated_time_remaining'] = f"{eta_seconds:.0f}s"
-                                
-                                update_status(download_status)
-                    
-                    # Validate downloaded file
-                    if temp_path.stat().st_size != total_size:
-                        temp_path.unlink()
-                        raise ValueError("Downloaded file size doesn't match expected size")
+                    def on_progress(downloaded, total_size):
+                        # Update progress
+                        download_status['total_bytes'] = total_size
+                        download_status['downloaded_bytes'] = downloaded
+                        download_status['progress'] = (downloaded / total_size * 100) if total_size > 0 else 0
+                        
+                        # Calculate download speed and ETA over this session's bytes
+                        baseline.setdefault('bytes', downloaded)
+                        baseline.setdefault('time', time.time())
+                        elapsed_time = time.time() - baseline['time']
+                        session_bytes = downloaded - baseline['bytes']
+                        if elapsed_time > 0 and session_bytes > 0:
+                            speed = session_bytes / elapsed_time
+                            download_status['download_speed'] = f"{speed / (1024*1024):.2f} MB/s"
+                            remaining_bytes = max(0, total_size - downloaded)
+                            download_status['estimated_time_remaining'] = f"{remaining_bytes / speed:.0f}s"
+                        
+                        update_status(download_status)
                     
-                    # Move temporary file to final location
-                    temp_path.rename(local_path)
+                    # Parallel ranged download into <file>.part; the size and SHA-256
+                    # are verified by the engine, and a failed attempt resumes next time.
+                    # Anything under 10MB is not a valid model: rejected from the
+                    # reported Content-Length before downloading when the server sends one
+                    result = download_file(
+                        final_download_url, local_path, progress_callback=on_progress,
+                        min_size=10 * 1024 * 1024,
+                        headers={'User-Agent': 'Vybe-AI-Desktop/1.0', 'Accept': '*/*'}
+                    )
                     
                     # Update final status
                     download_status['status'] = 'completed'
                     download_status['progress'] = 100
-                    download_status['checksum'] = checksum.hexdigest()
+                    download_status['downloaded_bytes'] = result.size
+                    download_status['total_bytes'] = result.size
+                    download_status['resumed_bytes'] = result.resumed_bytes
+                    download_status['checksum'] = result.sha256
                     download_status['validation_status'] = 'validated'
                     download_status['file_path'] = str(local_path)
-                    download_status['file_size_mb'] = round(total_size / (1024 * 1024), 2)
+                    download_status['file_size_mb'] = round(result.size / (1024 * 1024), 2)
                     update_status(download_status)
                     
-                    # Invalidate cache
-                    self._available_models_cache = None
+                    # Pick up the new file without waiting for the next directory check
+                    self.catalog.refresh()
                     
                     log_info(f"Successfully downloaded model: {model_name} ({download_status['file_size_mb']}MB)")
                     return True
@@ -403,14 +347,6 @@ class LLMModelManager:
                     download_status['error'] = str(e)
                     update_status(download_status)
                     
-                    # Clean up temporary file if it exists
-                    try:
-                        if 'temp_path' in locals() and temp_path.exists():
-                            temp_path.unlink()
-                    except Exception as e:
-                        log_error(f"Failed to clean up temp file: {e}")
-                        pass
-                    
                     return False
             
             # Start download thread
@@ -487,17 +423,17 @@ class LLMModelManager:
     
     def delete_model(self, model_name: str) -> bool:
         """Delete a model file"""
-        for gguf_file in self.models_dir.glob("*.gguf"):
-            if model_name in gguf_file.name or model_name == gguf_file.stem:
-                try:
-                    gguf_file.unlink()
-                    log_info(f"Deleted model: {model_name}")
-                    self._available_models_cache = None  # Invalidate cache
-                    return True
-                except Exception as e:
-                    log_error(f"Failed to delete model {model_name}: {e}")
-                    return False
-        return False
+        entry = self.catalog.get(model_name, directory=self.models_dir)
+        if entry is None:
+            return False
+        try:
+            Path(entry.path).unlink()
+            log_info(f"Deleted model: {model_name}")
+            self.catalog.refresh()
+            return True
+        except Exception as e:
+            log_error(f"Failed to delete model {model_name}: {e}")
+            return False
     
     def get_status(self) -> Dict[str, Any]:
         """Get the current status of the model manager"""
@@ -0,0 +1,213 @@
+"""
+LLM Request Scheduler for Vybe
+Admission control in front of the single local llama-cpp server, so bulk
+background work cannot starve interactive chat.
+
+    - Every call to the server takes a slot first. Config.LLM_SERVER_SLOTS
+      matches the number of requests the server actually processes at once
+      (llama-cpp-python serves one at a time); more would only queue inside
+      the server, where nothing can reorder them.
+    - Waiters are admitted by class (interactive > agent > background),
+      first come first served within a class.
+    - Background requests never take the last free slot while more than one
+      slot exists, and they are shed (LLMRequestRejected) once their queue is
+      full or they have waited Config.LLM_BACKGROUND_MAX_WAIT seconds.
+    - Queue time is recorded per class; callers get their own wait back
+      from acquire()/slot().
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RequestClass(IntEnum):
+    """Priority class of an LLM request (lower is served first)"""
+    INTERACTIVE = 0
+    AGENT = 1
+    BACKGROUND = 2
+
+
+class LLMRequestRejected(RuntimeError):
+    """A request was not admitted; ``reason`` is 'shed', 'timeout' or 'cancelled'"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ('request_class', 'seq', 'enqueued_at')
+
+    def __init__(self, request_class: RequestClass, seq: int):
+        self.request_class = request_class
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+
+    def __lt__(self, other: '_Waiter') -> bool:
+        return (self.request_class, self.seq) < (other.request_class, other.seq)
+
+
+class LLMRequestScheduler:
+    """
+    Priority admission for LLM server slots.
+
+    Args:
+        slots: Requests the server runs at the same time
+        background_max_wait: Seconds a background request may queue before it is shed
+        background_queue_limit: Queued background requests beyond which new ones are shed
+        history: Recent wait times kept per class for percentiles
+    """
+
+    def __init__(self, slots: int = 1, background_max_wait: float = 120.0,
+                 background_queue_limit: int = 32, history: int = 200):
+        self.slots = max(1, slots)
+        self.background_max_wait = background_max_wait
+        self.background_queue_limit = max(1, background_queue_limit)
+        self._cond = threading.Condition()
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._active = {cls: 0 for cls in RequestClass}
+        self._queued = {cls: 0 for cls in RequestClass}
+        self._waits = {cls: deque(maxlen=max(1, history)) for cls in RequestClass}
+        self._stats = {cls: {'admitted': 0, 'shed': 0, 'timed_out': 0, 'cancelled': 0,
+                             'wait_total': 0.0, 'wait_max': 0.0} for cls in RequestClass}
+
+    @property
+    def background_slots(self) -> int:
+        """Slots background work may hold; one is kept free for foreground requests when possible"""
+        return max(1, self.slots - 1)
+
+    def _admissible(self, waiter: _Waiter) -> bool:
+        if sum(self._active.values()) >= self.slots or self._queue[0] is not waiter:
+            return False
+        if waiter.request_class == RequestClass.BACKGROUND:
+            return self._active[RequestClass.BACKGROUND] < self.background_slots
+        return True
+
+    def acquire(self, request_class: RequestClass = RequestClass.INTERACTIVE, timeout: Optional[float] = None,
+                cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Wait for a slot and return the seconds spent queued. Raises
+        LLMRequestRejected when shed, timed out or cancelled while queued.
+        Every successful acquire() must be paired with release().
+        """
+        request_class = RequestClass(request_class)
+        background = request_class == RequestClass.BACKGROUND
+        if background and self.background_max_wait is not None:
+            timeout = self.background_max_wait if timeout is None else min(timeout, self.background_max_wait)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            if background and self._queued[request_class] >= self.background_queue_limit:
+                self._stats[request_class]['shed'] += 1
+                raise LLMRequestRejected("Background LLM queue is full", 'shed')
+            waiter = _Waiter(request_class, next(self._seq))
+            heapq.heappush(self._queue, waiter)
+            self._queued[request_class] += 1
+            try:
+                while not self._admissible(waiter):
+                    if cancel_event is not None and cancel_event.is_set():
+                        self._stats[request_class]['cancelled'] += 1
+                        raise LLMRequestRejected("LLM request cancelled while queued", 'cancelled')
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        reason = 'shed' if background else 'timeout'
+                        self._stats[request_class]['shed' if background else 'timed_out'] += 1
+                        raise LLMRequestRejected(
+                            f"{request_class.name.lower()} LLM request waited {timeout:.1f}s for a slot", reason)
+                    if cancel_event is not None:
+                        remaining = 0.1 if remaining is None else min(remaining, 0.1)
+                    self._cond.wait(remaining)
+            except BaseException:
+                self._remove(waiter)
+                raise
+            heapq.heappop(self._queue)
+            self._queued[request_class] -= 1
+            self._active[request_class] += 1
+            waited = time.monotonic() - waiter.enqueued_at
+            stats = self._stats[request_class]
+            stats['admitted'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+            self._waits[request_class].append(waited)
+            # The next waiter may be admissible too (several free slots)
+            self._cond.notify_all()
+        return waited
+
+    def _remove(self, waiter: _Waiter):
+        """Drop an abandoned waiter (lock held) and let the others re-check"""
+        self._queue.remove(waiter)
+        heapq.heapify(self._queue)
+        self._queued[waiter.request_class] -= 1
+        self._cond.notify_all()
+
+    def release(self, request_class: RequestClass = RequestClass.INTERACTIVE):
+        with self._cond:
+            self._active[RequestClass(request_class)] -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, request_class: RequestClass = RequestClass.INTERACTIVE, timeout: Optional[float] = None,
+             cancel_event: Optional[threading.Event] = None) -> Iterator[float]:
+        """``with scheduler.slot(cls) as waited:`` holds a slot for the block"""
+        waited = self.acquire(request_class, timeout, cancel_event)
+        try:
+            yield waited
+        finally:
+            self.release(request_class)
+
+    def is_idle(self, request_class: RequestClass = RequestClass.BACKGROUND) -> bool:
+        """True when no request of a higher class is running or queued"""
+        with self._cond:
+            return not any(self._active[cls] or self._queued[cls]
+                           for cls in RequestClass if cls < request_class)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            classes = {}
+            for cls in RequestClass:
+                stats = dict(self._stats[cls])
+                waits = sorted(self._waits[cls])
+                admitted = stats['admitted']
+                classes[cls.name.lower()] = {
+                    'active': self._active[cls],
+                    'queued': self._queued[cls],
+                    'admitted': admitted,
+                    'shed': stats['shed'],
+                    'timed_out': stats['timed_out'],
+                    'cancelled': stats['cancelled'],
+                    'avg_wait_ms': round(stats['wait_total'] / admitted * 1000, 1) if admitted else 0.0,
+                    'p95_wait_ms': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                    'max_wait_ms': round(stats['wait_max'] * 1000, 1)
+                }
+            return {'slots': self.slots, 'background_slots': self.background_slots, 'classes': classes}
+
+
+_llm_scheduler: Optional[LLMRequestScheduler] = None
+_llm_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMRequestScheduler:
+    """Process-wide scheduler for the local LLM server"""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        with _llm_scheduler_lock:
+            if _llm_scheduler is None:
+                try:
+                    from ..config import Config
+                    _llm_scheduler = LLMRequestScheduler(
+                        slots=Config.LLM_SERVER_SLOTS,
+                        background_max_wait=Config.LLM_BACKGROUND_MAX_WAIT,
+                        background_queue_limit=Config.LLM_BACKGROUND_QUEUE_LIMIT
+                    )
+                except Exception:
+                    _llm_scheduler = LLMRequestScheduler()
+    return _llm_scheduler
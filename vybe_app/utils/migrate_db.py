@@ -123,6 +123,53 @@ class DatabaseMigrator:
                 DROP INDEX IF EXISTS idx_sysprompt_default;
                 DROP INDEX IF EXISTS idx_sysprompt_updated;
             '''
+        },
+        {
+            'version': '1.4.0',
+            'name': 'normalize_chat_session_messages',
+            'description': 'Move chat session messages out of the JSON blob into one row per message',
+            'up_sql': '''
+                CREATE TABLE IF NOT EXISTS chat_session_message (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    role VARCHAR(32),
+                    content TEXT,
+                    extra TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES chat_session(id)
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_chatsessionmessage_session_seq ON chat_session_message(session_id, seq);
+                INSERT OR IGNORE INTO chat_session_message (session_id, seq, role, content, extra)
+                    SELECT chat_session.id, CAST(msg.key AS INTEGER),
+                           CASE WHEN json_type(msg.value, '$.role') = 'text' THEN json_extract(msg.value, '$.role') END,
+                           CASE WHEN json_type(msg.value, '$.content') = 'text' THEN json_extract(msg.value, '$.content') END,
+                           NULLIF(CASE
+                               WHEN json_type(msg.value, '$.role') = 'text' AND json_type(msg.value, '$.content') = 'text'
+                                   THEN json_remove(msg.value, '$.role', '$.content')
+                               WHEN json_type(msg.value, '$.role') = 'text' THEN json_remove(msg.value, '$.role')
+                               WHEN json_type(msg.value, '$.content') = 'text' THEN json_remove(msg.value, '$.content')
+                               ELSE json(msg.value)
+                           END, '{}')
+                    FROM chat_session,
+                         json_each(CASE WHEN json_valid(chat_session.messages) THEN chat_session.messages ELSE '[]' END) AS msg
+                    WHERE msg.type = 'object';
+                UPDATE chat_session SET message_count = COALESCE(
+                    (SELECT MAX(seq) + 1 FROM chat_session_message WHERE session_id = chat_session.id), 0)
+                    WHERE json_valid(messages) AND json_type(messages) = 'array';
+                UPDATE chat_session SET messages = '[]'
+                    WHERE json_valid(messages) AND json_type(messages) = 'array';
+            ''',
+            'down_sql': '''
+                UPDATE chat_session SET messages = (
+                    SELECT json_group_array(json_patch(
+                        COALESCE(m.extra, '{}'),
+                        json_patch(CASE WHEN m.role IS NULL THEN '{}' ELSE json_object('role', m.role) END,
+                                   CASE WHEN m.content IS NULL THEN '{}' ELSE json_object('content', m.content) END)))
+                    FROM (SELECT * FROM chat_session_message WHERE session_id = chat_session.id ORDER BY seq) AS m
+                ) WHERE EXISTS (SELECT 1 FROM chat_session_message WHERE session_id = chat_session.id);
+                DROP TABLE IF EXISTS chat_session_message;
+            '''
         }
     ]
     
@@ -0,0 +1,153 @@
+"""
+Prompt Prefix Cache for Vybe
+Settings and metrics for reusing evaluated prompt prefixes (the KV cache)
+on the local llama-cpp backend.
+
+Every chat turn starts with the same system prompt. llama-cpp-python only
+skips re-evaluating a prefix it still holds: without a cache that is the
+previous request's prompt, so alternating between chat and orchestrator
+calls re-evaluates both system prompts each time. With
+Config.LLM_PROMPT_CACHE set to 'ram' or 'disk' the server keeps evaluated
+states up to Config.LLM_PROMPT_CACHE_BYTES and restores the longest
+matching prefix.
+
+Prefixes only match if the bytes match, so the static system prompt must
+come first and stay identical; see context_packer.pack_messages.
+
+PromptCacheMetrics records cached vs. evaluated prompt tokens per request.
+Servers that report cached tokens (``usage.prompt_tokens_details`` or
+llama.cpp ``timings``) are trusted; otherwise the cached share is estimated
+from the longest common prefix with recently sent prompts.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ('off', 'ram', 'disk')
+
+
+def prompt_cache_mode() -> str:
+    try:
+        from ..config import Config
+        mode = str(getattr(Config, 'LLM_PROMPT_CACHE', 'ram')).lower()
+    except Exception:
+        mode = 'ram'
+    return mode if mode in CACHE_MODES else 'off'
+
+
+def prompt_cache_budget() -> int:
+    try:
+        from ..config import Config
+        return int(getattr(Config, 'LLM_PROMPT_CACHE_BYTES', 2 << 30))
+    except Exception:
+        return 2 << 30
+
+
+def prompt_cache_settings() -> Dict[str, Any]:
+    """Keyword arguments for llama_cpp.server.settings.Settings"""
+    mode = prompt_cache_mode()
+    if mode == 'off':
+        return {'cache': False}
+    return {'cache': True, 'cache_type': mode, 'cache_size': prompt_cache_budget()}
+
+
+def render_prompt_text(messages: List[Dict[str, Any]]) -> str:
+    """Messages flattened in order, as a stand-in for the prompt the chat template renders"""
+    return ''.join(f"<{m.get('role', '')}>\n{m.get('content') or ''}\n" for m in messages)
+
+
+def server_cached_tokens(data: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Cached prompt tokens reported by the server, if it reports them"""
+    if not isinstance(data, dict):
+        return None
+    details = (data.get('usage') or {}).get('prompt_tokens_details') or {}
+    if details.get('cached_tokens') is not None:
+        return int(details['cached_tokens'])
+    timings = data.get('timings') or {}
+    if timings.get('cache_n') is not None:
+        return int(timings['cache_n'])
+    return None
+
+
+class PromptCacheMetrics:
+    """
+    Per-request cached/evaluated prompt token accounting.
+
+    Args:
+        mode: 'off', 'ram' or 'disk' (how many past prompts can be matched)
+        cached_prompts: Prompts remembered for prefix matching while a cache is on
+        recent: Per-request records kept for get_stats()
+    """
+
+    def __init__(self, mode: str = 'ram', cached_prompts: int = 32, recent: int = 50):
+        self.mode = mode
+        # Without a cache only the prompt still loaded in the context can be reused
+        self._prompts: deque = deque(maxlen=max(1, cached_prompts) if mode != 'off' else 1)
+        self._recent: deque = deque(maxlen=max(1, recent))
+        self._lock = threading.Lock()
+        self._totals = {'requests': 0, 'prompt_tokens': 0, 'cached_prompt_tokens': 0}
+
+    def record(self, messages: List[Dict[str, Any]], prompt_tokens: Optional[int] = None,
+               response: Optional[Dict[str, Any]] = None, kind: str = 'chat') -> Dict[str, Any]:
+        """
+        Account one request. ``prompt_tokens`` comes from the response usage
+        when available; otherwise it is estimated at four characters a token.
+        """
+        text = render_prompt_text(messages)
+        estimated_total = prompt_tokens is None
+        if estimated_total:
+            prompt_tokens = max(1, len(text) // 4)
+        reported = server_cached_tokens(response)
+        with self._lock:
+            if reported is not None:
+                cached, source = min(reported, prompt_tokens), 'server'
+            else:
+                longest = max((len(os.path.commonprefix([text, previous])) for previous in self._prompts), default=0)
+                cached = int(prompt_tokens * longest / len(text)) if text else 0
+                source = 'estimated'
+            self._prompts.append(text)
+            entry = {
+                'kind': kind,
+                'prompt_tokens': prompt_tokens,
+                'cached_prompt_tokens': cached,
+                'evaluated_prompt_tokens': prompt_tokens - cached,
+                'source': source if not estimated_total else 'estimated'
+            }
+            self._recent.append(entry)
+            self._totals['requests'] += 1
+            self._totals['prompt_tokens'] += prompt_tokens
+            self._totals['cached_prompt_tokens'] += cached
+        return entry
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+            recent = list(self._recent)
+        prompt_tokens = totals['prompt_tokens']
+        return {
+            'mode': self.mode,
+            'budget_bytes': prompt_cache_budget() if self.mode != 'off' else 0,
+            **totals,
+            'evaluated_prompt_tokens': prompt_tokens - totals['cached_prompt_tokens'],
+            'cached_ratio': round(totals['cached_prompt_tokens'] / prompt_tokens, 3) if prompt_tokens else 0.0,
+            'recent': recent
+        }
+
+
+_prompt_cache_metrics: Optional[PromptCacheMetrics] = None
+_prompt_cache_metrics_lock = threading.Lock()
+
+
+def get_prompt_cache_metrics() -> PromptCacheMetrics:
+    """Process-wide metrics for requests sent to the local backend"""
+    global _prompt_cache_metrics
+    if _prompt_cache_metrics is None:
+        with _prompt_cache_metrics_lock:
+            if _prompt_cache_metrics is None:
+                _prompt_cache_metrics = PromptCacheMetrics(prompt_cache_mode())
+    return _prompt_cache_metrics
@@ -4,8 +4,8 @@ Advanced Rate Limiting and Throttling System for Vybe AI Desktop Application
 Provides sophisticated rate limiting, traffic shaping, and API protection
 """
 
+import math
 import time
-import threading
 import sqlite3
 import hashlib
 import json
@@ -17,9 +17,9 @@ from functools import wraps
 from flask import request, jsonify, g, current_app
 import logging
 import ipaddress
-from pathlib import Path
 
 from .error_handling import ApplicationError, ErrorCode
+from .gcra_limiter import GCRALimiter, SQLiteRateLimitBackend, get_gcra_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -90,301 +90,50 @@ class RateLimitRule:
         return True
 
 
-class TokenBucket:
-    """Token bucket algorithm implementation for rate limiting using integer-based calculations"""
-    
-    def __init__(self, capacity: int, refill_rate: float, burst_capacity: Optional[int] = None):
-        self.capacity = capacity
-        # Convert refill rate to tokens per millisecond (scaled by 1000)
-        self.refill_rate_scaled = int(refill_rate * 1000)  # tokens per second * 1000
-        self.burst_capacity = burst_capacity or capacity
-        # Use scaled tokens (multiplied by 1000 to avoid floating point)
-        self.tokens_scaled = capacity * 1000
-        self.last_refill_ms = int(time.time() * 1000)  # milliseconds
-        self._lock = threading.Lock()
-    
-    def consume(self, tokens: int = 1) -> bool:
-        """Try to consume tokens from the bucket"""
-        with self._lock:
-            now_ms = int(time.time() * 1000)
-            
-            # Refill tokens based on elapsed time (in milliseconds)
-            elapsed_ms = now_ms - self.last_refill_ms
-            tokens_to_add = (elapsed_ms * self.refill_rate_scaled) // 1000  # Convert back from scaled
-            
-            self.tokens_scaled = min(
-                self.burst_capacity * 1000,  # Convert to scaled
-                self.tokens_scaled + tokens_to_add
-            )
-            self.last_refill_ms = now_ms
-            
-            # Check if we have enough tokens (convert requested tokens to scaled)
-            tokens_needed_scaled = tokens * 1000
-            if self.tokens_scaled >= tokens_needed_scaled:
-                self.tokens_scaled -= tokens_needed_scaled
-                return True
-            
-            return False
-    
-    def get_wait_time(self, tokens: int = 1) -> float:
-        """Get the time to wait before tokens are available"""
-        with self._lock:
-            tokens_needed_scaled = tokens * 1000
-            if self.tokens_scaled >= tokens_needed_scaled:
-                return 0.0
-            
-            # Calculate how many scaled tokens we need
-            deficit_scaled = tokens_needed_scaled - self.tokens_scaled
-            
-            # Convert back to seconds: deficit_scaled / (refill_rate_scaled / 1000)
-            wait_time_ms = (deficit_scaled * 1000) // self.refill_rate_scaled
-            return wait_time_ms / 1000.0  # Convert to seconds
-
-
-class SlidingWindowCounter:
-    """Sliding window counter for precise rate limiting"""
-    
-    def __init__(self, window_size: int, bucket_count: int = 60):
-        self.window_size = window_size
-        self.bucket_count = bucket_count
-        self.bucket_duration = window_size / bucket_count
-        self.buckets = defaultdict(int)
-        self._lock = threading.Lock()
-    
-    def add_request(self, timestamp: Optional[float] = None) -> int:
-        """Add a request and return current count"""
-        if timestamp is None:
-            timestamp = time.time()
-        
-        with self._lock:
-            # Clean old buckets
-            self._cleanup_old_buckets(timestamp)
-            
-            # Add to current bucket
-            bucket_key = int(timestamp // self.bucket_duration)
-            self.buckets[bucket_key] += 1
-            
-            # Return total count in window
-            return self._get_count_in_window(timestamp)
-    
-    def get_count(self, timestamp: Optional[float] = None) -> int:
-        """Get current count in the window"""
-        if timestamp is None:
-            timestamp = time.time()
-        
-        with self._lock:
-            self._cleanup_old_buckets(timestamp)
-            return self._get_count_in_window(timestamp)
-    
-    def _cleanup_old_buckets(self, timestamp: float):
-        """Remove buckets outside the window"""
-        cutoff_bucket = int((timestamp - self.window_size) // self.bucket_duration)
-        keys_to_remove = [key for key in self.buckets.keys() if key <= cutoff_bucket]
-        
-        for key in keys_to_remove:
-            del self.buckets[key]
-    
-    def _get_count_in_window(self, timestamp: float) -> int:
-        """Get total count in the current window"""
-        window_start = timestamp - self.window_size
-        start_bucket = int(window_start // self.bucket_duration)
-        
-        total = 0
-        for bucket_key, count in self.buckets.items():
-            if bucket_key > start_bucket:
-                total += count
-        
-        return total
-
-
 class RateLimitTracker:
-    """Track rate limits for different keys (IP, user, API key, etc.)"""
+    """Track rate limits for different keys (IP, user, API key, etc.) on the GCRA core"""
     
-    def __init__(self, storage_backend: str = "memory"):
+    def __init__(self, storage_backend: Optional[str] = None):
+        # None shares the application-wide limiter configured by Config.RATE_LIMIT_*;
+        # "memory" or "database" give this tracker a private one
         self.storage_backend = storage_backend
-        self.memory_trackers: Dict[str, Dict[str, Any]] = defaultdict(dict)
         self.db_path = "instance/rate_limits.db"
-        self._lock = threading.Lock()
+        self._limiter: Optional[GCRALimiter] = None
         
         if storage_backend == "database":
-            self._setup_database()
-    
-    def _setup_database(self):
-        """Setup SQLite database for persistent rate limiting"""
-        try:
-            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-            
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    CREATE TABLE IF NOT EXISTS rate_limits (
-                        key_hash TEXT PRIMARY KEY,
-                        key_type TEXT NOT NULL,
-                        key_value TEXT NOT NULL,
-                        rule_name TEXT NOT NULL,
-                        request_count INTEGER NOT NULL,
-                        window_start INTEGER NOT NULL,
-                        last_request INTEGER NOT NULL,
-                        burst_used INTEGER DEFAULT 0,
-                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_rate_limits_key_hash 
-                    ON rate_limits(key_hash)
-                """)
-                
-                conn.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_rate_limits_window 
-                    ON rate_limits(window_start)
-                """)
-                
-                conn.commit()
-                
-        except Exception as e:
-            logger.error(f"Failed to setup rate limit database: {e}")
-            self.storage_backend = "memory"  # Fallback to memory
-    
-    def get_rate_limit_status(self, key: str, rule: RateLimitRule) -> Dict[str, Any]:
-        """Get current rate limit status for a key"""
-        
+            try:
+                self._limiter = GCRALimiter(backend=SQLiteRateLimitBackend(self.db_path))
+            except (sqlite3.Error, OSError) as e:
+                logger.error(f"Failed to setup rate limit database: {e}")
+                self.storage_backend = "memory"  # Fallback to memory
         if self.storage_backend == "memory":
-            return self._get_memory_status(key, rule)
-        else:
-            return self._get_database_status(key, rule)
+            self._limiter = GCRALimiter()
     
-    def _get_memory_status(self, key: str, rule: RateLimitRule) -> Dict[str, Any]:
-        """Get rate limit status from memory storage"""
-        
-        with self._lock:
-            key_hash = hashlib.sha256(f"{key}:{rule.name}".encode()).hexdigest()
-            
-            if key_hash not in self.memory_trackers:
-                # Initialize new tracker
-                tracker = SlidingWindowCounter(rule.rate_limit.window)
-                
-                self.memory_trackers[key_hash] = {
-                    'tracker': tracker,
-                    'rule': rule,
-                    'created_at': time.time()
-                }
-            
-            tracker_data = self.memory_trackers[key_hash]
-            tracker = tracker_data['tracker']
-            
-            if isinstance(tracker, SlidingWindowCounter):
-                current_count = tracker.add_request()
-                allowed = current_count <= rule.rate_limit.requests
-                remaining = max(0, rule.rate_limit.requests - current_count)
-                
-                return {
-                    'allowed': allowed,
-                    'remaining': remaining,
-                    'reset_time': time.time() + rule.rate_limit.window,
-                    'wait_time': 0 if allowed else rule.rate_limit.window,
-                    'limit': rule.rate_limit.requests,
-                    'window': rule.rate_limit.window,
-                    'current_count': current_count
-                }
-            
-            # Fallback return
-            return {
-                'allowed': True,
-                'remaining': rule.rate_limit.requests,
-                'reset_time': time.time() + rule.rate_limit.window,
-                'wait_time': 0,
-                'limit': rule.rate_limit.requests,
-                'window': rule.rate_limit.window
-            }
+    @property
+    def limiter(self) -> GCRALimiter:
+        return self._limiter if self._limiter is not None else get_gcra_limiter()
     
-    def _get_database_status(self, key: str, rule: RateLimitRule) -> Dict[str, Any]:
-        """Get rate limit status from database storage"""
+    def get_rate_limit_status(self, key: str, rule: RateLimitRule) -> Dict[str, Any]:
+        """Count a request for a key under a rule and return its rate limit status"""
+        rate_limit = rule.rate_limit
+        decision = self.limiter.check(key, rate_limit.requests, rate_limit.window, burst=rate_limit.burst,
+                                      scope=rule.name)
         
-        try:
-            key_hash = hashlib.sha256(f"{key}:{rule.name}".encode()).hexdigest()
-            now = int(time.time())
-            window_start = now - rule.rate_limit.window
-            
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT request_count, window_start, burst_used
-                    FROM rate_limits 
-                    WHERE key_hash = ? AND window_start > ?
-                """, (key_hash, window_start))
-                
-                result = cursor.fetchone()
-                
-            if result:
-                current_count, db_window_start, burst_used = result
-                
-                # Check if we need to reset the window
-                if now - db_window_start >= rule.rate_limit.window:
-                    current_count = 0
-                    burst_used = 0
-                    db_window_start = now
-            
-            else:
-                current_count = 0
-                burst_used = 0
-                db_window_start = now
-            
-            # Check rate limit
-            allowed = current_count < rule.rate_limit.requests
-            
-            # Check burst limit
-            if not allowed and rule.rate_limit.burst and burst_used < rule.rate_limit.burst:
-                allowed = True
-                burst_used += 1
-            
-            if allowed:
-                current_count += 1
-            
-            # Update database
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("""
-                    INSERT OR REPLACE INTO rate_limits 
-                    (key_hash, key_type, key_value, rule_name, request_count, 
-                     window_start, last_request, burst_used, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    key_hash, 'generic', key, rule.name, current_count,
-                    db_window_start, now, burst_used, datetime.utcnow()
-                ))
-                
-                conn.commit()
-            
-            remaining = max(0, rule.rate_limit.requests - current_count)
-            reset_time = db_window_start + rule.rate_limit.window
-            
-            return {
-                'allowed': allowed,
-                'remaining': remaining,
-                'reset_time': reset_time,
-                'wait_time': max(0, reset_time - now) if not allowed else 0,
-                'limit': rule.rate_limit.requests,
-                'window': rule.rate_limit.window,
-                'current_count': current_count,
-                'burst_used': burst_used
-            }
-                
-        except Exception as e:
-            logger.error(f"Database rate limit check failed: {e}")
-            # Fallback to allowing the request
-            return {
-                'allowed': True,
-                'remaining': rule.rate_limit.requests,
-                'reset_time': time.time() + rule.rate_limit.window,
-                'wait_time': 0,
-                'limit': rule.rate_limit.requests,
-                'window': rule.rate_limit.window
-            }
+        return {
+            'allowed': decision.allowed,
+            'remaining': decision.remaining,
+            'reset_time': time.time() + decision.reset_after,
+            'wait_time': decision.retry_after,
+            'limit': rate_limit.requests,
+            'window': rate_limit.window,
+            'current_count': rate_limit.requests - decision.remaining
+        }
 
 
 class AdvancedRateLimiter:
     """Advanced rate limiter with multiple strategies and rules"""
     
-    def __init__(self, storage_backend: str = "memory"):
+    def __init__(self, storage_backend: Optional[str] = None):
         self.rules: List[RateLimitRule] = []
         self.tracker = RateLimitTracker(storage_backend)
         self.global_stats = defaultdict(int)
@@ -570,7 +319,7 @@ def apply_rate_limit(key_func: Optional[Callable] = None,
                 })
                 
                 if info.get('retry_after'):
-                    response.headers['Retry-After'] = str(int(info['retry_after']))
+                    response.headers['Retry-After'] = str(math.ceil(info['retry_after']))
                 
                 return response, 429
             
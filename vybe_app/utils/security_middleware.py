@@ -7,9 +7,9 @@ from flask import request, redirect, url_for, g, jsonify, current_app
 from functools import wraps
 import re
 import ipaddress
-import unicodedata
 from urllib.parse import urlparse
 import time
+import math
 import json
 import logging
 import collections
@@ -23,6 +23,9 @@ import os
 from typing import Dict, Any, Optional, Tuple, List
 from datetime import datetime, timedelta
 
+from .threat_scanner import ThreatScanner, THREAT_PATTERNS, is_allowlisted_path
+from .gcra_limiter import get_gcra_limiter
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -30,23 +33,12 @@ logger = logging.getLogger(__name__)
 class ThreatDetector:
     """Advanced threat detection system"""
     
-    def __init__(self):
-        self.suspicious_patterns = [
-            # SQL Injection patterns
-            r"(?i)(union\s+select|or\s+1\s*=\s*1|drop\s+table|insert\s+into|delete\s+from)",
-            # XSS patterns
-            r"(?i)(<script|javascript:|vbscript:|onload\s*=|onerror\s*=|onclick\s*=)",
-            # Path traversal
-            r"(\.\./|\.\.\backslash|%2e%2e%2f|%2e%2e%5c)",
-            # Command injection
-            r"(?i)(;|\||\$\(|`|<\(|>\(|\|\||&&)",
-            # LDAP injection
-            r"(\*|\)|\(|\|\||&)",
-            # XXE patterns
-            r"(?i)(<!entity|<!doctype.*\[|%\w+;)",
-        ]
-        
-        self.compiled_patterns = [re.compile(pattern) for pattern in self.suspicious_patterns]
+    def __init__(self, cache_size: int = 4096):
+        # Patterns are compiled once into a scanner with a verdict cache
+        self.scanner = ThreatScanner(cache_size=cache_size)
+        self.suspicious_patterns = [('(?i)' if ignore_case else '') + pattern
+                                    for _, pattern, ignore_case in THREAT_PATTERNS]
+        self.compiled_patterns = self.scanner.patterns
         
         # Threat scoring thresholds
         self.threat_thresholds = {
@@ -66,43 +58,16 @@ class ThreatDetector:
         threat_score = 0
         detected_threats = []
         
-        # Analyze all request data
-        all_data = []
-        
-        # Add URL and query parameters
-        if request_data.get('url'):
-            all_data.append(request_data['url'])
-        if request_data.get('query_params'):
-            all_data.extend([str(v) for v in request_data['query_params'].values()])
-        
-        # Add form data
-        if request_data.get('form_data'):
-            all_data.extend([str(v) for v in request_data['form_data'].values()])
-        
-        # Add headers (check for suspicious values)
-        if request_data.get('headers'):
-            all_data.extend([str(v) for v in request_data['headers'].values()])
-        
-        # Check each data point against threat patterns
-        for data in all_data:
-            if isinstance(data, (str, bytes)):
-                data_str = str(data)
-                
-                # Normalize Unicode to prevent obfuscation attacks
-                normalized_data = unicodedata.normalize('NFKC', data_str)
-                
-                # Check both original and normalized data
-                for check_data in [data_str, normalized_data]:
-                    for i, pattern in enumerate(self.compiled_patterns):
-                        if pattern.search(check_data):
-                            threat_type = self._get_threat_type(i)
-                            threat_score += self._get_threat_score(threat_type)
-                            detected_threats.append({
-                                'type': threat_type,
-                                'pattern_index': i,
-                                'data_sample': check_data[:100],  # First 100 chars for analysis
-                                'normalized': check_data != data_str  # Flag if normalization changed the data
-                            })
+        # Scan URL, query parameters, form data and header values
+        for i, check_data, normalized in self.scanner.scan_request(request_data):
+            threat_type = self._get_threat_type(i)
+            threat_score += self._get_threat_score(threat_type)
+            detected_threats.append({
+                'type': threat_type,
+                'pattern_index': i,
+                'data_sample': check_data[:100],  # First 100 chars for analysis
+                'normalized': normalized  # Flag if normalization changed the data
+            })
         
         # Assess threat level
         threat_level = self._assess_threat_level(threat_score)
@@ -204,10 +169,11 @@ class SecurityMiddleware:
         from ..config import Config
         
         self.config = Config
+        self.threat_scan_skip_prefixes = tuple(Config.THREAT_SCAN_SKIP_PREFIXES)
+        self.threat_detector.scanner.cache_size = Config.THREAT_SCAN_CACHE_SIZE
         
         # Initialize global tracking variables
-        global _rate_limit_storage, _rate_limit_lock, _user_behavior_tracking
-        _rate_limit_storage = defaultdict(deque)
+        global _rate_limit_lock, _user_behavior_tracking
         _rate_limit_lock = threading.Lock()
         _user_behavior_tracking = defaultdict(lambda: {
             'first_seen': datetime.utcnow(),
@@ -293,6 +259,10 @@ class SecurityMiddleware:
                 'message': 'Your IP address has been temporarily blocked due to suspicious activity'
             }), 403
         
+        # Static assets are served from disk and never reach application code
+        if is_allowlisted_path(request.path, getattr(self, 'threat_scan_skip_prefixes', ())):
+            return
+        
         # Analyze current request for threats
         request_data = {
             'url': request.url,
@@ -784,19 +754,18 @@ def sanitize_input(f):
 Security middleware for rate limiting and other security features.
 """
 import time
-from collections import defaultdict, deque
+from collections import defaultdict
 from functools import wraps
 from flask import request, jsonify, g
 import threading
 import hashlib
 from typing import Dict, Any, Optional, Tuple
 
-# Global rate limiting storage with enhanced tracking
+# Global user behavior storage; request counting lives in the shared GCRA limiter
 class RateLimitStorage:
-    """Thread-safe rate limiting storage"""
+    """Thread-safe user behavior storage for adaptive rate limiting"""
     
     def __init__(self):
-        self._storage = defaultdict(lambda: deque())
         self._user_behavior = defaultdict(lambda: {
             'request_count': 0,
             'last_request_time': 0,
@@ -806,9 +775,6 @@ class RateLimitStorage:
         })
         self._lock = threading.Lock()
     
-    def get_storage(self):
-        return self._storage
-    
     def get_user_behavior(self):
         return self._user_behavior
     
@@ -986,43 +952,26 @@ def adaptive_rate_limit(endpoint_type: str = 'normal'):
             # Get adaptive limits for this user
             limits = adaptive_limiter.get_adaptive_limits(user_key, endpoint_type)
             
-            current_time = time.time()
-            storage = get_rate_limit_storage()
+            decision = get_gcra_limiter().check(user_key, limits['requests'], limits['window'],
+                                                scope=f"adaptive:{endpoint_type}")
             
-            with storage.get_lock():
-                # Clean old entries
-                while (storage.get_storage()[user_key] and 
-                       storage.get_storage()[user_key][0] < current_time - limits['window']):
-                    storage.get_storage()[user_key].popleft()
-                
-                # Check if limit exceeded
-                if len(storage.get_storage()[user_key]) >= limits['requests']:
-                    # Track this as suspicious behavior
-                    request_dict = {
-                        'method': request.method,
-                        'headers': dict(request.headers),
-                        'url': request.url
-                    }
-                    adaptive_limiter.track_user_behavior(user_key, request_dict)
-                    
-                    return jsonify({
-                        'success': False,
-                        'error': f'Rate limit exceeded. Maximum {limits["requests"]} requests per {limits["window"]} seconds.',
-                        'error_type': 'rate_limit_exceeded',
-                        'retry_after': limits['window']
-                    }), 429
-                
-                # Add current request
-                storage.get_storage()[user_key].append(current_time)
-                
-                # Track user behavior
-                request_dict = {
-                    'method': request.method,
-                    'headers': dict(request.headers),
-                    'url': request.url
-                }
+            # Track user behavior
+            request_dict = {
+                'method': request.method,
+                'headers': dict(request.headers),
+                'url': request.url
+            }
+            with get_rate_limit_storage().get_lock():
                 adaptive_limiter.track_user_behavior(user_key, request_dict)
             
+            if not decision.allowed:
+                return jsonify({
+                    'success': False,
+                    'error': f'Rate limit exceeded. Maximum {limits["requests"]} requests per {limits["window"]} seconds.',
+                    'error_type': 'rate_limit_exceeded',
+                    'retry_after': math.ceil(decision.retry_after)
+                }), 429
+            
             return f(*args, **kwargs)
         return decorated_function
     return decorator
@@ -1045,23 +994,14 @@ def rate_limit(max_requests=60, window_seconds=60, key_func=None):
             else:
                 key = request.remote_addr or 'unknown'
             
-            current_time = time.time()
-            
-            with _rate_limit_lock:
-                # Clean old entries
-                while _rate_limit_storage[key] and _rate_limit_storage[key][0] < current_time - window_seconds:
-                    _rate_limit_storage[key].popleft()
-                
-                # Check if limit exceeded
-                if len(_rate_limit_storage[key]) >= max_requests:
-                    return jsonify({
-                        'success': False,
-                        'error': f'Rate limit exceeded. Maximum {max_requests} requests per {window_seconds} seconds.',
-                        'error_type': 'rate_limit_exceeded'
-                    }), 429
-                
-                # Add current request
-                _rate_limit_storage[key].append(current_time)
+            decision = get_gcra_limiter().check(key, max_requests, window_seconds,
+                                                scope=f"legacy:{max_requests}/{window_seconds}")
+            if not decision.allowed:
+                return jsonify({
+                    'success': False,
+                    'error': f'Rate limit exceeded. Maximum {max_requests} requests per {window_seconds} seconds.',
+                    'error_type': 'rate_limit_exceeded'
+                }), 429
             
             return f(*args, **kwargs)
         return decorated_function
@@ -1090,16 +1030,10 @@ def admin_rate_limit():
 def cleanup_rate_limits():
     """Clean up old rate limit entries and user behavior data (call periodically)"""
     current_time = time.time()
+    # Drop rate limit keys that are back to a full burst
+    get_gcra_limiter().evict_idle()
+    
     with _rate_limit_lock:
-        # Clean rate limit storage
-        for key in list(_rate_limit_storage.keys()):
-            # Remove entries older than 1 hour
-            while _rate_limit_storage[key] and _rate_limit_storage[key][0] < current_time - 3600:
-                _rate_limit_storage[key].popleft()
-            # Remove empty keys
-            if not _rate_limit_storage[key]:
-                del _rate_limit_storage[key]
-        
         # Clean user behavior tracking (keep for 24 hours)
         for key in list(_user_behavior_tracking.keys()):
             behavior = _user_behavior_tracking[key]
@@ -1112,20 +1046,18 @@ def get_rate_limit_info(key=None):
     if key is None:
         key = adaptive_limiter.get_user_key(request)
     
+    current_time = time.time()
+    limits = adaptive_limiter.get_adaptive_limits(key, 'normal')
+    decision = get_gcra_limiter().peek(key, limits['requests'], limits['window'], scope='adaptive:normal')
+    
     with _rate_limit_lock:
-        current_time = time.time()
-        
-        # Get rate limit info
-        while _rate_limit_storage[key] and _rate_limit_storage[key][0] < current_time - 60:
-            _rate_limit_storage[key].popleft()
-        
         # Get user behavior info
         behavior = _user_behavior_tracking[key]
         trust_score = adaptive_limiter.calculate_trust_score(key)
         
         return {
-            'current_requests': len(_rate_limit_storage[key]),
-            'window_start': current_time - 60,
+            'current_requests': limits['requests'] - decision.remaining,
+            'window_start': current_time - limits['window'],
             'key': key,
             'trust_score': trust_score,
             'suspicious_activity': behavior['suspicious_activity'],
@@ -1144,5 +1076,5 @@ def reset_user_trust(user_key: str):
                 'blocked_until': 0,
                 'trust_score': 100
             }
-        if user_key in _rate_limit_storage:
-            _rate_limit_storage[user_key].clear()
+    for endpoint_type in adaptive_limiter.base_limits:
+        get_gcra_limiter().reset(user_key, scope=f"adaptive:{endpoint_type}")
@@ -0,0 +1,148 @@
+"""
+Threat Scanner for Vybe
+Pattern engine behind ThreatDetector (utils/security_middleware.py).
+
+    - All threat patterns are compiled once and searched one by one. They
+      are not joined into a single alternation: `re` loses each pattern's
+      literal-prefix and character-set optimizations inside an
+      alternation, which makes one pass over the union slower than six
+      separate searches.
+    - Plain-ASCII values skip NFKC normalization, which cannot change
+      them, and are matched lowered instead of with re.IGNORECASE.
+    - Verdicts are cached per value in a bounded LRU, so headers that repeat
+      on every request (User-Agent, Accept, Cookie) are scanned once.
+    - Findings are identical to scanning each pattern over the raw and the
+      normalized value separately, including for ASCII values, where both
+      passes see the same text.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (threat type, pattern, ignore case). Ignore-case patterns are written in
+# lower case: plain-ASCII text is lowered once and matched case-sensitively,
+# which is much faster than re.IGNORECASE and equivalent for ASCII.
+THREAT_PATTERNS: Tuple[Tuple[str, str, bool], ...] = (
+    ('sql_injection', r"union\s+select|or\s+1\s*=\s*1|drop\s+table|insert\s+into|delete\s+from", True),
+    ('xss', r"<script|javascript:|vbscript:|onload\s*=|onerror\s*=|onclick\s*=", True),
+    ('path_traversal', r"\.\./|\.\.\backslash|%2e%2e%2f|%2e%2e%5c", False),
+    ('command_injection', r";|\||\$\(|`|<\(|>\(|\|\||&&", False),
+    ('ldap_injection', r"\*|\)|\(|\|\||&", False),
+    ('xxe', r"<!entity|<!doctype.*\[|%\w+;", True),
+)
+
+# Texts checked for one value with the pattern indices each matched:
+# the raw value, then its NFKC form
+Verdict = Tuple[Tuple[str, Tuple[int, ...]], Tuple[str, Tuple[int, ...]]]
+
+
+class ThreatScanner:
+    """
+    Cached threat pattern matching.
+
+    Args:
+        patterns: (threat type, regex, ignore case)
+        cache_size: Number of value verdicts kept in the LRU
+        max_cached_length: Longer values are scanned but not cached
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, str, bool]] = THREAT_PATTERNS, cache_size: int = 4096,
+                 max_cached_length: int = 2048):
+        self.threat_types = [threat_type for threat_type, _, _ in patterns]
+        self.patterns = [re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+                         for _, pattern, ignore_case in patterns]
+        # ASCII path: (compiled pattern, match against lowered text) per pattern
+        self._ascii_patterns = [(re.compile(pattern), ignore_case) for _, pattern, ignore_case in patterns]
+        self.cache_size = cache_size
+        self.max_cached_length = max_cached_length
+        self._cache: "OrderedDict[str, Verdict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'values': 0, 'cache_hits': 0, 'ascii_fast_path': 0, 'normalized': 0,
+                       'flagged': 0}
+
+    def _match(self, text: str) -> Tuple[int, ...]:
+        """Indices of the patterns that occur in text"""
+        return tuple(i for i, pattern in enumerate(self.patterns) if pattern.search(text))
+
+    def _match_ascii(self, text: str) -> Tuple[int, ...]:
+        """_match for plain-ASCII text"""
+        lowered = text.lower()
+        return tuple(i for i, (pattern, ignore_case) in enumerate(self._ascii_patterns)
+                     if pattern.search(lowered if ignore_case else text))
+
+    def scan(self, value: str) -> Verdict:
+        """Verdict for one value, from the cache when it has been seen before"""
+        cacheable = len(value) <= self.max_cached_length
+        with self._lock:
+            self._stats['values'] += 1
+            if cacheable:
+                verdict = self._cache.get(value)
+                if verdict is not None:
+                    self._cache.move_to_end(value)
+                    self._stats['cache_hits'] += 1
+                    return verdict
+
+        if value.isascii():
+            raw = (value, self._match_ascii(value))
+            verdict = (raw, raw)
+            scan_path = 'ascii_fast_path'
+        else:
+            normalized = unicodedata.normalize('NFKC', value)
+            raw = (value, self._match(value))
+            verdict = (raw, raw if normalized == value else (normalized, self._match(normalized)))
+            scan_path = 'normalized'
+
+        with self._lock:
+            self._stats[scan_path] += 1
+            if verdict[0][1] or verdict[1][1]:
+                self._stats['flagged'] += 1
+            if cacheable:
+                self._cache[value] = verdict
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return verdict
+
+    def scan_request(self, request_data: Dict[str, Any]) -> List[Tuple[int, str, bool]]:
+        """
+        Scan the URL, query values, form values and header values of a
+        request. Returns (pattern index, matched text, normalized) findings.
+        """
+        values: List[Any] = []
+        if request_data.get('url'):
+            values.append(request_data['url'])
+        for key in ('query_params', 'form_data', 'headers'):
+            if request_data.get(key):
+                values.extend(request_data[key].values())
+
+        findings = []
+        for value in values:
+            verdict = self.scan(value if isinstance(value, str) else str(value))
+            raw_text = verdict[0][0]
+            for text, matches in verdict:
+                for index in matches:
+                    findings.append((index, text, text != raw_text))
+        return findings
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'cached_values': len(self._cache), 'cache_size': self.cache_size, **self._stats}
+
+
+def is_allowlisted_path(path: Optional[str], prefixes: Sequence[str]) -> bool:
+    """
+    True for static-asset paths that threat scanning can skip. Paths with a
+    parent-directory segment are never allowlisted.
+    """
+    if not path or '..' in path:
+        return False
+    return any(prefix and path.startswith(prefix) for prefix in prefixes)
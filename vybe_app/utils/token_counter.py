@@ -0,0 +1,216 @@
+"""
+Token Counting for Vybe
+Token accounting for context packing and context-window management.
+
+    - The active GGUF model's own tokenizer is loaded vocabulary-only
+      through llama-cpp-python (no weights, no server round-trip). Without
+      llama-cpp-python, or with Config.CONTEXT_TOKENIZER = 'approximate',
+      a fast BPE-compatible approximation is used instead.
+    - Counts are memoized per text in a bounded LRU. Keys are the strings
+      themselves: Python caches a string's hash on the object, so a growing
+      conversation only tokenizes its new messages.
+    - context_budget() turns the server's real context window into a prompt
+      budget, leaving room for the reply and a margin sized to how exact
+      the counter is.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_APPROX_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+class ApproximateTokenizer:
+    """
+    Fast tokenizer-free token estimate: each punctuation mark counts as one
+    token and each word as one token per ~4 characters, which tracks BPE
+    vocabularies closely for English text.
+    """
+
+    def count(self, text: str) -> int:
+        total = 0
+        for match in _APPROX_TOKEN.finditer(text):
+            length = match.end() - match.start()
+            total += 1 if length <= 4 else (length + 3) // 4
+        return total
+
+
+def make_token_counter(tokenizer: Any = None) -> Callable[[str], int]:
+    """
+    Adapt a tokenizer to a ``count(text) -> int`` callable.
+
+    Accepts objects exposing ``count``, ``encode`` (tiktoken / HF tokenizers) or
+    ``tokenize`` on bytes (llama-cpp), a plain callable, or None for the
+    approximate tokenizer.
+    """
+    if tokenizer is None:
+        return ApproximateTokenizer().count
+    if hasattr(tokenizer, 'count') and callable(tokenizer.count):
+        return tokenizer.count
+    if hasattr(tokenizer, 'encode'):
+        return lambda text: len(tokenizer.encode(text))
+    if hasattr(tokenizer, 'tokenize'):
+        return lambda text: len(tokenizer.tokenize(text.encode('utf-8'), add_bos=False))
+    if callable(tokenizer):
+        return tokenizer
+    raise TypeError(f"Unsupported tokenizer type: {type(tokenizer).__name__}")
+
+
+class TokenCounter:
+    """
+    Memoizing token counter.
+
+    Args:
+        tokenizer: Anything accepted by make_token_counter(); None for the approximation
+        cache_size: Distinct texts whose counts are kept
+        message_overhead: Tokens the chat template adds around each message (role markers)
+        name: Label reported in stats
+    """
+
+    def __init__(self, tokenizer: Any = None, cache_size: int = 8192, message_overhead: int = 4,
+                 name: Optional[str] = None):
+        self._count_text = make_token_counter(tokenizer)
+        self.exact = tokenizer is not None
+        self.name = name or ('approximate' if tokenizer is None else type(tokenizer).__name__)
+        self.cache_size = max(1, cache_size)
+        self.message_overhead = max(0, message_overhead)
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Native tokenizers are not documented as thread-safe
+        self._tokenize_lock = threading.Lock() if self.exact else None
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def count(self, text: str) -> int:
+        """Tokens in ``text`` (memoized)"""
+        if not text:
+            return 0
+        with self._lock:
+            tokens = self._cache.get(text)
+            if tokens is not None:
+                self._cache.move_to_end(text)
+                self._stats['hits'] += 1
+                return tokens
+            self._stats['misses'] += 1
+        if self._tokenize_lock is not None:
+            with self._tokenize_lock:
+                tokens = self._count_text(text)
+        else:
+            tokens = self._count_text(text)
+        with self._lock:
+            self._cache[text] = tokens
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def count_message(self, message: Any) -> int:
+        """Tokens of one chat message including template overhead"""
+        if isinstance(message, dict):
+            content = message.get('content') or ''
+            if not isinstance(content, str):
+                content = str(content)
+        else:
+            content = str(message)
+        return self.count(content) + self.message_overhead
+
+    def count_messages(self, messages: Iterable[Any]) -> int:
+        return sum(self.count_message(message) for message in messages)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'tokenizer': self.name,
+                'exact': self.exact,
+                'cached_texts': len(self._cache),
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0.0
+            }
+
+
+def load_model_tokenizer(model_path: str) -> Optional[Any]:
+    """The GGUF model's tokenizer (vocabulary only), or None without llama-cpp-python"""
+    try:
+        from llama_cpp import Llama
+    except ImportError:
+        return None
+    try:
+        return Llama(model_path=model_path, vocab_only=True, verbose=False)
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer from {model_path}: {e}")
+        return None
+
+
+def _active_model_path() -> Optional[str]:
+    try:
+        from ..core.backend_llm_controller import get_backend_controller
+        return get_backend_controller().model_path
+    except Exception:
+        return None
+
+
+def _tokenizer_mode() -> str:
+    try:
+        from ..config import Config
+        return str(getattr(Config, 'CONTEXT_TOKENIZER', 'model')).lower()
+    except Exception:
+        return 'model'
+
+
+_token_counters: Dict[Optional[str], TokenCounter] = {}
+_token_counters_lock = threading.Lock()
+
+
+def get_token_counter(model_path: Optional[str] = None) -> TokenCounter:
+    """
+    Shared counter for ``model_path`` (default: the active backend model).
+    Falls back to the approximation when the tokenizer cannot be loaded.
+    """
+    if _tokenizer_mode() != 'model':
+        model_path = None
+    elif model_path is None:
+        model_path = _active_model_path()
+    counter = _token_counters.get(model_path)
+    if counter is None:
+        with _token_counters_lock:
+            counter = _token_counters.get(model_path)
+            if counter is None:
+                tokenizer = load_model_tokenizer(model_path) if model_path else None
+                if tokenizer is not None:
+                    counter = TokenCounter(tokenizer, name=os.path.basename(model_path))
+                    logger.info(f"Context packing uses the tokenizer of {counter.name}")
+                else:
+                    counter = _token_counters.get(None) or TokenCounter()
+                    _token_counters[None] = counter
+                _token_counters[model_path] = counter
+    return counter
+
+
+def context_window() -> int:
+    """Context size (tokens) the local server is started with"""
+    try:
+        from ..core.backend_llm_controller import get_backend_controller
+        return int(get_backend_controller().n_ctx)
+    except Exception:
+        try:
+            from ..config import Config
+            return int(getattr(Config, 'REQUIRED_MIN_CONTEXT_TOKENS', 32768))
+        except Exception:
+            return 32768
+
+
+def context_budget(reply_tokens: int, counter: Optional[TokenCounter] = None,
+                   n_ctx: Optional[int] = None) -> int:
+    """
+    Prompt tokens that fit next to a ``reply_tokens`` reply. Exact counters
+    keep a 2% margin for template tokens; the approximation keeps 10%.
+    """
+    counter = counter or get_token_counter()
+    n_ctx = n_ctx or context_window()
+    margin = 0.02 if counter.exact else 0.10
+    return max(0, int(n_ctx * (1 - margin)) - max(0, reply_tokens))